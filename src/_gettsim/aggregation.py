@@ -1,6 +1,9 @@
+from _gettsim import config
 from _gettsim.aggregation_jax import all_by_p_id as all_by_p_id_jax
 from _gettsim.aggregation_jax import any_by_p_id as any_by_p_id_jax
 from _gettsim.aggregation_jax import count_by_p_id as count_by_p_id_jax
+from _gettsim.aggregation_jax import create_group_index as create_group_index_jax
+from _gettsim.aggregation_jax import dense_group_id as dense_group_id_jax
 from _gettsim.aggregation_jax import grouped_all as grouped_all_jax
 from _gettsim.aggregation_jax import grouped_any as grouped_any_jax
 from _gettsim.aggregation_jax import grouped_count as grouped_count_jax
@@ -12,9 +15,25 @@ from _gettsim.aggregation_jax import max_by_p_id as max_by_p_id_jax
 from _gettsim.aggregation_jax import mean_by_p_id as mean_by_p_id_jax
 from _gettsim.aggregation_jax import min_by_p_id as min_by_p_id_jax
 from _gettsim.aggregation_jax import sum_by_p_id as sum_by_p_id_jax
+from _gettsim.aggregation_numba import all_by_p_id as all_by_p_id_numba
+from _gettsim.aggregation_numba import any_by_p_id as any_by_p_id_numba
+from _gettsim.aggregation_numba import grouped_all as grouped_all_numba
+from _gettsim.aggregation_numba import grouped_any as grouped_any_numba
+from _gettsim.aggregation_numba import grouped_max as grouped_max_numba
+from _gettsim.aggregation_numba import grouped_mean as grouped_mean_numba
+from _gettsim.aggregation_numba import grouped_min as grouped_min_numba
+from _gettsim.aggregation_numba import grouped_sum as grouped_sum_numba
+from _gettsim.aggregation_numba import max_by_p_id as max_by_p_id_numba
+from _gettsim.aggregation_numba import mean_by_p_id as mean_by_p_id_numba
+from _gettsim.aggregation_numba import min_by_p_id as min_by_p_id_numba
+from _gettsim.aggregation_numba import sum_by_p_id as sum_by_p_id_numba
 from _gettsim.aggregation_numpy import all_by_p_id as all_by_p_id_numpy
 from _gettsim.aggregation_numpy import any_by_p_id as any_by_p_id_numpy
 from _gettsim.aggregation_numpy import count_by_p_id as count_by_p_id_numpy
+from _gettsim.aggregation_numpy import (
+    create_group_index as create_group_index_numpy,
+)
+from _gettsim.aggregation_numpy import dense_group_id as dense_group_id_numpy
 from _gettsim.aggregation_numpy import grouped_all as grouped_all_numpy
 from _gettsim.aggregation_numpy import grouped_any as grouped_any_numpy
 from _gettsim.aggregation_numpy import grouped_count as grouped_count_numpy
@@ -26,102 +45,139 @@ from _gettsim.aggregation_numpy import max_by_p_id as max_by_p_id_numpy
 from _gettsim.aggregation_numpy import mean_by_p_id as mean_by_p_id_numpy
 from _gettsim.aggregation_numpy import min_by_p_id as min_by_p_id_numpy
 from _gettsim.aggregation_numpy import sum_by_p_id as sum_by_p_id_numpy
-from _gettsim.config import USE_JAX
+
+
+def create_group_index(group_id):
+    if config.USE_JAX:
+        return create_group_index_jax(group_id)
+    else:
+        return create_group_index_numpy(group_id)
+
+
+def dense_group_id(group_id):
+    if config.USE_JAX:
+        return dense_group_id_jax(group_id)
+    else:
+        return dense_group_id_numpy(group_id)
 
 
 def grouped_count(group_id):
-    if USE_JAX:
+    if config.USE_JAX:
         return grouped_count_jax(group_id)
     else:
         return grouped_count_numpy(group_id)
 
 
 def grouped_sum(column, group_id):
-    if USE_JAX:
+    if config.USE_JAX:
         return grouped_sum_jax(column, group_id)
+    elif config.USE_NUMBA:
+        return grouped_sum_numba(column, group_id)
     else:
         return grouped_sum_numpy(column, group_id)
 
 
 def grouped_mean(column, group_id):
-    if USE_JAX:
+    if config.USE_JAX:
         return grouped_mean_jax(column, group_id)
+    elif config.USE_NUMBA:
+        return grouped_mean_numba(column, group_id)
     else:
         return grouped_mean_numpy(column, group_id)
 
 
 def grouped_max(column, group_id):
-    if USE_JAX:
+    if config.USE_JAX:
         return grouped_max_jax(column, group_id)
+    elif config.USE_NUMBA:
+        return grouped_max_numba(column, group_id)
     else:
         return grouped_max_numpy(column, group_id)
 
 
 def grouped_min(column, group_id):
-    if USE_JAX:
+    if config.USE_JAX:
         return grouped_min_jax(column, group_id)
+    elif config.USE_NUMBA:
+        return grouped_min_numba(column, group_id)
     else:
         return grouped_min_numpy(column, group_id)
 
 
 def grouped_any(column, group_id):
-    if USE_JAX:
+    if config.USE_JAX:
         return grouped_any_jax(column, group_id)
+    elif config.USE_NUMBA:
+        return grouped_any_numba(column, group_id)
     else:
         return grouped_any_numpy(column, group_id)
 
 
 def grouped_all(column, group_id):
-    if USE_JAX:
+    if config.USE_JAX:
         return grouped_all_jax(column, group_id)
+    elif config.USE_NUMBA:
+        return grouped_all_numba(column, group_id)
     else:
         return grouped_all_numpy(column, group_id)
 
 
 def count_by_p_id(p_id_to_aggregate_by, p_id_to_store_by):
-    if USE_JAX:
+    if config.USE_JAX:
         return count_by_p_id_jax(p_id_to_aggregate_by, p_id_to_store_by)
     else:
         return count_by_p_id_numpy(p_id_to_aggregate_by, p_id_to_store_by)
 
 
 def sum_by_p_id(column, p_id_to_aggregate_by, p_id_to_store_by):
-    if USE_JAX:
+    if config.USE_JAX:
         return sum_by_p_id_jax(column, p_id_to_aggregate_by, p_id_to_store_by)
+    elif config.USE_NUMBA:
+        return sum_by_p_id_numba(column, p_id_to_aggregate_by, p_id_to_store_by)
     else:
         return sum_by_p_id_numpy(column, p_id_to_aggregate_by, p_id_to_store_by)
 
 
 def mean_by_p_id(column, p_id_to_aggregate_by, p_id_to_store_by):
-    if USE_JAX:
+    if config.USE_JAX:
         return mean_by_p_id_jax(column, p_id_to_aggregate_by, p_id_to_store_by)
+    elif config.USE_NUMBA:
+        return mean_by_p_id_numba(column, p_id_to_aggregate_by, p_id_to_store_by)
     else:
         return mean_by_p_id_numpy(column, p_id_to_aggregate_by, p_id_to_store_by)
 
 
 def max_by_p_id(column, p_id_to_aggregate_by, p_id_to_store_by):
-    if USE_JAX:
+    if config.USE_JAX:
         return max_by_p_id_jax(column, p_id_to_aggregate_by, p_id_to_store_by)
+    elif config.USE_NUMBA:
+        return max_by_p_id_numba(column, p_id_to_aggregate_by, p_id_to_store_by)
     else:
         return max_by_p_id_numpy(column, p_id_to_aggregate_by, p_id_to_store_by)
 
 
 def min_by_p_id(column, p_id_to_aggregate_by, p_id_to_store_by):
-    if USE_JAX:
+    if config.USE_JAX:
         return min_by_p_id_jax(column, p_id_to_aggregate_by, p_id_to_store_by)
+    elif config.USE_NUMBA:
+        return min_by_p_id_numba(column, p_id_to_aggregate_by, p_id_to_store_by)
     else:
         return min_by_p_id_numpy(column, p_id_to_aggregate_by, p_id_to_store_by)
 
 
 def any_by_p_id(column, p_id_to_aggregate_by, p_id_to_store_by):
-    if USE_JAX:
+    if config.USE_JAX:
         return any_by_p_id_jax(column, p_id_to_aggregate_by, p_id_to_store_by)
+    elif config.USE_NUMBA:
+        return any_by_p_id_numba(column, p_id_to_aggregate_by, p_id_to_store_by)
     else:
         return any_by_p_id_numpy(column, p_id_to_aggregate_by, p_id_to_store_by)
 
 
 def all_by_p_id(column, p_id_to_aggregate_by, p_id_to_store_by):
-    if USE_JAX:
+    if config.USE_JAX:
         return all_by_p_id_jax(column, p_id_to_aggregate_by, p_id_to_store_by)
+    elif config.USE_NUMBA:
+        return all_by_p_id_numba(column, p_id_to_aggregate_by, p_id_to_store_by)
     else:
         return all_by_p_id_numpy(column, p_id_to_aggregate_by, p_id_to_store_by)
@@ -5,6 +5,7 @@ from _gettsim.aggregation_numpy import (
     fail_if_dtype_not_numeric_or_boolean,
     fail_if_dtype_not_numeric_or_datetime,
 )
+from _gettsim.shared import is_traced_by_jax, join_jax
 
 try:
     import jax.numpy as jnp
@@ -13,84 +14,150 @@ except ImportError:
     pass
 
 
+class GroupIndex:
+    """Index of the groups on one grouping level.
+
+    JAX version of :class:`_gettsim.aggregation_numpy.GroupIndex`. Aggregations are
+    segment reductions over the column sorted by group.
+
+    The number of groups is not known while the group ids are traced by `jax.jit`. In
+    this case, the number of rows is used as the static number of segments. It is an
+    upper bound of the number of groups and the segments of the missing groups are
+    empty.
+
+    """
+
+    def __init__(self, group_id):
+        self.codes = dense_group_id(group_id)
+        if is_traced_by_jax(self.codes):
+            n_segments = len(self.codes)
+        else:
+            n_segments = int(self.codes.max(initial=-1)) + 1
+        self.sizes = jnp.bincount(self.codes, length=n_segments)
+        self.order = jnp.argsort(self.codes, stable=True)
+        self.offsets = jnp.cumsum(self.sizes) - self.sizes
+
+    @property
+    def n_groups(self):
+        return len(self.sizes)
+
+    @property
+    def nbytes(self):
+        return sum(a.nbytes for a in (self.codes, self.sizes, self.order, self.offsets))
+
+    def reduce(self, column, segment_func):
+        """Reduce the column within each group with a `jax.ops.segment_*` function."""
+        return segment_func(
+            jnp.asarray(column)[self.order],
+            self.codes[self.order],
+            num_segments=self.n_groups,
+            indices_are_sorted=True,
+        )
+
+    def expand(self, out_on_group):
+        """Expand the results of the groups to the individual level."""
+        return jnp.asarray(out_on_group)[self.codes]
+
+
+def create_group_index(group_id):
+    return GroupIndex(group_id)
+
+
+def dense_group_id(group_id):
+    fail_if_dtype_not_int(group_id, agg_func="dense_group_id")
+
+    # Renumber the groups to 0, ..., n_groups - 1, so that the outputs of aggregations
+    # have the length of the number of groups instead of the maximum group id
+    if is_traced_by_jax(group_id):
+        _, out = jnp.unique(group_id, return_inverse=True, size=len(group_id))
+    else:
+        _, out = jnp.unique(group_id, return_inverse=True)
+    return out.reshape(-1)
+
+
 def grouped_count(group_id):
-    fail_if_dtype_not_int(group_id, agg_func="grouped_count")
-    out_on_hh = segment_sum(jnp.ones(len(group_id)), group_id)
-    out = out_on_hh[group_id]
-    return out
+    group_index = _get_group_index(group_id, agg_func="grouped_count")
+
+    return group_index.expand(group_index.sizes)
 
 
 def grouped_sum(column, group_id):
-    fail_if_dtype_not_int(group_id, agg_func="grouped_sum")
+    group_index = _get_group_index(group_id, agg_func="grouped_sum")
     fail_if_dtype_not_numeric_or_boolean(column, agg_func="grouped_sum")
     if column.dtype in ["bool"]:
         column = column.astype(int)
 
-    out_on_hh = segment_sum(column, group_id)
-    out = out_on_hh[group_id]
-    return out
+    out_on_hh = group_index.reduce(column, segment_sum)
+    return group_index.expand(out_on_hh)
 
 
 def grouped_mean(column, group_id):
-    fail_if_dtype_not_int(group_id, agg_func="grouped_mean")
+    group_index = _get_group_index(group_id, agg_func="grouped_mean")
     fail_if_dtype_not_float(column, agg_func="grouped_mean")
-    sum_on_hh = segment_sum(column, group_id)
-    sizes = segment_sum(jnp.ones(len(column)), group_id)
-    mean_on_hh = sum_on_hh / sizes
-    out = mean_on_hh[group_id]
-    return out
+
+    out_on_hh = group_index.reduce(column, segment_sum) / group_index.sizes
+    return group_index.expand(out_on_hh)
 
 
 def grouped_max(column, group_id):
-    fail_if_dtype_not_int(group_id, agg_func="grouped_max")
+    group_index = _get_group_index(group_id, agg_func="grouped_max")
     fail_if_dtype_not_numeric_or_datetime(column, agg_func="grouped_max")
 
-    out_on_hh = segment_max(column, group_id)
-    out = out_on_hh[group_id]
-    return out
+    out_on_hh = group_index.reduce(column, segment_max)
+    return group_index.expand(out_on_hh)
 
 
 def grouped_min(column, group_id):
-    fail_if_dtype_not_int(group_id, agg_func="grouped_min")
+    group_index = _get_group_index(group_id, agg_func="grouped_min")
     fail_if_dtype_not_numeric_or_datetime(column, agg_func="grouped_min")
-    out_on_hh = segment_min(column, group_id)
-    out = out_on_hh[group_id]
-    return out
+
+    out_on_hh = group_index.reduce(column, segment_min)
+    return group_index.expand(out_on_hh)
 
 
 def grouped_any(column, group_id):
-    fail_if_dtype_not_int(group_id, agg_func="grouped_any")
+    group_index = _get_group_index(group_id, agg_func="grouped_any")
     fail_if_dtype_not_boolean_or_int(column, agg_func="grouped_any")
 
     # Convert to boolean if necessary
     if jnp.issubdtype(column.dtype, jnp.integer):
-        my_col = column.astype("bool")
-    else:
-        my_col = column
+        column = column.astype("bool")
 
-    out_on_hh = segment_max(my_col, group_id)
-    out = out_on_hh[group_id]
-    return out
+    out_on_hh = group_index.reduce(column, segment_max)
+    return group_index.expand(out_on_hh)
 
 
 def grouped_all(column, group_id):
-    fail_if_dtype_not_int(group_id, agg_func="grouped_all")
+    group_index = _get_group_index(group_id, agg_func="grouped_all")
     fail_if_dtype_not_boolean_or_int(column, agg_func="grouped_all")
 
     # Convert to boolean if necessary
     if jnp.issubdtype(column.dtype, jnp.integer):
         column = column.astype("bool")
 
-    out_on_hh = segment_min(column, group_id)
-    out = out_on_hh[group_id]
-    return out
+    out_on_hh = group_index.reduce(column, segment_min)
+    return group_index.expand(out_on_hh)
+
+
+def _get_group_index(group_id, agg_func):
+    """Return the group index, creating it from the group ids if necessary."""
+    if isinstance(group_id, GroupIndex):
+        return group_id
+
+    fail_if_dtype_not_int(group_id, agg_func=agg_func)
+    return GroupIndex(group_id)
 
 
 def count_by_p_id(p_id_to_aggregate_by, p_id_to_store_by):
     fail_if_dtype_not_int(p_id_to_aggregate_by, agg_func="count_by_p_id")
     fail_if_dtype_not_int(p_id_to_store_by, agg_func="count_by_p_id")
 
-    raise NotImplementedError
+    rows = _rows_to_aggregate_by(p_id_to_aggregate_by, p_id_to_store_by)
+    return segment_sum(
+        jnp.ones(len(p_id_to_aggregate_by), dtype=int),
+        rows,
+        num_segments=len(p_id_to_store_by),
+    )
 
 
 def sum_by_p_id(column, p_id_to_aggregate_by, p_id_to_store_by):
@@ -100,46 +167,89 @@ def sum_by_p_id(column, p_id_to_aggregate_by, p_id_to_store_by):
 
     if column.dtype in ["bool"]:
         column = column.astype(int)
-    out = jnp.zeros_like(p_id_to_store_by, dtype=column.dtype)
-
-    map_p_id_to_position = {p_id: iloc for iloc, p_id in enumerate(p_id_to_store_by)}
 
-    for iloc, id_receiver in enumerate(p_id_to_aggregate_by):
-        if id_receiver >= 0:
-            out = out.at[map_p_id_to_position[id_receiver]].add(column[iloc])
-    return out
+    rows = _rows_to_aggregate_by(p_id_to_aggregate_by, p_id_to_store_by)
+    return segment_sum(column, rows, num_segments=len(p_id_to_store_by))
 
 
 def mean_by_p_id(column, p_id_to_aggregate_by, p_id_to_store_by):
     fail_if_dtype_not_int(p_id_to_aggregate_by, agg_func="mean_by_p_id")
     fail_if_dtype_not_int(p_id_to_store_by, agg_func="mean_by_p_id")
     fail_if_dtype_not_float(column, agg_func="mean_by_p_id")
-    raise NotImplementedError
+
+    rows = _rows_to_aggregate_by(p_id_to_aggregate_by, p_id_to_store_by)
+    sums = segment_sum(column, rows, num_segments=len(p_id_to_store_by))
+    sizes = segment_sum(jnp.ones(len(column)), rows, num_segments=len(p_id_to_store_by))
+    return jnp.where(sizes > 0, sums / jnp.maximum(sizes, 1), 0)
 
 
 def max_by_p_id(column, p_id_to_aggregate_by, p_id_to_store_by):
     fail_if_dtype_not_int(p_id_to_aggregate_by, agg_func="max_by_p_id")
     fail_if_dtype_not_int(p_id_to_store_by, agg_func="max_by_p_id")
     fail_if_dtype_not_numeric_or_datetime(column, agg_func="max_by_p_id")
-    raise NotImplementedError
+
+    rows = _rows_to_aggregate_by(p_id_to_aggregate_by, p_id_to_store_by)
+    out = segment_max(column, rows, num_segments=len(p_id_to_store_by))
+    return _fill_if_nothing_aggregated(out, rows, fill_value=0)
 
 
 def min_by_p_id(column, p_id_to_aggregate_by, p_id_to_store_by):
     fail_if_dtype_not_int(p_id_to_aggregate_by, agg_func="min_by_p_id")
     fail_if_dtype_not_int(p_id_to_store_by, agg_func="min_by_p_id")
     fail_if_dtype_not_numeric_or_datetime(column, agg_func="min_by_p_id")
-    raise NotImplementedError
+
+    rows = _rows_to_aggregate_by(p_id_to_aggregate_by, p_id_to_store_by)
+    out = segment_min(column, rows, num_segments=len(p_id_to_store_by))
+    return _fill_if_nothing_aggregated(out, rows, fill_value=0)
 
 
 def any_by_p_id(column, p_id_to_aggregate_by, p_id_to_store_by):
     fail_if_dtype_not_int(p_id_to_aggregate_by, agg_func="any_by_p_id")
     fail_if_dtype_not_int(p_id_to_store_by, agg_func="any_by_p_id")
     fail_if_dtype_not_boolean_or_int(column, agg_func="any_by_p_id")
-    raise NotImplementedError
+
+    # Convert to boolean if necessary
+    if jnp.issubdtype(column.dtype, jnp.integer):
+        column = column.astype("bool")
+
+    rows = _rows_to_aggregate_by(p_id_to_aggregate_by, p_id_to_store_by)
+    out = segment_max(column, rows, num_segments=len(p_id_to_store_by))
+    return _fill_if_nothing_aggregated(out, rows, fill_value=False)
 
 
 def all_by_p_id(column, p_id_to_aggregate_by, p_id_to_store_by):
     fail_if_dtype_not_int(p_id_to_store_by, agg_func="all_by_p_id")
     fail_if_dtype_not_int(p_id_to_aggregate_by, agg_func="all_by_p_id")
     fail_if_dtype_not_boolean_or_int(column, agg_func="all_by_p_id")
-    raise NotImplementedError
+
+    # Convert to boolean if necessary
+    if jnp.issubdtype(column.dtype, jnp.integer):
+        column = column.astype("bool")
+
+    rows = _rows_to_aggregate_by(p_id_to_aggregate_by, p_id_to_store_by)
+    out = segment_min(column, rows, num_segments=len(p_id_to_store_by))
+    return _fill_if_nothing_aggregated(out, rows, fill_value=True)
+
+
+def _fill_if_nothing_aggregated(out, rows, fill_value):
+    """Set the result of persons to whom no row is aggregated to `fill_value`."""
+    sizes = segment_sum(jnp.ones(len(rows), dtype=int), rows, num_segments=len(out))
+    return jnp.where(sizes > 0, out, fill_value)
+
+
+def _rows_to_aggregate_by(p_id_to_aggregate_by, p_id_to_store_by):
+    """Map the p_ids to aggregate by to the rows of `p_id_to_store_by`.
+
+    Negative p_ids are mapped to `len(p_id_to_store_by)`, which is out of bounds and,
+    hence, dropped by the segment reductions.
+
+    """
+    rows = join_jax(
+        p_id_to_aggregate_by,
+        p_id_to_store_by,
+        jnp.arange(len(p_id_to_store_by)),
+        value_if_foreign_key_is_missing=len(p_id_to_store_by),
+    )
+    return jnp.where(
+        jnp.asarray(p_id_to_aggregate_by) >= 0, rows, len(p_id_to_store_by)
+    )
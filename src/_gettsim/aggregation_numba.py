@@ -0,0 +1,222 @@
+import contextlib
+import functools
+
+import numpy
+
+from _gettsim import aggregation_numpy
+from _gettsim.aggregation_numpy import (
+    _get_group_index,
+    _rows_to_aggregate_by,
+    fail_if_dtype_not_boolean_or_int,
+    fail_if_dtype_not_float,
+    fail_if_dtype_not_int,
+    fail_if_dtype_not_numeric_or_boolean,
+    fail_if_dtype_not_numeric_or_datetime,
+)
+
+with contextlib.suppress(ImportError):
+    import numba
+
+
+def grouped_sum(column, group_id):
+    group_index = _get_group_index(group_id, agg_func="grouped_sum")
+    fail_if_dtype_not_numeric_or_boolean(column, agg_func="grouped_sum")
+    if column.dtype == bool:
+        column = column.astype(int)
+
+    out_on_hh = _jit(_sum_by_row)(
+        column, group_index.codes, group_index.n_groups, column.dtype.type(0)
+    )
+
+    # Expand to individual level
+    return group_index.expand(out_on_hh)
+
+
+def grouped_mean(column, group_id):
+    group_index = _get_group_index(group_id, agg_func="grouped_mean")
+    fail_if_dtype_not_float(column, agg_func="grouped_mean")
+
+    out_on_hh = (
+        _jit(_sum_by_row)(
+            column, group_index.codes, group_index.n_groups, column.dtype.type(0)
+        )
+        / group_index.sizes
+    )
+
+    # Expand to individual level
+    return group_index.expand(out_on_hh)
+
+
+def grouped_max(column, group_id):
+    if numpy.issubdtype(column.dtype, numpy.datetime64):
+        return aggregation_numpy.grouped_max(column, group_id)
+
+    group_index = _get_group_index(group_id, agg_func="grouped_max")
+    fail_if_dtype_not_numeric_or_datetime(column, agg_func="grouped_max")
+
+    out_on_hh = _jit(_max_by_row)(
+        column, group_index.codes, group_index.n_groups, column.dtype.type(0)
+    )
+
+    # Expand to individual level
+    return group_index.expand(out_on_hh)
+
+
+def grouped_min(column, group_id):
+    if numpy.issubdtype(column.dtype, numpy.datetime64):
+        return aggregation_numpy.grouped_min(column, group_id)
+
+    group_index = _get_group_index(group_id, agg_func="grouped_min")
+    fail_if_dtype_not_numeric_or_datetime(column, agg_func="grouped_min")
+
+    out_on_hh = _jit(_min_by_row)(
+        column, group_index.codes, group_index.n_groups, column.dtype.type(0)
+    )
+
+    # Expand to individual level
+    return group_index.expand(out_on_hh)
+
+
+def grouped_any(column, group_id):
+    group_index = _get_group_index(group_id, agg_func="grouped_any")
+    fail_if_dtype_not_boolean_or_int(column, agg_func="grouped_any")
+
+    out_on_hh = _jit(_any_by_row)(column, group_index.codes, group_index.n_groups)
+
+    # Expand to individual level
+    return group_index.expand(out_on_hh)
+
+
+def grouped_all(column, group_id):
+    group_index = _get_group_index(group_id, agg_func="grouped_all")
+    fail_if_dtype_not_boolean_or_int(column, agg_func="grouped_all")
+
+    out_on_hh = _jit(_all_by_row)(column, group_index.codes, group_index.n_groups)
+
+    # Expand to individual level
+    return group_index.expand(out_on_hh)
+
+
+def sum_by_p_id(column, p_id_to_aggregate_by, p_id_to_store_by):
+    fail_if_dtype_not_int(p_id_to_aggregate_by, agg_func="sum_by_p_id")
+    fail_if_dtype_not_int(p_id_to_store_by, agg_func="sum_by_p_id")
+    fail_if_dtype_not_numeric_or_boolean(column, agg_func="sum_by_p_id")
+
+    if column.dtype in ["bool"]:
+        column = column.astype(int)
+
+    rows = _rows_to_aggregate_by(p_id_to_aggregate_by, p_id_to_store_by)
+    return _jit(_sum_by_row)(column, rows, len(p_id_to_store_by), column.dtype.type(0))
+
+
+def mean_by_p_id(column, p_id_to_aggregate_by, p_id_to_store_by):
+    fail_if_dtype_not_int(p_id_to_aggregate_by, agg_func="mean_by_p_id")
+    fail_if_dtype_not_int(p_id_to_store_by, agg_func="mean_by_p_id")
+    fail_if_dtype_not_float(column, agg_func="mean_by_p_id")
+
+    rows = _rows_to_aggregate_by(p_id_to_aggregate_by, p_id_to_store_by)
+    out = _jit(_sum_by_row)(column, rows, len(p_id_to_store_by), column.dtype.type(0))
+    count = numpy.bincount(rows[rows >= 0], minlength=len(p_id_to_store_by))
+    return numpy.divide(out, count, out=out, where=count > 0)
+
+
+def max_by_p_id(column, p_id_to_aggregate_by, p_id_to_store_by):
+    if numpy.issubdtype(column.dtype, numpy.datetime64):
+        return aggregation_numpy.max_by_p_id(
+            column, p_id_to_aggregate_by, p_id_to_store_by
+        )
+
+    fail_if_dtype_not_int(p_id_to_aggregate_by, agg_func="max_by_p_id")
+    fail_if_dtype_not_int(p_id_to_store_by, agg_func="max_by_p_id")
+    fail_if_dtype_not_numeric_or_datetime(column, agg_func="max_by_p_id")
+
+    rows = _rows_to_aggregate_by(p_id_to_aggregate_by, p_id_to_store_by)
+    return _jit(_max_by_row)(column, rows, len(p_id_to_store_by), column.dtype.type(0))
+
+
+def min_by_p_id(column, p_id_to_aggregate_by, p_id_to_store_by):
+    if numpy.issubdtype(column.dtype, numpy.datetime64):
+        return aggregation_numpy.min_by_p_id(
+            column, p_id_to_aggregate_by, p_id_to_store_by
+        )
+
+    fail_if_dtype_not_int(p_id_to_aggregate_by, agg_func="min_by_p_id")
+    fail_if_dtype_not_int(p_id_to_store_by, agg_func="min_by_p_id")
+    fail_if_dtype_not_numeric_or_datetime(column, agg_func="min_by_p_id")
+
+    rows = _rows_to_aggregate_by(p_id_to_aggregate_by, p_id_to_store_by)
+    return _jit(_min_by_row)(column, rows, len(p_id_to_store_by), column.dtype.type(0))
+
+
+def any_by_p_id(column, p_id_to_aggregate_by, p_id_to_store_by):
+    fail_if_dtype_not_int(p_id_to_aggregate_by, agg_func="any_by_p_id")
+    fail_if_dtype_not_int(p_id_to_store_by, agg_func="any_by_p_id")
+    fail_if_dtype_not_boolean_or_int(column, agg_func="any_by_p_id")
+
+    rows = _rows_to_aggregate_by(p_id_to_aggregate_by, p_id_to_store_by)
+    return _jit(_any_by_row)(column, rows, len(p_id_to_store_by))
+
+
+def all_by_p_id(column, p_id_to_aggregate_by, p_id_to_store_by):
+    fail_if_dtype_not_int(p_id_to_store_by, agg_func="all_by_p_id")
+    fail_if_dtype_not_int(p_id_to_aggregate_by, agg_func="all_by_p_id")
+    fail_if_dtype_not_boolean_or_int(column, agg_func="all_by_p_id")
+
+    rows = _rows_to_aggregate_by(p_id_to_aggregate_by, p_id_to_store_by)
+    return _jit(_all_by_row)(column, rows, len(p_id_to_store_by))
+
+
+@functools.cache
+def _jit(func):
+    """Compile a kernel with numba when it is used the first time."""
+    return numba.njit(func)
+
+
+# The kernels below aggregate the column to the rows in `rows` in one pass. Negative
+# rows are skipped and rows without values receive `fill_value`.
+
+
+def _sum_by_row(column, rows, n_rows, fill_value):
+    out = numpy.full(n_rows, fill_value)
+    for i in range(len(rows)):
+        if rows[i] >= 0:
+            out[rows[i]] += column[i]
+    return out
+
+
+def _max_by_row(column, rows, n_rows, fill_value):
+    out = numpy.full(n_rows, fill_value)
+    is_filled = numpy.zeros(n_rows, dtype=numpy.bool_)
+    for i in range(len(rows)):
+        row = rows[i]
+        if row >= 0 and (not is_filled[row] or column[i] > out[row]):
+            out[row] = column[i]
+            is_filled[row] = True
+    return out
+
+
+def _min_by_row(column, rows, n_rows, fill_value):
+    out = numpy.full(n_rows, fill_value)
+    is_filled = numpy.zeros(n_rows, dtype=numpy.bool_)
+    for i in range(len(rows)):
+        row = rows[i]
+        if row >= 0 and (not is_filled[row] or column[i] < out[row]):
+            out[row] = column[i]
+            is_filled[row] = True
+    return out
+
+
+def _any_by_row(column, rows, n_rows):
+    out = numpy.zeros(n_rows, dtype=numpy.bool_)
+    for i in range(len(rows)):
+        if rows[i] >= 0 and column[i]:
+            out[rows[i]] = True
+    return out
+
+
+def _all_by_row(column, rows, n_rows):
+    out = numpy.ones(n_rows, dtype=numpy.bool_)
+    for i in range(len(rows)):
+        if rows[i] >= 0 and not column[i]:
+            out[rows[i]] = False
+    return out
@@ -1,120 +1,151 @@
 import numpy
 import numpy_groupies as npg
 
+from _gettsim.shared import join_numpy
+
+
+class GroupIndex:
+    """Index of the groups on one grouping level.
+
+    The index is computed once per level and shared by all aggregations on that level.
+    Aggregations are segment reductions over the column sorted by group.
+
+    Parameters
+    ----------
+    group_id
+        The group ids of all persons.
+
+    Attributes
+    ----------
+    codes
+        The densely renumbered group ids, i.e., 0, ..., n_groups - 1.
+    sizes
+        The number of persons in each group.
+    order
+        The positions of the persons sorted by group (stable).
+    offsets
+        The position in the sorted order where each group starts.
+
+    """
+
+    def __init__(self, group_id):
+        self.codes = dense_group_id(group_id)
+        self.sizes = numpy.bincount(self.codes)
+        self.order = numpy.argsort(self.codes, kind="stable")
+        self.offsets = numpy.cumsum(self.sizes) - self.sizes
+
+    @property
+    def n_groups(self):
+        return len(self.sizes)
+
+    @property
+    def nbytes(self):
+        return sum(a.nbytes for a in (self.codes, self.sizes, self.order, self.offsets))
+
+    def reduce(self, column, ufunc):
+        """Reduce the column within each group with a binary ufunc."""
+        return ufunc.reduceat(column[self.order], self.offsets)
+
+    def expand(self, out_on_group):
+        """Expand the results of the groups to the individual level."""
+        return out_on_group[self.codes]
+
+
+def create_group_index(group_id):
+    return GroupIndex(group_id)
+
+
+def dense_group_id(group_id):
+    fail_if_dtype_not_int(group_id, agg_func="dense_group_id")
+
+    # Renumber the groups to 0, ..., n_groups - 1, so that the outputs of aggregations
+    # have the length of the number of groups instead of the maximum group id
+    _, out = numpy.unique(group_id, return_inverse=True)
+    return out.reshape(-1)
+
 
 def grouped_count(group_id):
-    fail_if_dtype_not_int(group_id, agg_func="grouped_count")
-    out_on_hh = npg.aggregate(
-        group_id, numpy.ones(len(group_id)), func="sum", fill_value=0
-    )
+    group_index = _get_group_index(group_id, agg_func="grouped_count")
 
-    out = out_on_hh[group_id]
-    return out
+    return group_index.expand(group_index.sizes)
 
 
 def grouped_sum(column, group_id):
-    fail_if_dtype_not_int(group_id, agg_func="grouped_sum")
+    group_index = _get_group_index(group_id, agg_func="grouped_sum")
     fail_if_dtype_not_numeric_or_boolean(column, agg_func="grouped_sum")
     if column.dtype == bool:
         column = column.astype(int)
-    out_on_hh = npg.aggregate(group_id, column, func="sum", fill_value=0)
+    out_on_hh = group_index.reduce(column, numpy.add)
 
     # Expand to individual level
-    out = out_on_hh[group_id]
-    return out
+    return group_index.expand(out_on_hh)
 
 
 def grouped_mean(column, group_id):
-    fail_if_dtype_not_int(group_id, agg_func="grouped_mean")
+    group_index = _get_group_index(group_id, agg_func="grouped_mean")
     fail_if_dtype_not_float(column, agg_func="grouped_mean")
 
-    out_on_hh = npg.aggregate(group_id, column, func="mean", fill_value=0)
+    out_on_hh = group_index.reduce(column, numpy.add) / group_index.sizes
 
     # Expand to individual level
-    out = out_on_hh[group_id]
-    return out
+    return group_index.expand(out_on_hh)
 
 
 def grouped_max(column, group_id):
-    fail_if_dtype_not_int(group_id, agg_func="grouped_max")
+    group_index = _get_group_index(group_id, agg_func="grouped_max")
     fail_if_dtype_not_numeric_or_datetime(column, agg_func="grouped_max")
 
-    # For datetime, convert to integer (as numpy_groupies can handle datetime only if
-    # numba is installed)
-    if numpy.issubdtype(column.dtype, numpy.datetime64):
-        dtype = column.dtype
-        float_col = column.astype("datetime64[D]").astype(int)
-
-        out_on_hh_float = npg.aggregate(group_id, float_col, func="max")
-
-        out_on_hh = out_on_hh_float.astype("datetime64[D]").astype(dtype)
-
-        # Expand to individual level
-        out = out_on_hh[group_id]
-
-    else:
-        out_on_hh = npg.aggregate(group_id, column, func="max")
+    out_on_hh = group_index.reduce(column, numpy.maximum)
 
-        # Expand to individual level
-        out = out_on_hh[group_id]
-    return out
+    # Expand to individual level
+    return group_index.expand(out_on_hh)
 
 
 def grouped_min(column, group_id):
-    fail_if_dtype_not_int(group_id, agg_func="grouped_min")
+    group_index = _get_group_index(group_id, agg_func="grouped_min")
     fail_if_dtype_not_numeric_or_datetime(column, agg_func="grouped_min")
 
-    # For datetime, convert to integer (as numpy_groupies can handle datetime only if
-    # numba is installed)
-
-    if numpy.issubdtype(column.dtype, numpy.datetime64) or numpy.issubdtype(
-        column.dtype, numpy.timedelta64
-    ):
-        dtype = column.dtype
-        float_col = column.astype("datetime64[D]").astype(int)
-
-        out_on_hh_float = npg.aggregate(group_id, float_col, func="min")
-
-        out_on_hh = out_on_hh_float.astype("datetime64[D]").astype(dtype)
-
-        # Expand to individual level
-        out = out_on_hh[group_id]
-
-    else:
-        out_on_hh = npg.aggregate(group_id, column, func="min")
+    out_on_hh = group_index.reduce(column, numpy.minimum)
 
-        # Expand to individual level
-        out = out_on_hh[group_id]
-    return out
+    # Expand to individual level
+    return group_index.expand(out_on_hh)
 
 
 def grouped_any(column, group_id):
-    fail_if_dtype_not_int(group_id, agg_func="grouped_any")
+    group_index = _get_group_index(group_id, agg_func="grouped_any")
     fail_if_dtype_not_boolean_or_int(column, agg_func="grouped_any")
 
-    out_on_hh = npg.aggregate(group_id, column, func="any", fill_value=0)
+    out_on_hh = group_index.reduce(column, numpy.logical_or)
 
     # Expand to individual level
-    out = out_on_hh[group_id]
-    return out
+    return group_index.expand(out_on_hh)
 
 
 def grouped_all(column, group_id):
-    fail_if_dtype_not_int(group_id, agg_func="grouped_all")
+    group_index = _get_group_index(group_id, agg_func="grouped_all")
     fail_if_dtype_not_boolean_or_int(column, agg_func="grouped_all")
 
-    out_on_hh = npg.aggregate(group_id, column, func="all", fill_value=0)
+    out_on_hh = group_index.reduce(column, numpy.logical_and)
 
     # Expand to individual level
-    out = out_on_hh[group_id]
-    return out
+    return group_index.expand(out_on_hh)
+
+
+def _get_group_index(group_id, agg_func):
+    """Return the group index, creating it from the group ids if necessary."""
+    if isinstance(group_id, GroupIndex):
+        return group_id
+
+    fail_if_dtype_not_int(group_id, agg_func=agg_func)
+    return GroupIndex(group_id)
 
 
 def count_by_p_id(p_id_to_aggregate_by, p_id_to_store_by):
     fail_if_dtype_not_int(p_id_to_aggregate_by, agg_func="count_by_p_id")
     fail_if_dtype_not_int(p_id_to_store_by, agg_func="count_by_p_id")
 
-    raise NotImplementedError
+    rows = _rows_to_aggregate_by(p_id_to_aggregate_by, p_id_to_store_by)
+    return numpy.bincount(rows[rows >= 0], minlength=len(p_id_to_store_by))
 
 
 def sum_by_p_id(column, p_id_to_aggregate_by, p_id_to_store_by):
@@ -124,49 +155,127 @@ def sum_by_p_id(column, p_id_to_aggregate_by, p_id_to_store_by):
 
     if column.dtype in ["bool"]:
         column = column.astype(int)
-    out = numpy.zeros_like(p_id_to_store_by, dtype=column.dtype)
 
-    map_p_id_to_position = {p_id: iloc for iloc, p_id in enumerate(p_id_to_store_by)}
-
-    for iloc, id_receiver in enumerate(p_id_to_aggregate_by):
-        if id_receiver >= 0:
-            out[map_p_id_to_position[id_receiver]] += column[iloc]
-    return out
+    return _aggregate_by_p_id(
+        column, p_id_to_aggregate_by, p_id_to_store_by, func="sum", fill_value=0
+    )
 
 
 def mean_by_p_id(column, p_id_to_aggregate_by, p_id_to_store_by):
     fail_if_dtype_not_int(p_id_to_aggregate_by, agg_func="mean_by_p_id")
     fail_if_dtype_not_int(p_id_to_store_by, agg_func="mean_by_p_id")
     fail_if_dtype_not_float(column, agg_func="mean_by_p_id")
-    raise NotImplementedError
+
+    return _aggregate_by_p_id(
+        column, p_id_to_aggregate_by, p_id_to_store_by, func="mean", fill_value=0
+    )
 
 
 def max_by_p_id(column, p_id_to_aggregate_by, p_id_to_store_by):
     fail_if_dtype_not_int(p_id_to_aggregate_by, agg_func="max_by_p_id")
     fail_if_dtype_not_int(p_id_to_store_by, agg_func="max_by_p_id")
     fail_if_dtype_not_numeric_or_datetime(column, agg_func="max_by_p_id")
-    raise NotImplementedError
+
+    # For datetime, convert to integer (as numpy_groupies can handle datetime only if
+    # numba is installed)
+    if numpy.issubdtype(column.dtype, numpy.datetime64):
+        dtype = column.dtype
+        float_col = column.astype("datetime64[D]").astype(int)
+
+        out_float = _aggregate_by_p_id(
+            float_col, p_id_to_aggregate_by, p_id_to_store_by, func="max", fill_value=0
+        )
+
+        out = out_float.astype("datetime64[D]").astype(dtype)
+
+    else:
+        out = _aggregate_by_p_id(
+            column, p_id_to_aggregate_by, p_id_to_store_by, func="max", fill_value=0
+        )
+    return out
 
 
 def min_by_p_id(column, p_id_to_aggregate_by, p_id_to_store_by):
     fail_if_dtype_not_int(p_id_to_aggregate_by, agg_func="min_by_p_id")
     fail_if_dtype_not_int(p_id_to_store_by, agg_func="min_by_p_id")
     fail_if_dtype_not_numeric_or_datetime(column, agg_func="min_by_p_id")
-    raise NotImplementedError
+
+    # For datetime, convert to integer (as numpy_groupies can handle datetime only if
+    # numba is installed)
+    if numpy.issubdtype(column.dtype, numpy.datetime64):
+        dtype = column.dtype
+        float_col = column.astype("datetime64[D]").astype(int)
+
+        out_float = _aggregate_by_p_id(
+            float_col, p_id_to_aggregate_by, p_id_to_store_by, func="min", fill_value=0
+        )
+
+        out = out_float.astype("datetime64[D]").astype(dtype)
+
+    else:
+        out = _aggregate_by_p_id(
+            column, p_id_to_aggregate_by, p_id_to_store_by, func="min", fill_value=0
+        )
+    return out
 
 
 def any_by_p_id(column, p_id_to_aggregate_by, p_id_to_store_by):
     fail_if_dtype_not_int(p_id_to_aggregate_by, agg_func="any_by_p_id")
     fail_if_dtype_not_int(p_id_to_store_by, agg_func="any_by_p_id")
     fail_if_dtype_not_boolean_or_int(column, agg_func="any_by_p_id")
-    raise NotImplementedError
+
+    return _aggregate_by_p_id(
+        column, p_id_to_aggregate_by, p_id_to_store_by, func="any", fill_value=False
+    )
 
 
 def all_by_p_id(column, p_id_to_aggregate_by, p_id_to_store_by):
     fail_if_dtype_not_int(p_id_to_store_by, agg_func="all_by_p_id")
     fail_if_dtype_not_int(p_id_to_aggregate_by, agg_func="all_by_p_id")
     fail_if_dtype_not_boolean_or_int(column, agg_func="all_by_p_id")
-    raise NotImplementedError
+
+    return _aggregate_by_p_id(
+        column, p_id_to_aggregate_by, p_id_to_store_by, func="all", fill_value=True
+    )
+
+
+def _aggregate_by_p_id(
+    column, p_id_to_aggregate_by, p_id_to_store_by, func, fill_value
+):
+    """Aggregate the column for each person by the p_ids in `p_id_to_aggregate_by`.
+
+    Persons to whom no row is aggregated receive `fill_value`.
+
+    """
+    rows = _rows_to_aggregate_by(p_id_to_aggregate_by, p_id_to_store_by)
+    is_aggregated = rows >= 0
+
+    if not is_aggregated.any():
+        dtype = bool if func in ("any", "all") else column.dtype
+        return numpy.full(len(p_id_to_store_by), fill_value, dtype=dtype)
+
+    return npg.aggregate(
+        rows[is_aggregated],
+        column[is_aggregated],
+        func=func,
+        size=len(p_id_to_store_by),
+        fill_value=fill_value,
+    )
+
+
+def _rows_to_aggregate_by(p_id_to_aggregate_by, p_id_to_store_by):
+    """Map the p_ids to aggregate by to the rows of `p_id_to_store_by`.
+
+    Negative p_ids are mapped to -1.
+
+    """
+    rows = join_numpy(
+        p_id_to_aggregate_by,
+        p_id_to_store_by,
+        numpy.arange(len(p_id_to_store_by)),
+        value_if_foreign_key_is_missing=-1,
+    )
+    return numpy.where(p_id_to_aggregate_by >= 0, rows, -1)
 
 
 def fail_if_dtype_not_numeric(column, agg_func):
@@ -0,0 +1,200 @@
+import numpy
+import pandas as pd
+
+from _gettsim.config import SUPPORTED_GROUPINGS
+from _gettsim.execution import MemoryAwareExecutor, split_by_dependence
+from _gettsim.interface import prepare_taxes_and_transfers, process_and_check_data
+from _gettsim.policy_environment import PolicyEnvironment
+from _gettsim.policy_environment_postprocessor import get_group_index_name
+from _gettsim.shared import get_size_of_groups, parse_to_list_of_strings, stack_copies
+from _gettsim.time_conversion import (
+    convert_time_unit,
+    get_group_and_time_unit,
+    match_time_unit,
+)
+
+DEFAULT_TAXES = ["eink_st_y_sn", "soli_st_y_sn", "sozialv_beitr_arbeitnehmer_m"]
+DEFAULT_BENEFITS = [
+    "kindergeld_m",
+    "arbeitsl_geld_2_m_bg",
+    "kinderzuschl_m_bg",
+    "wohngeld_m_wthh",
+]
+
+
+def compute_budget_lines(  # noqa: PLR0913
+    templates: dict[str, pd.DataFrame] | list[pd.DataFrame],
+    environment: PolicyEnvironment,
+    incomes,
+    income="bruttolohn_m",
+    earner=0,
+    taxes=None,
+    benefits=None,
+    check_minimal_specification="ignore",
+    rounding=True,
+):
+    """Compute net incomes of households for a grid of incomes.
+
+    Each template is a single household, e.g., created by
+    :func:`gettsim.create_synthetic_data` without heterogeneous specifications. For
+    each value of the grid, the income of one member of the household is set to that
+    value. The copies of the household are created directly as arrays and evaluated by
+    functions which are set up once for all templates. Functions which do not depend on
+    the income are evaluated once per template.
+
+    Parameters
+    ----------
+    templates : dict of pandas.DataFrame or list of pandas.DataFrame
+        Data of the households. All templates must have the same columns. If it is a
+        dictionary, the keys are the names of the templates. Otherwise, the templates
+        are numbered.
+    environment:
+        The policy environment which contains all necessary functions and parameters.
+    incomes : array-like
+        Values of the income on the grid.
+    income : str, default "bruttolohn_m"
+        Name of the column of the data which is set to the values of the grid.
+    earner : int, default 0
+        Position of the member of the household whose income is set.
+    taxes : str, list of str, default None
+        Names of taxes and contributions which are subtracted from the income. By
+        default, income taxes, the solidarity surcharge, and social insurance
+        contributions of employees are used.
+    benefits : str, list of str, default None
+        Names of benefits which are added to the income. By default, Kindergeld,
+        Arbeitslosengeld 2, Kinderzuschlag, and Wohngeld are used.
+    check_minimal_specification : {"ignore", "warn", "raise"}, default "ignore"
+        Indicator for whether checks which ensure the most minimal configuration should
+        be silenced, emitted as warnings or errors.
+    rounding : bool, default True
+        Indicator for whether rounding should be applied as specified in the law.
+
+    Returns
+    -------
+    results : pandas.DataFrame
+        Monthly totals of the household of the income, each tax and benefit, and the
+        net income ``"netto_eink_m_hh"``. The names of the columns end with ``_m_hh``.
+        The first level of the index is the template and the second one the income.
+
+    """
+    if isinstance(templates, dict):
+        names, templates = list(templates), list(templates.values())
+    else:
+        templates = list(templates)
+        names = list(range(len(templates)))
+    taxes = parse_to_list_of_strings(DEFAULT_TAXES if taxes is None else taxes, "taxes")
+    benefits = parse_to_list_of_strings(
+        DEFAULT_BENEFITS if benefits is None else benefits, "benefits"
+    )
+    incomes = numpy.asarray(incomes, dtype=float)
+
+    templates = [process_and_check_data(data=t) for t in templates]
+    _fail_if_templates_are_invalid(templates, income, earner)
+    data_cols = list(templates[0])
+
+    components = [income, *taxes, *benefits]
+    groups = {name: get_group_and_time_unit(name) for name in components}
+    group_ids = sorted({f"{g}_id" for g, _ in groups.values() if g})
+    targets = [*taxes, *benefits]
+    targets += [i for i in group_ids if i not in {*targets, *data_cols}]
+
+    plan = prepare_taxes_and_transfers(
+        environment=environment,
+        data_cols=data_cols,
+        targets=targets,
+        check_minimal_specification=check_minimal_specification,
+        rounding=rounding,
+    )
+
+    # Functions which do not depend on the income are computed once per template. Group
+    # indices are recomputed for the copies of the households.
+    group_indices = {get_group_index_name(f"{g}_id") for g in SUPPORTED_GROUPINGS}
+    shared_executor, dependent = split_by_dependence(
+        plan.functions,
+        plan.targets,
+        {income, *(group_indices & plan.functions.keys())},
+    )
+    dependent_executor = MemoryAwareExecutor(
+        functions={n: plan.functions[n] for n in dependent},
+        targets=[t for t in plan.targets if t in dependent],
+    )
+
+    results = []
+    for template in templates:
+        data = plan.convert_data(template)
+        input_data = plan.create_input_data(data)
+        values = {
+            **input_data,
+            **shared_executor(input_data),
+            **{i: data[i].values for i in [income, *group_ids] if i in data},
+        }
+        n_persons = len(data[income])
+        p_id_offset = data["p_id"].max() + 1
+        values = {
+            name: stack_copies(name, numpy.asarray(value), len(incomes), p_id_offset)
+            for name, value in values.items()
+            if name in {*dependent_executor.arguments, *groups, *group_ids}
+        }
+        values[income] = values[income].astype(float)
+        values[income][earner::n_persons] = incomes
+        if dependent_executor.targets:
+            values.update(dependent_executor(values))
+
+        results.append(
+            _get_totals_of_households(values, groups, n_persons, len(incomes))
+        )
+
+    totals = {
+        name: numpy.concatenate([r[name] for r in results]) for name in components
+    }
+    totals["netto_eink"] = (
+        totals[income]
+        - sum(totals[name] for name in taxes)
+        + sum(totals[name] for name in benefits)
+    )
+    columns = {name: f"{match_time_unit(name)[0]}m_hh" for name in components}
+    totals = {
+        columns.get(name, f"{name}_m_hh"): total for name, total in totals.items()
+    }
+    index = pd.MultiIndex.from_product([names, incomes], names=["template", income])
+
+    return pd.DataFrame(totals, index=index)
+
+
+def _get_totals_of_households(values, groups, n_persons, n_households):
+    """Sum values over the members of each household and convert them to months.
+
+    Values of groups are divided by the number of members of the group, so that each
+    group is counted once.
+
+    """
+    totals = {}
+    for name, (group, time_unit) in groups.items():
+        value = numpy.asarray(values[name], dtype=float)
+        if group:
+            value = value / get_size_of_groups(values[f"{group}_id"])
+        total = value.reshape(n_households, n_persons).sum(axis=1)
+        totals[name] = convert_time_unit(total, time_unit, "m")
+
+    return totals
+
+
+def _fail_if_templates_are_invalid(templates, income, earner):
+    if len(templates) == 0:
+        raise ValueError("At least one template must be given.")
+
+    columns = set(templates[0])
+    for data in templates:
+        if set(data) != columns:
+            raise ValueError("All templates must have the same columns.")
+        if income not in data:
+            raise ValueError(
+                f"The income {income!r} must be a column of the templates."
+            )
+        if "hh_id" in data and data["hh_id"].nunique() != 1:
+            raise ValueError("Each template must contain a single household.")
+        if not 0 <= earner < len(data[income]):
+            raise ValueError(
+                f"'earner' must be the position of a member of each household, got "
+                f"{earner} for a household with {len(data[income])} members."
+            )
@@ -0,0 +1,190 @@
+import inspect
+
+import numpy
+import pandas as pd
+
+from _gettsim.execution import (
+    MemoryAwareExecutor,
+    get_functions_depending_on,
+    get_shared_targets,
+)
+from _gettsim.interface import prepare_taxes_and_transfers, process_and_check_data
+from _gettsim.policy_environment import PolicyEnvironment
+from _gettsim.scenarios import get_functions_using_params, get_varied_params
+
+
+def compare_environments(  # noqa: PLR0913
+    data,
+    base_environment: PolicyEnvironment,
+    reform_environment: PolicyEnvironment,
+    targets=None,
+    check_minimal_specification="ignore",
+    rounding=True,
+):
+    """Compute taxes and transfers under a base and a reform environment.
+
+    The functions and parameters of both environments are compared. Functions which
+    differ, which use parameters that differ, or which depend on the results of such
+    functions are computed for each environment. All other functions are computed
+    once for both environments.
+
+    Parameters
+    ----------
+    data : pandas.Series or pandas.DataFrame or dict of pandas.Series
+        Data provided by the user.
+    base_environment:
+        The policy environment of the baseline.
+    reform_environment:
+        The policy environment of the reform.
+    targets : str, list of str, default None
+        String or list of strings with names of functions whose output is actually
+        needed by the user. By default, ``targets`` is ``None`` and all key outputs as
+        defined by `gettsim.config.DEFAULT_TARGETS` are returned.
+    check_minimal_specification : {"ignore", "warn", "raise"}, default "ignore"
+        Indicator for whether checks which ensure the most minimal configuration should
+        be silenced, emitted as warnings or errors.
+    rounding : bool, default True
+        Indicator for whether rounding should be applied as specified in the law.
+
+    Returns
+    -------
+    results : dict of pandas.DataFrame
+        The results under the base environment ("base") and the reform environment
+        ("reform"), and the differences between the numeric or Boolean results of the
+        reform and the base ("delta").
+
+    """
+    data = process_and_check_data(data=data)
+    plans = {
+        name: prepare_taxes_and_transfers(
+            environment=environment,
+            data_cols=list(data),
+            targets=targets,
+            check_minimal_specification=check_minimal_specification,
+            rounding=rounding,
+        )
+        for name, environment in [
+            ("base", base_environment),
+            ("reform", reform_environment),
+        ]
+    }
+    targets = plans["base"].targets
+    for plan in plans.values():
+        data = plan.convert_data(data)
+    input_data = {}
+    for plan in plans.values():
+        input_data.update(plan.create_input_data(data))
+    processed_functions = {name: plan.functions for name, plan in plans.items()}
+
+    # Functions which are unchanged and do not depend on changed functions in either
+    # environment are computed once.
+    changed = get_changed_functions(
+        base_environment=base_environment,
+        reform_environment=reform_environment,
+        base_functions=processed_functions["base"],
+        reform_functions=processed_functions["reform"],
+        rounding=rounding,
+    )
+    dependent = {
+        name: get_functions_depending_on(functions, changed)
+        for name, functions in processed_functions.items()
+    }
+    shared = {
+        n: f
+        for n, f in processed_functions["base"].items()
+        if n in processed_functions["reform"]
+        and n not in dependent["base"]
+        and n not in dependent["reform"]
+    }
+    shared_targets = []
+    for functions in processed_functions.values():
+        for target in get_shared_targets(
+            functions, targets, dependent=functions.keys() - shared.keys()
+        ):
+            if target not in shared_targets:
+                shared_targets.append(target)
+    shared_results = MemoryAwareExecutor(functions=shared, targets=shared_targets)(
+        input_data
+    )
+
+    results = {}
+    for name, functions in processed_functions.items():
+        dependent_results = MemoryAwareExecutor(
+            functions={n: f for n, f in functions.items() if n not in shared},
+            targets=[t for t in targets if t in functions and t not in shared],
+        )({**input_data, **shared_results})
+        results[name] = plans[name].prepare_results(
+            {
+                target: dependent_results.get(target, shared_results.get(target))
+                for target in targets
+            },
+            data,
+        )
+
+    results["delta"] = _get_differences(results["base"], results["reform"])
+
+    return results
+
+
+def get_changed_functions(
+    base_environment, reform_environment, base_functions, reform_functions, rounding
+):
+    """Get the names of the functions which differ between two environments.
+
+    Functions differ if they exist in only one environment, if they are different
+    objects, if the specs of aggregations or their arguments differ, or if they use
+    parameters whose values differ.
+
+    Parameters
+    ----------
+    base_environment:
+        The policy environment of the baseline.
+    reform_environment:
+        The policy environment of the reform.
+    base_functions : dict of callable
+        The functions of the DAG of the base environment with partialled parameters.
+    reform_functions : dict of callable
+        The functions of the DAG of the reform environment with partialled parameters.
+    rounding : bool
+        Indicator for whether rounding is applied as specified in the law.
+
+    Returns
+    -------
+    changed : set of str
+        Names of the changed functions.
+
+    """
+    changed = set(base_functions.keys() ^ reform_functions.keys())
+    for name in base_functions.keys() & reform_functions.keys():
+        if (
+            base_environment.functions.get(name)
+            is not reform_environment.functions.get(name)
+            or base_environment.aggregate_by_group_specs.get(name)
+            != reform_environment.aggregate_by_group_specs.get(name)
+            or base_environment.aggregate_by_p_id_specs.get(name)
+            != reform_environment.aggregate_by_p_id_specs.get(name)
+            or inspect.signature(base_functions[name]).parameters.keys()
+            != inspect.signature(reform_functions[name]).parameters.keys()
+        ):
+            changed.add(name)
+
+    changed_params = set(
+        get_varied_params([base_environment.params, reform_environment.params])
+    )
+    for functions in [base_functions, reform_functions]:
+        changed |= get_functions_using_params(functions, changed_params, rounding)
+
+    return changed
+
+
+def _get_differences(base, reform):
+    """Subtract the numeric or Boolean results of the base from those of the reform."""
+    return pd.DataFrame(
+        {
+            column: reform[column].astype(float) - base[column].astype(float)
+            for column in base
+            if numpy.issubdtype(base[column].dtype, numpy.number)
+            or base[column].dtype == bool
+        },
+        index=base.index,
+    )
@@ -1,23 +1,31 @@
 from __future__ import annotations
 
-import importlib
+import contextlib
+import importlib.util
+import os
+import threading
 from pathlib import Path
 
 import numpy
 
 # Defaults
 USE_JAX = False
+USE_NUMBA = False
 numpy_or_jax = numpy
 
 
 def set_array_backend(backend: str):
     """Set array library backend.
 
-    backend (str): Must be in {'jax', 'numpy'}.
+    backend (str): Must be in {'jax', 'numba', 'numpy'}. With 'numba', policy functions
+        are compiled with numba and arrays are NumPy arrays. Functions which cannot be
+        compiled fall back to the 'numpy' backend.
 
     """
-    if backend not in {"jax", "numpy"}:
-        raise ValueError(f"Backend must be in {'jax', 'numpy'} but is {backend}.")
+    if backend not in {"jax", "numba", "numpy"}:
+        raise ValueError(
+            f"Backend must be in {'jax', 'numba', 'numpy'} but is {backend}."
+        )
 
     if backend == "jax":
         assert importlib.util.find_spec("jax") is not None, "JAX is not installed."
@@ -28,6 +36,39 @@ def set_array_backend(backend: str):
         USE_JAX = True
         numpy_or_jax = jax.numpy
         jax.config.update("jax_platform_name", "cpu")
+        # Use 64-bit integers and floats like NumPy, e.g., for large ids and incomes.
+        jax.config.update("jax_enable_x64", True)
+        jax.config.update("jax_compilation_cache_dir", str(JAX_COMPILATION_CACHE_DIR))
+
+    if backend == "numba":
+        assert importlib.util.find_spec("numba") is not None, "numba is not installed."
+        global USE_NUMBA  # noqa: PLW0603
+
+        USE_NUMBA = True
+
+
+@contextlib.contextmanager
+def numpy_backend():
+    """Use the NumPy backend within the context.
+
+    Functions which are called back on the host from functions compiled with JAX must
+    not call JAX themselves. Callbacks may run in several threads, so they enter the
+    context one after another.
+
+    """
+    global USE_JAX
+    global numpy_or_jax
+
+    with _NUMPY_BACKEND_LOCK:
+        previous = USE_JAX, numpy_or_jax
+        USE_JAX, numpy_or_jax = False, numpy
+        try:
+            yield
+        finally:
+            USE_JAX, numpy_or_jax = previous
+
+
+_NUMPY_BACKEND_LOCK = threading.Lock()
 
 
 # Obtain the root directory of the package.
@@ -67,6 +108,39 @@ INTERNAL_PARAMS_GROUPS = [
     "erziehungsgeld",
 ]
 
+# Directory of files which GETTSIM derives from its sources to speed up later runs.
+CACHE_DIR = Path(
+    os.environ.get(
+        "GETTSIM_CACHE_DIR",
+        Path(os.environ.get("XDG_CACHE_HOME", Path.home() / ".cache")) / "gettsim",
+    )
+)
+
+# Directory of the on-disk store of parsed parameter files. The store is rebuilt for
+# every parameter file whose contents have changed.
+PARAMETER_STORE_DIR = CACHE_DIR / "parameters"
+
+# Directory of the manifest of internal policy functions. The manifest is rebuilt when
+# the source files of the functions have changed.
+FUNCTION_MANIFEST_DIR = CACHE_DIR / "functions"
+
+# Directory of JAX's persistent compilation cache. Functions compiled with `jax.jit`
+# are loaded from it instead of being compiled again in later runs.
+JAX_COMPILATION_CACHE_DIR = CACHE_DIR / "jax"
+
+# Number of policy environments kept by `PolicyEnvironment.for_date`. The environments
+# of the most recently used dates are kept.
+POLICY_ENVIRONMENT_CACHE_SIZE = 64
+
+# Number of functions compiled with numba which are kept. Each function is compiled
+# for the values of its parameters, so variants of the parameters, e.g., of scenarios,
+# add compiled functions. The most recently used ones are kept.
+NUMBA_KERNEL_CACHE_SIZE = 1024
+
+# Number of lookup tables of piecewise functions which are kept. Equal parameters of
+# different dates share one table. The most recently used ones are kept.
+LOOKUP_TABLE_CACHE_SIZE = 256
+
 SUPPORTED_GROUPINGS = {
     "hh": {
         "name": "Haushalt",
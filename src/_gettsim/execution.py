@@ -0,0 +1,385 @@
+import contextlib
+import functools
+import inspect
+
+import dags.dag
+import networkx as nx
+import numpy
+
+from _gettsim.config import FOREIGN_KEYS, SUPPORTED_GROUPINGS
+from _gettsim.shared import fail_if_foreign_keys_cannot_be_joined
+
+with contextlib.suppress(ImportError):
+    import jax
+
+
+class MemoryAwareExecutor:
+    """
+    Execute functions in the order of their DAG and free intermediate results.
+
+    Each intermediate result is dropped right after the last function consuming it has
+    run, so that only a small part of all intermediate arrays is alive at any point in
+    time. The number of bytes held by the executor is tracked during each call.
+
+    Parameters
+    ----------
+    functions : dict of callable
+        Dictionary mapping function names to callables. Parameters must already be
+        partialled into the functions.
+    targets : list of str
+        Names of the functions whose output is returned.
+
+    Attributes
+    ----------
+    arguments : list of str
+        Names of the inputs of the DAG, i.e., nodes without a function.
+    execution_order : list of str
+        Names of the functions in the order in which they are executed.
+    peak_bytes : int or None
+        Maximum number of bytes held in inputs and intermediate results during the last
+        call. None if the executor has not been called yet.
+    """
+
+    def __init__(self, functions, targets):
+        dag = dags.dag.create_dag(functions=functions, targets=targets)
+        self.targets = list(targets)
+
+        self.arguments = []
+        self.execution_order = []
+        self._arguments_of_functions = {}
+        for node in nx.topological_sort(dag):
+            if node in functions:
+                self.execution_order.append(node)
+                self._arguments_of_functions[node] = get_free_arguments(functions[node])
+            else:
+                self.arguments.append(node)
+        self._functions = {name: functions[name] for name in self.execution_order}
+
+        self._nodes_to_free_after_step = _get_nodes_to_free_after_step(
+            execution_order=self.execution_order,
+            arguments_of_functions=self._arguments_of_functions,
+            keep=set(self.targets),
+        )
+        self.peak_bytes = None
+
+    def __call__(self, inputs, keep_intermediates=False):
+        """Execute the DAG.
+
+        Parameters
+        ----------
+        inputs : dict of numpy.ndarray
+            Values of the inputs of the DAG. Additional entries are ignored.
+        keep_intermediates : bool, default False
+            If True, no intermediate result is freed and all of them are returned.
+
+        Returns
+        -------
+        results : dict of numpy.ndarray
+            Results of the targets, or of all functions if ``keep_intermediates`` is
+            True.
+
+        """
+        _fail_if_inputs_are_missing(inputs, self.arguments)
+        held = {name: inputs[name] for name in self.arguments}
+        n_bytes = sum(get_nbytes(value) for value in held.values())
+        peak_bytes = n_bytes
+
+        for step, name in enumerate(self.execution_order):
+            kwargs = {arg: held[arg] for arg in self._arguments_of_functions[name]}
+            held[name] = self._functions[name](**kwargs)
+            n_bytes += get_nbytes(held[name])
+            peak_bytes = max(peak_bytes, n_bytes)
+
+            if not keep_intermediates:
+                for node in self._nodes_to_free_after_step[step]:
+                    n_bytes -= get_nbytes(held.pop(node))
+
+        self.peak_bytes = peak_bytes
+
+        if keep_intermediates:
+            return {name: held[name] for name in self.execution_order}
+        else:
+            return {name: held[name] for name in self.targets}
+
+
+class JitExecutor:
+    """
+    Execute the functions of a DAG compiled together with `jax.jit`.
+
+    Compiling the whole DAG allows XLA to fuse the operations of all functions instead
+    of dispatching each of them separately. Parameters are partialled into the
+    functions, so they are constants of the compiled function.
+
+    JAX does not support dates, so inputs which are dates are passed as days since
+    1970-01-01 to the compiled function.
+
+    Joins cannot check their keys while they are traced, so inputs which refer to
+    ``p_id`` are checked before each call.
+
+    A function is compiled for each combination of shapes and dtypes of the inputs. To
+    avoid compiling it again for every number of rows, the inputs are padded to the
+    next power of two rows. Padded rows form households of their own and are dropped
+    from the results.
+
+    Parameters
+    ----------
+    executor : MemoryAwareExecutor
+        Executor of the functions which are compiled.
+
+    Attributes
+    ----------
+    n_traces : int
+        Number of times the functions have been traced, i.e., compiled or loaded from
+        JAX's persistent compilation cache.
+    peak_bytes : int or None
+        Maximum number of bytes held during the last call if it kept the intermediate
+        results, which are not compiled. None otherwise.
+    """
+
+    def __init__(self, executor):
+        self.executor = executor
+        self.arguments = executor.arguments
+        self.targets = executor.targets
+        self.execution_order = executor.execution_order
+        self.n_traces = 0
+        self.peak_bytes = None
+        self._jitted = jax.jit(self._trace)
+
+    def __call__(self, inputs, keep_intermediates=False):
+        """Execute the compiled DAG.
+
+        Parameters
+        ----------
+        inputs : dict of numpy.ndarray
+            Values of the inputs of the DAG. Additional entries are ignored.
+        keep_intermediates : bool, default False
+            If True, the functions are executed without compiling them and all
+            intermediate results are returned.
+
+        Returns
+        -------
+        results : dict of numpy.ndarray
+            Results of the targets, or of all functions if ``keep_intermediates`` is
+            True.
+
+        """
+        if keep_intermediates:
+            results = self.executor(inputs, keep_intermediates=True)
+            self.peak_bytes = self.executor.peak_bytes
+            return results
+
+        self.peak_bytes = None
+        _fail_if_inputs_are_missing(inputs, self.arguments)
+        inputs = {name: _to_jax_compatible(inputs[name]) for name in self.arguments}
+        if "p_id" in inputs:
+            for name, value in inputs.items():
+                if name in FOREIGN_KEYS or name.startswith("p_id_"):
+                    fail_if_foreign_keys_cannot_be_joined(value, inputs["p_id"])
+        n_rows = _get_n_rows(inputs)
+        padded_inputs = {
+            name: _pad_rows(name, value, _get_bucket_size(n_rows))
+            for name, value in inputs.items()
+        }
+
+        results = self._jitted(padded_inputs)
+
+        return {name: numpy.asarray(results[name])[:n_rows] for name in self.targets}
+
+    def _trace(self, inputs):
+        self.n_traces += 1
+        return self.executor(inputs)
+
+
+def _to_jax_compatible(value):
+    """Convert an input to an array which JAX supports.
+
+    JAX does not support dates, so they are converted to days since 1970-01-01.
+
+    """
+    value = numpy.asarray(value)
+    if numpy.issubdtype(value.dtype, numpy.datetime64):
+        value = value.astype("datetime64[D]").astype(numpy.int64)
+    return value
+
+
+def _get_n_rows(inputs):
+    n_rows = {len(value) for value in inputs.values()}
+    if len(n_rows) > 1:
+        raise ValueError(f"The inputs have different numbers of rows: {n_rows}")
+    return n_rows.pop() if n_rows else 0
+
+
+def _get_bucket_size(n_rows):
+    """Round the number of rows up to the next power of two."""
+    return 1 << (n_rows - 1).bit_length() if n_rows > 0 else 0
+
+
+def _pad_rows(name, value, n_padded_rows):
+    """Pad an input to the given number of rows.
+
+    Padded rows get new ids and do not refer to other persons, so that they are not
+    aggregated with the original rows. Other inputs repeat the last row, which is a
+    valid value of the input.
+
+    """
+    n_missing_rows = n_padded_rows - len(value)
+    if n_missing_rows == 0:
+        return value
+
+    if name == "p_id" or name in {f"{g}_id" for g in SUPPORTED_GROUPINGS}:
+        padding = value.max() + 1 + numpy.arange(n_missing_rows, dtype=value.dtype)
+    elif name in FOREIGN_KEYS or name.startswith("p_id_"):
+        padding = numpy.full(n_missing_rows, -1, dtype=value.dtype)
+    else:
+        padding = numpy.repeat(value[-1:], n_missing_rows)
+
+    return numpy.concatenate([value, padding])
+
+
+def get_functions_depending_on(functions, nodes):
+    """Get the names of the functions which depend on any of the nodes.
+
+    Functions among the nodes are included.
+
+    Parameters
+    ----------
+    functions : dict of callable
+        Dictionary mapping function names to callables.
+    nodes : set of str
+        Names of functions or inputs of the DAG.
+
+    Returns
+    -------
+    dependent : set of str
+        Names of the functions which depend on the nodes directly or indirectly.
+
+    """
+    dag = dags.dag.create_dag(functions=functions, targets=None)
+    dependent = {node for node in nodes if node in functions}
+    for node in nodes:
+        if node in dag:
+            dependent.update(nx.descendants(dag, node))
+
+    return dependent
+
+
+def get_shared_targets(functions, targets, dependent):
+    """Get the nodes which are computed once for all evaluations of dependent functions.
+
+    These are the targets which are not dependent and the other arguments of dependent
+    functions, except inputs of the DAG.
+
+    Parameters
+    ----------
+    functions : dict of callable
+        Dictionary mapping function names to callables. Parameters must already be
+        partialled into the functions.
+    targets : list of str
+        Names of the functions whose output is returned.
+    dependent : set of str
+        Names of the functions which are evaluated several times.
+
+    Returns
+    -------
+    shared_targets : list of str
+        Names of the functions which are not dependent and whose results are needed.
+
+    """
+    shared_targets = [target for target in targets if target not in dependent]
+    for name in sorted(dependent):
+        for arg in get_free_arguments(functions[name]):
+            if arg in functions and arg not in dependent and arg not in shared_targets:
+                shared_targets.append(arg)
+
+    return shared_targets
+
+
+def split_by_dependence(functions, targets, nodes):
+    """Split functions into those which depend on the nodes and all others.
+
+    The other functions are computed once, e.g., for all scenarios of the parameters,
+    and their results are inputs of the dependent functions, which are evaluated
+    several times.
+
+    Parameters
+    ----------
+    functions : dict of callable
+        Dictionary mapping function names to callables. Parameters must already be
+        partialled into the functions.
+    targets : list of str
+        Names of the functions whose output is returned.
+    nodes : set of str
+        Names of functions or inputs of the DAG.
+
+    Returns
+    -------
+    shared_executor : MemoryAwareExecutor
+        Executor computing the results of the functions which do not depend on the
+        nodes and are needed, see :func:`get_shared_targets`.
+    dependent : set of str
+        Names of the functions which depend on the nodes directly or indirectly.
+
+    """
+    dependent = get_functions_depending_on(functions, nodes)
+    shared_executor = MemoryAwareExecutor(
+        functions={n: f for n, f in functions.items() if n not in dependent},
+        targets=get_shared_targets(functions, targets, dependent),
+    )
+
+    return shared_executor, dependent
+
+
+def _get_nodes_to_free_after_step(execution_order, arguments_of_functions, keep):
+    """Determine which nodes can be freed after each step of the execution.
+
+    A node can be freed after the step of its last consumer. Nodes without a consumer
+    are freed after the step which computed them. Nodes in ``keep`` are never freed.
+
+    Parameters
+    ----------
+    execution_order : list of str
+        Names of the functions in the order in which they are executed.
+    arguments_of_functions : dict of list of str
+        Arguments of each function.
+    keep : set of str
+        Names of nodes which are never freed.
+
+    Returns
+    -------
+    nodes_to_free : list of list of str
+        Names of the nodes which can be freed after each step.
+
+    """
+    last_step = {}
+    for step, name in enumerate(execution_order):
+        last_step.setdefault(name, step)
+        for arg in arguments_of_functions[name]:
+            last_step[arg] = step
+
+    nodes_to_free = [[] for _ in execution_order]
+    for node, step in last_step.items():
+        if node not in keep:
+            nodes_to_free[step].append(node)
+
+    return nodes_to_free
+
+
+def get_free_arguments(func):
+    """Get the names of the arguments of a function which are not partialled."""
+    arguments = list(inspect.signature(func).parameters)
+    if isinstance(func, functools.partial):
+        non_free = set(func.keywords)
+        arguments = [arg for arg in arguments if arg not in non_free]
+
+    return arguments
+
+
+def get_nbytes(value):
+    """Get the number of bytes of an array, zero for other objects."""
+    return getattr(value, "nbytes", 0)
+
+
+def _fail_if_inputs_are_missing(inputs, arguments):
+    missing = [arg for arg in arguments if arg not in inputs]
+    if missing:
+        raise ValueError(f"The following inputs of the DAG are missing: {missing}")
@@ -1,15 +1,44 @@
+import ast
+import copy
 import datetime
+import functools
+import hashlib
 import importlib.util
 import inspect
+import json
 import sys
+import tempfile
 from collections.abc import Callable
 from pathlib import Path
 from types import ModuleType
-from typing import Literal, TypeAlias
+from typing import Any, Literal, TypeAlias, get_args
 
+import numpy
+
+from _gettsim import config
 from _gettsim.config import PATHS_TO_INTERNAL_FUNCTIONS, RESOURCE_DIR
 
-from .policy_function import PolicyFunction
+from .policy_function import LazyPolicyFunction, PolicyFunction
+
+# Increase when the structure of the manifest changes to invalidate existing manifests.
+_MANIFEST_FORMAT_VERSION = 1
+
+# Manifests of functions, keyed by the hash of their source files.
+_FUNCTION_MANIFESTS: dict[str, dict[str, Any]] = {}
+
+# Types which may be used in the annotations of functions described by the manifest.
+# Functions with other annotations are loaded by importing their module.
+_ANNOTATION_TYPES = {
+    "bool": bool,
+    "dict": dict,
+    "float": float,
+    "int": int,
+    "list": list,
+    "str": str,
+    "tuple": tuple,
+    "numpy.datetime64": numpy.datetime64,
+    "numpy.ndarray": numpy.ndarray,
+}
 
 
 def load_functions_for_date(date: datetime.date) -> list[PolicyFunction]:
@@ -29,10 +58,38 @@ def load_functions_for_date(date: datetime.date) -> list[PolicyFunction]:
     return [f for f in _load_internal_functions() if f.is_active_at_date(date)]
 
 
+def load_functions_for_dates(
+    dates: list[datetime.date],
+) -> dict[datetime.date, list[PolicyFunction]]:
+    """
+    Load policy functions that are active at several dates.
+
+    The functions are loaded once and the same objects are returned for all dates at
+    which they are active.
+
+    Parameters
+    ----------
+    dates:
+        The dates for which policy functions should be loaded.
+
+    Returns
+    -------
+    functions:
+        A mapping from each date to the policy functions that are active at this date.
+    """
+    all_functions = _load_internal_functions()
+    return {
+        date: [f for f in all_functions if f.is_active_at_date(date)] for date in dates
+    }
+
+
 def _load_internal_functions() -> list[PolicyFunction]:
     """
     Load all internal policy functions.
 
+    The functions are created from the manifest of internal functions, so their modules
+    are only imported when the functions are used.
+
     Returns
     -------
     functions:
@@ -49,6 +106,12 @@ def _load_functions(
     """
     Load policy functions reachable from the given roots.
 
+    Functions defined in the modules are created from the manifest of the modules, see
+    :func:`load_function_manifest`, so the modules are only imported when the functions
+    are used. Functions of modules which the manifest cannot describe are loaded by
+    importing the module. Imported functions are not part of the manifest, so all
+    modules are imported if they are requested.
+
     Parameters
     ----------
     roots:
@@ -65,15 +128,27 @@ def _load_functions(
     functions:
         Loaded policy functions.
     """
-    roots = roots if isinstance(roots, list) else [roots]
-    paths = _find_python_files_recursively(roots)
+    if include_imported_functions:
+        roots = roots if isinstance(roots, list) else [roots]
+        return [
+            function
+            for path in _find_python_files_recursively(roots)
+            for function in _load_functions_in_module(path, package_root, True)
+        ]
+
+    manifest = load_function_manifest(roots, package_root)
 
     result = []
 
-    for path in paths:
-        result.extend(
-            _load_functions_in_module(path, package_root, include_imported_functions)
-        )
+    for module in manifest["modules"]:
+        if module["functions"] is None:
+            path = package_root.parent / module["path"]
+            result.extend(_load_functions_in_module(path, package_root, False))
+        else:
+            result.extend(
+                _create_lazy_policy_function(module["module"], description)
+                for description in module["functions"]
+            )
 
     return result
 
@@ -185,18 +260,21 @@ def _create_policy_function_from_decorated_callable(
         The policy function.
     """
 
+    return PolicyFunction(
+        function=function,
+        module_name=_clean_module_name(module_name),
+    )
+
+
+def _clean_module_name(module_name: str) -> str:
+    """Remove the prefixes of the package and its top-level directories."""
     # Only needed until the directory structure is cleaned up
-    clean_module_name = (
+    return (
         module_name.removeprefix("_gettsim.")
         .removeprefix("taxes.")
         .removeprefix("transfers.")
     )
 
-    return PolicyFunction(
-        function=function,
-        module_name=clean_module_name,
-    )
-
 
 def _is_function_defined_in_module(function: Callable, module: ModuleType) -> bool:
     """Check if a function is defined in a specific module or only imported."""
@@ -210,8 +288,13 @@ def load_internal_aggregation_dict(variant: _AggregationVariant):
     """
     Load a dictionary with all aggregations by group or person that are defined for
     internal functions.
+
+    The dictionaries are taken from the manifest of internal functions, so the modules
+    are not imported.
     """
-    return _load_aggregation_dict(PATHS_TO_INTERNAL_FUNCTIONS, RESOURCE_DIR, variant)
+    return _load_aggregation_dict_from_manifest(
+        PATHS_TO_INTERNAL_FUNCTIONS, RESOURCE_DIR, variant
+    )
 
 
 def _load_aggregation_dict(
@@ -230,6 +313,33 @@ def _load_aggregation_dict(
     for path in paths:
         dicts.extend(_load_dicts_in_module(path, package_root, f"{variant}_"))
 
+    return _combine_aggregation_dicts(dicts, variant)
+
+
+def _load_aggregation_dict_from_manifest(
+    roots: list[Path], package_root: Path, variant: _AggregationVariant
+):
+    """
+    Load a dictionary with all aggregations by group or person reachable from the given
+    roots using their manifest.
+    """
+    manifest = load_function_manifest(roots, package_root)
+
+    # Load dictionaries
+    dicts = []
+
+    for module in manifest["modules"]:
+        if module["aggregation_dicts"] is None:
+            path = package_root.parent / module["path"]
+            dicts.extend(_load_dicts_in_module(path, package_root, f"{variant}_"))
+        else:
+            dicts.extend(copy.deepcopy(module["aggregation_dicts"][variant]))
+
+    return _combine_aggregation_dicts(dicts, variant)
+
+
+def _combine_aggregation_dicts(dicts: list[dict], variant: _AggregationVariant):
+    """Combine dictionaries with aggregations after checking for duplicate keys."""
     # Check for duplicate keys
     all_keys = [k for dict_ in dicts for k in dict_]
     if len(all_keys) != len(set(all_keys)):
@@ -270,3 +380,293 @@ def _load_dicts_in_module(
         for name, member in inspect.getmembers(module)
         if isinstance(member, dict) and name.startswith(prefix_filter)
     ]
+
+
+def load_function_manifest(
+    roots: Path | list[Path] = PATHS_TO_INTERNAL_FUNCTIONS,
+    package_root: Path = RESOURCE_DIR,
+) -> dict[str, Any]:
+    """
+    Load the manifest of the policy functions reachable from the given roots.
+
+    The manifest describes the functions and the aggregation dictionaries defined in
+    each module, so policy environments can be set up without importing the modules.
+    It is built by importing all modules once and kept in memory and on disk in
+    :data:`_gettsim.config.FUNCTION_MANIFEST_DIR`. Manifests are keyed by the SHA-256
+    hash of the source files, so they are rebuilt whenever a module changes.
+
+    Parameters
+    ----------
+    roots:
+        The roots from which to start the search for policy functions.
+    package_root:
+        The root of the package that contains the functions. It must contain all roots.
+
+    Returns
+    -------
+    manifest:
+        A dictionary with the key "modules", a list with one description per module.
+        Each description contains the qualified name of the module, the path relative
+        to the parent of the package root, the descriptions of its functions, and its
+        aggregation dictionaries. The functions or the aggregation dictionaries are
+        `None` if they cannot be described without importing the module. The manifest
+        is shared by all callers and must not be modified.
+    """
+    roots = roots if isinstance(roots, list) else [roots]
+    paths = _find_python_files_recursively(roots)
+    manifest_hash = _hash_source_files(paths, package_root)
+
+    if manifest_hash not in _FUNCTION_MANIFESTS:
+        manifest_file = (
+            Path(config.FUNCTION_MANIFEST_DIR)
+            / f"manifest-{manifest_hash}-v{_MANIFEST_FORMAT_VERSION}.json"
+        )
+        manifest = _read_manifest(manifest_file)
+        if manifest is None:
+            manifest = {
+                "modules": [_describe_module(path, package_root) for path in paths]
+            }
+            _write_manifest(manifest_file, manifest)
+        _FUNCTION_MANIFESTS[manifest_hash] = manifest
+
+    return _FUNCTION_MANIFESTS[manifest_hash]
+
+
+def _create_lazy_policy_function(
+    module: str, description: dict[str, Any]
+) -> LazyPolicyFunction:
+    """
+    Create a policy function from its description in the manifest.
+
+    Parameters
+    ----------
+    module:
+        The qualified name of the module in which the function is defined.
+    description:
+        The description of the function in the manifest.
+
+    Returns
+    -------
+    policy_function:
+        The policy function. Its module is imported when the function is used.
+    """
+    info = description["info"]
+    if info is not None:
+        info = {
+            key: datetime.date.fromisoformat(value)
+            if key in {"start_date", "end_date"}
+            else value
+            for key, value in info.items()
+        }
+
+    signature = inspect.Signature(
+        [
+            inspect.Parameter(
+                name,
+                inspect.Parameter.POSITIONAL_OR_KEYWORD,
+                annotation=_evaluate_annotation(annotation),
+            )
+            for name, annotation in description["parameters"]
+        ],
+        return_annotation=_evaluate_annotation(description["return_annotation"]),
+    )
+
+    info_or_empty = {} if info is None else info
+
+    return LazyPolicyFunction(
+        module=module,
+        name_in_module=description["name_in_module"],
+        function_name=description["function_name"],
+        signature=signature,
+        module_name=_clean_module_name(module),
+        name_in_dag=info_or_empty.get("name_in_dag", description["function_name"]),
+        start_date=info_or_empty.get("start_date", datetime.date(1, 1, 1)),
+        end_date=info_or_empty.get("end_date", datetime.date(9999, 12, 31)),
+        params_key_for_rounding=info_or_empty.get("params_key_for_rounding"),
+        skip_vectorization=info_or_empty.get("skip_vectorization", False),
+        info=info,
+    )
+
+
+@functools.lru_cache
+def _evaluate_annotation(annotation: str | None) -> Any:
+    """Recreate an annotation from its source code. `None` stands for no annotation.
+
+    The source code is not evaluated. Only the types in :data:`_ANNOTATION_TYPES`, the
+    subscripts of these types, and `None` are recreated, other annotations raise a
+    ValueError.
+    """
+    if annotation is None:
+        return inspect.Parameter.empty
+    return _recreate_annotation(ast.parse(annotation, mode="eval").body)
+
+
+def _recreate_annotation(node: ast.expr) -> Any:
+    if isinstance(node, ast.Constant) and node.value is None:
+        return None
+    if isinstance(node, ast.Subscript):
+        elements = (
+            node.slice.elts if isinstance(node.slice, ast.Tuple) else [node.slice]
+        )
+        arguments = tuple(_recreate_annotation(element) for element in elements)
+        return _recreate_annotation(node.value)[
+            arguments if len(arguments) > 1 else arguments[0]
+        ]
+    name = ast.unparse(node)
+    if name not in _ANNOTATION_TYPES:
+        raise ValueError(f"Annotation {name} is not supported by the manifest.")
+    return _ANNOTATION_TYPES[name]
+
+
+def _describe_module(path: Path, package_root: Path) -> dict[str, Any]:
+    """
+    Describe the policy functions and aggregation dictionaries defined in a module.
+
+    The module is imported to obtain the information attached to the functions and the
+    aggregation dictionaries. The annotations are taken from the source code.
+
+    Parameters
+    ----------
+    path:
+        The path to the module.
+    package_root:
+        The root of the package that contains the module.
+
+    Returns
+    -------
+    description:
+        The description of the module in the manifest.
+    """
+    module = _load_module(path, package_root)
+    tree = ast.parse(path.read_text(encoding="utf-8"), filename=str(path))
+    definitions = {
+        node.name: node for node in tree.body if isinstance(node, ast.FunctionDef)
+    }
+
+    functions = [
+        _describe_function(name, function, definitions.get(function.__name__))
+        for name, function in inspect.getmembers(module, inspect.isfunction)
+        if _is_function_defined_in_module(function, module)
+    ]
+
+    aggregation_dicts = {
+        variant: [
+            member
+            for name, member in inspect.getmembers(module)
+            if isinstance(member, dict) and name.startswith(f"{variant}_")
+        ]
+        for variant in get_args(_AggregationVariant)
+    }
+
+    return {
+        "module": module.__name__,
+        "path": path.relative_to(package_root.parent).as_posix(),
+        "functions": None if None in functions else functions,
+        "aggregation_dicts": aggregation_dicts
+        if _survives_json_round_trip(aggregation_dicts)
+        else None,
+    }
+
+
+def _describe_function(
+    name: str, function: Callable, definition: ast.FunctionDef | None
+) -> dict[str, Any] | None:
+    """
+    Describe a policy function for the manifest.
+
+    Parameters
+    ----------
+    name:
+        The name under which the function can be accessed in its module.
+    function:
+        The function.
+    definition:
+        The definition of the function in the source code of the module.
+
+    Returns
+    -------
+    description:
+        The description of the function or `None` if the function cannot be recreated
+        from it, e.g., because its annotations refer to names defined in the module.
+    """
+    if definition is None:
+        return None
+
+    info = getattr(function, "__info__", None)
+    description = {
+        "name_in_module": name,
+        "function_name": function.__name__,
+        "parameters": [
+            [arg.arg, None if arg.annotation is None else ast.unparse(arg.annotation)]
+            for arg in definition.args.args
+        ],
+        "return_annotation": None
+        if definition.returns is None
+        else ast.unparse(definition.returns),
+        "info": None
+        if info is None
+        else {
+            key: value.isoformat() if isinstance(value, datetime.date) else value
+            for key, value in info.items()
+        },
+    }
+
+    # Only use descriptions which recreate the function exactly.
+    try:
+        recreated = _create_lazy_policy_function(function.__module__, description)
+    except (TypeError, ValueError):
+        return None
+    if (
+        not _survives_json_round_trip(description)
+        or recreated.__signature__ != inspect.signature(function)
+        or getattr(recreated, "__info__", None) != info
+    ):
+        return None
+
+    return description
+
+
+def _survives_json_round_trip(obj: Any) -> bool:
+    """Check whether an object is unchanged when it is written to and read from JSON."""
+    try:
+        return json.loads(json.dumps(obj)) == obj
+    except (TypeError, ValueError):
+        return False
+
+
+def _hash_source_files(paths: list[Path], package_root: Path) -> str:
+    """Hash the relative paths and the contents of source files."""
+    file_hash = hashlib.sha256()
+    for path in paths:
+        file_hash.update(path.relative_to(package_root.parent).as_posix().encode())
+        file_hash.update(b"\0")
+        file_hash.update(path.read_bytes())
+        file_hash.update(b"\0")
+    return file_hash.hexdigest()
+
+
+def _read_manifest(manifest_file: Path) -> dict[str, Any] | None:
+    """Read a manifest from disk, None if it is missing or broken."""
+    try:
+        manifest = json.loads(manifest_file.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    return manifest if isinstance(manifest, dict) and "modules" in manifest else None
+
+
+def _write_manifest(manifest_file: Path, manifest: dict[str, Any]):
+    """Write a manifest atomically. The manifest on disk is optional, so failures to
+    write it, e.g., in read-only directories, are ignored."""
+    try:
+        manifest_file.parent.mkdir(parents=True, exist_ok=True)
+        with tempfile.NamedTemporaryFile(
+            mode="w",
+            encoding="utf-8",
+            dir=manifest_file.parent,
+            suffix=".tmp",
+            delete=False,
+        ) as f:
+            json.dump(manifest, f)
+        Path(f.name).replace(manifest_file)
+    except OSError:
+        pass
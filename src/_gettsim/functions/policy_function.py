@@ -1,13 +1,29 @@
 from __future__ import annotations
 
+import contextlib
+import copy
 import functools
+import importlib
 import inspect
+import warnings
 from collections.abc import Callable
 from datetime import date
 from typing import Any, TypeVar
 
 import numpy
 
+from _gettsim import config
+from _gettsim.shared import get_values_traced_by_jax, replace_by_path
+from _gettsim.vectorization import make_vectorizable
+from _gettsim.vectorization_numba import (
+    TranslateToNumbaError,
+    get_numba_compilation_errors,
+    make_numba_vectorized,
+)
+
+with contextlib.suppress(ImportError):
+    import jax
+
 T = TypeVar("T")
 
 
@@ -103,25 +119,370 @@ class PolicyFunction(Callable):
         """The name of the wrapped function."""
         return self.function.__name__
 
+    @property
+    def vectorization_strategy(self) -> str | None:
+        """
+        How the function is vectorized. Either "numba" if it is compiled by
+        :func:`make_numba_vectorized`, "ast" if it is translated by
+        :func:`make_vectorizable`, "vectorize" if it falls back to `numpy.vectorize`, or
+        `None` if vectorization is skipped.
+        """
+        return getattr(self.function, "vectorization_strategy", None)
+
+    @property
+    def vectorization_fallback_reason(self) -> str | None:
+        """The reason for falling back to `numpy.vectorize`, if any."""
+        return getattr(self.function, "vectorization_fallback_reason", None)
+
+    @property
+    def numba_fallback_reason(self) -> str | None:
+        """The reason why the function could not be compiled with numba, if any."""
+        return getattr(self.function, "numba_fallback_reason", None)
+
     def is_active_at_date(self, date: date) -> bool:
         """Check if the function is active at a given date."""
         return self.start_date <= date <= self.end_date
 
 
+class LazyPolicyFunction(PolicyFunction):
+    """
+    A policy function whose module is only imported when the function is used.
+
+    All metadata is passed explicitly, usually from the manifest of internal functions,
+    so creating the policy function does not import its module. The module is imported
+    and the function is vectorized when the function is called or accessed the first
+    time.
+
+    Parameters
+    ----------
+    module:
+        The qualified name of the module where the function is defined.
+    name_in_module:
+        The name under which the function can be accessed in the module.
+    function_name:
+        The name of the wrapped function.
+    signature:
+        The signature of the wrapped function.
+    module_name:
+        The name of the module where the function is defined.
+    name_in_dag:
+        The name of the function in the DAG.
+    start_date:
+        The date from which the function is active (inclusive).
+    end_date:
+        The date until which the function is active (inclusive).
+    params_key_for_rounding:
+        The key in the params dictionary that should be used for rounding.
+    skip_vectorization:
+        Whether the function should be vectorized.
+    info:
+        The information attached to the function by `@policy_info` or `None` if the
+        function is not decorated.
+    """
+
+    def __init__(  # noqa: PLR0913
+        self,
+        *,
+        module: str,
+        name_in_module: str,
+        function_name: str,
+        signature: inspect.Signature,
+        module_name: str,
+        name_in_dag: str,
+        start_date: date,
+        end_date: date,
+        params_key_for_rounding: str | None,
+        skip_vectorization: bool,
+        info: dict[str, Any] | None,
+    ):
+        self._module = module
+        self._name_in_module = name_in_module
+
+        # Shared by copies, so the module is imported and the function is vectorized
+        # only once.
+        self._loaded: dict[str, Callable] = {}
+
+        self.skip_vectorization = skip_vectorization
+        self.module_name = module_name
+        self.name_in_dag = name_in_dag
+        self.start_date = start_date
+        self.end_date = end_date
+        self.params_key_for_rounding = params_key_for_rounding
+
+        # Expose the signature of the wrapped function for dependency resolution
+        self.__annotations__ = {
+            name: parameter.annotation
+            for name, parameter in signature.parameters.items()
+            if parameter.annotation is not inspect.Parameter.empty
+        }
+        if signature.return_annotation is not inspect.Signature.empty:
+            self.__annotations__["return"] = signature.return_annotation
+        self.__module__ = module
+        self.__name__ = function_name
+        self.__signature__ = signature
+
+        # Temporary solution until the rest of the interface is updated
+        if info is not None:
+            self.__info__ = info
+
+    def __deepcopy__(self, memo: dict) -> LazyPolicyFunction:
+        # Like deep copies of other policy functions, copies share the wrapped function.
+        return copy.copy(self)
+
+    @property
+    def function(self) -> Callable:
+        """The wrapped function. Its module is imported on first access."""
+        if "function" not in self._loaded:
+            module = importlib.import_module(self._module)
+            function = getattr(module, self._name_in_module)
+            self._loaded["function"] = (
+                function if self.skip_vectorization else _vectorize_func(function)
+            )
+        return self._loaded["function"]
+
+    @property
+    def is_loaded(self) -> bool:
+        """Whether the module of the function has been imported."""
+        return "function" in self._loaded
+
+    @property
+    def original_function_name(self) -> str:
+        """The name of the wrapped function."""
+        return self.__name__
+
+
 def _vectorize_func(func: Callable) -> Callable:
-    # What should work once that Jax backend is fully supported
+    """
+    Vectorize a function which is written for scalar inputs.
+
+    By default, the function is translated by :func:`make_vectorizable`, which replaces
+    if-clauses and Boolean operators by their array counterparts. `numpy.vectorize` is
+    used as a fallback if the translation fails, or if the translated function raises an
+    error or returns an array of the wrong shape when it is called. The strategy in use
+    and the reason for a fallback are stored in the attributes `vectorization_strategy`
+    and `vectorization_fallback_reason` of the returned function.
+
+    With the numba backend, the function is first compiled by
+    :func:`make_numba_vectorized` when it is called. If the compilation fails, the
+    function falls back to the strategies above and the reason is stored in the
+    attribute `numba_fallback_reason`. Errors which the compiled function raises for
+    the data, e.g., for missing keys, are raised again.
+
+    Parameters
+    ----------
+    func:
+        The function to vectorize.
+
+    Returns
+    -------
+    vectorized_func:
+        The vectorized function.
+    """
     signature = inspect.signature(func)
     func_vec = numpy.vectorize(func)
 
+    try:
+        func_ast = make_vectorizable(func, backend="jax" if config.USE_JAX else "numpy")
+    except Exception as e:
+        func_ast = None
+        fallback_reason = f"Translation failed: {_summarize_exception(e)}"
+    else:
+        fallback_reason = None
+
+    @functools.cache
+    def get_func_on_host():
+        # Functions which are called back from compiled JAX functions receive NumPy
+        # arrays, so they are translated for NumPy, if possible.
+        try:
+            func_ast_numpy = make_vectorizable(func, backend="numpy")
+        except Exception:
+            return func_vec
+
+        def func_on_host(*args, **kwargs):
+            if func_on_host.is_translatable:
+                try:
+                    return _call_translated_func(func_ast_numpy, args, kwargs)
+                except Exception:
+                    func_on_host.is_translatable = False
+            return func_vec(*args, **kwargs)
+
+        func_on_host.is_translatable = True
+
+        return func_on_host
+
     @functools.wraps(func)
     def wrapper_vectorize_func(*args, **kwargs):
-        return func_vec(*args, **kwargs)
+        if wrapper_vectorize_func.vectorization_strategy == "numba":
+            try:
+                return _call_numba_func(func, signature, args, kwargs)
+            except get_numba_compilation_errors() as e:
+                wrapper_vectorize_func.vectorization_strategy = (
+                    "vectorize" if func_ast is None else "ast"
+                )
+                wrapper_vectorize_func.numba_fallback_reason = _summarize_exception(e)
+
+        if wrapper_vectorize_func.vectorization_strategy == "vectorize":
+            return _call_numpy_vectorized_func(
+                func_vec, get_func_on_host, signature, args, kwargs
+            )
+
+        try:
+            out = _call_translated_func(func_ast, args, kwargs)
+        except Exception as e:
+            # Errors that are raised by the function itself are raised again here.
+            out = _call_numpy_vectorized_func(
+                func_vec, get_func_on_host, signature, args, kwargs
+            )
+            wrapper_vectorize_func.vectorization_strategy = "vectorize"
+            wrapper_vectorize_func.vectorization_fallback_reason = (
+                f"Call failed: {_summarize_exception(e)}"
+            )
+
+        return out
 
     wrapper_vectorize_func.__signature__ = signature
+    if config.USE_NUMBA:
+        wrapper_vectorize_func.vectorization_strategy = "numba"
+    else:
+        wrapper_vectorize_func.vectorization_strategy = (
+            "vectorize" if func_ast is None else "ast"
+        )
+    wrapper_vectorize_func.vectorization_fallback_reason = fallback_reason
+    wrapper_vectorize_func.numba_fallback_reason = None
 
     return wrapper_vectorize_func
 
 
+def _call_translated_func(func: Callable, args: tuple, kwargs: dict) -> Any:
+    """
+    Call a function translated by :func:`make_vectorizable` and check its output.
+
+    All branches of if-clauses are evaluated for all elements, so floating point
+    warnings are suppressed, while deprecation warnings are raised as errors. Scalar
+    outputs (e.g., of functions which only depend on parameters in some branches) are
+    broadcast to the shape of the inputs.
+    """
+    shape = numpy.broadcast_shapes(
+        *(a.shape for a in (*args, *kwargs.values()) if hasattr(a, "shape"))
+    )
+
+    with (
+        numpy.errstate(divide="ignore", invalid="ignore", over="ignore"),
+        warnings.catch_warnings(),
+    ):
+        # Converting arrays to scalars works for arrays of size 1 only, which would
+        # make the result depend on the number of rows.
+        warnings.simplefilter("error", DeprecationWarning)
+        out = func(*args, **kwargs)
+
+    out_shape = numpy.shape(out)
+    if out_shape == ():
+        out = config.numpy_or_jax.full(shape, out)
+    elif out_shape != shape:
+        raise ValueError(f"Output has shape {out_shape} instead of {shape}.")
+
+    return out
+
+
+def _call_numpy_vectorized_func(
+    func_vec: Callable,
+    get_func_on_host: Callable,
+    signature: inspect.Signature,
+    args: tuple,
+    kwargs: dict,
+) -> Any:
+    """
+    Call a function vectorized by `numpy.vectorize`.
+
+    If arguments or parameters are traced by JAX, the function returned by
+    `get_func_on_host` is called back on the host with their values instead. The dtype
+    of the output is determined by the return annotation of the function. The function
+    is evaluated with the NumPy backend, because it must not call JAX. JAX does not
+    support dates, so they are passed as days since 1970-01-01.
+    """
+    arguments = signature.bind(*args, **kwargs).arguments
+    traced = get_values_traced_by_jax(arguments)
+    if not traced:
+        return func_vec(*args, **kwargs)
+
+    return_type = _get_type_name(signature.return_annotation)
+    if return_type not in {"bool", "int", "float", "datetime64"}:
+        raise TypeError(
+            "Functions which are called back from compiled functions must be annotated "
+            "with a return type in {bool, int, float, numpy.datetime64}, not "
+            f"{signature.return_annotation}."
+        )
+    result_shape = jax.ShapeDtypeStruct(
+        numpy.broadcast_shapes(
+            *(numpy.shape(v) for k, v in arguments.items() if not k.endswith("_params"))
+        ),
+        jax.dtypes.canonicalize_dtype(
+            "int" if return_type == "datetime64" else return_type
+        ),
+    )
+    date_arguments = {
+        k
+        for k in arguments
+        if (k,) in traced
+        and _get_type_name(signature.parameters[k].annotation) == "datetime64"
+    }
+
+    def callback(traced_values):
+        values = dict(arguments)
+        for path, value in zip(traced, traced_values, strict=True):
+            values = replace_by_path(values, path, numpy.asarray(value))
+        for k in date_arguments:
+            values[k] = values[k].astype("datetime64[D]")
+        with config.numpy_backend():
+            out = get_func_on_host()(**values)
+        out = numpy.broadcast_to(numpy.asarray(out), result_shape.shape)
+        if return_type == "datetime64":
+            out = out.astype("datetime64[D]").astype(numpy.int64)
+        return out.astype(result_shape.dtype)
+
+    return jax.pure_callback(
+        callback, result_shape, list(traced.values()), vmap_method="sequential"
+    )
+
+
+def _get_type_name(annotation: Any) -> str:
+    """Get the name of a type annotation, which may be a string."""
+    name = getattr(annotation, "__name__", str(annotation))
+    return name.rsplit(".", maxsplit=1)[-1]
+
+
+def _call_numba_func(
+    func: Callable, signature: inspect.Signature, args: tuple, kwargs: dict
+) -> Any:
+    """
+    Compile a function with numba and call it.
+
+    Arguments which are dictionaries hold parameters and are compiled into the function
+    as constants. All other arguments are passed to the compiled ufunc.
+    """
+    arguments = signature.bind(*args, **kwargs).arguments
+    params = {k: v for k, v in arguments.items() if isinstance(v, dict)}
+    inputs = [v for k, v in arguments.items() if k not in params]
+    if not inputs:
+        raise TranslateToNumbaError("The function only depends on parameters.")
+
+    out = make_numba_vectorized(func, params)(*inputs)
+
+    shape = numpy.broadcast_shapes(*(numpy.shape(a) for a in inputs))
+    if numpy.shape(out) != shape:
+        raise TranslateToNumbaError(
+            f"Output has shape {numpy.shape(out)} instead of {shape}."
+        )
+
+    return out
+
+
+def _summarize_exception(e: Exception) -> str:
+    """Summarize an exception in one line."""
+    lines = [line.strip() for line in str(e).splitlines() if line.strip()]
+    return f"{type(e).__name__}: {lines[0]}" if lines else type(e).__name__
+
+
 def _first_not_none(*values: T) -> T:
     """
     Return the first value that is not None or raise if all values are None.
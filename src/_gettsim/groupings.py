@@ -1,8 +1,14 @@
-from collections import Counter
+import contextlib
+import functools
 from collections.abc import Callable
 
 import numpy
 
+from _gettsim.shared import is_traced_by_jax
+
+with contextlib.suppress(ImportError):
+    import jax
+
 
 def create_groupings() -> dict[str, Callable]:
     return {
@@ -15,6 +21,36 @@ def create_groupings() -> dict[str, Callable]:
     }
 
 
+def _call_on_host_if_traced(func: Callable) -> Callable:
+    """
+    Call a grouping function on the host if its inputs are traced by JAX.
+
+    The groupings are computed with NumPy, partly in loops whose number of iterations
+    depends on the data, so they cannot be traced. Inside compiled or vectorized
+    functions, they are called back with the values of the inputs instead.
+    """
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        inputs = [*args, *kwargs.values()]
+        if not any(is_traced_by_jax(i) for i in inputs):
+            return func(*args, **kwargs)
+
+        result_shape = jax.ShapeDtypeStruct(
+            (len(inputs[0]),), jax.dtypes.canonicalize_dtype(int)
+        )
+
+        def callback(*args, **kwargs):
+            return numpy.asarray(func(*args, **kwargs), dtype=result_shape.dtype)
+
+        return jax.pure_callback(
+            callback, result_shape, *args, vmap_method="sequential", **kwargs
+        )
+
+    return wrapper
+
+
+@_call_on_host_if_traced
 def bg_id_numpy(
     fg_id: numpy.ndarray[int],
     alter: numpy.ndarray[int],
@@ -26,23 +62,33 @@ def bg_id_numpy(
     # TODO(@MImmesberger): Remove input variable eigenbedarf_gedeckt once
     # Bedarfsgemeinschaften are fully endogenous
     # https://github.com/iza-institute-of-labor-economics/gettsim/issues/763
-    counter = Counter()
-    result = []
+    fg_id = numpy.asarray(fg_id)
 
-    for index, current_fg_id in enumerate(fg_id):
-        current_alter = alter[index]
-        current_eigenbedarf_gedeckt = eigenbedarf_gedeckt[index]
-        # TODO(@MImmesberger): Remove hard-coded number
-        # https://github.com/iza-institute-of-labor-economics/gettsim/issues/668
-        if current_alter < 25 and current_eigenbedarf_gedeckt:
-            counter[current_fg_id] += 1
-            result.append(current_fg_id * 100 + counter[current_fg_id])
-        else:
-            result.append(current_fg_id * 100)
+    # TODO(@MImmesberger): Remove hard-coded number
+    # https://github.com/iza-institute-of-labor-economics/gettsim/issues/668
+    own_bg = (numpy.asarray(alter) < 25) & numpy.asarray(eigenbedarf_gedeckt)
 
-    return numpy.asarray(result)
+    # Children with their own Bedarfsgemeinschaft are numbered consecutively within
+    # their Familiengemeinschaft in order of appearance.
+    fg_id_own_bg = fg_id[own_bg]
+    order = numpy.argsort(fg_id_own_bg, kind="stable")
+    sorted_fg_id = fg_id_own_bg[order]
+    is_first_in_fg = numpy.ones(len(sorted_fg_id), dtype=bool)
+    is_first_in_fg[1:] = sorted_fg_id[1:] != sorted_fg_id[:-1]
+    position = numpy.arange(len(sorted_fg_id))
+    first_position_in_fg = numpy.maximum.accumulate(
+        numpy.where(is_first_in_fg, position, 0)
+    )
+    counter = numpy.empty(len(sorted_fg_id), dtype=numpy.int64)
+    counter[order] = position - first_position_in_fg + 1
 
+    result = fg_id * 100
+    result[own_bg] += counter
 
+    return result
+
+
+@_call_on_host_if_traced
 def eg_id_numpy(
     p_id: numpy.ndarray[int],
     p_id_einstandspartner: numpy.ndarray[int],
@@ -50,28 +96,16 @@ def eg_id_numpy(
     """
     Compute the ID of the Einstandsgemeinschaft for each person.
     """
-    p_id_to_eg_id = {}
-    next_eg_id = 0
-    result = []
-
-    for index, current_p_id in enumerate(p_id):
-        current_p_id_einstandspartner = p_id_einstandspartner[index]
-
-        if (
-            current_p_id_einstandspartner >= 0
-            and current_p_id_einstandspartner in p_id_to_eg_id
-        ):
-            result.append(p_id_to_eg_id[current_p_id_einstandspartner])
-            continue
+    result, _, _ = _assign_ids_to_partners(
+        p_id=p_id,
+        p_id_partner=p_id_einstandspartner,
+        may_join_partner=numpy.ones(len(p_id), dtype=bool),
+    )
 
-        # New Einstandsgemeinschaft
-        result.append(next_eg_id)
-        p_id_to_eg_id[current_p_id] = next_eg_id
-        next_eg_id += 1
-
-    return numpy.asarray(result)
+    return result
 
 
+@_call_on_host_if_traced
 def ehe_id_numpy(
     p_id: numpy.ndarray[int],
     p_id_ehepartner: numpy.ndarray[int],
@@ -79,25 +113,16 @@ def ehe_id_numpy(
     """
     Compute the ID of the Ehe for each person.
     """
-    p_id_to_ehe_id = {}
-    next_ehe_id = 0
-    result = []
-
-    for index, current_p_id in enumerate(p_id):
-        current_p_id_ehepartner = p_id_ehepartner[index]
-
-        if current_p_id_ehepartner >= 0 and current_p_id_ehepartner in p_id_to_ehe_id:
-            result.append(p_id_to_ehe_id[current_p_id_ehepartner])
-            continue
+    result, _, _ = _assign_ids_to_partners(
+        p_id=p_id,
+        p_id_partner=p_id_ehepartner,
+        may_join_partner=numpy.ones(len(p_id), dtype=bool),
+    )
 
-        # New Steuersubjekt
-        result.append(next_ehe_id)
-        p_id_to_ehe_id[current_p_id] = next_ehe_id
-        next_ehe_id += 1
-
-    return numpy.asarray(result)
+    return result
 
 
+@_call_on_host_if_traced
 def fg_id_numpy(  # noqa: PLR0913
     p_id: numpy.ndarray[int],
     hh_id: numpy.ndarray[int],
@@ -108,72 +133,69 @@ def fg_id_numpy(  # noqa: PLR0913
 ) -> numpy.ndarray[int]:
     """
     Compute the ID of the Familiengemeinschaft for each person.
-    """
-    # Build indexes
-    p_id_to_index = {}
-    p_id_to_p_ids_children = {}
-
-    for index, current_p_id in enumerate(p_id):
-        # Fast access from p_id to index
-        p_id_to_index[current_p_id] = index
-
-        # Fast access from p_id to p_ids of children
-        current_p_id_elternteil_1 = p_id_elternteil_1[index]
-        current_p_id_elternteil_2 = p_id_elternteil_2[index]
-
-        if current_p_id_elternteil_1 >= 0:
-            if current_p_id_elternteil_1 not in p_id_to_p_ids_children:
-                p_id_to_p_ids_children[current_p_id_elternteil_1] = []
-            p_id_to_p_ids_children[current_p_id_elternteil_1].append(current_p_id)
-
-        if current_p_id_elternteil_2 >= 0:
-            if current_p_id_elternteil_2 not in p_id_to_p_ids_children:
-                p_id_to_p_ids_children[current_p_id_elternteil_2] = []
-            p_id_to_p_ids_children[current_p_id_elternteil_2].append(current_p_id)
-
-    p_id_to_fg_id = {}
-    next_fg_id = 0
-
-    for index, current_p_id in enumerate(p_id):
-        # Already assigned a fg_id to this p_id via einstandspartner / parent
-        if current_p_id in p_id_to_fg_id:
-            continue
-
-        p_id_to_fg_id[current_p_id] = next_fg_id
-
-        current_hh_id = hh_id[index]
-        current_p_id_einstandspartner = p_id_einstandspartner[index]
-        current_p_id_children = p_id_to_p_ids_children.get(current_p_id, [])
-
-        # Assign fg to einstandspartner
-        if current_p_id_einstandspartner >= 0:
-            p_id_to_fg_id[current_p_id_einstandspartner] = next_fg_id
-
-        # Assign fg to children
-        for current_p_id_child in current_p_id_children:
-            child_index = p_id_to_index[current_p_id_child]
-            child_hh_id = hh_id[child_index]
-            child_alter = alter[child_index]
-            child_p_id_children = p_id_to_p_ids_children.get(current_p_id_child, [])
-
-            if (
-                child_hh_id == current_hh_id
-                # TODO (@MImmesberger): Check correct conditions for grown up children
-                # https://github.com/iza-institute-of-labor-economics/gettsim/pull/509
-                # TODO(@MImmesberger): Remove hard-coded number
-                # https://github.com/iza-institute-of-labor-economics/gettsim/issues/668
-                and child_alter < 25
-                and len(child_p_id_children) == 0
-            ):
-                p_id_to_fg_id[current_p_id_child] = next_fg_id
-
-        next_fg_id += 1
-
-    # Compute result vector
-    result = [p_id_to_fg_id[current_p_id] for current_p_id in p_id]
-    return numpy.asarray(result)
-
 
+    Persons are processed in order of appearance. A person who has not been assigned to
+    a Familiengemeinschaft yet starts a new one, to which their Einstandspartner and
+    their children who live in the same household, are younger than 25 and do not have
+    children themselves are assigned as well. Later assignments take precedence.
+    """
+    p_id = numpy.asarray(p_id)
+    hh_id = numpy.asarray(hh_id)
+    alter = numpy.asarray(alter)
+    p_id_elternteil_1 = numpy.asarray(p_id_elternteil_1)
+    p_id_elternteil_2 = numpy.asarray(p_id_elternteil_2)
+    rows = numpy.arange(len(p_id))
+
+    # Collect edges from the assigning person to the assigned person.
+    partner_row = _rows_of_p_ids(p_id, p_id_einstandspartner)
+    has_partner = partner_row >= 0
+
+    p_ids_parents = numpy.concatenate([p_id_elternteil_1, p_id_elternteil_2])
+    has_children = numpy.isin(p_id, p_ids_parents[p_ids_parents >= 0])
+    parent_rows = _rows_of_p_ids(p_id, p_ids_parents)
+    child_rows = numpy.concatenate([rows, rows])
+    is_child_in_fg = (parent_rows >= 0) & (
+        (hh_id[child_rows] == hh_id[parent_rows])
+        # TODO (@MImmesberger): Check correct conditions for grown up children
+        # https://github.com/iza-institute-of-labor-economics/gettsim/pull/509
+        # TODO(@MImmesberger): Remove hard-coded number
+        # https://github.com/iza-institute-of-labor-economics/gettsim/issues/668
+        & (alter[child_rows] < 25)
+        & ~has_children[child_rows]
+    )
+
+    assigning_rows = numpy.concatenate([rows[has_partner], parent_rows[is_child_in_fg]])
+    assigned_rows = numpy.concatenate(
+        [partner_row[has_partner], child_rows[is_child_in_fg]]
+    )
+
+    # A person starts a new Familiengemeinschaft unless a person who appears earlier
+    # and started a Familiengemeinschaft assigned them to it. The dependencies point to
+    # earlier rows, so the iteration converges to the unique solution after at most as
+    # many steps as the longest chain of such dependencies.
+    is_earlier = assigning_rows < assigned_rows
+    starts_fg = numpy.ones(len(p_id), dtype=bool)
+    while True:
+        is_assigned = numpy.zeros(len(p_id), dtype=bool)
+        is_assigned[assigned_rows[is_earlier & starts_fg[assigning_rows]]] = True
+        if numpy.array_equal(starts_fg, ~is_assigned):
+            break
+        starts_fg = ~is_assigned
+
+    # The last person who assigns someone to their Familiengemeinschaft wins.
+    last_assigning_row = numpy.where(starts_fg, rows, -1)
+    is_effective = starts_fg[assigning_rows]
+    numpy.maximum.at(
+        last_assigning_row,
+        assigned_rows[is_effective],
+        assigning_rows[is_effective],
+    )
+
+    next_fg_id = numpy.cumsum(starts_fg) - 1
+    return next_fg_id[last_assigning_row]
+
+
+@_call_on_host_if_traced
 def sn_id_numpy(
     p_id: numpy.ndarray[int],
     p_id_ehepartner: numpy.ndarray[int],
@@ -182,41 +204,35 @@ def sn_id_numpy(
     """
     Compute a Steuernummer (ID) for each person / couple.
     """
-    p_id_to_sn_id = {}
-    p_id_to_gemeinsam_veranlagt = {}
-    next_sn_id = 0
-    result = []
-
-    for index, current_p_id in enumerate(p_id):
-        current_p_id_ehepartner = p_id_ehepartner[index]
-        current_gemeinsam_veranlagt = gemeinsam_veranlagt[index]
-
-        if current_p_id_ehepartner >= 0 and current_p_id_ehepartner in p_id_to_sn_id:
-            gemeinsam_veranlagt_ehepartner = p_id_to_gemeinsam_veranlagt[
-                current_p_id_ehepartner
-            ]
-
-            if current_gemeinsam_veranlagt != gemeinsam_veranlagt_ehepartner:
-                message = (
-                    f"{current_p_id_ehepartner} and {current_p_id} are "
-                    "married, but have different values for "
-                    "gemeinsam_veranlagt."
-                )
-                raise ValueError(message)
-
-            if current_gemeinsam_veranlagt:
-                result.append(p_id_to_sn_id[current_p_id_ehepartner])
-                continue
-
-        # New Steuersubjekt
-        result.append(next_sn_id)
-        p_id_to_sn_id[current_p_id] = next_sn_id
-        p_id_to_gemeinsam_veranlagt[current_p_id] = current_gemeinsam_veranlagt
-        next_sn_id += 1
-
-    return numpy.asarray(result)
-
-
+    gemeinsam_veranlagt = numpy.asarray(gemeinsam_veranlagt)
+    result, starts_group, partner_row = _assign_ids_to_partners(
+        p_id=p_id,
+        p_id_partner=p_id_ehepartner,
+        may_join_partner=gemeinsam_veranlagt,
+    )
+
+    # Spouses must agree on filing jointly.
+    rows = numpy.arange(len(p_id))
+    has_earlier_partner_with_own_sn = (
+        (partner_row >= 0) & (partner_row < rows) & starts_group[partner_row]
+    )
+    conflicting_rows = rows[
+        has_earlier_partner_with_own_sn
+        & (gemeinsam_veranlagt != gemeinsam_veranlagt[partner_row])
+    ]
+    if len(conflicting_rows) > 0:
+        row = conflicting_rows[0]
+        message = (
+            f"{p_id[partner_row[row]]} and {p_id[row]} are "
+            "married, but have different values for "
+            "gemeinsam_veranlagt."
+        )
+        raise ValueError(message)
+
+    return result
+
+
+@_call_on_host_if_traced
 def wthh_id_numpy(
     hh_id: numpy.ndarray[int],
     wohngeld_vorrang_bg: numpy.ndarray[bool],
@@ -225,11 +241,91 @@ def wthh_id_numpy(
     """
     Compute the ID of the wohngeldrechtlicher Teilhaushalt.
     """
-    result = []
-    for index, current_hh_id in enumerate(hh_id):
-        if wohngeld_vorrang_bg[index] or wohngeld_kinderzuschl_vorrang_bg[index]:
-            result.append(current_hh_id * 100 + 1)
-        else:
-            result.append(current_hh_id * 100)
+    wohngeld_vorrang = numpy.asarray(wohngeld_vorrang_bg) | numpy.asarray(
+        wohngeld_kinderzuschl_vorrang_bg
+    )
+    return numpy.asarray(hh_id) * 100 + wohngeld_vorrang
+
 
-    return numpy.asarray(result)
+def _assign_ids_to_partners(
+    p_id: numpy.ndarray[int],
+    p_id_partner: numpy.ndarray[int],
+    may_join_partner: numpy.ndarray[bool],
+) -> tuple[numpy.ndarray[int], numpy.ndarray[bool], numpy.ndarray[int]]:
+    """
+    Assign a common ID to partners.
+
+    Persons are processed in order of appearance. A person joins the group of their
+    partner if they may do so and the partner appeared earlier and started a group.
+    Otherwise, they start a new group. Groups are numbered consecutively.
+
+    Parameters
+    ----------
+    p_id:
+        The IDs of the persons.
+    p_id_partner:
+        The IDs of the partners or a negative number if there is no partner.
+    may_join_partner:
+        Whether a person may join the group of their partner.
+
+    Returns
+    -------
+    ids:
+        The IDs of the groups.
+    starts_group:
+        Whether a person started a new group.
+    partner_row:
+        The row of the partner or -1 if the partner is not in the data.
+    """
+    p_id = numpy.asarray(p_id)
+    partner_row = _rows_of_p_ids(p_id, p_id_partner)
+    rows = numpy.arange(len(p_id))
+    can_join = (
+        numpy.asarray(may_join_partner) & (partner_row >= 0) & (partner_row < rows)
+    )
+
+    # Whether a person joins depends on whether their partner, who appears earlier,
+    # joined someone else. For consistent data, this takes a single iteration.
+    joins_partner = numpy.zeros(len(p_id), dtype=bool)
+    while True:
+        new_joins_partner = can_join & ~joins_partner[partner_row]
+        if numpy.array_equal(new_joins_partner, joins_partner):
+            break
+        joins_partner = new_joins_partner
+
+    starts_group = ~joins_partner
+    ids = numpy.cumsum(starts_group) - 1
+    ids[joins_partner] = ids[partner_row[joins_partner]]
+
+    return ids, starts_group, partner_row
+
+
+def _rows_of_p_ids(
+    p_id: numpy.ndarray[int], p_ids_to_find: numpy.ndarray[int]
+) -> numpy.ndarray[int]:
+    """
+    Find the rows of persons by their IDs.
+
+    Parameters
+    ----------
+    p_id:
+        The unique IDs of all persons.
+    p_ids_to_find:
+        The IDs to look up.
+
+    Returns
+    -------
+    rows:
+        The rows of the persons or -1 for IDs that are negative or do not exist.
+    """
+    p_id = numpy.asarray(p_id)
+    p_ids_to_find = numpy.asarray(p_ids_to_find)
+    if len(p_id) == 0:
+        return numpy.full(len(p_ids_to_find), -1)
+
+    sorter = numpy.argsort(p_id)
+    positions = numpy.searchsorted(p_id, p_ids_to_find, sorter=sorter)
+    positions = numpy.minimum(positions, len(p_id) - 1)
+    rows = sorter[positions]
+    found = (p_ids_to_find >= 0) & (p_id[rows] == p_ids_to_find)
+    return numpy.where(found, rows, -1)
@@ -2,11 +2,14 @@ import copy
 import functools
 import inspect
 import warnings
+import weakref
+from collections.abc import Callable
 from typing import Literal, get_args
 
 import dags
 import pandas as pd
 
+from _gettsim import config
 from _gettsim.config import (
     DEFAULT_TARGETS,
     FOREIGN_KEYS,
@@ -14,6 +17,7 @@ from _gettsim.config import (
     TYPES_INPUT_VARIABLES,
 )
 from _gettsim.config import numpy_or_jax as np
+from _gettsim.execution import JitExecutor, MemoryAwareExecutor
 from _gettsim.gettsim_typing import (
     check_series_has_expected_type,
     convert_series_to_internal_type,
@@ -39,6 +43,7 @@ def compute_taxes_and_transfers(  # noqa: PLR0913
     check_minimal_specification="ignore",
     rounding=True,
     debug=False,
+    jit=False,
 ):
     """Compute taxes and transfers.
 
@@ -63,6 +68,9 @@ def compute_taxes_and_transfers(  # noqa: PLR0913
         1. All necessary inputs and all computed variables are returned.
         2. If an exception occurs while computing one variable, the exception is
            skipped.
+    jit : bool, default False
+        Indicator for whether all functions are compiled together with `jax.jit`.
+        Requires the JAX backend. See :func:`prepare_taxes_and_transfers`.
 
     Returns
     -------
@@ -70,28 +78,345 @@ def compute_taxes_and_transfers(  # noqa: PLR0913
         DataFrame containing computed variables.
 
     """
+    # Process data and prepare the computations for its columns.
+    data = process_and_check_data(data=data)
+    plan = prepare_taxes_and_transfers(
+        environment=environment,
+        data_cols=list(data),
+        targets=targets,
+        check_minimal_specification=check_minimal_specification,
+        rounding=rounding,
+        jit=jit,
+    )
+
+    return plan._compute(data, debug=debug)  # noqa: SLF001
+
+
+def prepare_taxes_and_transfers(  # noqa: PLR0913
+    environment: PolicyEnvironment,
+    data_cols,
+    targets=None,
+    check_minimal_specification="ignore",
+    rounding=True,
+    jit=False,
+) -> "TaxTransferPlan":
+    """Prepare the computation of taxes and transfers for data with given columns.
 
+    All work that does not depend on the values of the data is done once: deriving
+    functions, setting up the DAG, adding rounding, partialling parameters, and
+    concatenating the functions. The returned plan can be called repeatedly on data
+    with the same columns, e.g., on chunks of a large dataset.
+
+    Parameters
+    ----------
+    environment:
+        The policy environment which contains all necessary functions and parameters.
+    data_cols : list of str
+        Names of the columns of the data the plan will be called with.
+    targets : str, list of str, default None
+        String or list of strings with names of functions whose output is actually
+        needed by the user. By default, ``targets`` is ``None`` and all key outputs as
+        defined by `gettsim.config.DEFAULT_TARGETS` are returned.
+    check_minimal_specification : {"ignore", "warn", "raise"}, default "ignore"
+        Indicator for whether checks which ensure the most minimal configuration should
+        be silenced, emitted as warnings or errors.
+    rounding : bool, default True
+        Indicator for whether rounding should be applied as specified in the law.
+    jit : bool, default False
+        Indicator for whether all functions are compiled together with `jax.jit`.
+        Requires the JAX backend. The compiled function is shared by all plans for the
+        same environment, targets, columns, and rounding, and it is stored in JAX's
+        persistent compilation cache. Intermediate results are not compiled.
+
+    Returns
+    -------
+    plan : TaxTransferPlan
+        Callable which computes taxes and transfers for data with columns `data_cols`.
+
+    """
     targets = DEFAULT_TARGETS if targets is None else targets
     targets = parse_to_list_of_strings(targets, "targets")
-    params = environment.params
+    data_cols = parse_to_list_of_strings(data_cols, "data_cols")
+
+    necessary_functions, functions_overridden = _get_necessary_functions(
+        environment=environment,
+        targets=targets,
+        data_cols=data_cols,
+        check_minimal_specification=check_minimal_specification,
+    )
+
+    processed_functions = _round_and_partial_parameters_to_functions(
+        necessary_functions, environment.params, rounding
+    )
+
+    # Determine the required input data.
+    root_nodes = _get_root_nodes(
+        data_cols=data_cols,
+        processed_functions=processed_functions,
+        targets=targets,
+        columns_overriding_functions=set(functions_overridden),
+        check_minimal_specification=check_minimal_specification,
+    )
+
+    if jit:
+        executor = _get_jit_executor(
+            environment=environment,
+            processed_functions=processed_functions,
+            targets=targets,
+            data_cols=data_cols,
+            rounding=rounding,
+        )
+    else:
+        executor = MemoryAwareExecutor(functions=processed_functions, targets=targets)
+
+    return TaxTransferPlan(
+        data_cols=data_cols,
+        targets=targets,
+        necessary_functions=necessary_functions,
+        functions=processed_functions,
+        functions_overridden=functions_overridden,
+        root_nodes=root_nodes,
+        rounding=rounding,
+        executor=executor,
+    )
+
+
+class TaxTransferPlan:
+    """
+    The computation of taxes and transfers prepared for data with given columns.
+
+    Create it with :func:`prepare_taxes_and_transfers`. Calling the plan only checks
+    and converts the data before executing the prepared functions.
+
+    Computations which evaluate parts of the functions several times, e.g., for
+    scenarios of the parameters, use the prepared functions and the methods of the plan
+    to convert the data and to create the inputs.
+
+    Parameters
+    ----------
+    data_cols : list of str
+        Names of the columns of the data the plan can be called with.
+    targets : list of str
+        Names of the computed variables.
+    necessary_functions : dict of callable
+        Functions which are ancestors of the targets, without rounding and parameters.
+    functions : dict of callable
+        The necessary functions with rounding and partialled parameters.
+    functions_overridden : dict of callable
+        Functions which are overridden by data columns.
+    root_nodes : set of str
+        Names of the data columns which are inputs of the computations.
+    rounding : bool
+        Indicator for whether rounding is applied as specified in the law.
+    executor : MemoryAwareExecutor or JitExecutor
+        Executor computing the targets from the root nodes.
+    """
+
+    def __init__(  # noqa: PLR0913
+        self,
+        *,
+        data_cols: list[str],
+        targets: list[str],
+        necessary_functions: dict[str, Callable],
+        functions: dict[str, Callable],
+        functions_overridden: dict[str, Callable],
+        root_nodes: set[str],
+        rounding: bool,
+        executor: MemoryAwareExecutor | JitExecutor,
+    ):
+        self.data_cols = data_cols
+        self.targets = targets
+        self.necessary_functions = necessary_functions
+        self.functions = functions
+        self.functions_overridden = functions_overridden
+        self.root_nodes = root_nodes
+        self.rounding = rounding
+        self.executor = executor
+
+    @property
+    def peak_bytes(self):
+        """Maximum number of bytes held in arrays during the last call of the plan.
+
+        Intermediate results are freed after their last use unless the plan is called
+        in debug mode.
+
+        """
+        return self.executor.peak_bytes
+
+    def __call__(self, data, debug=False):
+        """Compute taxes and transfers.
+
+        Parameters
+        ----------
+        data : pandas.Series or pandas.DataFrame or dict of pandas.Series
+            Data provided by the user. Must have the columns the plan was prepared for.
+        debug : bool
+            If True, all necessary inputs and all computed variables are returned.
+
+        Returns
+        -------
+        results : pandas.DataFrame
+            DataFrame containing computed variables.
+
+        """
+        data = process_and_check_data(data=data)
+        return self._compute(data, debug=debug)
+
+    def convert_data(self, data):
+        """Convert columns of checked data to the types expected by the functions.
+
+        Parameters
+        ----------
+        data : dict of pandas.Series
+            Data checked with :func:`process_and_check_data`. It may contain only some
+            of the columns of the plan.
+
+        Returns
+        -------
+        data : dict of pandas.Series
+            Data with converted types.
+
+        """
+        return _convert_data_to_correct_types(data, self.functions_overridden)
+
+    def create_input_data(self, data):
+        """Select the inputs of the computations from converted data.
+
+        Parameters
+        ----------
+        data : dict of pandas.Series
+            Data converted with :meth:`convert_data`.
+
+        Returns
+        -------
+        input_data : dict of numpy.ndarray
+            Values of the root nodes.
+
+        """
+        return _create_input_data(data, self.root_nodes)
+
+    def process_functions(self, names, params):
+        """Add rounding and partial other parameters into necessary functions.
+
+        Parameters
+        ----------
+        names : iterable of str
+            Names of the necessary functions.
+        params : dict
+            Dictionary of parameters, e.g., of another scenario than the one the plan
+            was prepared for.
+
+        Returns
+        -------
+        functions : dict of callable
+            The functions with rounding and partialled parameters.
+
+        """
+        return _round_and_partial_parameters_to_functions(
+            {name: self.necessary_functions[name] for name in names},
+            params,
+            self.rounding,
+        )
+
+    def prepare_results(self, results, data, debug=False):
+        """Collect the results of the targets in a DataFrame.
+
+        Parameters
+        ----------
+        results : dict of numpy.ndarray
+            Results of the targets.
+        data : dict of pandas.Series
+            Data converted with :meth:`convert_data`.
+        debug : bool
+            If True, the data is returned, too.
+
+        Returns
+        -------
+        results : pandas.DataFrame
+            DataFrame containing computed variables.
+
+        """
+        return _prepare_results(results, data, debug)
+
+    def _compute(self, data, debug):
+        _fail_if_data_columns_differ_from_plan(data, self.data_cols)
+        data = self.convert_data(data)
+
+        input_data = self.create_input_data(data)
+        results = self.executor(input_data, keep_intermediates=debug)
+        results = {target: results[target] for target in self.targets}
+
+        return self.prepare_results(results, data, debug)
+
+
+# Compiled executors by policy environment. They are dropped with the environment.
+_JIT_EXECUTORS = weakref.WeakKeyDictionary()
 
-    # Process data and load dictionaries with functions.
-    data = _process_and_check_data(data=data)
+
+def _get_jit_executor(environment, processed_functions, targets, data_cols, rounding):
+    """Get the compiled executor for the environment, targets, columns, and rounding.
+
+    The executor is created once, so that its compiled functions are reused.
+
+    """
+    if not config.USE_JAX:
+        raise ValueError(
+            "Compiling the functions with 'jit=True' requires the JAX backend. Call "
+            "'_gettsim.config.set_array_backend(\"jax\")' first."
+        )
+
+    executors = _JIT_EXECUTORS.setdefault(environment, {})
+    key = (tuple(targets), tuple(sorted(data_cols)), rounding)
+    if key not in executors:
+        executors[key] = JitExecutor(
+            MemoryAwareExecutor(functions=processed_functions, targets=targets)
+        )
+
+    return executors[key]
+
+
+def _get_necessary_functions(
+    environment, targets, data_cols, check_minimal_specification
+):
+    """Get the functions which are necessary to compute the targets from the data.
+
+    Warns if columns of the data override functions.
+
+    Parameters
+    ----------
+    environment:
+        The policy environment which contains all necessary functions and parameters.
+    targets : list of str
+        Names of functions whose output is actually needed by the user.
+    data_cols : list of str
+        Names of the columns in the data provided by the user.
+    check_minimal_specification : {"ignore", "warn", "raise"}, default "ignore"
+        Indicator for whether checks which ensure the most minimal configuration should
+        be silenced, emitted as warnings or errors.
+
+    Returns
+    -------
+    necessary_functions : dict of callable
+        Functions which are ancestors of the targets, without rounding and parameters.
+    functions_overridden : dict of callable
+        Functions which are overridden by data columns.
+
+    """
+    # Load dictionaries with functions.
     functions_not_overridden, functions_overridden = (
         check_functions_and_differentiate_types(
             environment=environment,
             targets=targets,
-            data_cols=list(data),
+            data_cols=data_cols,
         )
     )
-    data = _convert_data_to_correct_types(data, functions_overridden)
     columns_overriding_functions = set(functions_overridden)
 
     # Warn if columns override functions.
     if columns_overriding_functions:
         warnings.warn(
             FunctionsAndColumnsOverlapWarning(columns_overriding_functions),
-            stacklevel=2,
+            stacklevel=3,
         )
 
     # Select necessary nodes by creating a preliminary DAG.
@@ -105,34 +430,7 @@ def compute_taxes_and_transfers(  # noqa: PLR0913
         f_name: f for f_name, f in functions_not_overridden.items() if (f_name in nodes)
     }
 
-    processed_functions = _round_and_partial_parameters_to_functions(
-        necessary_functions, params, rounding
-    )
-
-    # Create input data.
-    input_data = _create_input_data(
-        data=data,
-        processed_functions=processed_functions,
-        targets=targets,
-        columns_overriding_functions=columns_overriding_functions,
-        check_minimal_specification=check_minimal_specification,
-    )
-
-    # Calculate results.
-    tax_transfer_function = dags.concatenate_functions(
-        processed_functions,
-        targets,
-        return_type="dict",
-        aggregator=None,
-        enforce_signature=True,
-    )
-
-    results = tax_transfer_function(**input_data)
-
-    # Prepare results.
-    prepared_results = _prepare_results(results, data, debug)
-
-    return prepared_results
+    return necessary_functions, functions_overridden
 
 
 def set_up_dag(
@@ -179,7 +477,7 @@ def set_up_dag(
     return dag
 
 
-def _process_and_check_data(data):
+def process_and_check_data(data):
     """Process data and perform several checks.
 
     Parameters
@@ -266,8 +564,7 @@ def _convert_data_to_correct_types(data, functions_overridden):
                     series, internal_type
                 )
                 collected_conversions.append(
-                    f" - {column_name} from {series.dtype} "
-                    f"to {internal_type.__name__}"
+                    f" - {column_name} from {series.dtype} to {internal_type.__name__}"
                 )
 
             except ValueError as e:
@@ -295,22 +592,19 @@ def _convert_data_to_correct_types(data, functions_overridden):
     return data
 
 
-def _create_input_data(
-    data,
+def _get_root_nodes(
+    data_cols,
     processed_functions,
     targets,
     columns_overriding_functions,
     check_minimal_specification="ignore",
 ):
-    """Create input data for use in the calculation of taxes and transfers by:
-
-    - reducing to necessary data
-    - convert pandas.Series to numpy.array
+    """Determine the data columns which are inputs of the computations and check them.
 
     Parameters
     ----------
-    data : Dict of pandas.Series
-        Data provided by the user.
+    data_cols : list of str
+        Names of the columns in the data provided by the user.
     processed_functions : dict of callable
         Dictionary mapping function names to callables.
     targets : list of str
@@ -325,8 +619,8 @@ def _create_input_data(
 
     Returns
     -------
-    input_data : Dict of numpy.array
-        Data which can be used to calculate taxes and transfers.
+    root_nodes : set of str
+        Names of the nodes of the DAG without predecessors.
 
     """
     # Create dag using processed functions
@@ -337,15 +631,44 @@ def _create_input_data(
         check_minimal_specification=check_minimal_specification,
     )
     root_nodes = {n for n in dag.nodes if list(dag.predecessors(n)) == []}
-    _fail_if_root_nodes_are_missing(root_nodes, data, processed_functions)
-    data = _reduce_to_necessary_data(root_nodes, data, check_minimal_specification)
+    _fail_if_root_nodes_are_missing(root_nodes, data_cols, processed_functions)
+    _fail_if_data_is_unnecessary(root_nodes, data_cols, check_minimal_specification)
+
+    return root_nodes
+
+
+def _create_input_data(data, root_nodes):
+    """Create input data for use in the calculation of taxes and transfers by:
 
-    # Convert series to numpy arrays
-    data = {key: series.values for key, series in data.items()}
+    - reducing to necessary data
+    - convert pandas.Series to numpy.array
+
+    Parameters
+    ----------
+    data : Dict of pandas.Series
+        Data provided by the user.
+    root_nodes : set of str
+        Names of the data columns which are inputs of the computations.
+
+    Returns
+    -------
+    input_data : Dict of numpy.array
+        Data which can be used to calculate taxes and transfers.
 
-    # Restrict to root nodes
-    input_data = {k: v for k, v in data.items() if k in root_nodes}
-    return input_data
+    """
+    return {k: series.values for k, series in data.items() if k in root_nodes}
+
+
+def _fail_if_data_columns_differ_from_plan(data, data_cols):
+    """Check that the data has the columns the computations were prepared for."""
+    if set(data) != set(data_cols):
+        missing = format_list_linewise(sorted(set(data_cols) - set(data)))
+        additional = format_list_linewise(sorted(set(data) - set(data_cols)))
+        raise ValueError(
+            "The columns of 'data' differ from the columns the computations were "
+            f"prepared for.\n\nMissing columns:\n{missing}\n\n"
+            f"Additional columns:\n{additional}"
+        )
 
 
 class FunctionsAndColumnsOverlapWarning(UserWarning):
@@ -508,9 +831,9 @@ def _fail_if_root_nodes_are_missing(root_nodes, data, functions):
         raise ValueError(f"The following data columns are missing.\n{formatted}")
 
 
-def _reduce_to_necessary_data(root_nodes, data, check_minimal_specification):
+def _fail_if_data_is_unnecessary(root_nodes, data_cols, check_minimal_specification):
     # Produce warning or fail if more than necessary data is given.
-    unnecessary_data = set(data) - root_nodes
+    unnecessary_data = set(data_cols) - root_nodes
     formatted = format_list_linewise(unnecessary_data)
     message = f"The following columns in 'data' are unused.\n\n{formatted}"
     if unnecessary_data and check_minimal_specification == "warn":
@@ -518,8 +841,6 @@ def _reduce_to_necessary_data(root_nodes, data, check_minimal_specification):
     elif unnecessary_data and check_minimal_specification == "raise":
         raise ValueError(message)
 
-    return {k: v for k, v in data.items() if k not in unnecessary_data}
-
 
 def _round_and_partial_parameters_to_functions(functions, params, rounding):
     """Create a dictionary of all functions that are available.
@@ -0,0 +1,218 @@
+import contextlib
+
+import numpy
+import pandas as pd
+
+from _gettsim import config
+from _gettsim.config import SUPPORTED_GROUPINGS
+from _gettsim.execution import (
+    MemoryAwareExecutor,
+    get_free_arguments,
+    split_by_dependence,
+)
+from _gettsim.interface import prepare_taxes_and_transfers, process_and_check_data
+from _gettsim.policy_environment import PolicyEnvironment
+from _gettsim.policy_environment_postprocessor import get_group_index_name
+from _gettsim.shared import get_size_of_groups, parse_to_list_of_strings, stack_copies
+from _gettsim.time_conversion import convert_time_unit, get_group_and_time_unit
+
+with contextlib.suppress(ImportError):
+    import jax
+
+METHODS = ("differences", "autodiff")
+
+
+def compute_marginal_tax_rates(  # noqa: PLR0913
+    data,
+    environment: PolicyEnvironment,
+    net_income,
+    income="bruttolohn_m",
+    earner=0,
+    changes=(1.0,),
+    method="differences",
+    check_minimal_specification="ignore",
+    rounding=False,
+):
+    """Compute marginal effective tax rates.
+
+    The income of one member of each household, the earner, is changed. The marginal
+    rate of a net income is one minus the change of the net income divided by the change
+    of the income of the earner. Net incomes which do not depend on the income of the
+    earner, e.g., of other households, have a marginal rate of one.
+
+    With ``method="differences"``, the functions depending on the income are evaluated
+    once for the data and all changes of the income by stacking copies of the data. All
+    other functions are evaluated once. With ``method="autodiff"``, the derivatives of
+    the net incomes are computed with JAX. This requires the JAX backend and functions
+    depending on the income which can be translated to JAX.
+
+    Parameters
+    ----------
+    data : pandas.Series or pandas.DataFrame or dict of pandas.Series
+        Data provided by the user.
+    environment:
+        The policy environment which contains all necessary functions and parameters.
+    net_income : str, list of str
+        Names of the functions whose marginal rates are computed. Their names must end
+        with a time unit and optionally with a group, like ``"..._m_hh"``.
+    income : str, default "bruttolohn_m"
+        Name of the column of the data which is changed.
+    earner : int, default 0
+        Position of the member of the household whose income is changed. Without the
+        column ``"hh_id"``, each row is a household.
+    changes : list of float, default (1.0,)
+        Changes of the income for which marginal rates are computed. Ignored with
+        ``method="autodiff"``.
+    method : {"differences", "autodiff"}, default "differences"
+        Whether marginal rates are computed from differences of net incomes or from
+        their derivatives.
+    check_minimal_specification : {"ignore", "warn", "raise"}, default "ignore"
+        Indicator for whether checks which ensure the most minimal configuration should
+        be silenced, emitted as warnings or errors.
+    rounding : bool, default False
+        Indicator for whether rounding should be applied as specified in the law.
+        Rounding makes net incomes step functions of the income, so that marginal rates
+        of small changes are noisy and derivatives are zero.
+
+    Returns
+    -------
+    results : pandas.DataFrame
+        DataFrame containing the marginal rates of the net incomes. The first level of
+        the index is the change of the income and the second one the row of the data.
+        With ``method="autodiff"``, the change is 0.
+
+    """
+    if method not in METHODS:
+        raise ValueError(f"'method' must be one of {METHODS}, got {method!r}.")
+    if method == "autodiff" and not config.USE_JAX:
+        raise ValueError(
+            "Computing marginal rates with 'method=\"autodiff\"' requires the JAX "
+            "backend. Call '_gettsim.config.set_array_backend(\"jax\")' first."
+        )
+    net_income = parse_to_list_of_strings(net_income, "net_income")
+    changes = [0.0] if method == "autodiff" else [float(c) for c in changes]
+    # Derivatives are changes of the net incomes per unit of the income.
+    steps = [1.0] if method == "autodiff" else changes
+    data = process_and_check_data(data=data)
+    if income not in data:
+        raise ValueError(f"The income {income!r} must be a column of the data.")
+    is_earner = _find_earners(data, earner)
+
+    time_units = {name: get_group_and_time_unit(name)[1] for name in net_income}
+    plan = prepare_taxes_and_transfers(
+        environment=environment,
+        data_cols=list(data),
+        targets=net_income,
+        check_minimal_specification=check_minimal_specification,
+        rounding=rounding,
+    )
+    data = plan.convert_data(data)
+    input_data = plan.create_input_data(data)
+
+    # Functions which do not depend on the income are computed once. Group indices
+    # are recomputed for the stacked copies of the data.
+    group_indices = {get_group_index_name(f"{g}_id") for g in SUPPORTED_GROUPINGS}
+    shared_executor, dependent = split_by_dependence(
+        plan.functions,
+        plan.targets,
+        {income, *(group_indices & plan.functions.keys())},
+    )
+    shared_results = shared_executor(input_data)
+    values = {**input_data, **shared_results}
+
+    dependent_functions = {n: plan.functions[n] for n in dependent}
+    dependent_targets = [t for t in plan.targets if t in dependent]
+    if not dependent_targets:
+        changes_of_targets = {}
+    elif method == "differences":
+        changes_of_targets = _compute_differences(
+            functions=dependent_functions,
+            targets=dependent_targets,
+            values=values,
+            income=income,
+            changes=numpy.outer(changes, is_earner),
+        )
+    else:
+        changes_of_targets = _compute_derivatives(
+            functions=dependent_functions,
+            targets=dependent_targets,
+            values=values,
+            income=income,
+            is_earner=is_earner,
+        )
+
+    n_rows = len(data[income])
+    _, income_time_unit = get_group_and_time_unit(income)
+    rates = {}
+    for name in net_income:
+        change_of_income = convert_time_unit(
+            numpy.array(steps)[:, None], income_time_unit, time_units[name]
+        )
+        change_of_net_income = changes_of_targets.get(
+            name, numpy.zeros((len(changes), n_rows))
+        )
+        rates[name] = (1 - change_of_net_income / change_of_income).reshape(-1)
+
+    index = pd.MultiIndex.from_product([changes, range(n_rows)], names=["change", None])
+
+    return pd.DataFrame(rates, index=index)
+
+
+def _find_earners(data, earner):
+    """Find the rows of the earners of the households."""
+    if "hh_id" in data:
+        hh_id = data["hh_id"]
+        position = hh_id.groupby(hh_id).cumcount().to_numpy()
+        size = get_size_of_groups(hh_id.to_numpy())
+    else:
+        position = numpy.zeros(len(data), dtype=int)
+        size = numpy.ones(len(data), dtype=int)
+
+    if len(data) > 0 and not 0 <= earner < size.min():
+        raise ValueError(
+            f"'earner' must be the position of a member of each household, got "
+            f"{earner} for a household with {size.min()} members."
+        )
+
+    return position == earner
+
+
+def _compute_differences(functions, targets, values, income, changes):
+    """Compute the changes of the targets for all changes of the income at once.
+
+    The functions are evaluated for copies of the data with the income changed by each
+    row of the changes, stacked below the original data.
+
+    """
+    arguments = {a for f in functions.values() for a in get_free_arguments(f)}
+    n_copies = len(changes) + 1
+    p_id_offset = values["p_id"].max() + 1 if "p_id" in values else 0
+    inputs = {
+        name: stack_copies(name, numpy.asarray(value), n_copies, p_id_offset)
+        for name, value in values.items()
+        if name in arguments
+    }
+    n_rows = len(values[income])
+    inputs[income] = inputs[income] + numpy.concatenate([numpy.zeros(n_rows), *changes])
+
+    results = MemoryAwareExecutor(functions=functions, targets=targets)(inputs)
+
+    out = {}
+    for target in targets:
+        result = numpy.asarray(results[target]).reshape(n_copies, n_rows)
+        out[target] = result[1:] - result[0]
+
+    return out
+
+
+def _compute_derivatives(functions, targets, values, income, is_earner):
+    """Compute the derivatives of the targets with respect to the income of earners."""
+    executor = MemoryAwareExecutor(functions=functions, targets=targets)
+    income_values = numpy.asarray(values[income], dtype=float)
+
+    def compute(income_values):
+        return executor({**values, income: income_values})
+
+    _, derivatives = jax.jvp(compute, (income_values,), (is_earner.astype(float),))
+
+    return {target: numpy.asarray(derivatives[target])[None] for target in targets}
@@ -0,0 +1,252 @@
+import multiprocessing
+import os
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy
+import pandas as pd
+
+from _gettsim.config import FOREIGN_KEYS, SUPPORTED_GROUPINGS
+from _gettsim.interface import prepare_taxes_and_transfers, process_and_check_data
+from _gettsim.policy_environment import PolicyEnvironment
+from _gettsim.shared import join_numpy
+
+# The plan of the current worker process. It is set once when the worker starts.
+_WORKER_PLAN = None
+
+
+def compute_taxes_and_transfers_in_parallel(  # noqa: PLR0913
+    data,
+    environment: PolicyEnvironment,
+    targets=None,
+    n_workers=None,
+    check_minimal_specification="ignore",
+    rounding=True,
+    debug=False,
+):
+    """Compute taxes and transfers in parallel processes.
+
+    The data is split into partitions which never separate persons of the same
+    household or persons linked by a foreign key like ``p_id_ehepartner``. The
+    computations are prepared once in the main process and handed to each worker when
+    it starts. The partitions are computed in a process pool and the results are
+    returned in the original order of the rows. Group ids computed by GETTSIM, like
+    ``fg_id``, are shifted per partition, so that they are unique across partitions.
+
+    The workers are started with the "fork" start method because prepared computations
+    cannot be pickled. On platforms without it, the computations run in the main
+    process.
+
+    Parameters
+    ----------
+    data : pandas.DataFrame or dict of pandas.Series
+        Data provided by the user.
+    environment:
+        The policy environment which contains all necessary functions and parameters.
+    targets : str, list of str, default None
+        String or list of strings with names of functions whose output is actually
+        needed by the user. By default, ``targets`` is ``None`` and all key outputs as
+        defined by `gettsim.config.DEFAULT_TARGETS` are returned.
+    n_workers : int, default None
+        Number of worker processes. By default, the number of CPUs is used.
+    check_minimal_specification : {"ignore", "warn", "raise"}, default "ignore"
+        Indicator for whether checks which ensure the most minimal configuration should
+        be silenced, emitted as warnings or errors.
+    rounding : bool, default True
+        Indicator for whether rounding should be applied as specified in the law.
+    debug : bool
+        If True, all necessary inputs and all computed variables are returned.
+
+    Returns
+    -------
+    results : pandas.DataFrame
+        DataFrame containing computed variables.
+
+    """
+    n_workers = os.cpu_count() if n_workers is None else n_workers
+    if n_workers < 1:
+        raise ValueError(f"'n_workers' must be a positive integer, got {n_workers}.")
+
+    # Check the complete data once, partitions are checked again by the workers.
+    data = pd.DataFrame(process_and_check_data(data=data))
+    plan = prepare_taxes_and_transfers(
+        environment=environment,
+        data_cols=list(data),
+        targets=targets,
+        check_minimal_specification=check_minimal_specification,
+        rounding=rounding,
+    )
+
+    if n_workers > 1 and "fork" not in multiprocessing.get_all_start_methods():
+        warnings.warn(
+            "Computing in parallel requires the 'fork' start method, which is not "
+            "available on this platform. Computing in the main process instead.",
+            stacklevel=2,
+        )
+        n_workers = 1
+
+    components = _get_linked_components(data)
+    partitions = _split_into_partitions(components, n_partitions=4 * n_workers)
+    tasks = [(data.iloc[rows], debug) for rows in partitions]
+
+    if n_workers == 1:
+        _initialize_worker(plan)
+        results = [_compute_partition(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(
+            max_workers=n_workers,
+            mp_context=multiprocessing.get_context("fork"),
+            initializer=_initialize_worker,
+            initargs=(plan,),
+        ) as executor:
+            results = list(executor.map(_compute_partition, tasks))
+
+    offsets = {}
+    for i, result in enumerate(results):
+        results[i], offsets = shift_derived_group_ids(result, list(data), offsets)
+
+    positions = numpy.concatenate(partitions)
+    out = pd.concat(results, ignore_index=True)
+    return out.iloc[numpy.argsort(positions, kind="stable")].reset_index(drop=True)
+
+
+def shift_derived_group_ids(result, data_cols, offsets):
+    """Shift group ids computed by GETTSIM, so that they are unique across results.
+
+    Group ids which are computed, like ``fg_id``, are numbered within each result of a
+    part of the data. They are shifted by one plus the largest id of the previous
+    results. Group ids provided by the user are not changed.
+
+    Parameters
+    ----------
+    result : pandas.DataFrame
+        Result of a part of the data.
+    data_cols : list of str
+        Names of the columns of the data.
+    offsets : dict of int
+        Mapping from the names of computed group ids to the offsets of the result.
+
+    Returns
+    -------
+    result : pandas.DataFrame
+        Result with shifted group ids.
+    offsets : dict of int
+        Offsets of the next result.
+
+    """
+    group_ids = [
+        f"{g}_id"
+        for g in SUPPORTED_GROUPINGS
+        if f"{g}_id" in result and f"{g}_id" not in data_cols
+    ]
+    if not group_ids:
+        return result, offsets
+
+    result = result.copy()
+    offsets = dict(offsets)
+    for group_id in group_ids:
+        result[group_id] += offsets.get(group_id, 0)
+        if len(result) > 0:
+            offsets[group_id] = result[group_id].max() + 1
+
+    return result, offsets
+
+
+def _initialize_worker(plan):
+    global _WORKER_PLAN  # noqa: PLW0603
+    _WORKER_PLAN = plan
+
+
+def _compute_partition(task):
+    partition, debug = task
+    return _WORKER_PLAN(partition, debug=debug)
+
+
+def _get_linked_components(data):
+    """Assign an id to groups of persons which must be computed together.
+
+    Persons are linked if they live in the same household or if one refers to the other
+    via a foreign key.
+
+    Parameters
+    ----------
+    data : pandas.DataFrame
+        Data provided by the user.
+
+    Returns
+    -------
+    components : numpy.ndarray
+        Array with one id per row. Linked persons have the same id.
+
+    """
+    n_rows = len(data)
+    if "hh_id" in data:
+        _, components = numpy.unique(data["hh_id"].to_numpy(), return_inverse=True)
+        components = components.reshape(-1)
+    else:
+        components = numpy.arange(n_rows)
+
+    # Collect pairs of linked rows.
+    p_id = data["p_id"].to_numpy()
+    sources, destinations = [], []
+    for foreign_key in FOREIGN_KEYS:
+        if foreign_key in data:
+            key = data[foreign_key].to_numpy()
+            valid = key >= 0
+            rows = join_numpy(
+                key[valid],
+                p_id,
+                numpy.arange(n_rows),
+                value_if_foreign_key_is_missing=-1,
+            )
+            sources.append(numpy.flatnonzero(valid)[rows >= 0])
+            destinations.append(rows[rows >= 0])
+    if not sources:
+        return components
+    sources = numpy.concatenate(sources)
+    destinations = numpy.concatenate(destinations)
+
+    # Propagate the smallest component id through households and links until stable.
+    while True:
+        new = components.copy()
+        numpy.minimum.at(new, sources, components[destinations])
+        numpy.minimum.at(new, destinations, components[sources])
+        smallest_in_component = numpy.full(n_rows, n_rows)
+        numpy.minimum.at(smallest_in_component, components, new)
+        new = smallest_in_component[components]
+        if numpy.array_equal(new, components):
+            return components
+        components = new
+
+
+def _split_into_partitions(components, n_partitions):
+    """Split rows into partitions of similar size without splitting components.
+
+    Parameters
+    ----------
+    components : numpy.ndarray
+        Component id of each row.
+    n_partitions : int
+        Maximum number of partitions.
+
+    Returns
+    -------
+    partitions : list of numpy.ndarray
+        Positions of the rows in each partition.
+
+    """
+    order = numpy.argsort(components, kind="stable")
+    sorted_components = components[order]
+    starts_component = numpy.flatnonzero(
+        numpy.concatenate([[True], sorted_components[1:] != sorted_components[:-1]])
+    )
+
+    # Cut at the first component start at or after each multiple of the target size.
+    target_cuts = numpy.arange(1, n_partitions) * len(order) / n_partitions
+    cut_positions = numpy.searchsorted(starts_component, target_cuts)
+    cuts = numpy.unique(
+        starts_component[cut_positions[cut_positions < len(starts_component)]]
+    )
+    cuts = cuts[cuts > 0]
+
+    return [rows for rows in numpy.split(order, cuts) if len(rows) > 0]
@@ -0,0 +1,242 @@
+"""Store of parsed parameter files.
+
+Parsing the YAML files in ``_gettsim/parameters`` dominates the time to set up a policy
+environment. Each file is parsed once and kept as JSON, in memory and on disk in
+:data:`_gettsim.config.PARAMETER_STORE_DIR`. Entries are keyed by the SHA-256 hash of
+the file contents, so the YAML files remain the source of truth and changed files are
+parsed again.
+
+JSON only supports string keys and no dates, so dictionaries are stored as lists of
+key-value pairs and dates are tagged, see :func:`_encode` and :func:`_decode_object`.
+
+"""
+
+import bisect
+import datetime
+import hashlib
+import json
+import tempfile
+from pathlib import Path
+
+import yaml
+
+from _gettsim import config
+from _gettsim.config import INTERNAL_PARAMS_GROUPS, RESOURCE_DIR
+
+# Increase when the stored representation changes to invalidate existing stores.
+_STORE_FORMAT_VERSION = 2
+
+# Parameter files encoded as JSON, keyed by path and hash of the file contents.
+_ENCODED_GROUPS: dict[tuple[str, str], str] = {}
+
+# Timelines of parameter files, keyed like `_ENCODED_GROUPS`.
+_TIMELINES: dict[tuple[str, str], "ParameterTimeline"] = {}
+
+
+class ParameterTimeline:
+    """
+    The dated values of the parameters of one group, indexed by their change dates.
+
+    The timeline is built once per parameter file and shared by all lookups, so the
+    contents must not be modified.
+
+    Parameters
+    ----------
+    raw_group_data : dict
+        The contents of the parameter file.
+
+    Attributes
+    ----------
+    raw_group_data : dict
+        The contents of the parameter file.
+    change_dates : dict of list of datetime.date
+        The sorted dates at which each parameter changes.
+    """
+
+    def __init__(self, raw_group_data):
+        self.raw_group_data = raw_group_data
+        self.change_dates = {
+            param: sorted(key for key in values if isinstance(key, datetime.date))
+            for param, values in raw_group_data.items()
+            if isinstance(values, dict)
+        }
+
+    def last_change_until(self, param, date):
+        """Return the last change date of a parameter on or before a date.
+
+        Returns None if the parameter did not exist at the date.
+
+        """
+        change_dates = self.change_dates[param]
+        position = bisect.bisect_right(change_dates, date)
+        return change_dates[position - 1] if position > 0 else None
+
+    def first_change(self, param):
+        """Return the first change date of a parameter."""
+        return self.change_dates[param][0]
+
+
+def load_parameter_group(group, yaml_path=RESOURCE_DIR / "parameters"):
+    """Load the contents of a parameter file.
+
+    Parameters
+    ----------
+    group : str
+        Name of the parameter file without suffix.
+    yaml_path : pathlib.Path
+        Directory of the parameter files.
+
+    Returns
+    -------
+    raw_group_data : dict
+        The contents of the YAML file. Each call returns a new object, so it can be
+        modified by the caller.
+
+    """
+    path = Path(yaml_path) / f"{group}.yaml"
+    key, content = _read_parameter_file(path)
+    return _load_parameter_group(path, key, content)
+
+
+def load_parameter_timeline(group, yaml_path=RESOURCE_DIR / "parameters"):
+    """Load the timeline of a parameter file.
+
+    Parameters
+    ----------
+    group : str
+        Name of the parameter file without suffix.
+    yaml_path : pathlib.Path
+        Directory of the parameter files.
+
+    Returns
+    -------
+    timeline : ParameterTimeline
+        The timeline of the parameter file. It is shared by all callers and must not
+        be modified.
+
+    """
+    path = Path(yaml_path) / f"{group}.yaml"
+    key, content = _read_parameter_file(path)
+    if key not in _TIMELINES:
+        _TIMELINES[key] = ParameterTimeline(_load_parameter_group(path, key, content))
+    return _TIMELINES[key]
+
+
+def build_parameter_store(yaml_path=RESOURCE_DIR / "parameters", groups=None):
+    """Parse parameter files and write them to the on-disk store.
+
+    Calling this function is optional, the store is also filled when parameter files
+    are loaded the first time. It is useful to prepare the store ahead of time, e.g.,
+    before starting many processes.
+
+    Parameters
+    ----------
+    yaml_path : pathlib.Path
+        Directory of the parameter files.
+    groups : list of str, default None
+        Names of the parameter files without suffix. By default, all internal
+        parameter groups.
+
+    """
+    groups = INTERNAL_PARAMS_GROUPS if groups is None else groups
+    for group in groups:
+        path = Path(yaml_path) / f"{group}.yaml"
+        key, content = _read_parameter_file(path)
+        if key not in _ENCODED_GROUPS:
+            _load_parameter_group(path, key, content)
+
+
+def _read_parameter_file(path):
+    """Read a parameter file and create its key from the path and the hash."""
+    content = path.read_bytes()
+    return (str(path.resolve()), hashlib.sha256(content).hexdigest()), content
+
+
+def _load_parameter_group(path, key, content):
+    """Load the contents of a parameter file from memory, the store, or the YAML file.
+
+    The JSON is decoded once per call, so each call returns a new object.
+
+    """
+    if key in _ENCODED_GROUPS:
+        return _decode(_ENCODED_GROUPS[key])
+
+    _, file_hash = key
+    store_file = (
+        Path(config.PARAMETER_STORE_DIR)
+        / f"{path.stem}-{file_hash}-v{_STORE_FORMAT_VERSION}.json"
+    )
+    encoded, raw_group_data = _read_from_store(store_file)
+    if encoded is None:
+        raw_group_data = yaml.load(content.decode("utf-8"), Loader=yaml.CLoader)
+        try:
+            encoded = json.dumps(_encode(raw_group_data))
+        except TypeError:
+            # Files with values which JSON cannot represent are parsed every time.
+            return raw_group_data
+        _write_to_store(store_file, encoded)
+    _ENCODED_GROUPS[key] = encoded
+
+    return raw_group_data
+
+
+def _encode(obj):
+    """Convert parsed YAML to objects which JSON can represent without losing types."""
+    if isinstance(obj, dict):
+        return {"__dict__": [[_encode(k), _encode(v)] for k, v in obj.items()]}
+    if isinstance(obj, list):
+        return [_encode(v) for v in obj]
+    if isinstance(obj, datetime.datetime):
+        return {"__datetime__": obj.isoformat()}
+    if isinstance(obj, datetime.date):
+        return {"__date__": obj.isoformat()}
+    if obj is None or isinstance(obj, str | int | float):
+        return obj
+    raise TypeError(f"Cannot store objects of type {type(obj)}.")
+
+
+def _decode_object(obj):
+    """Restore the dictionaries and dates converted by :func:`_encode`."""
+    if "__dict__" in obj:
+        return dict(obj["__dict__"])
+    if "__datetime__" in obj:
+        return datetime.datetime.fromisoformat(obj["__datetime__"])
+    if "__date__" in obj:
+        return datetime.date.fromisoformat(obj["__date__"])
+    return obj
+
+
+def _decode(encoded):
+    return json.loads(encoded, object_hook=_decode_object)
+
+
+def _read_from_store(store_file):
+    """Read a parameter file from the store.
+
+    Returns the JSON and the decoded contents, None for both if the file is missing or
+    broken.
+
+    """
+    try:
+        encoded = store_file.read_text(encoding="utf-8")
+        return encoded, _decode(encoded)
+    except (OSError, ValueError, TypeError, KeyError):
+        return None, None
+
+
+def _write_to_store(store_file, encoded):
+    """Write a parameter file to the store atomically. The store is optional, so
+    failures to write it, e.g., in read-only directories, are ignored."""
+    try:
+        store_file.parent.mkdir(parents=True, exist_ok=True)
+        with tempfile.NamedTemporaryFile(
+            mode="w",
+            encoding="utf-8",
+            dir=store_file.parent,
+            suffix=".tmp",
+            delete=False,
+        ) as f:
+            f.write(encoded)
+        Path(f.name).replace(store_file)
+    except OSError:
+        pass
@@ -1,15 +1,37 @@
+import threading
+from collections import OrderedDict
+
 import numpy
 
+from _gettsim import config
+from _gettsim.config import LOOKUP_TABLE_CACHE_SIZE
+
+_LOOKUP_TABLES = OrderedDict()
+_LOOKUP_TABLES_LOCK = threading.Lock()
+
 
 def piecewise_polynomial(
-    x, thresholds, rates, intercepts_at_lower_thresholds, rates_multiplier=None
+    x,
+    thresholds,
+    rates,
+    intercepts_at_lower_thresholds,
+    rates_multiplier=None,
+    lookup_table=None,
 ):
     """Calculate value of the piecewise function at `x`.
 
+    The function works on arrays. The interval of each value is determined by one
+    search over all values, and the rates and intercepts of the intervals are gathered.
+    It uses the array module of the selected backend, so it works with NumPy and JAX.
+
+    If a lookup table created by :func:`create_lookup_table` is passed, values at whole
+    numbers inside the table are gathered from it. All other values are evaluated as
+    usual, so the result is the same with and without the table.
+
     Parameters
     ----------
-    x : pd.Series
-        Series with values which piecewise polynomial is applied to.
+    x : numpy.ndarray or float
+        Array with values which piecewise polynomial is applied to.
     thresholds : numpy.array
                 A one-dimensional array containing the thresholds for all intervals.
     rates : numpy.ndarray
@@ -17,45 +39,77 @@ def piecewise_polynomial(
             correspond to the nth polynomial.
     intercepts_at_lower_thresholds : numpy.ndarray
         The intercepts at the lower threshold of each interval.
-    rates_multiplier : pd.Series, float
+    rates_multiplier : numpy.ndarray, float
                        Multiplier to create individual or scaled rates. If given and
                        not equal to 1, the function also calculates new intercepts.
+    lookup_table : dict, optional
+        The tabulated function created by :func:`create_lookup_table`. It is ignored
+        if it was created from other parameters. Cannot be combined with
+        `rates_multiplier`.
 
     Returns
     -------
-    out : float
+    out : numpy.ndarray or float
         The value of `x` under the piecewise function.
 
     """
-    num_intervals = len(thresholds) - 1
+    if lookup_table is not None:
+        if rates_multiplier is not None:
+            raise ValueError(
+                "A lookup table cannot be combined with a rates multiplier."
+            )
+        if _lookup_table_matches(
+            lookup_table, thresholds, rates, intercepts_at_lower_thresholds
+        ):
+            return _piecewise_polynomial_from_lookup_table(
+                x, thresholds, rates, intercepts_at_lower_thresholds, lookup_table
+            )
+
+    return _piecewise_polynomial(
+        x,
+        thresholds,
+        rates,
+        intercepts_at_lower_thresholds,
+        rates_multiplier,
+        xnp=config.numpy_or_jax,
+    )
+
+
+def _piecewise_polynomial(
+    x, thresholds, rates, intercepts_at_lower_thresholds, rates_multiplier, xnp
+):
+    """Evaluate the piecewise function with the array module `xnp`."""
+    thresholds = xnp.asarray(thresholds)
+    rates = xnp.asarray(rates)
+    intercepts_at_lower_thresholds = xnp.asarray(intercepts_at_lower_thresholds)
     degree_polynomial = rates.shape[0]
 
     # Check in which interval each individual is. The thresholds are not exclusive on
     # the right side.
-    selected_bin = numpy.searchsorted(thresholds, x, side="right") - 1
-
-    # Calc last threshold for each individual
-    threshold = thresholds[selected_bin]
+    selected_bin = xnp.searchsorted(thresholds, x, side="right") - 1
 
-    # Increment for each individual in the corresponding interval.
-    increment_to_calc = x - threshold
+    # Increment for each individual in the corresponding interval. The first interval
+    # starts at minus infinity, so the function is constant there.
+    increment_to_calc = xnp.where(selected_bin > 0, x - thresholds[selected_bin], 0)
 
     # If each individual has its own rates or the rates are scaled, we can't use the
     # intercept, which was generated in the parameter loading.
     if rates_multiplier is not None:
-        # Initialize Series containing 0 for all individuals.
-        out = intercepts_at_lower_thresholds[0]
-
-        # Go through all intervals except the first and last.
-        for i in range(2, num_intervals):
-            threshold_incr = thresholds[i] - thresholds[i - 1]
-            for pol in range(1, degree_polynomial + 1):
-                # We only calculate the intercepts for individuals who are in this or
-                # higher interval. Hence we have to use the individual rates.
-                if selected_bin >= i:
-                    out += (
-                        rates_multiplier * rates[pol - 1, i - 1] * threshold_incr**pol
-                    )
+        # Calculate the increase of the function over each interval except the first
+        # and last. The intercept of an interval is the cumulative increase over all
+        # intervals below, scaled by the individual multiplier.
+        widths = thresholds[2:-1] - thresholds[1:-2]
+        increase_per_interval = sum(
+            rates[pol - 1, 1:-1] * widths**pol
+            for pol in range(1, degree_polynomial + 1)
+        )
+        cumulative_increase = xnp.concatenate(
+            [xnp.zeros(2), xnp.cumsum(increase_per_interval)]
+        )
+        out = (
+            intercepts_at_lower_thresholds[0]
+            + rates_multiplier * cumulative_increase[selected_bin]
+        )
 
     # If rates remain the same, everything is a lot easier.
     else:
@@ -65,18 +119,199 @@ def piecewise_polynomial(
     # Intialize a multiplyer for 1 if it is not given.
     rates_multiplier = 1 if rates_multiplier is None else rates_multiplier
 
-    if selected_bin > 0:
-        # Now add the evaluation of the increment
-        for pol in range(1, degree_polynomial + 1):
-            out += (
-                rates[pol - 1][selected_bin]
-                * rates_multiplier
-                * (increment_to_calc**pol)
-            )
+    # Now add the evaluation of the increment
+    for pol in range(1, degree_polynomial + 1):
+        out = out + (
+            rates[pol - 1, selected_bin] * rates_multiplier * (increment_to_calc**pol)
+        )
 
     return out
 
 
+def create_lookup_table(thresholds, rates, intercepts_at_lower_thresholds):
+    """Tabulate a piecewise polynomial at all whole numbers between its finite
+    thresholds.
+
+    Below the lowest finite threshold, the function is constant, so the table holds
+    this value once. In between the lowest and highest finite threshold, it holds the
+    value at every whole number. Above, the function is given by the polynomial of the
+    top interval, which is evaluated directly. Tables are computed with NumPy and
+    cached, so equal parameters of different dates share one table. The
+    ``LOOKUP_TABLE_CACHE_SIZE`` most recently used tables are kept.
+
+    Parameters
+    ----------
+    thresholds : numpy.array
+        A one-dimensional array containing the thresholds for all intervals.
+    rates : numpy.ndarray
+        A two-dimensional array where columns are interval sections and rows
+        correspond to the nth polynomial.
+    intercepts_at_lower_thresholds : numpy.ndarray
+        The intercepts at the lower threshold of each interval.
+
+    Returns
+    -------
+    lookup_table : dict
+        The parameters the table was created from, the lowest finite threshold, the
+        first whole number of the table (`start`), and the function values
+        (`values`).
+
+    """
+    parameters = {
+        "thresholds": thresholds,
+        "rates": rates,
+        "intercepts_at_lower_thresholds": intercepts_at_lower_thresholds,
+    }
+    thresholds = numpy.asarray(thresholds, dtype=float)
+    rates = numpy.asarray(rates, dtype=float)
+    intercepts_at_lower_thresholds = numpy.asarray(
+        intercepts_at_lower_thresholds, dtype=float
+    )
+    key = tuple(
+        (a.shape, a.tobytes())
+        for a in (thresholds, rates, intercepts_at_lower_thresholds)
+    )
+    with _LOOKUP_TABLES_LOCK:
+        table = _LOOKUP_TABLES.get(key)
+        if table is None:
+            table = _tabulate_piecewise_polynomial(
+                thresholds, rates, intercepts_at_lower_thresholds
+            )
+            _LOOKUP_TABLES[key] = table
+            if len(_LOOKUP_TABLES) > LOOKUP_TABLE_CACHE_SIZE:
+                _LOOKUP_TABLES.popitem(last=False)
+        else:
+            _LOOKUP_TABLES.move_to_end(key)
+
+    # The table refers to the given parameters, so that passing them along with it is
+    # recognized without comparing their values.
+    return {**parameters, **table}
+
+
+def _tabulate_piecewise_polynomial(thresholds, rates, intercepts_at_lower_thresholds):
+    """Evaluate the piecewise function below its lowest finite threshold and at all
+    whole numbers between its finite thresholds."""
+    # The first entry holds the constant value below the lowest finite threshold.
+    finite_thresholds = thresholds[numpy.isfinite(thresholds)]
+    if finite_thresholds.size == 0:
+        lower_threshold, start, stop = numpy.inf, 0, -1
+    else:
+        lower_threshold = finite_thresholds.min()
+        start = int(numpy.ceil(lower_threshold))
+        stop = int(numpy.floor(finite_thresholds.max()))
+    with numpy.errstate(invalid="ignore"):
+        values = _piecewise_polynomial(
+            numpy.concatenate([[-numpy.inf], numpy.arange(start, stop + 1)]),
+            thresholds,
+            rates,
+            intercepts_at_lower_thresholds,
+            rates_multiplier=None,
+            xnp=numpy,
+        )
+    values.flags.writeable = False
+
+    return {"lower_threshold": lower_threshold, "start": start, "values": values}
+
+
+def _lookup_table_matches(
+    lookup_table, thresholds, rates, intercepts_at_lower_thresholds
+):
+    """Check whether the lookup table was created from the given parameters.
+
+    The parameters of an environment are the objects the table refers to, so their
+    values are only compared for other parameters.
+
+    """
+    return all(
+        lookup_table[name] is value
+        or numpy.array_equal(lookup_table[name], numpy.asarray(value))
+        for name, value in [
+            ("thresholds", thresholds),
+            ("rates", rates),
+            ("intercepts_at_lower_thresholds", intercepts_at_lower_thresholds),
+        ]
+    )
+
+
+def _piecewise_polynomial_from_lookup_table(
+    x, thresholds, rates, intercepts_at_lower_thresholds, lookup_table
+):
+    """Gather the values at whole numbers from the lookup table and evaluate the
+    polynomial only for all other values."""
+    if not config.USE_JAX and numpy.ndim(x) == 0:
+        return _piecewise_polynomial_from_lookup_table_on_scalar(
+            x, thresholds, rates, intercepts_at_lower_thresholds, lookup_table
+        )
+
+    xnp = config.numpy_or_jax
+    x = xnp.asarray(x)
+    values = xnp.asarray(lookup_table["values"])
+
+    # Values below the lowest finite threshold map to the first entry and whole
+    # numbers to the following ones.
+    position = xnp.where(
+        x < lookup_table["lower_threshold"], 0, x - lookup_table["start"] + 1
+    )
+    in_table = (position < values.shape[0]) & (position == xnp.floor(position))
+    index = xnp.where(in_table, position, 0).astype(int)
+    out = values[index]
+
+    if config.USE_JAX:
+        return xnp.where(
+            in_table,
+            out,
+            _piecewise_polynomial(
+                x,
+                thresholds,
+                rates,
+                intercepts_at_lower_thresholds,
+                rates_multiplier=None,
+                xnp=xnp,
+            ),
+        )
+
+    not_in_table = ~in_table
+    if not_in_table.any():
+        out = numpy.array(out, dtype=float)
+        out[not_in_table] = _piecewise_polynomial(
+            x[not_in_table],
+            thresholds,
+            rates,
+            intercepts_at_lower_thresholds,
+            rates_multiplier=None,
+            xnp=numpy,
+        )
+
+    return out[()]
+
+
+def _piecewise_polynomial_from_lookup_table_on_scalar(
+    x, thresholds, rates, intercepts_at_lower_thresholds, lookup_table
+):
+    """Look up a single value without creating arrays.
+
+    Functions which are not vectorized call the tariffs with scalars, where the
+    overhead of the array operations exceeds the cost of evaluating the polynomial.
+
+    """
+    values = lookup_table["values"]
+    if x < lookup_table["lower_threshold"]:
+        return values[0]
+
+    position = float(x) - lookup_table["start"] + 1
+    if position < len(values) and position.is_integer():
+        return values[int(position)]
+
+    return _piecewise_polynomial(
+        x,
+        thresholds,
+        rates,
+        intercepts_at_lower_thresholds,
+        rates_multiplier=None,
+        xnp=numpy,
+    )
+
+
 def get_piecewise_parameters(parameter_dict, parameter, func_type):
     """Create the objects for piecewise polynomial.
 
@@ -2,29 +2,43 @@ from __future__ import annotations
 
 import copy
 import datetime
+import inspect
 import operator
-from functools import reduce
+from functools import cache, lru_cache, reduce
 from typing import TYPE_CHECKING, Any
 
 import numpy
 import pandas as pd
-import yaml
 
-from _gettsim.config import INTERNAL_PARAMS_GROUPS, RESOURCE_DIR
+from _gettsim import config
+from _gettsim.config import (
+    INTERNAL_PARAMS_GROUPS,
+    POLICY_ENVIRONMENT_CACHE_SIZE,
+    RESOURCE_DIR,
+)
 from _gettsim.functions.loader import (
     load_functions_for_date,
+    load_functions_for_dates,
     load_internal_aggregation_dict,
 )
 from _gettsim.functions.policy_function import PolicyFunction
+from _gettsim.parameter_store import load_parameter_timeline
 from _gettsim.piecewise_functions import (
     check_thresholds,
+    create_lookup_table,
     get_piecewise_parameters,
     piecewise_polynomial,
 )
+from _gettsim.policy_environment_postprocessor import (
+    check_functions_and_differentiate_types,
+)
+from _gettsim.shared import parse_to_list_of_strings
 
 if TYPE_CHECKING:
     from collections.abc import Callable
 
+_TARIFFS_WITH_LOOKUP_TABLE = [("eink_st", "eink_st_tarif"), ("soli_st", "soli_st")]
+
 
 class PolicyEnvironment:
     """
@@ -55,6 +69,12 @@ class PolicyEnvironment:
         """
         Set up the policy environment for a particular date.
 
+        The environment is cached, so repeated calls for the same date and array backend
+        return the same object. It is immutable, i.e., its functions and parameters
+        cannot be modified in place. Use :meth:`upsert_functions` or
+        :meth:`replace_all_parameters` to create modified environments. The cache can
+        be emptied with :func:`clear_policy_environment_cache`.
+
         Parameters
         ----------
         date:
@@ -67,29 +87,83 @@ class PolicyEnvironment:
             The policy environment for the specified date.
         """
         # Check policy date for correct format and convert to datetime.date
-        date = _parse_date(date)
-
-        params = {}
-        for group in INTERNAL_PARAMS_GROUPS:
-            params_one_group = _load_parameter_group_from_yaml(date, group)
+        return _cached_policy_environment_for_date(
+            _parse_date(date), config.USE_JAX, config.USE_NUMBA
+        )
 
-            # Align parameters for piecewise polynomial functions
-            params[group] = _parse_piecewise_parameters(params_one_group)
+    @staticmethod
+    def for_dates(
+        dates: list[datetime.date | str | int],
+    ) -> dict[datetime.date, PolicyEnvironment]:
+        """
+        Set up the policy environments for many dates at once.
 
-        # Extend dictionary with date-specific values which do not need an own function
-        params = _parse_kinderzuschl_max(date, params)
-        params = _parse_einführungsfaktor_vorsorgeaufw_alter_ab_2005(date, params)
-        params = _parse_vorsorgepauschale_rentenv_anteil(date, params)
-        functions = load_functions_for_date(date)
+        Functions are loaded once. Functions and parameter values which do not change
+        between dates are shared by the environments, so each distinct value is stored
+        only once. Like the environments returned by :meth:`for_date`, the
+        environments are immutable. Use :func:`get_policy_regimes` to find the date
+        intervals over which the policy does not change.
 
-        # Load aggregation specs
-        aggregate_by_group_specs = load_internal_aggregation_dict("aggregate_by_group")
-        aggregate_by_p_id_specs = load_internal_aggregation_dict("aggregate_by_p_id")
+        Parameters
+        ----------
+        dates:
+            The dates for which the policy system is set up. An integer is interpreted
+            as the year.
 
-        return PolicyEnvironment(
-            functions, params, aggregate_by_group_specs, aggregate_by_p_id_specs
+        Returns
+        -------
+        environments:
+            A mapping from the sorted, normalized dates to the policy environments.
+        """
+        dates = sorted({_parse_date(date) for date in dates})
+        functions_by_date = load_functions_for_dates(dates)
+        aggregate_by_group_specs = _make_read_only(
+            load_internal_aggregation_dict("aggregate_by_group")
+        )
+        aggregate_by_p_id_specs = _make_read_only(
+            load_internal_aggregation_dict("aggregate_by_p_id")
         )
 
+        shared_functions = {}
+        shared_values = {}
+        environments = {}
+        for date in dates:
+            functions = _ReadOnlyDict(
+                {f.name_in_dag: f for f in functions_by_date[date]}
+            )
+            functions = shared_functions.setdefault(
+                tuple(map(id, functions.values())), functions
+            )
+
+            params = _ReadOnlyDict(
+                {
+                    group: _ReadOnlyDict(
+                        {
+                            key: value
+                            if key == "datum"
+                            else _get_shared_value(
+                                shared_values.setdefault((group, key), []), value
+                            )
+                            for key, value in params_one_group.items()
+                        }
+                    )
+                    for group, params_one_group in _load_params_for_date(date).items()
+                }
+            )
+
+            environment = object.__new__(PolicyEnvironment)
+            environment._functions = functions  # noqa: SLF001
+            environment._params = params  # noqa: SLF001
+            environment._aggregate_by_group_specs = (  # noqa: SLF001
+                aggregate_by_group_specs
+            )
+            environment._aggregate_by_p_id_specs = (  # noqa: SLF001
+                aggregate_by_p_id_specs
+            )
+            environments[date] = environment
+
+        return environments
+
     def __init__(
         self,
         functions: list[PolicyFunction | Callable],
@@ -156,6 +230,45 @@ class PolicyEnvironment:
         """
         return self._functions.get(name)
 
+    def get_vectorization_fallbacks(self) -> dict[str, str]:
+        """
+        Return the functions which are vectorized with `numpy.vectorize` instead of
+        being translated to array operations.
+
+        Functions which fail when they are called the first time fall back to
+        `numpy.vectorize` only then, so the result may change after computing taxes and
+        transfers.
+
+        Returns
+        -------
+        fallbacks:
+            A mapping from the names of the functions to the reasons for the fallback.
+        """
+        return {
+            name: f.vectorization_fallback_reason
+            for name, f in self._functions.items()
+            if f.vectorization_strategy == "vectorize"
+        }
+
+    def get_numba_fallbacks(self) -> dict[str, str]:
+        """
+        Return the functions which could not be compiled with numba.
+
+        Only relevant for the numba backend. Functions are compiled when they are called
+        the first time, so the result is only complete after computing taxes and
+        transfers. These functions are vectorized as with the NumPy backend.
+
+        Returns
+        -------
+        fallbacks:
+            A mapping from the names of the functions to the reasons for the fallback.
+        """
+        return {
+            name: f.numba_fallback_reason
+            for name, f in self._functions.items()
+            if f.numba_fallback_reason is not None
+        }
+
     def upsert_functions(
         self, *functions: PolicyFunction | Callable
     ) -> PolicyEnvironment:
@@ -218,6 +331,252 @@ class PolicyEnvironment:
         return result
 
 
+@lru_cache(maxsize=POLICY_ENVIRONMENT_CACHE_SIZE)
+def _cached_policy_environment_for_date(
+    date: datetime.date,
+    use_jax: bool,  # noqa: ARG001
+    use_numba: bool,  # noqa: ARG001
+) -> PolicyEnvironment:
+    """Set up the immutable policy environment for a date and cache it.
+
+    Functions are vectorized for the array backend which is set when they are created
+    and called, so the flags of the backend are part of the key of the cache.
+
+    """
+    params = _load_params_for_date(date)
+    functions = load_functions_for_date(date)
+
+    # Load aggregation specs
+    aggregate_by_group_specs = load_internal_aggregation_dict("aggregate_by_group")
+    aggregate_by_p_id_specs = load_internal_aggregation_dict("aggregate_by_p_id")
+
+    environment = PolicyEnvironment(
+        functions, params, aggregate_by_group_specs, aggregate_by_p_id_specs
+    )
+    environment._functions = _ReadOnlyDict(environment._functions)  # noqa: SLF001
+    environment._params = _make_read_only(environment._params)  # noqa: SLF001
+    environment._aggregate_by_group_specs = _make_read_only(  # noqa: SLF001
+        environment._aggregate_by_group_specs  # noqa: SLF001
+    )
+    environment._aggregate_by_p_id_specs = _make_read_only(  # noqa: SLF001
+        environment._aggregate_by_p_id_specs  # noqa: SLF001
+    )
+
+    return environment
+
+
+def _load_params_for_date(date: datetime.date) -> dict[str, Any]:
+    """Load the parameters of all groups for a date."""
+    params = {}
+    for group in INTERNAL_PARAMS_GROUPS:
+        params_one_group = _load_parameter_group_from_yaml(date, group)
+
+        # Align parameters for piecewise polynomial functions
+        params[group] = _parse_piecewise_parameters(params_one_group)
+
+    params = _add_tariff_lookup_tables(params)
+
+    # Extend dictionary with date-specific values which do not need an own function
+    params = _parse_kinderzuschl_max(date, params)
+    params = _parse_einführungsfaktor_vorsorgeaufw_alter_ab_2005(date, params)
+    params = _parse_vorsorgepauschale_rentenv_anteil(date, params)
+
+    return params
+
+
+def get_policy_regimes(
+    environments: dict[datetime.date, PolicyEnvironment],
+    targets: str | list[str] | None = None,
+) -> list[tuple[datetime.date, datetime.date]]:
+    """
+    Find the date intervals over which the policy environment does not change.
+
+    Consecutive dates belong to the same regime if their environments share all
+    functions and all parameter values, as the environments created by
+    :meth:`PolicyEnvironment.for_dates` do. The date itself (``datum``) of a group of
+    parameters is only ignored if no function needed for the targets reads it. E.g.,
+    the age in months used by Elterngeld depends on the date, so each date is its own
+    regime if Elterngeld is among the targets.
+
+    A function is assumed to read the date if it receives the parameters of the group
+    and its source code mentions ``"datum"`` or is not available.
+
+    Parameters
+    ----------
+    environments:
+        A mapping from dates to policy environments.
+    targets:
+        Names of the functions which are computed for the regimes. By default, all
+        functions of the environments are considered.
+
+    Returns
+    -------
+    regimes:
+        The first and the last date of each regime, sorted by date.
+    """
+    targets = None if targets is None else parse_to_list_of_strings(targets, "targets")
+    groups_reading_date = {}
+    regimes = []
+    previous = None
+    for date, environment in sorted(environments.items()):
+        if id(environment.functions) not in groups_reading_date:
+            groups_reading_date[id(environment.functions)] = (
+                _get_params_groups_whose_date_is_read(environment, targets)
+            )
+        if previous is not None and _environments_share_policy(
+            previous, environment, groups_reading_date[id(environment.functions)]
+        ):
+            regimes[-1] = (regimes[-1][0], date)
+        else:
+            regimes.append((date, date))
+        previous = environment
+
+    return regimes
+
+
+def _environments_share_policy(first, second, groups_reading_date):
+    if first.functions is not second.functions:
+        return False
+    if first.params.keys() != second.params.keys():
+        return False
+    for group, first_group in first.params.items():
+        second_group = second.params[group]
+        if first_group.keys() != second_group.keys():
+            return False
+        if any(
+            first_group[key] is not second_group[key]
+            for key in first_group
+            if key != "datum" or group in groups_reading_date
+        ):
+            return False
+    return True
+
+
+def _get_params_groups_whose_date_is_read(environment, targets):
+    """Get the groups of parameters whose date is read by functions for the targets."""
+    if targets is None:
+        functions = environment.functions
+    else:
+        functions, _ = check_functions_and_differentiate_types(
+            environment=environment, targets=targets, data_cols=[]
+        )
+
+    groups = set()
+    for function in functions.values():
+        params_groups = {
+            argument.removesuffix("_params")
+            for argument in inspect.signature(function).parameters
+            if argument.endswith("_params")
+        }
+        if params_groups and _mentions_date(getattr(function, "function", function)):
+            groups |= params_groups
+
+    return groups
+
+
+@cache
+def _mentions_date(function):
+    try:
+        return "datum" in inspect.getsource(function)
+    except (OSError, TypeError):
+        return True
+
+
+def _get_shared_value(distinct_values, value):
+    """Return an equal value which was seen before or store the read-only value."""
+    for distinct_value in distinct_values:
+        if values_are_equal(distinct_value, value):
+            return distinct_value
+    distinct_values.append(_make_read_only(value))
+    return distinct_values[-1]
+
+
+def values_are_equal(first, second):
+    """Check whether two parameter values are equal, including nested arrays."""
+    if isinstance(first, dict) or isinstance(second, dict):
+        return (
+            isinstance(first, dict)
+            and isinstance(second, dict)
+            and first.keys() == second.keys()
+            and all(values_are_equal(first[k], second[k]) for k in first)
+        )
+    elif isinstance(first, numpy.ndarray) or isinstance(second, numpy.ndarray):
+        return (
+            isinstance(first, numpy.ndarray)
+            and isinstance(second, numpy.ndarray)
+            and first.dtype == second.dtype
+            and numpy.array_equal(first, second, equal_nan=first.dtype.kind == "f")
+        )
+    elif isinstance(first, list | tuple) or isinstance(second, list | tuple):
+        return (
+            type(first) is type(second)
+            and len(first) == len(second)
+            and all(values_are_equal(a, b) for a, b in zip(first, second, strict=True))
+        )
+    elif isinstance(first, float) and isinstance(second, float):
+        return first == second or (numpy.isnan(first) and numpy.isnan(second))
+    else:
+        return type(first) is type(second) and first == second
+
+
+def clear_policy_environment_cache():
+    """Remove all cached policy environments.
+
+    :meth:`PolicyEnvironment.for_date` keeps the environments of the
+    ``POLICY_ENVIRONMENT_CACHE_SIZE`` most recently used dates.
+
+    """
+    _cached_policy_environment_for_date.cache_clear()
+
+
+class _ReadOnlyDict(dict):
+    """
+    A dictionary which cannot be modified in place.
+
+    Copies, e.g., with ``dict(d)``, ``d.copy()``, or ``copy.deepcopy(d)``, are regular
+    dictionaries which can be modified.
+    """
+
+    def _fail(self, *args, **kwargs):  # noqa: ARG002
+        raise TypeError(
+            "The policy environment is immutable. Modify a copy and create a new "
+            "environment with 'replace_all_parameters' or 'upsert_functions'."
+        )
+
+    __setitem__ = __delitem__ = __ior__ = _fail
+    clear = pop = popitem = setdefault = update = _fail
+
+    def __copy__(self):
+        return dict(self)
+
+    def __deepcopy__(self, memo):
+        return {copy.deepcopy(k, memo): copy.deepcopy(v, memo) for k, v in self.items()}
+
+    def __reduce__(self):
+        return (dict, (dict(self),))
+
+
+def _make_read_only(value, memo=None):
+    """Turn nested dictionaries into read-only dictionaries and freeze numpy arrays.
+
+    Like :func:`copy.deepcopy`, an array which appears several times is replaced by the
+    same frozen view, so that, e.g., lookup tables still refer to the parameters they
+    were created from.
+
+    """
+    memo = {} if memo is None else memo
+    if isinstance(value, dict):
+        return _ReadOnlyDict({k: _make_read_only(v, memo) for k, v in value.items()})
+    elif isinstance(value, numpy.ndarray):
+        if id(value) not in memo:
+            view = value.view()
+            view.flags.writeable = False
+            memo[id(value)] = view
+        return memo[id(value)]
+    else:
+        return value
+
+
 def set_up_policy_environment(date: datetime.date | str | int) -> PolicyEnvironment:
     """
     Set up the policy environment for a particular date.
@@ -292,6 +651,36 @@ def _parse_piecewise_parameters(tax_data):
     return tax_data
 
 
+def _add_tariff_lookup_tables(params):
+    """Add lookup tables to the tariffs of the income tax and the solidarity surcharge.
+
+    The tariffs are evaluated for many people, so their values at whole euros are
+    tabulated once per environment. See :func:`create_lookup_table`.
+
+    Parameters
+    ----------
+    params : dict
+        Dictionary of parameters with parsed piecewise parameters.
+
+    Returns
+    -------
+    params : dict
+        Dictionary of parameters with lookup tables of the tariffs.
+
+    """
+    for group, param in _TARIFFS_WITH_LOOKUP_TABLE:
+        if param in params.get(group, {}):
+            params[group][param]["lookup_table"] = create_lookup_table(
+                thresholds=params[group][param]["thresholds"],
+                rates=params[group][param]["rates"],
+                intercepts_at_lower_thresholds=params[group][param][
+                    "intercepts_at_lower_thresholds"
+                ],
+            )
+
+    return params
+
+
 def _parse_kinderzuschl_max(date, params):
     """Prior to 2021, the maximum amount of the Kinderzuschlag was specified directly in
     the laws and directives.
@@ -353,16 +742,14 @@ def _parse_einführungsfaktor_vorsorgeaufw_alter_ab_2005(date, params):
     jahr = float(date.year)
     if jahr >= 2005:
         out = piecewise_polynomial(
-            pd.Series(jahr),
+            numpy.array([jahr]),
             thresholds=params["eink_st_abzuege"]["einführungsfaktor"]["thresholds"],
             rates=params["eink_st_abzuege"]["einführungsfaktor"]["rates"],
             intercepts_at_lower_thresholds=params["eink_st_abzuege"][
                 "einführungsfaktor"
             ]["intercepts_at_lower_thresholds"],
-        )
-        params["eink_st_abzuege"]["einführungsfaktor_vorsorgeaufw_alter_ab_2005"] = (
-            out.loc[0]
-        )
+        )[0]
+        params["eink_st_abzuege"]["einführungsfaktor_vorsorgeaufw_alter_ab_2005"] = out
     return params
 
 
@@ -386,7 +773,7 @@ def _parse_vorsorgepauschale_rentenv_anteil(date, params):
     jahr = float(date.year)
     if jahr >= 2005:
         out = piecewise_polynomial(
-            pd.Series(jahr),
+            numpy.array([jahr]),
             thresholds=params["eink_st_abzuege"]["vorsorgepauschale_rentenv_anteil"][
                 "thresholds"
             ],
@@ -396,8 +783,8 @@ def _parse_vorsorgepauschale_rentenv_anteil(date, params):
             intercepts_at_lower_thresholds=params["eink_st_abzuege"][
                 "vorsorgepauschale_rentenv_anteil"
             ]["intercepts_at_lower_thresholds"],
-        )
-        params["eink_st_abzuege"]["vorsorgepauschale_rentenv_anteil"] = out.loc[0]
+        )[0]
+        params["eink_st_abzuege"]["vorsorgepauschale_rentenv_anteil"] = out
 
     return params
 
@@ -443,10 +830,8 @@ def _load_parameter_group_from_yaml(
 
         return dt
 
-    raw_group_data = yaml.load(
-        (yaml_path / f"{group}.yaml").read_text(encoding="utf-8"),
-        Loader=yaml.CLoader,
-    )
+    timeline = load_parameter_timeline(group, yaml_path=yaml_path)
+    raw_group_data = timeline.raw_group_data
 
     # Load parameters (exclude 'rounding' parameters which are handled at the
     # end of this function)
@@ -457,18 +842,14 @@ def _load_parameter_group_from_yaml(
 
     # Load values of all parameters at the specified date
     for param in parameters:
-        policy_dates = sorted(
-            key for key in raw_group_data[param] if isinstance(key, datetime.date)
-        )
-
-        past_policies = [d for d in policy_dates if d <= date]
+        policy_date_in_place = timeline.last_change_until(param, date)
 
-        if not past_policies:
+        if policy_date_in_place is None:
             # If no policy exists, then we check if the policy maybe agrees right now
             # with another one.
             # Otherwise, do not create an entry for this parameter.
-            if "deviation_from" in raw_group_data[param][numpy.min(policy_dates)]:
-                future_policy = raw_group_data[param][numpy.min(policy_dates)]
+            future_policy = raw_group_data[param][timeline.first_change(param)]
+            if "deviation_from" in future_policy:
                 if "." in future_policy["deviation_from"]:
                     path_list = future_policy["deviation_from"].split(".")
                     params_temp = _load_parameter_group_from_yaml(
@@ -481,7 +862,7 @@ def _load_parameter_group_from_yaml(
                         out_params[param] = params_temp[path_list[1]]
 
         else:
-            policy_in_place = raw_group_data[param][numpy.max(past_policies)]
+            policy_in_place = raw_group_data[param][policy_date_in_place]
             if "scalar" in policy_in_place:
                 if policy_in_place["scalar"] == "inf":
                     out_params[param] = numpy.inf
@@ -499,7 +880,7 @@ def _load_parameter_group_from_yaml(
                 )
                 if "deviation_from" in policy_in_place:
                     if policy_in_place["deviation_from"] == "previous":
-                        new_date = numpy.max(past_policies) - datetime.timedelta(days=1)
+                        new_date = policy_date_in_place - datetime.timedelta(days=1)
                         out_params[param] = _load_parameter_group_from_yaml(
                             new_date, group, parameters=[param], yaml_path=yaml_path
                         )[param]
@@ -561,7 +942,9 @@ def _load_parameter_group_from_yaml(
         out_params["rounding"] = _load_rounding_parameters(
             date, raw_group_data["rounding"]
         )
-    return out_params
+
+    # The timeline is shared, so the values must not be modified by the caller.
+    return copy.deepcopy(out_params)
 
 
 def _load_rounding_parameters(date, rounding_spec):
@@ -4,12 +4,11 @@ import functools
 import inspect
 from typing import TYPE_CHECKING
 
-import numpy
-
 from _gettsim.aggregation import (
     all_by_p_id,
     any_by_p_id,
     count_by_p_id,
+    create_group_index,
     grouped_all,
     grouped_any,
     grouped_count,
@@ -28,13 +27,18 @@ from _gettsim.config import (
 )
 from _gettsim.functions.derived_function import DerivedFunction
 from _gettsim.functions.policy_function import PolicyFunction
+from _gettsim.functions.policy_function import (
+    _vectorize_func as _vectorize_scalar_func,
+)
 from _gettsim.groupings import create_groupings
 from _gettsim.shared import (
     format_list_linewise,
-    get_names_of_arguments_without_defaults,
     remove_group_suffix,
 )
-from _gettsim.time_conversion import create_time_conversion_functions
+from _gettsim.time_conversion import (
+    create_time_conversion_function,
+    get_time_conversion_sources,
+)
 
 if TYPE_CHECKING:
     from collections.abc import Callable
@@ -47,10 +51,11 @@ def check_functions_and_differentiate_types(
     targets: list[str],
     data_cols,
 ) -> tuple[dict[str, Callable], dict[str, Callable]]:
-    """Create the dict with all functions that may become part of the DAG by:
+    """Create the dict with all functions that become part of the DAG by:
 
-    - vectorizing all functions
-    - adding time conversion functions, aggregation functions, and combinations
+    - searching backwards from the targets for the functions they depend on
+    - adding time conversion functions, aggregation functions, and combinations of
+      these when they are requested by another function or a target
 
     Check that: - all targets are in set of functions or in data_cols
 
@@ -66,91 +71,231 @@ def check_functions_and_differentiate_types(
     Returns
     -------
     functions_not_overridden : dict
-        All functions except the ones that are overridden by an input column.
+        Functions which are needed to compute the targets except the ones that are
+        overridden by an input column.
     functions_overridden : dict
         Functions that are overridden by an input column.
 
     """
-    # Create derived functions
-    (
-        time_conversion_functions,
-        aggregate_by_group_functions,
-        aggregate_by_p_id_functions,
-    ) = _create_derived_functions(
-        environment,
-        targets,
-        data_cols,
-    )
+    functions = _FunctionsOnDemand(environment, targets, data_cols)
 
-    # Create groupings
-    groupings = create_groupings()
+    _fail_if_targets_are_not_among_functions(
+        {name: functions.get(name) for name in targets if name in functions}, targets
+    )
 
-    all_functions = {
-        **environment.functions,
-        **aggregate_by_p_id_functions,
-        **time_conversion_functions,
-        **aggregate_by_group_functions,
-        **groupings,
+    functions_overridden = {
+        name: functions.get(name) for name in data_cols if name in functions
     }
 
-    _fail_if_targets_are_not_among_functions(all_functions, targets)
-
-    # Separate all functions by whether they will be used or not.
-    functions_overridden = {}
+    # Search backwards from the targets. Data columns end the search.
     functions_not_overridden = {}
-    for k, v in all_functions.items():
-        if k in data_cols:
-            functions_overridden[k] = v
-        else:
-            functions_not_overridden[k] = v
+    to_visit = list(reversed(targets))
+    visited = set()
+    while to_visit:
+        name = to_visit.pop()
+        if name in visited or name in data_cols or name not in functions:
+            continue
+        visited.add(name)
+        function = functions.get(name)
+        functions_not_overridden[name] = function
+        arguments = list(inspect.signature(function).parameters)
+        functions.request(arguments)
+        to_visit.extend(reversed(arguments))
 
     return functions_not_overridden, functions_overridden
 
 
-def _create_derived_functions(
-    environment: PolicyEnvironment,
-    targets: list[str],
-    data_cols: list[str],
-) -> tuple[
-    dict[str, DerivedFunction], dict[str, DerivedFunction], dict[str, DerivedFunction]
-]:
-    """
-    Create functions that are derived from the user and internal functions.
+class _FunctionsOnDemand:
+    """All functions that may become part of the DAG, created when they are requested.
+
+    Besides the functions of the environment, these are the aggregations by p_id, the
+    time conversions, the aggregations by group, the groupings, and the group indices.
+    If several of them have the same name, the one listed last takes precedence.
+
+    Parameters
+    ----------
+    environment:
+        The policy environment.
+    targets:
+        Names of functions whose output is actually needed by the user.
+    data_cols : list
+        Data columns provided by the user.
 
-    This includes:
-    - functions for converting to different time units
-    - aggregation functions
-    - combinations of these
     """
-    # Create parent-child relationships
-    aggregate_by_p_id_functions = _create_aggregate_by_p_id_functions(
-        environment.functions,
-        environment.aggregate_by_p_id_specs,
-        data_cols,
-    )
 
-    # Create functions for different time units
-    time_conversion_functions = create_time_conversion_functions(
-        {**environment.functions, **aggregate_by_p_id_functions}, data_cols
-    )
+    def __init__(self, environment: PolicyEnvironment, targets, data_cols):
+        self._environment_functions = environment.functions
+        self._aggregate_by_p_id_specs = environment.aggregate_by_p_id_specs
+        self._aggregate_by_group_specs = environment.aggregate_by_group_specs
+        self._data_col_positions = {name: i for i, name in enumerate(data_cols)}
+
+        # Sums by group are only created for variables which are requested by a target
+        # or a function.
+        self._requested = set(targets)
+        for function in self._environment_functions.values():
+            self._requested.update(inspect.signature(function).parameters)
+
+        for k, v in self._aggregate_by_p_id_specs.items():
+            _check_agg_specs_validity(agg_specs=v, agg_col=k)
+        for k, v in self._aggregate_by_group_specs.items():
+            _check_agg_specs_validity(agg_specs=v, agg_col=k)
+
+        self._groupings = create_groupings()
+        self._group_ids_of_group_indices = {
+            get_group_index_name(f"{g}_id"): f"{g}_id" for g in SUPPORTED_GROUPINGS
+        }
 
-    # Create aggregation functions
-    aggregate_by_group_functions = _create_aggregate_by_group_functions(
-        {
-            **time_conversion_functions,
-            **environment.functions,
-            **aggregate_by_p_id_functions,
-        },
-        targets,
-        data_cols,
-        environment.aggregate_by_group_specs,
-    )
+        # Time conversions of functions are derived from the last function in this
+        # order, like in `create_time_conversion_functions`.
+        self._function_positions = {
+            name: i
+            for i, name in enumerate(
+                [
+                    *self._environment_functions,
+                    *(
+                        name
+                        for name in self._aggregate_by_p_id_specs
+                        if name not in self._environment_functions
+                    ),
+                ]
+            )
+        }
 
-    return (
-        time_conversion_functions,
-        aggregate_by_group_functions,
-        aggregate_by_p_id_functions,
-    )
+        self._cache = {}
+
+    def request(self, names):
+        """Mark variables as requested by a function."""
+        self._requested.update(names)
+
+    def __contains__(self, name):
+        return self.get(name) is not None
+
+    def get(self, name):
+        """Get the function with the given name or None if there is none."""
+        if name not in self._cache:
+            if name in self._group_ids_of_group_indices:
+                function = _create_group_index_function(
+                    self._group_ids_of_group_indices[name]
+                )
+            elif name in self._groupings:
+                function = self._groupings[name]
+            else:
+                function = self._get_aggregate_by_group_function(name)
+                if function is None:
+                    function = self._get_time_conversion_function(name)
+                if function is None:
+                    function = self._get_user_or_internal_function(name)
+            self._cache[name] = function
+
+        return self._cache[name]
+
+    def _get_user_or_internal_function(self, name):
+        """Get an aggregation by p_id or a function of the environment."""
+        function = self._get_aggregate_by_p_id_function(name)
+        if function is None:
+            function = self._environment_functions.get(name)
+        return function
+
+    def _get_aggregate_by_p_id_function(self, name):
+        key = ("aggregate_by_p_id", name)
+        if key not in self._cache:
+            agg_specs = self._aggregate_by_p_id_specs.get(name)
+            if agg_specs is not None and (
+                agg_specs["source_col"] in self._environment_functions
+                or agg_specs["source_col"] in self._data_col_positions
+            ):
+                self._cache[key] = _create_one_aggregate_by_p_id_func(
+                    agg_col=name,
+                    agg_specs=agg_specs,
+                    user_and_internal_functions=self._environment_functions,
+                )
+            else:
+                self._cache[key] = None
+
+        return self._cache[key]
+
+    def _get_time_conversion_function(self, name):
+        """Get the function converting a data column or a function to `name`.
+
+        Conversions of data columns are preferred and replace functions with the same
+        name. Conversions of functions are only created if there is no function or data
+        column with the same name.
+
+        """
+        key = ("time_conversion", name)
+        if key not in self._cache:
+            sources = get_time_conversion_sources(name)
+            data_col_sources = [s for s in sources if s in self._data_col_positions]
+
+            function = None
+            if name in self._data_col_positions:
+                pass
+            elif data_col_sources:
+                function = create_time_conversion_function(
+                    name, max(data_col_sources, key=self._data_col_positions.get)
+                )
+            elif self._get_user_or_internal_function(name) is None:
+                for source in sorted(
+                    (s for s in sources if s in self._function_positions),
+                    key=self._function_positions.get,
+                    reverse=True,
+                ):
+                    source_func = self._get_user_or_internal_function(source)
+                    if source_func is not None:
+                        function = create_time_conversion_function(
+                            name, source, source_func
+                        )
+                    if function is not None:
+                        break
+            self._cache[key] = function
+
+        return self._cache[key]
+
+    def _get_aggregate_by_group_function(self, name):
+        """Get the aggregation by group with the given name.
+
+        Besides the aggregations in the specs, sums are created for requested
+        variables with a group suffix, unless a function with the name exists. The
+        summed variable must be a function or a data column.
+
+        """
+        if name in self._aggregate_by_group_specs:
+            agg_specs = self._aggregate_by_group_specs[name]
+        elif (
+            name in self._requested
+            and any(name.endswith(f"_{g}") for g in SUPPORTED_GROUPINGS)
+            and self._get_source_function(name) is None
+            and (
+                self._get_source_function(remove_group_suffix(name)) is not None
+                or remove_group_suffix(name) in self._data_col_positions
+            )
+        ):
+            agg_specs = {"aggr": "sum", "source_col": remove_group_suffix(name)}
+        else:
+            return None
+
+        source_col = agg_specs.get("source_col")
+        source_function = (
+            None if source_col is None else self._get_source_function(source_col)
+        )
+        return _create_one_aggregate_by_group_func(
+            name,
+            agg_specs,
+            {} if source_function is None else {source_col: source_function},
+        )
+
+    def _get_source_function(self, name):
+        """Get a function which can be aggregated by group.
+
+        These are aggregations by p_id, functions of the environment, and time
+        conversions. Aggregations by p_id take precedence over functions of the
+        environment, which take precedence over time conversions.
+
+        """
+        function = self._get_user_or_internal_function(name)
+        if function is None:
+            function = self._get_time_conversion_function(name)
+        return function
 
 
 def _format_duplicated_functions(duplicated_functions, functions, source):
@@ -164,61 +309,6 @@ def _format_duplicated_functions(duplicated_functions, functions, source):
     return "\n".join(lines)
 
 
-def _create_aggregate_by_group_functions(
-    user_and_internal_functions: dict[str, PolicyFunction],
-    targets: list[str],
-    data_cols: list[str],
-    aggregate_by_group_specs: dict[str, dict[str, str]],
-) -> dict[str, DerivedFunction]:
-    """Create aggregation functions."""
-
-    # Make specs for automated sum aggregation
-    potential_source_cols = list(user_and_internal_functions) + data_cols
-    potential_agg_cols = set(
-        [
-            arg
-            for func in user_and_internal_functions.values()
-            for arg in get_names_of_arguments_without_defaults(func)
-        ]
-        + targets
-    )
-
-    automated_sum_aggregate_by_group_cols = [
-        col
-        for col in potential_agg_cols
-        if (col not in user_and_internal_functions)
-        and any(col.endswith(f"_{g}") for g in SUPPORTED_GROUPINGS)
-        and (remove_group_suffix(col) in potential_source_cols)
-    ]
-    automated_sum_aggregate_by_group_specs = {
-        agg_col: {"aggr": "sum", "source_col": remove_group_suffix(agg_col)}
-        for agg_col in automated_sum_aggregate_by_group_cols
-    }
-
-    # Add automated aggregation specs.
-    # Note: For duplicate keys, explicitly set specs are treated with higher priority
-    # than automated specs.
-    aggregate_by_group_dict = {
-        **automated_sum_aggregate_by_group_specs,
-        **aggregate_by_group_specs,
-    }
-
-    # Check validity of aggregation specs
-    [
-        _check_agg_specs_validity(agg_specs=v, agg_col=k)
-        for k, v in aggregate_by_group_dict.items()
-    ]
-
-    # Create functions from specs
-    aggregate_by_group_functions = {
-        agg_col: _create_one_aggregate_by_group_func(
-            agg_col, agg_spec, user_and_internal_functions
-        )
-        for agg_col, agg_spec in aggregate_by_group_dict.items()
-    }
-    return aggregate_by_group_functions
-
-
 def rename_arguments(func=None, mapper=None, annotations=None):
     if not annotations:
         annotations = {}
@@ -356,14 +446,22 @@ def _create_one_aggregate_by_group_func(  # noqa: PLR0912
         user_and_internal_functions=user_and_internal_functions,
     )
 
+    # Aggregate using the group index, which is computed once per level
+    group_index_name = get_group_index_name(group_id)
+
     if agg_specs["aggr"] == "count":
 
-        @rename_arguments(mapper={"group_id": group_id}, annotations=annotations)
+        @rename_arguments(
+            mapper={"group_id": group_index_name}, annotations=annotations
+        )
         def aggregate_by_group_func(group_id):
             return grouped_count(group_id)
 
     else:
-        mapper = {"source_col": agg_specs["source_col"], "group_id": group_id}
+        mapper = {
+            "source_col": agg_specs["source_col"],
+            "group_id": group_index_name,
+        }
         if agg_specs["aggr"] == "sum":
 
             @rename_arguments(
@@ -433,32 +531,39 @@ def _create_one_aggregate_by_group_func(  # noqa: PLR0912
     )
 
 
-def _create_aggregate_by_p_id_functions(
-    user_and_internal_functions: dict[str, PolicyFunction],
-    aggregate_by_p_id_specs: dict[str, dict[str, str]],
-    data_cols: list[str],
-) -> dict[str, DerivedFunction]:
-    """Create function dict with functions that link variables across persons."""
+def _create_group_index_function(group_id: str) -> DerivedFunction:
+    """Create the function that computes the group index of a grouping level.
 
-    aggregate_by_p_id_dict = aggregate_by_p_id_specs
+    The group index holds the densely renumbered group ids, the group sizes, and the
+    sort order of the persons by group. It is computed once per level and shared by all
+    aggregations by group on that level.
 
-    for k, v in aggregate_by_p_id_dict.items():
-        _check_agg_specs_validity(agg_specs=v, agg_col=k)
+    Parameters
+    ----------
+    group_id : str
+        Name of the group id of the level, e.g., `hh_id`.
 
-    aggregate_by_p_id_functions = {
-        agg_by_p_id_col: _create_one_aggregate_by_p_id_func(
-            agg_col=agg_by_p_id_col,
-            agg_specs=agg_by_p_id_spec,
-            user_and_internal_functions=user_and_internal_functions,
-        )
-        for agg_by_p_id_col, agg_by_p_id_spec in aggregate_by_p_id_dict.items()
-        if (
-            agg_by_p_id_spec["source_col"] in user_and_internal_functions
-            or agg_by_p_id_spec["source_col"] in data_cols
-        )
-    }
+    Returns
+    -------
+    group_index_function : DerivedFunction
+        Function computing `_[level]_group_index` from `[level]_id`.
 
-    return aggregate_by_p_id_functions
+    """
+
+    @rename_arguments(mapper={"group_id": group_id})
+    def group_index_func(group_id):
+        return create_group_index(group_id)
+
+    return DerivedFunction(
+        group_index_func,
+        function_name=get_group_index_name(group_id),
+        derived_from=group_id,
+    )
+
+
+def get_group_index_name(group_id: str) -> str:
+    """Get the name of the group index of the grouping level of a group id."""
+    return f"_{group_id.removesuffix('_id')}_group_index"
 
 
 def _create_one_aggregate_by_p_id_func(
@@ -588,17 +693,7 @@ def _vectorize_func(func):
     if isinstance(func, PolicyFunction):
         return func
 
-    # What should work once that Jax backend is fully supported
-    signature = inspect.signature(func)
-    func_vec = numpy.vectorize(func)
-
-    @functools.wraps(func)
-    def wrapper_vectorize_func(*args, **kwargs):
-        return func_vec(*args, **kwargs)
-
-    wrapper_vectorize_func.__signature__ = signature
-
-    return wrapper_vectorize_func
+    return _vectorize_scalar_func(func)
 
 
 def _fail_if_targets_are_not_among_functions(functions, targets):
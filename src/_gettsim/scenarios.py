@@ -0,0 +1,426 @@
+import ast
+import contextlib
+import functools
+import inspect
+import textwrap
+
+import numpy
+import pandas as pd
+
+from _gettsim import config
+from _gettsim.execution import MemoryAwareExecutor, split_by_dependence
+from _gettsim.functions.policy_function import PolicyFunction
+from _gettsim.interface import (
+    TaxTransferPlan,
+    prepare_taxes_and_transfers,
+    process_and_check_data,
+)
+from _gettsim.policy_environment import PolicyEnvironment, values_are_equal
+from _gettsim.shared import replace_by_path
+
+with contextlib.suppress(ImportError):
+    import jax
+
+
+class _ParamsCannotBeStackedError(TypeError):
+    """Raised if varying parameters cannot be stacked for `jax.vmap`."""
+
+
+def _get_errors_of_vmap():
+    """Get the errors which are raised if functions cannot be vectorized with JAX."""
+    return (
+        _ParamsCannotBeStackedError,
+        jax.errors.ConcretizationTypeError,
+        jax.errors.TracerArrayConversionError,
+        jax.errors.TracerIntegerConversionError,
+    )
+
+
+def compute_taxes_and_transfers_for_scenarios(
+    data,
+    environments: dict[str, PolicyEnvironment] | list[PolicyEnvironment],
+    targets=None,
+    check_minimal_specification="ignore",
+    rounding=True,
+):
+    """Compute taxes and transfers for many variants of the parameters.
+
+    The environments must share their functions and differ only in the values of their
+    parameters, e.g., because they were created with
+    :meth:`PolicyEnvironment.replace_all_parameters`. Functions which do not depend on
+    the parameters that vary across scenarios are computed once for all scenarios.
+
+    With the JAX backend, the remaining functions are evaluated once for all scenarios
+    with `jax.vmap`: Varying parameters are stacked to arrays with a leading scenario
+    axis. Lookup tables of varying tariffs are dropped, so the tariffs are evaluated
+    directly. If varying parameters cannot be stacked, e.g., because they are not
+    numeric, and with the NumPy backend, the functions are evaluated for each scenario
+    in turn. Which of both was used is recorded in ``results.attrs["vectorized"]``.
+
+    Parameters
+    ----------
+    data : pandas.Series or pandas.DataFrame or dict of pandas.Series
+        Data provided by the user.
+    environments : dict of PolicyEnvironment or list of PolicyEnvironment
+        The policy environments of the scenarios. If it is a dictionary, the keys are
+        the names of the scenarios. Otherwise, the scenarios are numbered.
+    targets : str, list of str, default None
+        String or list of strings with names of functions whose output is actually
+        needed by the user. By default, ``targets`` is ``None`` and all key outputs as
+        defined by `gettsim.config.DEFAULT_TARGETS` are returned.
+    check_minimal_specification : {"ignore", "warn", "raise"}, default "ignore"
+        Indicator for whether checks which ensure the most minimal configuration should
+        be silenced, emitted as warnings or errors.
+    rounding : bool, default True
+        Indicator for whether rounding should be applied as specified in the law.
+
+    Returns
+    -------
+    results : pandas.DataFrame
+        DataFrame containing computed variables. The first level of the index is the
+        scenario and the second one the row of the data. ``results.attrs["vectorized"]``
+        is True if the functions depending on varying parameters were evaluated with
+        `jax.vmap`.
+
+    """
+    if isinstance(environments, dict):
+        names, environments = list(environments), list(environments.values())
+    else:
+        environments = list(environments)
+        names = list(range(len(environments)))
+    _fail_if_environments_are_invalid(environments)
+
+    data = process_and_check_data(data=data)
+    plan = prepare_taxes_and_transfers(
+        environment=environments[0],
+        data_cols=list(data),
+        targets=targets,
+        check_minimal_specification=check_minimal_specification,
+        rounding=rounding,
+    )
+    data = plan.convert_data(data)
+    input_data = plan.create_input_data(data)
+
+    # Split the functions into those which are computed once and those which are
+    # computed for each scenario.
+    varied_params = get_varied_params([e.params for e in environments])
+    shared_executor, dependent = split_by_dependence(
+        plan.functions,
+        plan.targets,
+        get_functions_using_params(plan.functions, set(varied_params), rounding),
+    )
+    shared_results = shared_executor(input_data)
+
+    dependent_targets = [t for t in plan.targets if t in dependent]
+    dependent_results, vectorized = (
+        compute_dependent_functions(
+            plan=plan,
+            names=dependent,
+            targets=dependent_targets,
+            inputs={**input_data, **shared_results},
+            params_of_scenarios=[e.params for e in environments],
+            varied_params=varied_params,
+        )
+        if dependent_targets
+        else ({}, False)
+    )
+
+    n_rows = len(next(iter(data.values())))
+    results = plan.prepare_results(
+        {
+            target: (
+                numpy.asarray(dependent_results[target]).reshape(-1)
+                if target in dependent_results
+                else numpy.tile(numpy.asarray(shared_results[target]), len(names))
+            )
+            for target in plan.targets
+        },
+        data={},
+    )
+    results.index = pd.MultiIndex.from_product(
+        [names, range(n_rows)], names=["scenario", None]
+    )
+    results.attrs["vectorized"] = vectorized
+
+    return results
+
+
+def get_varied_params(params_of_scenarios):
+    """Get the parameters whose values differ between scenarios.
+
+    Nested dictionaries with the same keys are compared key by key, all other values
+    are compared as a whole. Lookup tables are compared as a whole, too.
+
+    Parameters
+    ----------
+    params_of_scenarios : list of dict
+        The parameters of each scenario.
+
+    Returns
+    -------
+    varied_params : dict
+        Mapping from the paths of the varying parameters to their values in each
+        scenario.
+
+    """
+    base_params = params_of_scenarios[0]
+    varied_params = {}
+    for params in params_of_scenarios[1:]:
+        if params is base_params:
+            continue
+        for path in _get_paths_of_different_values(base_params, params, path=()):
+            varied_params[path] = None
+
+    return {
+        path: [_get_by_path(params, path) for params in params_of_scenarios]
+        for path in varied_params
+    }
+
+
+def compute_dependent_functions(  # noqa: PLR0913
+    plan: TaxTransferPlan, names, targets, inputs, params_of_scenarios, varied_params
+):
+    """Compute functions which depend on varying parameters for all scenarios.
+
+    Parameters
+    ----------
+    plan : TaxTransferPlan
+        The computation prepared for the first scenario.
+    names : set of str
+        Names of the functions of the plan which depend on varying parameters.
+    targets : list of str
+        Names of the functions whose output is returned.
+    inputs : dict of numpy.ndarray
+        Values of the inputs of the functions which do not vary across scenarios.
+    params_of_scenarios : list of dict
+        The parameters of each scenario.
+    varied_params : dict
+        Mapping from the paths of the varying parameters to their values in each
+        scenario. See :func:`get_varied_params`.
+
+    Returns
+    -------
+    results : dict of numpy.ndarray
+        Results of the targets with a leading scenario axis.
+    vectorized : bool
+        Whether the functions were evaluated for all scenarios at once with `jax.vmap`.
+
+    """
+    # If varying parameters cannot be stacked or the functions cannot be traced, each
+    # scenario is evaluated in turn below. All other errors are raised.
+    if config.USE_JAX:
+        try:
+            results = _compute_with_vmap(
+                plan=plan,
+                names=names,
+                targets=targets,
+                inputs=inputs,
+                base_params=params_of_scenarios[0],
+                varied_params=varied_params,
+            )
+        except _get_errors_of_vmap():
+            pass
+        else:
+            return results, True
+
+    results = []
+    for params in params_of_scenarios:
+        executor = MemoryAwareExecutor(
+            functions=plan.process_functions(names, params), targets=targets
+        )
+        results.append(executor(inputs))
+
+    return {
+        target: numpy.stack([numpy.asarray(r[target]) for r in results])
+        for target in targets
+    }, False
+
+
+def _compute_with_vmap(  # noqa: PLR0913
+    plan, names, targets, inputs, base_params, varied_params
+):
+    """Compute the functions for all scenarios at once with `jax.vmap`."""
+    paths = []
+    stacked_values = []
+    for path, values in varied_params.items():
+        if path[-1] == "lookup_table":
+            base_params = replace_by_path(base_params, path, None)
+        else:
+            try:
+                arrays = [numpy.asarray(v) for v in values]
+            except ValueError as error:
+                raise _ParamsCannotBeStackedError(
+                    f"The parameter {path} is not an array."
+                ) from error
+            if len({a.shape for a in arrays}) > 1:
+                raise _ParamsCannotBeStackedError(
+                    f"The parameter {path} has different shapes."
+                )
+            stacked = numpy.stack(arrays)
+            if stacked.dtype.kind not in "biuf":
+                raise _ParamsCannotBeStackedError(
+                    f"The parameter {path} is not numeric."
+                )
+            paths.append(path)
+            stacked_values.append(stacked)
+
+    def compute_scenario(values):
+        params = base_params
+        for path, value in zip(paths, values, strict=True):
+            params = replace_by_path(params, path, value)
+        executor = MemoryAwareExecutor(
+            functions=plan.process_functions(names, params), targets=targets
+        )
+        return executor(inputs)
+
+    return jax.vmap(compute_scenario)(stacked_values)
+
+
+def get_functions_using_params(functions, paths, rounding):
+    """Get the names of the functions which use any of the parameters.
+
+    Functions use the parameters which are accessed with literal keys in their source
+    code, e.g., ``kindergeld_params["kindergeld"]``, and the specifications of their
+    rounding. If a parameter group is used in another way, e.g., if it is passed to
+    another function as a whole, the function uses all parameters of the group.
+
+    Parameters
+    ----------
+    functions : dict of callable
+        Dictionary mapping function names to callables with partialled parameters.
+    paths : set of tuple
+        Paths of the parameters, starting with the name of the parameter group.
+    rounding : bool
+        Indicator for whether rounding is applied as specified in the law.
+
+    Returns
+    -------
+    names : set of str
+        Names of the functions which use any of the parameters.
+
+    """
+    return {
+        name
+        for name, func in functions.items()
+        if any(
+            used_path[: len(path)] == path[: len(used_path)]
+            for used_path in _get_used_params(name, func, rounding)
+            for path in paths
+        )
+    }
+
+
+def _get_used_params(name, func, rounding):
+    """Get the paths of the parameters which are used by a function."""
+    paths = set()
+    groups = {key[:-7] for key in getattr(func, "keywords", {})}
+    if groups:
+        paths_by_group = _get_paths_of_params_in_source(_get_original_function(func))
+        for group in groups:
+            paths.update(paths_by_group.get(group, {(group,)}))
+
+    info = getattr(func, "__info__", {})
+    if rounding and "params_key_for_rounding" in info:
+        paths.add((info["params_key_for_rounding"], "rounding", name))
+
+    return paths
+
+
+def _get_original_function(func):
+    """Unwrap partials, policy functions, and decorators."""
+    while True:
+        if isinstance(func, functools.partial):
+            func = func.func
+        elif isinstance(func, PolicyFunction):
+            func = func.function
+        elif hasattr(func, "__wrapped__"):
+            func = func.__wrapped__
+        else:
+            return func
+
+
+@functools.cache
+def _get_paths_of_params_in_source(func):
+    """Get the paths of the parameters which are accessed with literal keys.
+
+    Returns a mapping from the names of the parameter groups to the paths. Groups which
+    are also used in other ways are mapped to the path of the whole group.
+
+    """
+    try:
+        tree = ast.parse(textwrap.dedent(inspect.getsource(func)))
+    except (OSError, TypeError, SyntaxError):
+        return {}
+
+    parents = {
+        child: node for node in ast.walk(tree) for child in ast.iter_child_nodes(node)
+    }
+    paths = {}
+    for node in ast.walk(tree):
+        if not (isinstance(node, ast.Name) and node.id.endswith("_params")):
+            continue
+        group = node.id[:-7]
+        path = (group,)
+        subscript = node
+        while isinstance(parents.get(subscript), ast.Subscript) and (
+            parents[subscript].value is subscript
+        ):
+            try:
+                key = ast.literal_eval(parents[subscript].slice)
+            except (ValueError, TypeError):
+                break
+            path = (*path, key)
+            subscript = parents[subscript]
+        paths.setdefault(group, set()).add(path)
+
+    # The path of the whole group covers all others.
+    return {
+        group: {(group,)} if (group,) in group_paths else group_paths
+        for group, group_paths in paths.items()
+    }
+
+
+def _get_paths_of_different_values(first, second, path):
+    if first is second:
+        return []
+    elif (
+        isinstance(first, dict)
+        and isinstance(second, dict)
+        and path[-1:] != ("lookup_table",)
+    ):
+        if first.keys() != second.keys():
+            return [path]
+        return [
+            different_path
+            for key in first
+            for different_path in _get_paths_of_different_values(
+                first[key], second[key], (*path, key)
+            )
+        ]
+    elif values_are_equal(first, second):
+        return []
+    else:
+        return [path]
+
+
+def _get_by_path(params, path):
+    for key in path:
+        params = params[key]
+
+    return params
+
+
+def _fail_if_environments_are_invalid(environments):
+    if not environments:
+        raise ValueError("At least one policy environment is required.")
+    base = environments[0]
+    if any(
+        e.functions.keys() != base.functions.keys()
+        or any(e.functions[name] is not f for name, f in base.functions.items())
+        or e.aggregate_by_group_specs != base.aggregate_by_group_specs
+        or e.aggregate_by_p_id_specs != base.aggregate_by_p_id_specs
+        for e in environments[1:]
+    ):
+        raise ValueError(
+            "The policy environments of all scenarios must have the same functions."
+        )
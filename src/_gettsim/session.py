@@ -0,0 +1,239 @@
+import dags.dag
+import networkx as nx
+import numpy
+import pandas as pd
+
+from _gettsim.config import FOREIGN_KEYS, SUPPORTED_GROUPINGS
+from _gettsim.execution import get_free_arguments, get_nbytes
+from _gettsim.interface import prepare_taxes_and_transfers, process_and_check_data
+from _gettsim.policy_environment import PolicyEnvironment
+from _gettsim.shared import format_list_linewise, parse_to_list_of_strings
+
+EVICTION_POLICIES = ("lru", "largest")
+
+
+class TaxTransferSession:
+    """
+    A computation of taxes and transfers which is updated when input columns change.
+
+    The session keeps the data and caches the results of all functions. When columns of
+    the data are updated, only the cached results which depend on them are dropped.
+    The next computation recomputes these results and reuses all others.
+
+    Each cached result has a version stamp. Updating columns increases the version of
+    the data, and cached results carry the version of the data they were computed from.
+
+    If ``max_cached_bytes`` is given, cached results are evicted after each computation
+    until they fit into the limit. Evicted results are recomputed when they are needed
+    again.
+
+    Parameters
+    ----------
+    data : pandas.Series or pandas.DataFrame or dict of pandas.Series
+        Data provided by the user.
+    environment:
+        The policy environment which contains all necessary functions and parameters.
+    targets : str, list of str, default None
+        String or list of strings with names of functions whose output is actually
+        needed by the user. By default, ``targets`` is ``None`` and all key outputs as
+        defined by `gettsim.config.DEFAULT_TARGETS` are returned.
+    check_minimal_specification : {"ignore", "warn", "raise"}, default "ignore"
+        Indicator for whether checks which ensure the most minimal configuration should
+        be silenced, emitted as warnings or errors.
+    rounding : bool, default True
+        Indicator for whether rounding should be applied as specified in the law.
+    max_cached_bytes : int, default None
+        Maximum number of bytes of cached results. By default, all results are cached.
+    eviction_policy : {"lru", "largest"}, default "lru"
+        Which cached results are evicted first: the least recently used ones or the
+        largest ones.
+
+    Attributes
+    ----------
+    version : int
+        Version of the data, which is increased by each update.
+    last_computed : list of str
+        Names of the functions which were executed by the last computation.
+    """
+
+    def __init__(  # noqa: PLR0913
+        self,
+        data,
+        environment: PolicyEnvironment,
+        targets=None,
+        check_minimal_specification="ignore",
+        rounding=True,
+        max_cached_bytes=None,
+        eviction_policy="lru",
+    ):
+        if eviction_policy not in EVICTION_POLICIES:
+            raise ValueError(
+                f"'eviction_policy' must be one of {EVICTION_POLICIES}, got "
+                f"{eviction_policy!r}."
+            )
+        self.max_cached_bytes = max_cached_bytes
+        self.eviction_policy = eviction_policy
+
+        data = process_and_check_data(data=data)
+        self._plan = prepare_taxes_and_transfers(
+            environment=environment,
+            data_cols=list(data),
+            targets=targets,
+            check_minimal_specification=check_minimal_specification,
+            rounding=rounding,
+        )
+        self.targets = self._plan.targets
+        self.root_nodes = self._plan.root_nodes
+        self._functions = self._plan.functions
+        self._dag = dags.dag.create_dag(functions=self._functions, targets=self.targets)
+        self._execution_order = [
+            n for n in nx.topological_sort(self._dag) if n in self._functions
+        ]
+        self._arguments_of_functions = {
+            name: get_free_arguments(self._functions[name])
+            for name in self._execution_order
+        }
+
+        self._data = self._plan.convert_data(data)
+        self._inputs = {k: s.values for k, s in self._data.items()}
+        self.version = 0
+
+        # Cached results with their version stamps and the time of their last use.
+        self._cache = {}
+        self._versions = {}
+        self._last_used = {}
+        self._n_uses = 0
+        self.last_computed = []
+
+    @property
+    def cached_bytes(self):
+        """Number of bytes of the cached results."""
+        return sum(get_nbytes(value) for value in self._cache.values())
+
+    @property
+    def cached_nodes(self):
+        """Names of the functions whose results are cached, with their versions."""
+        return dict(self._versions)
+
+    def update(self, data):
+        """Update columns of the data.
+
+        The cached results of all functions which depend on the columns are dropped.
+
+        Parameters
+        ----------
+        data : pandas.Series or pandas.DataFrame or dict of array-like
+            New values of some columns of the data. The rows must be in the same order
+            as in the data the session was created with.
+
+        """
+        data = dict(pd.DataFrame(data)) if isinstance(data, pd.Series) else dict(data)
+        unknown = set(data) - set(self._data)
+        if unknown:
+            raise ValueError(
+                "Only columns of the data can be updated. The following columns are "
+                f"unknown:\n{format_list_linewise(sorted(unknown))}"
+            )
+
+        n_rows = len(next(iter(self._data.values())))
+        if any(len(column) != n_rows for column in data.values()):
+            raise ValueError(f"Updated columns must have {n_rows} rows.")
+        data = {
+            name: pd.Series(
+                numpy.asarray(column), index=self._data[name].index, name=name
+            )
+            for name, column in data.items()
+        }
+
+        # Check the updated columns together with the ids they are checked against.
+        ids = ["p_id", *FOREIGN_KEYS, *(f"{g}_id" for g in SUPPORTED_GROUPINGS)]
+        process_and_check_data(
+            {**{k: self._data[k] for k in ids if k in self._data}, **data}
+        )
+        data = self._plan.convert_data(data)
+
+        self.version += 1
+        for name, column in data.items():
+            self._data[name] = column
+            self._inputs[name] = column.values
+            if name in self._dag:
+                for node in nx.descendants(self._dag, name):
+                    self._evict(node)
+
+    def compute(self, targets=None):
+        """Compute taxes and transfers, reusing cached results.
+
+        Parameters
+        ----------
+        targets : str, list of str, default None
+            Names of targets of the session which are computed. By default, all targets
+            are computed.
+
+        Returns
+        -------
+        results : pandas.DataFrame
+            DataFrame containing computed variables.
+
+        """
+        targets = self.targets if targets is None else targets
+        targets = parse_to_list_of_strings(targets, "targets")
+        unknown = set(targets) - set(self.targets)
+        if unknown:
+            raise ValueError(
+                "The following targets are not targets of the session:\n"
+                f"{format_list_linewise(sorted(unknown))}"
+            )
+
+        needed = set(targets)
+        for target in targets:
+            needed |= nx.ancestors(self._dag, target)
+
+        # Results used by this computation are held until it is finished, even if they
+        # are evicted from the cache.
+        held = {}
+        self.last_computed = []
+        for name in self._execution_order:
+            if name not in needed:
+                continue
+            if name in self._cache:
+                held[name] = self._cache[name]
+            else:
+                kwargs = {
+                    arg: held[arg] if arg in held else self._inputs[arg]
+                    for arg in self._arguments_of_functions[name]
+                }
+                held[name] = self._functions[name](**kwargs)
+                self._cache[name] = held[name]
+                self._versions[name] = self.version
+                self.last_computed.append(name)
+            self._n_uses += 1
+            self._last_used[name] = self._n_uses
+
+        self._evict_until_cache_fits()
+
+        results = {
+            target: held[target] if target in held else self._inputs[target]
+            for target in targets
+        }
+        return self._plan.prepare_results(results, self._data)
+
+    def _evict(self, name):
+        self._cache.pop(name, None)
+        self._versions.pop(name, None)
+        self._last_used.pop(name, None)
+
+    def _evict_until_cache_fits(self):
+        if self.max_cached_bytes is None:
+            return
+
+        if self.eviction_policy == "lru":
+            order = sorted(self._cache, key=self._last_used.get)
+        else:
+            order = sorted(self._cache, key=lambda n: get_nbytes(self._cache[n]))[::-1]
+
+        n_bytes = self.cached_bytes
+        for name in order:
+            if n_bytes <= self.max_cached_bytes:
+                break
+            n_bytes -= get_nbytes(self._cache[name])
+            self._evict(name)
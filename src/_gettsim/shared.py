@@ -3,11 +3,19 @@ import re
 import textwrap
 from collections.abc import Callable
 from datetime import date
+from types import ModuleType
 from typing import TypeVar
 
 import numpy
 
-from _gettsim.config import SUPPORTED_GROUPINGS
+from _gettsim import config
+from _gettsim.config import FOREIGN_KEYS, SUPPORTED_GROUPINGS
+
+try:
+    import jax
+    import jax.numpy as jnp
+except ImportError:
+    pass
 
 
 class KeyErrorMessage(str):
@@ -265,10 +273,97 @@ def remove_group_suffix(col):
     return out
 
 
+def replace_by_path(data_dict, key_list, value):
+    """Replace a value in nested dictionaries without modifying them.
+
+    The dictionaries along the path are copied, all others are shared.
+
+    """
+    if not key_list:
+        return value
+
+    data_dict = dict(data_dict)
+    data_dict[key_list[0]] = replace_by_path(
+        data_dict[key_list[0]], key_list[1:], value
+    )
+
+    return data_dict
+
+
+def stack_copies(name, value, n_copies, p_id_offset):
+    """Stack copies of an input, e.g., to evaluate functions for changed incomes.
+
+    Ids of each copy are shifted, so that the copies do not refer to each other and are
+    not aggregated together. Scalars are not stacked.
+
+    Parameters
+    ----------
+    name : str
+        Name of the input.
+    value : numpy.ndarray
+        Values of the input.
+    n_copies : int
+        Number of copies.
+    p_id_offset : int
+        Shift of the person ids and the foreign keys between copies. It must be larger
+        than all person ids.
+
+    Returns
+    -------
+    stacked : numpy.ndarray
+        The copies of the input one below the other.
+
+    """
+    if value.ndim == 0:
+        return value
+
+    stacked = numpy.tile(value, n_copies)
+    if name == "p_id" or name in FOREIGN_KEYS or name.startswith("p_id_"):
+        offset = p_id_offset
+    elif name in {f"{g}_id" for g in SUPPORTED_GROUPINGS}:
+        offset = value.max() + 1 if len(value) else 0
+    else:
+        return stacked
+
+    shift = numpy.repeat(numpy.arange(n_copies) * offset, len(value))
+    return numpy.where(stacked >= 0, stacked + shift, stacked)
+
+
+def get_size_of_groups(group_id):
+    """Get the number of persons in the group of each person."""
+    _, inverse, counts = numpy.unique(
+        numpy.asarray(group_id), return_inverse=True, return_counts=True
+    )
+    return counts[inverse]
+
+
 Key: TypeVar = TypeVar("Key")
 Out: TypeVar = TypeVar("Out")
 
 
+def join(
+    foreign_key: numpy.ndarray[Key],
+    primary_key: numpy.ndarray[Key],
+    target: numpy.ndarray[Out],
+    value_if_foreign_key_is_missing: Out,
+) -> numpy.ndarray[Out]:
+    """
+    Given a foreign key, find the corresponding primary key, and return the target at
+    the same index as the primary key.
+
+    Dispatches to :func:`join_jax` or :func:`join_numpy` depending on the array backend.
+    See :func:`join_numpy` for a description of the arguments.
+    """
+    if config.USE_JAX:
+        return join_jax(
+            foreign_key, primary_key, target, value_if_foreign_key_is_missing
+        )
+    else:
+        return join_numpy(
+            foreign_key, primary_key, target, value_if_foreign_key_is_missing
+        )
+
+
 def join_numpy(
     foreign_key: numpy.ndarray[Key],
     primary_key: numpy.ndarray[Key],
@@ -279,6 +374,9 @@ def join_numpy(
     Given a foreign key, find the corresponding primary key, and return the target at
     the same index as the primary key.
 
+    The primary keys are sorted once and the foreign keys are looked up by binary
+    search, which takes O(n log n) time and O(n) memory.
+
     Parameters
     ----------
     foreign_key : numpy.ndarray[Key]
@@ -295,34 +393,138 @@ def join_numpy(
     numpy.ndarray[Out]
         The joined array.
     """
-    if len(numpy.unique(primary_key)) != len(primary_key):
-        keys, counts = numpy.unique(primary_key, return_counts=True)
-        duplicate_primary_keys = keys[counts > 1]
+    return _join(
+        foreign_key,
+        primary_key,
+        target,
+        value_if_foreign_key_is_missing,
+        array_module=numpy,
+    )
+
+
+def join_jax(
+    foreign_key,
+    primary_key,
+    target,
+    value_if_foreign_key_is_missing,
+):
+    """
+    Given a foreign key, find the corresponding primary key, and return the target at
+    the same index as the primary key.
+
+    JAX version of :func:`join_numpy`.
+    """
+    return _join(
+        jnp.asarray(foreign_key),
+        jnp.asarray(primary_key),
+        jnp.asarray(target),
+        value_if_foreign_key_is_missing,
+        array_module=jnp,
+    )
+
+
+def is_traced_by_jax(array) -> bool:
+    """Check whether an array is traced by a JAX transformation, e.g., `jax.jit`.
+
+    The values of traced arrays are unknown, so they cannot be checked.
+
+    """
+    return config.USE_JAX and isinstance(array, jax.core.Tracer)
+
+
+def get_values_traced_by_jax(data_dict, path=()):
+    """Get the values in nested dictionaries which are traced by JAX.
+
+    Returns a dictionary mapping the paths of the traced values to the values.
+
+    """
+    if is_traced_by_jax(data_dict):
+        return {path: data_dict}
+    elif isinstance(data_dict, dict):
+        return {
+            traced_path: value
+            for key, sub_dict in data_dict.items()
+            for traced_path, value in get_values_traced_by_jax(
+                sub_dict, (*path, key)
+            ).items()
+        }
+    else:
+        return {}
+
+
+def fail_if_foreign_keys_cannot_be_joined(foreign_key, primary_key):
+    """Check that keys can be joined by :func:`join`.
+
+    Primary keys must be unique and each non-negative foreign key must match a primary
+    key. :func:`join` skips these checks while the keys are traced by JAX, so they have
+    to be run on the values before tracing.
+
+    Parameters
+    ----------
+    foreign_key : numpy.ndarray[Key]
+        The keys to join.
+    primary_key : numpy.ndarray[Key]
+        The primary keys.
+
+    """
+    foreign_key = numpy.asarray(foreign_key)
+    sorted_primary_key = numpy.sort(numpy.asarray(primary_key))
+
+    is_duplicate = sorted_primary_key[1:] == sorted_primary_key[:-1]
+    if is_duplicate.any():
+        duplicate_primary_keys = numpy.unique(sorted_primary_key[1:][is_duplicate])
         raise ValueError(f"Duplicate primary keys: {duplicate_primary_keys}")
 
-    invalid_foreign_keys = foreign_key[
-        (foreign_key >= 0) & (~numpy.isin(foreign_key, primary_key))
-    ]
+    is_invalid = (foreign_key >= 0) & ~numpy.isin(foreign_key, sorted_primary_key)
+    if is_invalid.any():
+        raise ValueError(f"Invalid foreign keys: {foreign_key[is_invalid]}")
+
+
+def _join(
+    foreign_key: numpy.ndarray[Key],
+    primary_key: numpy.ndarray[Key],
+    target: numpy.ndarray[Out],
+    value_if_foreign_key_is_missing: Out,
+    array_module: ModuleType,
+) -> numpy.ndarray[Out]:
+    # Sort the primary keys once, so that foreign keys can be looked up by binary search
+    sorter = array_module.argsort(primary_key)
+    sorted_primary_key = primary_key[sorter]
 
-    if len(invalid_foreign_keys) > 0:
-        raise ValueError(f"Invalid foreign keys: {invalid_foreign_keys}")
+    # Checks of the values are skipped while the arrays are traced by `jax.jit`
+    is_traced = is_traced_by_jax(foreign_key) or is_traced_by_jax(primary_key)
 
-    # For each foreign key and for each primary key, check if they match
-    matches_foreign_key = foreign_key[:, None] == primary_key
+    is_duplicate = sorted_primary_key[1:] == sorted_primary_key[:-1]
+    if not is_traced and is_duplicate.any():
+        duplicate_primary_keys = numpy.unique(
+            numpy.asarray(sorted_primary_key[1:][is_duplicate])
+        )
+        raise ValueError(f"Duplicate primary keys: {duplicate_primary_keys}")
 
-    # For each foreign key, add a column with True at the end, to later fall back to
-    # the value for unresolved foreign keys
-    padded_matches_foreign_key = numpy.pad(
-        matches_foreign_key, ((0, 0), (0, 1)), "constant", constant_values=True
-    )
+    # For each foreign key, compute the position of the matching primary key, if any
+    if len(primary_key) > 0:
+        positions = array_module.minimum(
+            array_module.searchsorted(sorted_primary_key, foreign_key),
+            len(primary_key) - 1,
+        )
+        matches_primary_key = sorted_primary_key[positions] == foreign_key
+        indices = array_module.where(matches_primary_key, sorter[positions], 0)
+    else:
+        matches_primary_key = array_module.zeros(len(foreign_key), dtype=bool)
+        indices = array_module.zeros(len(foreign_key), dtype=int)
+
+    if not is_traced:
+        invalid_foreign_keys = foreign_key[(foreign_key >= 0) & ~matches_primary_key]
+        if len(invalid_foreign_keys) > 0:
+            raise ValueError(f"Invalid foreign keys: {invalid_foreign_keys}")
 
-    # For each foreign key, compute the index of the first matching primary key
-    indices = numpy.argmax(padded_matches_foreign_key, axis=1)
+    # Fall back to the index after the end of the target array for unresolved keys
+    indices = array_module.where(matches_primary_key, indices, len(target))
 
     # Add the value for unresolved foreign keys at the end of the target array
-    padded_targets = numpy.pad(
+    padded_targets = array_module.pad(
         target, (0, 1), "constant", constant_values=value_if_foreign_key_is_missing
     )
 
-    # Return the target at the index of the first matching primary key
+    # Return the target at the index of the matching primary key
     return padded_targets.take(indices)
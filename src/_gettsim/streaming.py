@@ -0,0 +1,221 @@
+from collections.abc import Iterable, Iterator
+from pathlib import Path
+
+import numpy
+import pandas as pd
+
+from _gettsim.interface import prepare_taxes_and_transfers
+from _gettsim.parallel import shift_derived_group_ids
+from _gettsim.policy_environment import PolicyEnvironment
+
+
+def compute_taxes_and_transfers_in_chunks(  # noqa: PLR0913
+    data,
+    environment: PolicyEnvironment,
+    targets=None,
+    chunk_size=100_000,
+    output_path=None,
+    check_minimal_specification="ignore",
+    rounding=True,
+    debug=False,
+):
+    """Compute taxes and transfers for data which is processed in chunks.
+
+    The data is split into chunks of at least ``chunk_size`` rows (unless the data is
+    exhausted) which never cut through a household. The computations are prepared once
+    and run on each chunk, so memory use depends on the chunk size, not on the size of
+    the population.
+
+    If ``data`` is not a DataFrame, the rows must be sorted by ``hh_id``, also across
+    DataFrames or batches of the parquet file. Foreign keys like
+    ``p_id_ehepartner`` must point to persons in the same household. Group ids computed
+    by GETTSIM, like ``fg_id``, are shifted per chunk, so that they are unique across
+    chunks.
+
+    Parameters
+    ----------
+    data : pandas.DataFrame or iterable of pandas.DataFrame or str or pathlib.Path
+        Data provided by the user. Either a DataFrame, an iterable of DataFrames with
+        identical columns, or the path to a parquet file which is read in batches.
+        Reading parquet files requires pyarrow.
+    environment:
+        The policy environment which contains all necessary functions and parameters.
+    targets : str, list of str, default None
+        String or list of strings with names of functions whose output is actually
+        needed by the user. By default, ``targets`` is ``None`` and all key outputs as
+        defined by `gettsim.config.DEFAULT_TARGETS` are returned.
+    chunk_size : int, default 100_000
+        Minimum number of rows of each chunk. A chunk is extended until the current
+        household is complete.
+    output_path : str or pathlib.Path, default None
+        If given, the results are written to this parquet file chunk by chunk instead
+        of being returned. Writing parquet files requires pyarrow.
+    check_minimal_specification : {"ignore", "warn", "raise"}, default "ignore"
+        Indicator for whether checks which ensure the most minimal configuration should
+        be silenced, emitted as warnings or errors.
+    rounding : bool, default True
+        Indicator for whether rounding should be applied as specified in the law.
+    debug : bool
+        If True, all necessary inputs and all computed variables are returned.
+
+    Returns
+    -------
+    results : iterator of pandas.DataFrame or None
+        Iterator yielding the results of each chunk with the index of the chunk. None if
+        ``output_path`` is given.
+
+    """
+    chunks = _split_into_household_chunks(_read_data(data, chunk_size), chunk_size)
+    results = _compute_chunks(
+        chunks=chunks,
+        environment=environment,
+        targets=targets,
+        check_minimal_specification=check_minimal_specification,
+        rounding=rounding,
+        debug=debug,
+    )
+
+    if output_path is None:
+        return results
+    else:
+        _write_to_parquet(results, output_path)
+        return None
+
+
+def _compute_chunks(  # noqa: PLR0913
+    chunks, environment, targets, check_minimal_specification, rounding, debug
+):
+    plan = None
+    offsets = {}
+    for chunk in chunks:
+        if plan is None:
+            plan = prepare_taxes_and_transfers(
+                environment=environment,
+                data_cols=list(chunk),
+                targets=targets,
+                check_minimal_specification=check_minimal_specification,
+                rounding=rounding,
+            )
+        result = plan(chunk, debug=debug)
+        result.index = chunk.index
+        result, offsets = shift_derived_group_ids(result, list(chunk), offsets)
+        yield result
+
+
+def _read_data(data, chunk_size) -> Iterator[pd.DataFrame]:
+    """Turn the different kinds of data into an iterator of DataFrames."""
+    if isinstance(data, pd.DataFrame):
+        if "hh_id" in data:
+            data = data.sort_values("hh_id", kind="stable")
+        return iter([data])
+    elif isinstance(data, str | Path):
+        return _read_parquet_in_batches(data, chunk_size)
+    elif isinstance(data, Iterable):
+        return iter(data)
+    else:
+        raise NotImplementedError(
+            "'data' is not a pd.DataFrame, an iterable of pd.DataFrame, or the path to "
+            "a parquet file."
+        )
+
+
+def _read_parquet_in_batches(path, batch_size):
+    try:
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise ImportError("Reading parquet files in chunks requires pyarrow.") from e
+
+    parquet_file = pq.ParquetFile(path)
+    for batch in parquet_file.iter_batches(batch_size=batch_size):
+        yield batch.to_pandas()
+
+
+def _write_to_parquet(results, path):
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise ImportError("Writing parquet files in chunks requires pyarrow.") from e
+
+    writer = None
+    try:
+        for result in results:
+            table = pa.Table.from_pandas(result)
+            if writer is None:
+                writer = pq.ParquetWriter(path, table.schema)
+            writer.write_table(table)
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+def _split_into_household_chunks(frames, chunk_size):
+    """Split a stream of DataFrames into chunks which do not cut through households.
+
+    Rows are buffered until at least ``chunk_size`` rows are available. The chunk is
+    then cut at the first change of ``hh_id`` at or after ``chunk_size`` rows. The rest
+    of the buffer, including the last household, is carried over to the next chunk.
+
+    The rows must be sorted by ``hh_id``, so that households which appear again in a
+    later chunk are detected by comparing with the last ``hh_id`` of the previous
+    chunk only.
+
+    Parameters
+    ----------
+    frames : iterator of pandas.DataFrame
+        DataFrames with identical columns, sorted by ``hh_id``.
+    chunk_size : int
+        Minimum number of rows of each chunk except the last one.
+
+    Yields
+    ------
+    chunk : pandas.DataFrame
+        Chunk containing complete households.
+
+    """
+    if chunk_size < 1:
+        raise ValueError(f"'chunk_size' must be a positive integer, got {chunk_size}.")
+
+    buffer = None
+    last_hh_id = None
+    for frame in frames:
+        if "hh_id" not in frame:
+            raise ValueError("Computing in chunks requires the column 'hh_id'.")
+        buffer = frame if buffer is None else pd.concat([buffer, frame])
+
+        while len(buffer) >= chunk_size:
+            cut = _find_household_boundary(buffer["hh_id"].to_numpy(), chunk_size)
+            if cut is None:
+                break
+            chunk, buffer = buffer.iloc[:cut], buffer.iloc[cut:]
+            last_hh_id = _fail_if_households_are_not_sorted(chunk, last_hh_id)
+            yield chunk
+
+    if buffer is not None and len(buffer) > 0:
+        _fail_if_households_are_not_sorted(buffer, last_hh_id)
+        yield buffer
+
+
+def _find_household_boundary(hh_id, start):
+    """Find the first position at or after ``start`` where a new household begins.
+
+    Returns None if the household at ``start`` might continue after the end of
+    ``hh_id``.
+
+    """
+    changes = numpy.flatnonzero(hh_id[start:] != hh_id[start - 1])
+    return start + changes[0] if len(changes) > 0 else None
+
+
+def _fail_if_households_are_not_sorted(chunk, last_hh_id):
+    """Check that the rows of a chunk are sorted by ``hh_id`` and follow the last
+    ``hh_id`` of the previous chunk. Returns the last ``hh_id`` of the chunk."""
+    hh_id = chunk["hh_id"].to_numpy()
+    if numpy.any(hh_id[1:] < hh_id[:-1]) or (
+        last_hh_id is not None and hh_id[0] <= last_hh_id
+    ):
+        raise ValueError(
+            "The rows must be sorted by 'hh_id' when computing in chunks. Sort the "
+            "data by 'hh_id' first."
+        )
+    return hh_id[-1]
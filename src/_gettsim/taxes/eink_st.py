@@ -105,6 +105,7 @@ def _eink_st_tarif(x: float, params: dict) -> float:
         intercepts_at_lower_thresholds=params["eink_st_tarif"][
             "intercepts_at_lower_thresholds"
         ],
+        lookup_table=params["eink_st_tarif"].get("lookup_table"),
     )
     return out
 
@@ -1,3 +1,4 @@
+from _gettsim import config
 from _gettsim.shared import policy_info
 from _gettsim.taxes.eink_st import _eink_st_tarif
 
@@ -81,7 +82,7 @@ def _lohnsteuer_klasse5_6_basis_y(taxable_inc: float, eink_st_params: dict) -> f
 
     """
 
-    out = max(
+    out = config.numpy_or_jax.maximum(
         2
         * (
             _eink_st_tarif(taxable_inc * 1.25, eink_st_params)
@@ -390,35 +391,36 @@ def _lohnst_m(
     ][0][3]
     lohnsteuer_klasse5_6_tmp = lohnsteuer_grenze_2 + lohnsteuer_zw_grenze_2_3
 
-    if lohnst_eink_y < grenze_1:
-        lohnsteuer_klasse5_6 = lohnsteuer_5_6_basis
-    elif grenze_1 <= lohnst_eink_y < grenze_2:
-        lohnsteuer_klasse5_6 = min(
-            max_lohnsteuer, _lohnsteuer_klasse5_6_basis_y(lohnst_eink_y, eink_st_params)
-        )
-    elif grenze_2 <= lohnst_eink_y < grenze_3:
-        lohnsteuer_klasse5_6 = (
-            lohnsteuer_grenze_2
-            + (lohnst_eink_y - grenze_2)
-            * eink_st_params["eink_st_tarif"]["rates"][0][3]
-        )
-    else:
-        lohnsteuer_klasse5_6 = (
-            lohnsteuer_klasse5_6_tmp
-            + (lohnst_eink_y - grenze_3)
-            * eink_st_params["eink_st_tarif"]["rates"][0][4]
-        )
+    # The conditions are evaluated elementwise, so that the function is applied to
+    # arrays of incomes at once instead of to each income separately.
+    xnp = config.numpy_or_jax
+    lohnsteuer_klasse5_6 = xnp.where(
+        lohnst_eink_y < grenze_1,
+        lohnsteuer_5_6_basis,
+        xnp.where(
+            lohnst_eink_y < grenze_2,
+            xnp.minimum(max_lohnsteuer, lohnsteuer_5_6_basis),
+            xnp.where(
+                lohnst_eink_y < grenze_3,
+                lohnsteuer_grenze_2
+                + (lohnst_eink_y - grenze_2)
+                * eink_st_params["eink_st_tarif"]["rates"][0][3],
+                lohnsteuer_klasse5_6_tmp
+                + (lohnst_eink_y - grenze_3)
+                * eink_st_params["eink_st_tarif"]["rates"][0][4],
+            ),
+        ),
+    )
 
-    if steuerklasse in {1, 2, 4}:
-        out = lohnsteuer_basistarif
-    elif steuerklasse == 3:
-        out = lohnsteuer_splittingtarif
-    else:
-        out = lohnsteuer_klasse5_6
+    out = xnp.where(
+        xnp.isin(steuerklasse, xnp.asarray([1, 2, 4])),
+        lohnsteuer_basistarif,
+        xnp.where(steuerklasse == 3, lohnsteuer_splittingtarif, lohnsteuer_klasse5_6),
+    )
 
     out = out / 12
 
-    return max(out, 0.0)
+    return xnp.maximum(out, 0.0)
 
 
 def lohnst_m(
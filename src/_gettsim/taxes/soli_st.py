@@ -126,6 +126,7 @@ def _soli_st_tarif(st_per_individual: float, soli_st_params: dict) -> float:
         intercepts_at_lower_thresholds=soli_st_params["soli_st"][
             "intercepts_at_lower_thresholds"
         ],
+        lookup_table=soli_st_params["soli_st"].get("lookup_table"),
     )
 
     return out
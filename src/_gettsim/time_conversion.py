@@ -7,6 +7,7 @@ from dags.signature import rename_arguments
 from _gettsim.config import SUPPORTED_GROUPINGS, SUPPORTED_TIME_UNITS
 from _gettsim.functions.derived_function import DerivedFunction
 from _gettsim.functions.policy_function import PolicyFunction
+from _gettsim.shared import format_list_linewise
 
 _M_PER_Y = 12
 _W_PER_Y = 365.25 / 7
@@ -233,6 +234,29 @@ _time_conversion_functions = {
 }
 
 
+def convert_time_unit(value: float, from_unit: str, to_unit: str) -> float:
+    """
+    Convert a value from one time unit to another.
+
+    Parameters
+    ----------
+    value
+        Value in the time unit `from_unit`.
+    from_unit
+        Time unit of the value, one of `SUPPORTED_TIME_UNITS`.
+    to_unit
+        Time unit of the result, one of `SUPPORTED_TIME_UNITS`.
+
+    Returns
+    -------
+    float
+        Value in the time unit `to_unit`.
+    """
+    if from_unit == to_unit:
+        return value
+    return _time_conversion_functions[f"{from_unit}_to_{to_unit}"](value)
+
+
 def create_time_conversion_functions(
     functions: dict[str, PolicyFunction],
     data_cols: list[str],
@@ -308,49 +332,142 @@ def _create_time_conversion_functions(
 ) -> dict[str, DerivedFunction]:
     result: dict[str, DerivedFunction] = {}
 
-    all_time_units = list(SUPPORTED_TIME_UNITS)
-
-    units = "".join(all_time_units)
-    groupings = "|".join([f"_{grouping}" for grouping in SUPPORTED_GROUPINGS])
-    function_with_time_unit = re.compile(
-        f"(?P<base_name>.*_)(?P<time_unit>[{units}])(?P<aggregation>{groupings})?"
-    )
-    match = function_with_time_unit.fullmatch(name)
-    dependencies = set(inspect.signature(func).parameters) if func else set()
+    match = match_time_unit(name)
 
     if match:
-        base_name = match.group("base_name")
-        time_unit = match.group("time_unit")
-        aggregation = match.group("aggregation") or ""
+        base_name, time_unit, aggregation = match
 
-        missing_time_units = [unit for unit in all_time_units if unit != time_unit]
+        missing_time_units = [
+            unit for unit in SUPPORTED_TIME_UNITS if unit != time_unit
+        ]
         for missing_time_unit in missing_time_units:
             new_name = f"{base_name}{missing_time_unit}{aggregation}"
-
-            # Without this check, we could create cycles in the DAG: Consider a
-            # hard-coded function `var_y` that takes `var_m` as an input, assuming it
-            # to be provided in the input data. If we create a function `var_m`, which
-            # would take `var_y` as input, we create a cycle. If `var_m` is actually
-            # provided as an input, `var_m` would be overwritten, removing the cycle.
-            # However, if `var_m` is not provided as an input, an error message would
-            # be shown that a cycle between `var_y` and `var_m` was detected. This
-            # hides the actual problem, which is that `var_m` is not provided as an
-            # input.
-            if new_name in dependencies:
-                continue
-
-            result[new_name] = DerivedFunction(
-                _create_function_for_time_unit(
-                    name,
-                    _time_conversion_functions[f"{time_unit}_to_{missing_time_unit}"],
-                ),
-                function_name=new_name,
-                derived_from=func or name,
-            )
+            new_func = create_time_conversion_function(new_name, name, func)
+            if new_func is not None:
+                result[new_name] = new_func
 
     return result
 
 
+def get_time_conversion_sources(name: str) -> list[str]:
+    """
+    Get the names of the variables which can be converted to a variable.
+
+    Parameters
+    ----------
+    name:
+        The name of the variable, which follows the naming convention for time units.
+
+    Returns
+    -------
+    sources:
+        The names of the variable in all other time units. Empty if the name does not
+        refer to a time unit.
+    """
+    match = match_time_unit(name)
+    if not match:
+        return []
+
+    base_name, time_unit, aggregation = match
+    return [
+        f"{base_name}{unit}{aggregation}"
+        for unit in SUPPORTED_TIME_UNITS
+        if unit != time_unit
+    ]
+
+
+def create_time_conversion_function(
+    name: str, source_name: str, source_func: PolicyFunction | None = None
+) -> DerivedFunction | None:
+    """
+    Create the function which converts a variable to another time unit.
+
+    Parameters
+    ----------
+    name:
+        The name of the created function.
+    source_name:
+        The name of the converted variable. It must refer to another time unit than
+        `name`.
+    source_func:
+        The function computing the converted variable or `None` if it is a data column.
+
+    Returns
+    -------
+    derived_function:
+        The created function or `None` if `source_func` depends on `name`.
+    """
+    # Without this check, we could create cycles in the DAG: Consider a hard-coded
+    # function `var_y` that takes `var_m` as an input, assuming it to be provided in the
+    # input data. If we create a function `var_m`, which would take `var_y` as input, we
+    # create a cycle. If `var_m` is actually provided as an input, `var_m` would be
+    # overwritten, removing the cycle. However, if `var_m` is not provided as an input,
+    # an error message would be shown that a cycle between `var_y` and `var_m` was
+    # detected. This hides the actual problem, which is that `var_m` is not provided as
+    # an input.
+    dependencies = (
+        set(inspect.signature(source_func).parameters) if source_func else set()
+    )
+    if name in dependencies:
+        return None
+
+    _, source_time_unit, _ = match_time_unit(source_name)
+    _, time_unit, _ = match_time_unit(name)
+
+    return DerivedFunction(
+        _create_function_for_time_unit(
+            source_name,
+            _time_conversion_functions[f"{source_time_unit}_to_{time_unit}"],
+        ),
+        function_name=name,
+        derived_from=source_func or source_name,
+    )
+
+
+_function_with_time_unit = re.compile(
+    f"(?P<base_name>.*_)(?P<time_unit>[{''.join(SUPPORTED_TIME_UNITS)}])"
+    f"(?P<aggregation>{'|'.join(f'_{grouping}' for grouping in SUPPORTED_GROUPINGS)})?"
+)
+
+
+def match_time_unit(name: str) -> tuple[str, str, str] | None:
+    """Split a name into the base name, the time unit, and the aggregation level."""
+    match = _function_with_time_unit.fullmatch(name)
+    if not match:
+        return None
+
+    return (
+        match.group("base_name"),
+        match.group("time_unit"),
+        match.group("aggregation") or "",
+    )
+
+
+def get_group_and_time_unit(name: str) -> tuple[str, str]:
+    """
+    Get the aggregation level and the time unit of a name like ``"..._m_hh"``.
+
+    Parameters
+    ----------
+    name
+        Name ending with a time unit and optionally an aggregation level.
+
+    Returns
+    -------
+    tuple of str
+        The aggregation level without the leading underscore, an empty string if there
+        is none, and the time unit.
+    """
+    match = match_time_unit(name)
+    if match is None:
+        raise ValueError(
+            "The names of incomes must end with a time unit and optionally a group. "
+            f"Got:\n{format_list_linewise([name])}"
+        )
+    _, time_unit, group = match
+    return group.removeprefix("_"), time_unit
+
+
 def _create_function_for_time_unit(
     function_name: str, converter: Callable[[float], float]
 ) -> Callable[[float], float]:
@@ -2,7 +2,7 @@
 
 import numpy
 
-from _gettsim.shared import join_numpy, policy_info
+from _gettsim.shared import join, policy_info
 
 aggregate_by_p_id_kindergeldübertrag = {
     "kindergeldübertrag_m": {
@@ -93,7 +93,7 @@ def kindergeld_zur_bedarfsdeckung_m(
     -------
 
     """
-    return join_numpy(
+    return join(
         p_id_kindergeld_empf,
         p_id,
         _mean_kindergeld_per_child_m,
@@ -182,14 +182,13 @@ def _in_anderer_bedarfsgemeinschaft_als_kindergeldempfänger(
     -------
 
     """
-    # Create a dictionary to map p_id to bg_id
-    p_id_to_bg_id = dict(zip(p_id, bg_id))
-
     # Map each p_id_kindergeld_empf to its corresponding bg_id
-    empf_bg_id = [
-        p_id_to_bg_id[empfänger_id] if empfänger_id >= 0 else -1
-        for empfänger_id in p_id_kindergeld_empf
-    ]
+    empf_bg_id = join(
+        p_id_kindergeld_empf,
+        p_id,
+        bg_id,
+        value_if_foreign_key_is_missing=-1,
+    )
 
     # Compare bg_id array with the mapped bg_ids of p_id_kindergeld_empf
     return bg_id != empf_bg_id
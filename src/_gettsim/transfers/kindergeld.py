@@ -1,6 +1,6 @@
 import numpy
 
-from _gettsim.shared import join_numpy, policy_info
+from _gettsim.shared import join, policy_info
 
 aggregate_by_group_kindergeld = {
     "anz_kinder_mit_kindergeld_fg": {
@@ -195,7 +195,7 @@ def same_fg_as_kindergeldempfänger(
     -------
 
     """
-    fg_id_kindergeldempfänger = join_numpy(
+    fg_id_kindergeldempfänger = join(
         p_id_kindergeld_empf,
         p_id,
         fg_id,
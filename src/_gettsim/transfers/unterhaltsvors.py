@@ -3,7 +3,7 @@
 
 import numpy
 
-from _gettsim.shared import join_numpy, policy_info
+from _gettsim.shared import join, policy_info
 
 aggregate_by_p_id_unterhaltsvors = {
     "unterhaltsvors_zahlbetrag_eltern_m": {
@@ -94,7 +94,7 @@ def parent_alleinerz(
     -------
 
     """
-    return join_numpy(
+    return join(
         p_id_kindergeld_empf, p_id, alleinerz, value_if_foreign_key_is_missing=False
     )
 
@@ -349,7 +349,7 @@ def _unterhaltsvorschuss_empf_eink_above_income_threshold(
     Returns
     -------
     """
-    return join_numpy(
+    return join(
         p_id_kindergeld_empf,
         p_id,
         _unterhaltsvorschuss_eink_above_income_threshold,
@@ -1,6 +1,7 @@
 import ast
 import functools
 import inspect
+import textwrap
 from importlib import import_module
 
 import astor
@@ -26,24 +27,76 @@ def make_vectorizable(func: callable, backend: str):
 
     """
     module = _module_from_backend(backend)
-    tree = _make_vectorizable_ast(func, module=module)
 
-    # recreate scope of function, add policy_info decorator and array library
-    scope = func.__globals__
-    from _gettsim.shared import policy_info
+    # The source code is that of the innermost wrapped function, see `inspect.unwrap`.
+    original_func = inspect.unwrap(func)
+    func_loc = original_func.__module__ + "/" + original_func.__name__
+
+    if original_func.__code__.co_freevars:
+        msg = _closure_error_message(original_func, func_loc=func_loc)
+        raise TranslateToVectorizableError(msg)
+
+    compiled = _compile_vectorizable(
+        source=inspect.getsource(original_func),
+        func_name=original_func.__name__,
+        module=module,
+        func_loc=func_loc,
+    )
 
-    scope["policy_info"] = policy_info
+    # recreate scope of function and add array library. The scope is copied such that
+    # the module which defines the function is left untouched.
+    scope = dict(original_func.__globals__)
     scope[module] = import_module(module)
 
     # execute new ast
-    compiled = compile(tree, "<ast>", "exec")
     exec(compiled, scope)  # noqa: S102
 
     # assign created function
-    new_func = scope[func.__name__]
+    new_func = scope[original_func.__name__]
     return functools.wraps(func)(new_func)
 
 
+@functools.lru_cache(maxsize=2048)
+def _compile_vectorizable(source: str, func_name: str, module: str, func_loc: str):
+    """Translate the source code of a function and compile it.
+
+    The result only depends on the source code and the array module, hence it is
+    cached. This avoids transforming the same functions each time policy functions are
+    loaded.
+
+    Args:
+        source (str): Source code of the function.
+        func_name (str): Name of the function.
+        module (str): Module which exports the function `where` that behaves as
+            `numpy.where`.
+        func_loc (str): Path to function.
+
+    Returns:
+        code: Compiled module code which defines the new function.
+
+    """
+    tree = ast.parse(textwrap.dedent(source))
+
+    # Executing anything but a single function definition (e.g., the line in which a
+    # lambda is defined) could have arbitrary side effects.
+    if not (
+        len(tree.body) == 1
+        and isinstance(tree.body[0], ast.FunctionDef)
+        and tree.body[0].name == func_name
+    ):
+        msg = _no_function_definition_error_message(func_loc=func_loc)
+        raise TranslateToVectorizableError(msg)
+
+    # Decorators have already been applied to the original function, their attributes
+    # are transferred by `functools.wraps`.
+    tree.body[0].decorator_list = []
+
+    tree = _add_parent_attr_to_ast(tree)
+    new_tree = Transformer(module, func_loc).visit(tree)
+    new_tree = ast.fix_missing_locations(new_tree)
+    return compile(new_tree, "<ast>", "exec")
+
+
 def make_vectorizable_source(
     func: callable,
     backend: str,
@@ -126,6 +179,7 @@ class Transformer(ast.NodeTransformer):
         return call
 
     def visit_UnaryOp(self, node: ast.UnaryOp):  # noqa: N802
+        self.generic_visit(node)
         if isinstance(node.op, ast.Not):
             out = _not_to_call(node, module=self.module)
         else:
@@ -142,10 +196,10 @@ class Transformer(ast.NodeTransformer):
         call = _if_to_call(node, module=self.module, func_loc=self.func_loc)
         if isinstance(node.body[0], ast.Return):
             out = ast.Return(call)
-        elif isinstance(node.body[0], ast.Assign | ast.AugAssign):
-            out = node.body[0]
-            out.value = call
-        return out
+        else:
+            name = _assignment_target_name(node.body[0], func_loc=self.func_loc)
+            out = ast.Assign(targets=[ast.Name(id=name, ctx=ast.Store())], value=call)
+        return ast.copy_location(out, node)
 
     def visit_IfExp(self, node: ast.IfExp):  # noqa: N802
         self.generic_visit(node)
@@ -185,6 +239,10 @@ def _not_to_call(node: ast.UnaryOp, module: str):
 def _if_to_call(node: ast.If, module: str, func_loc: str):
     """Transform If statement to Call.
 
+    Each branch is translated to the value the returned or assigned variable takes in
+    this branch. An augmented assignment like `out += 1` is translated to `out + 1`, and
+    a missing else clause to the unchanged variable.
+
     Args:
         node (ast.If): An If node in the ast.
         module (str): Module which exports the function `where` that behaves as
@@ -195,31 +253,35 @@ def _if_to_call(node: ast.If, module: str, func_loc: str):
         ast.Call: The If statement reformatted using a call to {module}.where().
 
     """
-    args = [node.test, node.body[0].value]
-
     if len(node.orelse) > 1 or len(node.body) > 1:
         msg = _too_many_operations_error_message(node, func_loc=func_loc)
         raise TranslateToVectorizableError(msg)
-    elif node.orelse == []:
-        if isinstance(node.body[0], ast.Return):
+
+    body = node.body[0]
+    args = [node.test, _branch_to_value(body, func_loc=func_loc)]
+
+    if node.orelse == []:
+        if isinstance(body, ast.Return):
             msg = _return_and_no_else_error_message(node, func_loc=func_loc)
             raise TranslateToVectorizableError(msg)
-        elif hasattr(node.body[0], "targets"):
-            name = ast.Name(id=node.body[0].targets[0].id, ctx=ast.Load())
-        else:
-            name = ast.Name(id=node.body[0].target.id, ctx=ast.Load())
-        args.append(name)
-    elif isinstance(node.orelse[0], ast.Return):
-        args.append(node.orelse[0].value)
+        name = _assignment_target_name(body, func_loc=func_loc)
+        args.append(ast.Name(id=name, ctx=ast.Load()))
     elif isinstance(node.orelse[0], ast.If):
-        call = _if_to_call(node.orelse[0], module=module)
+        call = _if_to_call(node.orelse[0], module=module, func_loc=func_loc)
         args.append(call)
-    elif isinstance(node.orelse[0], ast.Assign | ast.AugAssign):
-        if isinstance(node.orelse[0].value, ast.IfExp):
-            call = _ifexp_to_call(node.orelse[0].value, module=module)
-            args.append(call)
-        else:
-            args.append(node.orelse[0].value)
+    elif isinstance(node.orelse[0], ast.Return | ast.Assign | ast.AugAssign):
+        orelse = node.orelse[0]
+        if isinstance(body, ast.Return) != isinstance(orelse, ast.Return) or (
+            not isinstance(body, ast.Return)
+            and _assignment_target_name(body, func_loc=func_loc)
+            != _assignment_target_name(orelse, func_loc=func_loc)
+        ):
+            msg = _different_targets_error_message(node, func_loc=func_loc)
+            raise TranslateToVectorizableError(msg)
+        value = _branch_to_value(orelse, func_loc=func_loc)
+        if isinstance(value, ast.IfExp):
+            value = _ifexp_to_call(value, module=module)
+        args.append(value)
     else:
         msg = _unallowed_operation_error_message(node.orelse[0], func_loc=func_loc)
         raise TranslateToVectorizableError(msg)
@@ -234,6 +296,45 @@ def _if_to_call(node: ast.If, module: str, func_loc: str):
     return call
 
 
+def _branch_to_value(node: ast.stmt, func_loc: str):
+    """Get the value of the returned or assigned variable after a branch was executed.
+
+    Args:
+        node (ast.stmt): The only statement in the body of an if-elif-else clause.
+        func_loc (str): Path to function.
+
+    Returns:
+        ast.expr: The value of the returned or assigned variable.
+
+    """
+    if isinstance(node, ast.Return | ast.Assign):
+        out = node.value
+    elif isinstance(node, ast.AugAssign):
+        name = _assignment_target_name(node, func_loc=func_loc)
+        out = ast.BinOp(
+            left=ast.Name(id=name, ctx=ast.Load()), op=node.op, right=node.value
+        )
+    else:
+        msg = _unallowed_operation_error_message(node, func_loc=func_loc)
+        raise TranslateToVectorizableError(msg)
+    return out
+
+
+def _assignment_target_name(node: ast.Assign | ast.AugAssign, func_loc: str):
+    """Get the name of the variable that is assigned to in an if-elif-else clause."""
+    if isinstance(node, ast.Assign) and len(node.targets) == 1:
+        target = node.targets[0]
+    elif isinstance(node, ast.AugAssign):
+        target = node.target
+    else:
+        target = None
+
+    if not isinstance(target, ast.Name):
+        msg = _unallowed_operation_error_message(node, func_loc=func_loc)
+        raise TranslateToVectorizableError(msg)
+    return target.id
+
+
 def _ifexp_to_call(node: ast.IfExp, module: str):
     """Transform IfExp expression to Call.
 
@@ -324,7 +425,16 @@ def _call_to_call_from_module(node: ast.Call, module: str, func_loc: str):
     call = node
     args = node.args
 
-    if len(args) == 1:
+    if (
+        len(args) == 1
+        and isinstance(args[0], ast.List | ast.Tuple)
+        and len(args[0].elts) > 0
+        and not any(isinstance(elt, ast.Starred) for elt in args[0].elts)
+    ):
+        # Handles case of a literal sequence, e.g., `min([x, y])`, which has to be
+        # reduced element-wise instead of over all elements of the arrays
+        call = _reduce_elementwise(args[0].elts, func_id=func_id, module=module)
+    elif len(args) == 1:
         # Handles all cases called with a single sequence-type argument
         call.func = ast.Attribute(
             value=ast.Name(id=module, ctx=ast.Load()),
@@ -346,6 +456,57 @@ def _call_to_call_from_module(node: ast.Call, module: str, func_loc: str):
     return call
 
 
+def _reduce_elementwise(elts: list[ast.expr], func_id: str, module: str):
+    """Reduce the elements of a literal sequence element-wise.
+
+    Args:
+        elts (list[ast.expr]): The elements of the sequence.
+        func_id (str): One of ('sum', 'any', 'all', 'max', 'min').
+        module (str): The module from which the element-wise functions are called.
+
+    Returns:
+        ast.expr: The nested expression, e.g., `{module}.minimum(x, y)` instead of
+            `min([x, y])`.
+
+    """
+    attr = {
+        "any": "logical_or",
+        "all": "logical_and",
+        "max": "maximum",
+        "min": "minimum",
+    }.get(func_id)
+
+    out = elts[0]
+    for elt in elts[1:]:
+        if func_id == "sum":
+            out = ast.BinOp(left=out, op=ast.Add(), right=elt)
+        else:
+            out = ast.Call(
+                func=ast.Attribute(
+                    value=ast.Name(id=module, ctx=ast.Load()),
+                    attr=attr,
+                    ctx=ast.Load(),
+                ),
+                args=[out, elt],
+                keywords=[],
+            )
+
+    if len(elts) == 1 and func_id in ("any", "all"):
+        out = ast.Call(
+            func=ast.Attribute(
+                value=ast.Name(id=module, ctx=ast.Load()),
+                attr="asarray",
+                ctx=ast.Load(),
+            ),
+            args=[out],
+            keywords=[
+                ast.keyword(arg="dtype", value=ast.Name(id="bool", ctx=ast.Load()))
+            ],
+        )
+
+    return out
+
+
 # ======================================================================================
 # Transformation errors
 # ======================================================================================
@@ -396,6 +557,19 @@ def _too_many_operations_error_message(node: ast.If, func_loc: str):
     return msg
 
 
+def _different_targets_error_message(node: ast.If, func_loc: str):
+    source = _node_to_formatted_source(node)
+    msg = (
+        "\n\n"
+        "The branches of an if-elif-else clause return or assign different variables.\n"
+        "Please return in all branches or assign to the same variable in all branches."
+        f"\n\nFunction: {func_loc}\n\n"
+        "Problematic source code (after transformations that were possible, if any):"
+        f"\n\n{source}\n"
+    )
+    return msg
+
+
 def _unallowed_operation_error_message(node: ast.If, func_loc: str):
     source = _node_to_formatted_source(node)
     msg = (
@@ -413,6 +587,26 @@ def _unallowed_operation_error_message(node: ast.If, func_loc: str):
     return msg
 
 
+def _closure_error_message(func: callable, func_loc: str):
+    msg = (
+        "\n\n"
+        "The function refers to variables of an enclosing scope "
+        f"{func.__code__.co_freevars}, which cannot be recreated."
+        f"\n\nFunction: {func_loc}\n"
+    )
+    return msg
+
+
+def _no_function_definition_error_message(func_loc: str):
+    msg = (
+        "\n\n"
+        "The source code of the function is not a single function definition. Lambda "
+        "functions cannot be translated."
+        f"\n\nFunction: {func_loc}\n"
+    )
+    return msg
+
+
 def _node_to_formatted_source(node: ast.AST):
     source = astor.code_gen.to_source(node)
     source = " > " + source[:-1].replace("\n", "\n > ")
@@ -0,0 +1,272 @@
+import ast
+import contextlib
+import functools
+import inspect
+import textwrap
+import threading
+from collections import OrderedDict
+
+import numpy
+
+from _gettsim.config import NUMBA_KERNEL_CACHE_SIZE
+
+with contextlib.suppress(ImportError):
+    import numba
+
+_KERNELS = OrderedDict()
+_KERNELS_LOCK = threading.Lock()
+
+
+def make_numba_vectorized(func: callable, params: dict):
+    """Compile a scalar function with numba and vectorize it.
+
+    The parameters of the function are passed as constants: Accesses like
+    `params["key"]["subkey"]` are replaced by the value, which is either a scalar or an
+    array. Lookups in dictionaries with consecutive integer keys (e.g., by household
+    size) are replaced by lookups in an array. The remaining arguments are the inputs
+    of the vectorized function. It broadcasts the inputs and calls the compiled
+    function in a compiled loop, which is specialized for the types of the inputs when
+    it is called the first time. Unlike in `numba.vectorize` ufuncs, errors raised by
+    the function (e.g., for missing keys) are raised again.
+
+    Compiled functions are cached by the source code and the values of the parameters.
+    The ``NUMBA_KERNEL_CACHE_SIZE`` most recently used ones are kept.
+
+    Args:
+        func (callable): Function which is written for scalar inputs.
+        params (dict): Mapping from the names of the arguments which hold parameters to
+            their values.
+
+    Returns:
+        callable: Function which takes the remaining arguments in the order of the
+            signature of `func` as arrays.
+
+    """
+    original_func = inspect.unwrap(func)
+    func_loc = original_func.__module__ + "/" + original_func.__name__
+
+    if original_func.__code__.co_freevars:
+        raise TranslateToNumbaError(
+            f"The function refers to variables of an enclosing scope "
+            f"{original_func.__code__.co_freevars}.\n\nFunction: {func_loc}"
+        )
+
+    try:
+        source = inspect.getsource(original_func)
+    except (OSError, TypeError) as e:
+        raise TranslateToNumbaError(
+            f"The source code of the function is not available.\n\nFunction: {func_loc}"
+        ) from e
+
+    tree = ast.parse(textwrap.dedent(source))
+    if not (
+        len(tree.body) == 1
+        and isinstance(tree.body[0], ast.FunctionDef)
+        and tree.body[0].name == original_func.__name__
+    ):
+        raise TranslateToNumbaError(
+            f"The source code of the function is not a single function definition."
+            f"\n\nFunction: {func_loc}"
+        )
+
+    function_def = tree.body[0]
+    function_def.decorator_list = []
+    function_def.returns = None
+    function_def.args.args = [
+        ast.arg(arg=a.arg) for a in function_def.args.args if a.arg not in params
+    ]
+
+    transformer = ParamsToConstants(params)
+    tree = ast.fix_missing_locations(transformer.visit(tree))
+
+    # Parameters which are still used, e.g., whole dictionaries or dictionaries with
+    # keys that are not literals, cannot be compiled.
+    unresolved = sorted(
+        {
+            node.id
+            for node in ast.walk(function_def)
+            if isinstance(node, ast.Name) and node.id in params
+        }
+    )
+    if unresolved:
+        raise TranslateToNumbaError(
+            f"The parameters {unresolved} are not only accessed with literal keys."
+            f"\n\nFunction: {func_loc}"
+        )
+
+    source = ast.unparse(tree)
+    key = (
+        original_func.__code__,
+        source,
+        tuple(
+            (name, value.dtype.str, value.shape, value.tobytes())
+            for name, value in transformer.constants.items()
+        ),
+    )
+    # Functions may be compiled by several threads, e.g., when data is computed in
+    # parallel.
+    with _KERNELS_LOCK:
+        kernel = _KERNELS.get(key)
+        if kernel is None:
+            # Recreate the scope of the function with the constants. The scope is
+            # copied such that the module which defines the function is left untouched.
+            scope = dict(original_func.__globals__)
+            scope.update(transformer.constants)
+            scope["_lookup_by_int_key"] = _get_jitted_lookup_by_int_key()
+            exec(compile(tree, "<ast>", "exec"), scope)  # noqa: S102
+            kernel = numba.njit(scope[original_func.__name__])
+            _KERNELS[key] = kernel
+            if len(_KERNELS) > NUMBA_KERNEL_CACHE_SIZE:
+                _KERNELS.popitem(last=False)
+        else:
+            _KERNELS.move_to_end(key)
+
+    def vectorized(*inputs):
+        inputs = numpy.broadcast_arrays(*inputs)
+        shape = inputs[0].shape
+        if inputs[0].size == 0:
+            return numpy.empty(shape)
+
+        out = _get_loop(len(inputs))(kernel, *(a.reshape(-1) for a in inputs))
+        return out.reshape(shape)
+
+    return vectorized
+
+
+@functools.cache
+def _get_loop(n_inputs: int):
+    """Compile a loop which calls a compiled function on each element of the inputs.
+
+    The dtype of the output is that of the first result.
+
+    """
+    names = [f"x{i}" for i in range(n_inputs)]
+    first = ", ".join(f"{n}[0]" for n in names)
+    ith = ", ".join(f"{n}[i]" for n in names)
+    source = (
+        f"def loop(kernel, {', '.join(names)}):\n"
+        f"    out = numpy.full(len(x0), kernel({first}))\n"
+        "    for i in range(1, len(x0)):\n"
+        f"        out[i] = kernel({ith})\n"
+        "    return out\n"
+    )
+    scope = {"numpy": numpy}
+    exec(source, scope)  # noqa: S102
+    return numba.njit(scope["loop"])
+
+
+class ParamsToConstants(ast.NodeTransformer):
+    """Replace accesses to parameters by constants.
+
+    Arrays cannot be literals, so they are stored in `constants` and referenced by name.
+
+    """
+
+    def __init__(self, params: dict):
+        self.params = params
+        self.constants = {}
+
+    def visit_Subscript(self, node: ast.Subscript):  # noqa: N802
+        found, value = self._resolve(node)
+        if found:
+            constant = self._to_constant(value)
+            if constant is not None:
+                return ast.copy_location(constant, node)
+
+        # Lookups in dictionaries by a key which is computed in the function
+        found, value = self._resolve(node.value)
+        if found and _is_int_keyed_dict(value):
+            keys = sorted(k for k in value if type(k) is int)
+            values = numpy.array([value[k] for k in keys])
+            call = ast.Call(
+                func=ast.Name(id="_lookup_by_int_key", ctx=ast.Load()),
+                args=[
+                    self._add_array(values),
+                    ast.Constant(value=keys[0]),
+                    self.visit(node.slice),
+                ],
+                keywords=[],
+            )
+            return ast.copy_location(call, node)
+
+        return self.generic_visit(node)
+
+    def _resolve(self, node: ast.expr):
+        """Return the value of a chain of subscripts with literal keys of parameters."""
+        if isinstance(node, ast.Name):
+            if node.id in self.params:
+                return True, self.params[node.id]
+            return False, None
+
+        if not isinstance(node, ast.Subscript):
+            return False, None
+
+        found, value = self._resolve(node.value)
+        if not found:
+            return False, None
+        try:
+            return True, value[ast.literal_eval(node.slice)]
+        except (ValueError, TypeError, KeyError, IndexError):
+            return False, None
+
+    def _to_constant(self, value):
+        if isinstance(value, bool | int | float | numpy.bool_ | numpy.number):
+            return ast.Constant(value=value.item() if hasattr(value, "item") else value)
+        elif isinstance(value, numpy.ndarray) and value.dtype.kind in "biuf":
+            return self._add_array(value)
+        else:
+            return None
+
+    def _add_array(self, value: numpy.ndarray):
+        name = f"_gettsim_param_{len(self.constants)}"
+        self.constants[name] = numpy.ascontiguousarray(value)
+        return ast.Name(id=name, ctx=ast.Load())
+
+
+def _is_int_keyed_dict(value) -> bool:
+    """Check whether the value is a dictionary whose integer keys are consecutive and
+    map to numbers.
+
+    Other keys (e.g., "jede_weitere_person") cannot be looked up by an integer.
+
+    """
+    if not isinstance(value, dict):
+        return False
+
+    keys = sorted(k for k in value if type(k) is int)
+    return (
+        len(keys) > 0
+        and keys == list(range(keys[0], keys[0] + len(keys)))
+        and all(
+            isinstance(value[k], int | float | numpy.number)
+            and not isinstance(value[k], bool)
+            for k in keys
+        )
+    )
+
+
+def _lookup_by_int_key(values, first_key, key):
+    """Look up the value of an integer key in the values of consecutive keys."""
+    position = int(key) - first_key
+    if position != key - first_key or position < 0 or position >= len(values):
+        raise KeyError("The key is not in the parameter dictionary.")
+    return values[position]
+
+
+@functools.cache
+def _get_jitted_lookup_by_int_key():
+    return numba.njit(_lookup_by_int_key)
+
+
+class TranslateToNumbaError(ValueError):
+    """Error when a function cannot be translated for compilation with numba."""
+
+
+def get_numba_compilation_errors() -> tuple[type[Exception], ...]:
+    """Get the errors which are raised if a function cannot be compiled with numba.
+
+    Errors which are raised by the compiled function itself, e.g., for missing keys,
+    are not among them.
+
+    """
+    return (TranslateToNumbaError, numba.core.errors.NumbaError)
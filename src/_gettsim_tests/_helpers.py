@@ -1,9 +1,8 @@
 from __future__ import annotations
 
-from functools import lru_cache
 from typing import TYPE_CHECKING
 
-from _gettsim.policy_environment import PolicyEnvironment, _parse_date
+from _gettsim.policy_environment import PolicyEnvironment
 
 if TYPE_CHECKING:
     import datetime
@@ -12,10 +11,5 @@ if TYPE_CHECKING:
 def cached_set_up_policy_environment(
     date: int | str | datetime.date,
 ) -> PolicyEnvironment:
-    normalized_date = _parse_date(date)
-    return _cached_set_up_policy_environment(normalized_date)
-
-
-@lru_cache(maxsize=100)
-def _cached_set_up_policy_environment(date: datetime.date) -> PolicyEnvironment:
+    # Environments are cached by `PolicyEnvironment.for_date`.
     return PolicyEnvironment.for_date(date)
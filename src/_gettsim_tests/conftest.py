@@ -1,3 +1,6 @@
+import pytest
+
+from _gettsim import config
 from _gettsim.config import set_array_backend
 
 
@@ -15,3 +18,23 @@ def pytest_sessionstart(session):  # type: ignore[no-untyped-def]
     use_jax = session.config.option.USE_JAX
     backend = "jax" if use_jax else "numpy"
     set_array_backend(backend)
+
+
+@pytest.fixture(autouse=True, scope="session")
+def _use_temporary_cache_dir(tmp_path_factory):  # type: ignore[no-untyped-def]
+    """Keep the files which GETTSIM derives during the tests out of the user's cache.
+
+    The fixture is session-scoped because JAX reads the directory of its compilation
+    cache only once.
+
+    """
+    cache_dir = tmp_path_factory.mktemp("gettsim_cache")
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.setattr(config, "PARAMETER_STORE_DIR", cache_dir / "parameters")
+        monkeypatch.setattr(config, "FUNCTION_MANIFEST_DIR", cache_dir / "functions")
+        monkeypatch.setattr(config, "JAX_COMPILATION_CACHE_DIR", cache_dir / "jax")
+        if config.USE_JAX:
+            import jax
+
+            jax.config.update("jax_compilation_cache_dir", str(cache_dir / "jax"))
+        yield
@@ -1,9 +1,15 @@
 import copy
 
 import numpy
+import numpy_groupies as npg
 import pytest
 
 from _gettsim.aggregation import (
+    all_by_p_id,
+    any_by_p_id,
+    count_by_p_id,
+    create_group_index,
+    dense_group_id,
     grouped_all,
     grouped_any,
     grouped_count,
@@ -11,6 +17,9 @@ from _gettsim.aggregation import (
     grouped_mean,
     grouped_min,
     grouped_sum,
+    max_by_p_id,
+    mean_by_p_id,
+    min_by_p_id,
     sum_by_p_id,
 )
 from _gettsim.config import USE_JAX
@@ -480,3 +489,344 @@ def test_sum_by_p_id_raises(
             p_id_to_aggregate_by=group_id,
             p_id_to_store_by=p_id_to_store_by,
         )
+
+
+test_by_p_id_specs = {
+    "float_column": {
+        "column_to_aggregate": np.array([10.0, 20.0, 30.0, 40.0, 50.0]),
+        "p_id_to_aggregate_by": np.array([-1, -1, 8, 8, 10]),
+        "p_id_to_store_by": np.array([7, 8, 9, 10, 11]),
+        "expected_res_count": np.array([0, 2, 0, 1, 0]),
+        "expected_res_mean": np.array([0.0, 35.0, 0.0, 50.0, 0.0]),
+        "expected_res_max": np.array([0.0, 40.0, 0.0, 50.0, 0.0]),
+        "expected_res_min": np.array([0.0, 30.0, 0.0, 50.0, 0.0]),
+    },
+    "p_id_to_store_by_unsorted": {
+        "column_to_aggregate": np.array([3, 1, 4, 1, 5]),
+        "p_id_to_aggregate_by": np.array([2, 0, 2, -1, 0]),
+        "p_id_to_store_by": np.array([2, 4, 0, 3, 1]),
+        "expected_res_count": np.array([2, 0, 2, 0, 0]),
+        "expected_res_max": np.array([4, 0, 5, 0, 0]),
+        "expected_res_min": np.array([3, 0, 1, 0, 0]),
+    },
+    "nothing_to_aggregate": {
+        "column_to_aggregate": np.array([1.0, 2.0]),
+        "p_id_to_aggregate_by": np.array([-1, -1]),
+        "p_id_to_store_by": np.array([0, 1]),
+        "expected_res_count": np.array([0, 0]),
+        "expected_res_mean": np.array([0.0, 0.0]),
+        "expected_res_max": np.array([0.0, 0.0]),
+        "expected_res_min": np.array([0.0, 0.0]),
+    },
+    "bool_column": {
+        "column_to_aggregate": np.array([True, False, True, True, False]),
+        "p_id_to_aggregate_by": np.array([1, 1, 2, 2, 3]),
+        "p_id_to_store_by": np.array([0, 1, 2, 3, 4]),
+        "expected_res_any": np.array([False, True, True, False, False]),
+        "expected_res_all": np.array([True, False, True, False, True]),
+    },
+}
+
+
+@parameterize_based_on_dict(
+    test_by_p_id_specs,
+    keys_of_test_cases=[
+        "p_id_to_aggregate_by",
+        "p_id_to_store_by",
+        "expected_res_count",
+    ],
+)
+def test_count_by_p_id(p_id_to_aggregate_by, p_id_to_store_by, expected_res_count):
+    result = count_by_p_id(
+        p_id_to_aggregate_by=p_id_to_aggregate_by, p_id_to_store_by=p_id_to_store_by
+    )
+    numpy.testing.assert_array_almost_equal(result, expected_res_count)
+
+
+@parameterize_based_on_dict(
+    test_by_p_id_specs,
+    keys_of_test_cases=[
+        "column_to_aggregate",
+        "p_id_to_aggregate_by",
+        "p_id_to_store_by",
+        "expected_res_mean",
+    ],
+)
+def test_mean_by_p_id(
+    column_to_aggregate, p_id_to_aggregate_by, p_id_to_store_by, expected_res_mean
+):
+    result = mean_by_p_id(
+        column=column_to_aggregate,
+        p_id_to_aggregate_by=p_id_to_aggregate_by,
+        p_id_to_store_by=p_id_to_store_by,
+    )
+    numpy.testing.assert_array_almost_equal(result, expected_res_mean)
+
+
+@parameterize_based_on_dict(
+    test_by_p_id_specs,
+    keys_of_test_cases=[
+        "column_to_aggregate",
+        "p_id_to_aggregate_by",
+        "p_id_to_store_by",
+        "expected_res_max",
+    ],
+)
+def test_max_by_p_id(
+    column_to_aggregate, p_id_to_aggregate_by, p_id_to_store_by, expected_res_max
+):
+    result = max_by_p_id(
+        column=column_to_aggregate,
+        p_id_to_aggregate_by=p_id_to_aggregate_by,
+        p_id_to_store_by=p_id_to_store_by,
+    )
+    numpy.testing.assert_array_almost_equal(result, expected_res_max)
+
+
+@parameterize_based_on_dict(
+    test_by_p_id_specs,
+    keys_of_test_cases=[
+        "column_to_aggregate",
+        "p_id_to_aggregate_by",
+        "p_id_to_store_by",
+        "expected_res_min",
+    ],
+)
+def test_min_by_p_id(
+    column_to_aggregate, p_id_to_aggregate_by, p_id_to_store_by, expected_res_min
+):
+    result = min_by_p_id(
+        column=column_to_aggregate,
+        p_id_to_aggregate_by=p_id_to_aggregate_by,
+        p_id_to_store_by=p_id_to_store_by,
+    )
+    numpy.testing.assert_array_almost_equal(result, expected_res_min)
+
+
+@parameterize_based_on_dict(
+    test_by_p_id_specs,
+    keys_of_test_cases=[
+        "column_to_aggregate",
+        "p_id_to_aggregate_by",
+        "p_id_to_store_by",
+        "expected_res_any",
+    ],
+)
+def test_any_by_p_id(
+    column_to_aggregate, p_id_to_aggregate_by, p_id_to_store_by, expected_res_any
+):
+    result = any_by_p_id(
+        column=column_to_aggregate,
+        p_id_to_aggregate_by=p_id_to_aggregate_by,
+        p_id_to_store_by=p_id_to_store_by,
+    )
+    numpy.testing.assert_array_almost_equal(result, expected_res_any)
+
+
+@parameterize_based_on_dict(
+    test_by_p_id_specs,
+    keys_of_test_cases=[
+        "column_to_aggregate",
+        "p_id_to_aggregate_by",
+        "p_id_to_store_by",
+        "expected_res_all",
+    ],
+)
+def test_all_by_p_id(
+    column_to_aggregate, p_id_to_aggregate_by, p_id_to_store_by, expected_res_all
+):
+    result = all_by_p_id(
+        column=column_to_aggregate,
+        p_id_to_aggregate_by=p_id_to_aggregate_by,
+        p_id_to_store_by=p_id_to_store_by,
+    )
+    numpy.testing.assert_array_almost_equal(result, expected_res_all)
+
+
+def test_sum_by_p_id_equals_loop():
+    rng = numpy.random.default_rng(0)
+    p_id_to_store_by = rng.permutation(1_000) + 5
+    p_id_to_aggregate_by = rng.choice(numpy.append(p_id_to_store_by, -1), size=1_000)
+    column = rng.normal(size=1_000)
+
+    expected = numpy.zeros(1_000)
+    map_p_id_to_position = {p_id: iloc for iloc, p_id in enumerate(p_id_to_store_by)}
+    for iloc, id_receiver in enumerate(p_id_to_aggregate_by):
+        if id_receiver >= 0:
+            expected[map_p_id_to_position[id_receiver]] += column[iloc]
+
+    result = sum_by_p_id(
+        column=np.array(column),
+        p_id_to_aggregate_by=np.array(p_id_to_aggregate_by),
+        p_id_to_store_by=np.array(p_id_to_store_by),
+    )
+
+    numpy.testing.assert_array_almost_equal(numpy.array(result), expected)
+
+
+def test_sum_by_p_id_raises_if_p_id_to_aggregate_by_does_not_exist():
+    with pytest.raises(ValueError, match="Invalid foreign keys"):
+        sum_by_p_id(
+            column=np.array([1, 2]),
+            p_id_to_aggregate_by=np.array([-1, 5]),
+            p_id_to_store_by=np.array([0, 1]),
+        )
+
+
+@pytest.mark.parametrize(
+    "group_id, expected",
+    [
+        (np.array([100, 5, 100, 7]), np.array([2, 0, 2, 1])),
+        (np.array([0, 0, 1]), np.array([0, 0, 1])),
+        (np.array([10**12, 3]), np.array([1, 0])),
+    ],
+)
+def test_dense_group_id(group_id, expected):
+    numpy.testing.assert_array_equal(dense_group_id(group_id), expected)
+
+
+def test_dense_group_id_raises_if_dtype_is_not_int():
+    with pytest.raises(TypeError, match="The dtype of id columns must be integer."):
+        dense_group_id(np.array([0.5, 1.5]))
+
+
+def test_group_index():
+    group_index = create_group_index(np.array([100, 5, 100, 7, 5, 100]))
+
+    numpy.testing.assert_array_equal(group_index.codes, np.array([2, 0, 2, 1, 0, 2]))
+    numpy.testing.assert_array_equal(group_index.sizes, np.array([2, 1, 3]))
+    numpy.testing.assert_array_equal(group_index.order, np.array([1, 4, 3, 0, 2, 5]))
+    numpy.testing.assert_array_equal(group_index.offsets, np.array([0, 2, 3]))
+    assert group_index.n_groups == 3
+
+
+@pytest.mark.parametrize(
+    "aggregation_func, column",
+    [
+        (grouped_sum, np.arange(6.0)),
+        (grouped_sum, np.array([True, False, True, True, False, True])),
+        (grouped_mean, np.arange(6.0)),
+        (grouped_max, np.arange(6)),
+        (grouped_min, np.arange(6)),
+        (grouped_any, np.array([True, False, False, False, False, False])),
+        (grouped_all, np.array([True, True, True, False, True, True])),
+    ],
+)
+def test_grouped_aggregations_accept_group_index(aggregation_func, column):
+    group_id = np.array([100, 5, 100, 7, 5, 100])
+
+    numpy.testing.assert_array_equal(
+        aggregation_func(column, create_group_index(group_id)),
+        aggregation_func(column, group_id),
+    )
+
+
+@pytest.mark.skipif(not USE_JAX, reason="JAX is not used.")
+@pytest.mark.parametrize(
+    "func",
+    [
+        "grouped_sum",
+        "grouped_mean",
+        "grouped_max",
+        "grouped_min",
+        "grouped_any",
+        "grouped_all",
+    ],
+)
+def test_jax_aggregations_under_jit_equal_eager(func):
+    import jax
+
+    from _gettsim import aggregation_jax
+
+    aggregation_func = getattr(aggregation_jax, func)
+    group_id = np.array([100, 5, 100, 7, 5, 100])
+    column = (
+        np.array([True, False, False, True, True, True])
+        if "any" in func or "all" in func
+        else np.array([1.0, 2.0, 3.0, 4.0, 5.0, 6.0])
+    )
+
+    numpy.testing.assert_allclose(
+        jax.jit(aggregation_func)(column, group_id), aggregation_func(column, group_id)
+    )
+
+
+@pytest.mark.skipif(USE_JAX, reason="Compares against numpy_groupies.")
+@pytest.mark.parametrize("func", ["sum", "mean", "max", "min", "any", "all"])
+def test_grouped_aggregations_equal_numpy_groupies(func):
+    rng = numpy.random.default_rng(0)
+    group_id = rng.integers(0, 10_000, size=5_000) * 100
+    column = (
+        rng.random(size=5_000) < 0.5
+        if func in ("any", "all")
+        else rng.normal(size=5_000)
+    )
+
+    expected = npg.aggregate(group_id, column, func=func)[group_id]
+    aggregation_func = {
+        "sum": grouped_sum,
+        "mean": grouped_mean,
+        "max": grouped_max,
+        "min": grouped_min,
+        "any": grouped_any,
+        "all": grouped_all,
+    }[func]
+
+    numpy.testing.assert_allclose(aggregation_func(column, group_id), expected)
+
+
+@pytest.mark.skipif(USE_JAX, reason="Compares against the NumPy backend.")
+@pytest.mark.parametrize(
+    "func",
+    [
+        "grouped_sum",
+        "grouped_mean",
+        "grouped_max",
+        "grouped_min",
+        "grouped_any",
+        "grouped_all",
+        "sum_by_p_id",
+        "mean_by_p_id",
+        "max_by_p_id",
+        "min_by_p_id",
+        "any_by_p_id",
+        "all_by_p_id",
+    ],
+)
+def test_numba_aggregations_equal_numpy(func):
+    pytest.importorskip("numba")
+    from _gettsim import aggregation_numba, aggregation_numpy
+
+    rng = numpy.random.default_rng(0)
+    column = (
+        rng.random(size=5_000) < 0.5
+        if "any" in func or "all" in func
+        else rng.normal(size=5_000)
+    )
+    if func.startswith("grouped"):
+        args = (column, rng.integers(0, 1_000, size=5_000) * 100)
+    else:
+        p_id = numpy.arange(5_000)
+        p_id_to_aggregate_by = numpy.where(
+            rng.random(size=5_000) < 0.7, rng.integers(0, 5_000, size=5_000), -1
+        )
+        args = (column, p_id_to_aggregate_by, p_id)
+
+    expected = getattr(aggregation_numpy, func)(*args)
+    actual = getattr(aggregation_numba, func)(*args)
+
+    assert actual.dtype == expected.dtype
+    numpy.testing.assert_allclose(actual, expected)
+
+
+def test_aggregations_use_backend_set_after_import(monkeypatch):
+    pytest.importorskip("numba")
+    from _gettsim import aggregation, config
+
+    monkeypatch.setattr(config, "USE_JAX", False)
+    monkeypatch.setattr(config, "USE_NUMBA", True)
+    monkeypatch.setattr(aggregation, "grouped_sum_numba", lambda column, _: column)
+
+    result = aggregation.grouped_sum(numpy.array([1.0, 2.0]), numpy.array([0, 0]))
+
+    numpy.testing.assert_array_equal(result, [1.0, 2.0])
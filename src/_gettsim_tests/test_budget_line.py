@@ -0,0 +1,143 @@
+import numpy
+import pandas as pd
+import pytest
+
+from _gettsim.budget_line import compute_budget_lines
+from _gettsim.interface import compute_taxes_and_transfers
+from _gettsim.policy_environment import PolicyEnvironment
+from _gettsim.synthetic import create_synthetic_data
+
+
+def steuer_y(bruttolohn_m: float, steuer_params: dict) -> float:
+    return bruttolohn_m * 12 * steuer_params["satz"]
+
+
+def transfer_m_hh(anz_personen_hh: int, einkommen_m_hh: float) -> float:
+    return max(anz_personen_hh * 100.0 - einkommen_m_hh * 0.5, 0.0)
+
+
+@pytest.fixture
+def environment():
+    return PolicyEnvironment(
+        [steuer_y, transfer_m_hh],
+        params={"steuer": {"satz": 0.2}},
+        aggregate_by_group_specs={
+            "anz_personen_hh": {"aggr": "count"},
+            "einkommen_m_hh": {"source_col": "bruttolohn_m", "aggr": "sum"},
+        },
+    )
+
+
+@pytest.fixture
+def templates():
+    return {
+        "single": pd.DataFrame(
+            {"p_id": [0], "hh_id": [0], "bruttolohn_m": [0.0]},
+        ),
+        "couple": pd.DataFrame(
+            {"p_id": [3, 4], "hh_id": [7, 7], "bruttolohn_m": [0.0, 100.0]},
+        ),
+    }
+
+
+def test_budget_lines(templates, environment):
+    result = compute_budget_lines(
+        templates,
+        environment,
+        incomes=[0.0, 200.0, 1_000.0],
+        taxes="steuer_y",
+        benefits="transfer_m_hh",
+    )
+
+    assert list(result) == [
+        "bruttolohn_m_hh",
+        "steuer_m_hh",
+        "transfer_m_hh",
+        "netto_eink_m_hh",
+    ]
+    assert result.index.names == ["template", "bruttolohn_m"]
+    numpy.testing.assert_allclose(
+        result.loc["single"].to_numpy(),
+        [[0.0, 0.0, 100.0, 100.0], [200.0, 40.0, 0.0, 160.0], [1_000, 200, 0.0, 800]],
+    )
+    numpy.testing.assert_allclose(
+        result.loc["couple"].to_numpy(),
+        [
+            [100.0, 20.0, 150.0, 230.0],
+            [300.0, 60.0, 50.0, 290.0],
+            [1_100.0, 220.0, 0.0, 880.0],
+        ],
+    )
+
+
+def test_budget_lines_equal_compute_taxes_and_transfers():
+    environment = PolicyEnvironment.for_date(2020)
+    incomes = [0.0, 1_000.0, 2_000.0, 3_000.0, 5_000.0]
+    household_types = [(1, 0), (2, 2)]
+    templates = [
+        create_synthetic_data(n_adults=n_adults, n_children=n_children)
+        for n_adults, n_children in household_types
+    ]
+    targets = [
+        "eink_st_y_sn",
+        "sozialv_beitr_arbeitnehmer_m",
+        "kindergeld_m",
+        "arbeitsl_geld_2_m_bg",
+        "wohngeld_m_wthh",
+    ]
+
+    result = compute_budget_lines(
+        templates, environment, incomes, taxes=targets[:2], benefits=targets[2:]
+    )
+
+    for i, (n_adults, n_children) in enumerate(household_types):
+        data = create_synthetic_data(
+            n_adults=n_adults,
+            n_children=n_children,
+            specs_heterogeneous={
+                "bruttolohn_m": [
+                    [w] + [0.0] * (n_adults + n_children - 1) for w in incomes
+                ]
+            },
+        )
+        expected = compute_taxes_and_transfers(data, environment, targets=targets)
+        hh_id = data["hh_id"].to_numpy()
+        numpy.testing.assert_allclose(
+            result.loc[i, "eink_st_m_hh"],
+            expected.groupby(hh_id)["eink_st_y_sn"].max() / 12,
+        )
+        numpy.testing.assert_allclose(
+            result.loc[i, "kindergeld_m_hh"],
+            expected.groupby(hh_id)["kindergeld_m"].sum(),
+        )
+        numpy.testing.assert_allclose(
+            result.loc[i, "arbeitsl_geld_2_m_hh"],
+            expected.groupby(hh_id)["arbeitsl_geld_2_m_bg"].max(),
+        )
+        numpy.testing.assert_allclose(
+            result.loc[i, "wohngeld_m_hh"],
+            expected.groupby(hh_id)["wohngeld_m_wthh"].max(),
+        )
+
+
+@pytest.mark.parametrize(
+    ("kwargs", "match"),
+    [
+        ({"income": "kapitaleink_m"}, "must be a column of the templates"),
+        ({"earner": 2}, "'earner' must be the position"),
+        ({"taxes": "steuer"}, "must end with a time unit"),
+    ],
+)
+def test_fail_if_arguments_are_invalid(templates, environment, kwargs, match):
+    kwargs = {"taxes": "steuer_y", "benefits": "transfer_m_hh", **kwargs}
+    with pytest.raises(ValueError, match=match):
+        compute_budget_lines(templates, environment, [0.0], **kwargs)
+
+
+def test_fail_if_template_contains_several_households(templates, environment):
+    templates["couple"]["hh_id"] = [7, 8]
+
+    with pytest.raises(ValueError, match="single household"):
+        compute_budget_lines(
+            templates, environment, [0.0], taxes="steuer_y", benefits="transfer_m_hh"
+        )
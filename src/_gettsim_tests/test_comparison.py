@@ -0,0 +1,120 @@
+import copy
+
+import pandas as pd
+import pytest
+
+from _gettsim.comparison import compare_environments, get_changed_functions
+from _gettsim.functions.policy_function import PolicyFunction
+from _gettsim.interface import (
+    _round_and_partial_parameters_to_functions,
+    compute_taxes_and_transfers,
+)
+from _gettsim.policy_environment import PolicyEnvironment
+from _gettsim.synthetic import create_synthetic_data
+
+
+def einkommen_m(bruttolohn_m: float) -> float:
+    return bruttolohn_m * 2
+
+
+def steuer_m(einkommen_m: float, steuer_params: dict) -> float:
+    return einkommen_m * steuer_params["satz"]
+
+
+def transfer_m(einkommen_m: float, transfer_params: dict) -> float:
+    return max(transfer_params["betrag"] - einkommen_m, 0.0)
+
+
+def netto_m(einkommen_m: float, steuer_m: float, transfer_m: float) -> float:
+    return einkommen_m - steuer_m + transfer_m
+
+
+def transfer_reform_m(einkommen_m: float, transfer_params: dict) -> float:  # noqa: ARG001
+    return transfer_params["betrag"]
+
+
+PARAMS = {"steuer": {"satz": 0.2}, "transfer": {"betrag": 500.0}}
+
+
+@pytest.fixture
+def data():
+    return pd.DataFrame(
+        {"p_id": [0, 1, 2, 3], "bruttolohn_m": [0.0, 100.0, 1_000.0, 3_000.0]}
+    )
+
+
+@pytest.fixture
+def base_environment():
+    return PolicyEnvironment([einkommen_m, steuer_m, transfer_m, netto_m], PARAMS)
+
+
+def _get_reform_environments(base_environment):
+    params = copy.deepcopy(PARAMS)
+    params["steuer"]["satz"] = 0.3
+    return {
+        "params": base_environment.replace_all_parameters(params),
+        "functions": base_environment.upsert_functions(
+            PolicyFunction(transfer_reform_m, function_name="transfer_m")
+        ),
+    }
+
+
+@pytest.mark.parametrize("reform", ["params", "functions"])
+def test_results_equal_compute_taxes_and_transfers(data, base_environment, reform):
+    reform_environment = _get_reform_environments(base_environment)[reform]
+    targets = ["netto_m", "einkommen_m", "steuer_m"]
+
+    results = compare_environments(
+        data, base_environment, reform_environment, targets=targets
+    )
+
+    expected_base = compute_taxes_and_transfers(data, base_environment, targets)
+    expected_reform = compute_taxes_and_transfers(data, reform_environment, targets)
+    pd.testing.assert_frame_equal(results["base"], expected_base)
+    pd.testing.assert_frame_equal(results["reform"], expected_reform)
+    pd.testing.assert_frame_equal(results["delta"], expected_reform - expected_base)
+
+
+@pytest.mark.parametrize(
+    ("reform", "expected"), [("params", {"steuer_m"}), ("functions", {"transfer_m"})]
+)
+def test_changed_functions(base_environment, reform, expected):
+    reform_environment = _get_reform_environments(base_environment)[reform]
+
+    changed = get_changed_functions(
+        base_environment=base_environment,
+        reform_environment=reform_environment,
+        base_functions=_round_and_partial_parameters_to_functions(
+            base_environment.functions, base_environment.params, rounding=True
+        ),
+        reform_functions=_round_and_partial_parameters_to_functions(
+            reform_environment.functions, reform_environment.params, rounding=True
+        ),
+        rounding=True,
+    )
+
+    assert changed == expected
+
+
+def test_results_of_kindergeld_reform():
+    environment = PolicyEnvironment.for_date(2020)
+    params = copy.deepcopy(environment.params)
+    params["kindergeld"]["kindergeld"][1] += 50
+    reform_environment = environment.replace_all_parameters(params)
+    data = create_synthetic_data(
+        n_adults=2,
+        n_children=1,
+        specs_heterogeneous={
+            "bruttolohn_m": [[float(w), 0.0, 0.0] for w in range(0, 6_000, 500)]
+        },
+    )
+
+    results = compare_environments(data, environment, reform_environment)
+
+    pd.testing.assert_frame_equal(
+        results["base"], compute_taxes_and_transfers(data, environment)
+    )
+    pd.testing.assert_frame_equal(
+        results["reform"], compute_taxes_and_transfers(data, reform_environment)
+    )
+    assert results["delta"]["kindergeld_m"].sum() == 50 * 12
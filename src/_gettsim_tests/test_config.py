@@ -11,8 +11,11 @@ def test_default_backend():
     assert numpy_or_jax.__name__ == "numpy"
 
 
-def test_set_backend():
+def test_set_backend(monkeypatch):
     is_jax_installed = importlib.util.find_spec("jax") is not None
+    # Restore the backend for later tests.
+    monkeypatch.setattr(_gettsim.config, "USE_JAX", _gettsim.config.USE_JAX)
+    monkeypatch.setattr(_gettsim.config, "numpy_or_jax", _gettsim.config.numpy_or_jax)
 
     # expect default backend
     from _gettsim.config import numpy_or_jax
@@ -38,3 +41,16 @@ def test_set_backend():
 def test_wrong_backend(backend):
     with pytest.raises(ValueError):
         _gettsim.config.set_array_backend(backend)
+
+
+def test_set_numba_backend(monkeypatch):
+    monkeypatch.setattr(_gettsim.config, "USE_NUMBA", False)
+
+    if importlib.util.find_spec("numba") is not None:
+        _gettsim.config.set_array_backend("numba")
+
+        assert _gettsim.config.USE_NUMBA
+        assert _gettsim.config.numpy_or_jax.__name__ == "numpy"
+    else:
+        with pytest.raises(AssertionError):
+            _gettsim.config.set_array_backend("numba")
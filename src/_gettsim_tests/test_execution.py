@@ -0,0 +1,205 @@
+import functools
+
+import numpy
+import pytest
+from dags.signature import rename_arguments
+
+from _gettsim.config import USE_JAX
+from _gettsim.execution import (
+    JitExecutor,
+    MemoryAwareExecutor,
+    _get_bucket_size,
+    _get_nodes_to_free_after_step,
+    _pad_rows,
+    get_functions_depending_on,
+    get_shared_targets,
+    split_by_dependence,
+)
+from _gettsim.shared import join
+
+
+def a(x):
+    return x + 1.0
+
+
+def b(a):
+    return a * 2.0
+
+
+def c(a, b):
+    return a + b
+
+
+def d(c, factor):
+    return c * factor
+
+
+@pytest.fixture
+def functions():
+    return {"a": a, "b": b, "c": c, "d": functools.partial(d, factor=3.0)}
+
+
+def test_executor_computes_targets(functions):
+    executor = MemoryAwareExecutor(functions, targets=["d", "b"])
+    x = numpy.arange(5, dtype=float)
+
+    result = executor({"x": x})
+
+    assert list(result) == ["d", "b"]
+    numpy.testing.assert_array_equal(result["b"], (x + 1) * 2)
+    numpy.testing.assert_array_equal(result["d"], ((x + 1) + (x + 1) * 2) * 3)
+
+
+@pytest.mark.parametrize(
+    ("nodes", "expected"),
+    [({"x"}, {"a", "b", "c", "d"}), ({"b"}, {"b", "c", "d"}), ({"d", "y"}, {"d"})],
+)
+def test_functions_depending_on_nodes(functions, nodes, expected):
+    assert get_functions_depending_on(functions, nodes) == expected
+
+
+def test_shared_targets_are_targets_and_arguments_of_dependent_functions(functions):
+    shared_targets = get_shared_targets(
+        functions, targets=["d", "a"], dependent={"b", "c", "d"}
+    )
+
+    assert shared_targets == ["a"]
+    assert get_shared_targets(functions, targets=["d"], dependent={"c", "d"}) == [
+        "a",
+        "b",
+    ]
+
+
+def test_split_by_dependence(functions):
+    shared_executor, dependent = split_by_dependence(
+        functions, targets=["d", "a"], nodes={"c"}
+    )
+    shared_results = shared_executor({"x": numpy.array([1.0])})
+
+    assert dependent == {"c", "d"}
+    assert set(shared_results) == {"a", "b"}
+    assert MemoryAwareExecutor({n: functions[n] for n in dependent}, targets=["d"])(
+        shared_results
+    )["d"] == numpy.array([18.0])
+
+
+def test_executor_ignores_additional_inputs(functions):
+    executor = MemoryAwareExecutor(functions, targets=["b"])
+    assert executor.arguments == ["x"]
+
+    result = executor({"x": numpy.zeros(2), "y": numpy.ones(2)})
+
+    numpy.testing.assert_array_equal(result["b"], numpy.full(2, 2.0))
+
+
+def test_executor_fails_if_inputs_are_missing(functions):
+    executor = MemoryAwareExecutor(functions, targets=["d"])
+    with pytest.raises(ValueError, match="inputs of the DAG are missing"):
+        executor({})
+
+
+def test_nodes_are_freed_after_last_consumer():
+    nodes_to_free = _get_nodes_to_free_after_step(
+        execution_order=["a", "b", "c", "d"],
+        arguments_of_functions={"a": ["x"], "b": ["a"], "c": ["a", "b"], "d": ["c"]},
+        keep={"d"},
+    )
+
+    assert nodes_to_free == [["x"], [], ["a", "b"], ["c"]]
+
+
+def test_peak_bytes_are_lower_than_keeping_intermediates():
+    n_steps = 10
+    functions = {"step_0": a}
+    for i in range(1, n_steps):
+        functions[f"step_{i}"] = rename_arguments(a, mapper={"x": f"step_{i - 1}"})
+    executor = MemoryAwareExecutor(functions, targets=[f"step_{n_steps - 1}"])
+    x = numpy.zeros(1_000)
+
+    result = executor({"x": x})
+    peak_bytes_freeing = executor.peak_bytes
+    all_results = executor({"x": x}, keep_intermediates=True)
+    peak_bytes_keeping = executor.peak_bytes
+
+    numpy.testing.assert_array_equal(result[f"step_{n_steps - 1}"], x + n_steps)
+    assert len(all_results) == n_steps
+    assert peak_bytes_freeing == 2 * x.nbytes
+    assert peak_bytes_keeping == (n_steps + 1) * x.nbytes
+
+
+@pytest.mark.parametrize(
+    "n_rows, expected", [(0, 0), (1, 1), (2, 2), (5, 8), (8, 8), (9, 16)]
+)
+def test_bucket_size_is_next_power_of_two(n_rows, expected):
+    assert _get_bucket_size(n_rows) == expected
+
+
+@pytest.mark.parametrize(
+    "name, value, expected",
+    [
+        ("hh_id", [3, 3, 5], [3, 3, 5, 6, 7]),
+        ("p_id", [0, 1, 2], [0, 1, 2, 3, 4]),
+        ("p_id_ehepartner", [1, 0, -1], [1, 0, -1, -1, -1]),
+        ("p_id_kindergeld_empf", [1, 0, -1], [1, 0, -1, -1, -1]),
+        ("alter", [30, 40, 50], [30, 40, 50, 50, 50]),
+    ],
+)
+def test_padded_rows_are_separate_persons(name, value, expected):
+    numpy.testing.assert_array_equal(
+        _pad_rows(name, numpy.array(value), 5), numpy.array(expected)
+    )
+
+
+@pytest.mark.skipif(not USE_JAX, reason="JAX is not used.")
+def test_jit_executor_is_traced_once_per_bucket(functions):
+    executor = JitExecutor(MemoryAwareExecutor(functions, targets=["d", "b"]))
+
+    for n_rows in [5, 6, 8, 9]:
+        x = numpy.arange(n_rows, dtype=float)
+        result = executor({"x": x})
+
+        assert list(result) == ["d", "b"]
+        numpy.testing.assert_allclose(result["b"], (x + 1) * 2)
+        numpy.testing.assert_allclose(result["d"], ((x + 1) + (x + 1) * 2) * 3)
+
+    assert executor.n_traces == 2
+
+
+@pytest.mark.skipif(not USE_JAX, reason="JAX is not used.")
+def test_jit_executor_does_not_compile_intermediates(functions):
+    executor = JitExecutor(MemoryAwareExecutor(functions, targets=["d"]))
+
+    result = executor({"x": numpy.arange(5, dtype=float)}, keep_intermediates=True)
+
+    assert set(result) == {"a", "b", "c", "d"}
+    assert executor.n_traces == 0
+    assert executor.peak_bytes is not None
+
+
+def received(p_id_empfänger, p_id, x):
+    return join(p_id_empfänger, p_id, x, value_if_foreign_key_is_missing=0.0)
+
+
+@pytest.mark.skipif(not USE_JAX, reason="JAX is not used.")
+@pytest.mark.parametrize(
+    ("p_id", "p_id_empfänger", "match"),
+    [
+        ([0, 1, 2], [1, 5, -1], "Invalid foreign keys: \\[5\\]"),
+        ([0, 1, 1], [1, 0, -1], "Duplicate primary keys: \\[1\\]"),
+    ],
+)
+def test_jit_executor_fails_if_foreign_keys_cannot_be_joined(
+    p_id, p_id_empfänger, match
+):
+    executor = JitExecutor(
+        MemoryAwareExecutor({"received": received}, targets=["received"])
+    )
+    inputs = {
+        "p_id": numpy.array(p_id),
+        "p_id_empfänger": numpy.array(p_id_empfänger),
+        "x": numpy.arange(3.0),
+    }
+
+    with pytest.raises(ValueError, match=match):
+        executor(inputs)
+    assert executor.n_traces == 0
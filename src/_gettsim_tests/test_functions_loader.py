@@ -1,20 +1,30 @@
 from __future__ import annotations
 
+import sys
 import textwrap
 from typing import TYPE_CHECKING
 
 import numpy
 import pytest
 
-from _gettsim.config import RESOURCE_DIR
+from _gettsim import config
+from _gettsim.config import PATHS_TO_INTERNAL_FUNCTIONS, RESOURCE_DIR
+from _gettsim.functions import loader
 from _gettsim.functions.loader import (
+    _evaluate_annotation,
+    _find_python_files_recursively,
+    _load_aggregation_dict,
     _load_functions,
+    _load_functions_in_module,
+    _load_internal_functions,
+    load_function_manifest,
+    load_internal_aggregation_dict,
 )
-from _gettsim.functions.policy_function import PolicyFunction
+from _gettsim.functions.policy_function import LazyPolicyFunction, PolicyFunction
 from _gettsim.policy_environment import PolicyEnvironment
 from _gettsim.policy_environment_postprocessor import (
-    _create_derived_functions,
     _vectorize_func,
+    check_functions_and_differentiate_types,
 )
 from _gettsim.shared import policy_info
 
@@ -60,6 +70,154 @@ def test_special_attribute_module_is_set_for_internal_functions():
     assert function.__module__ == "_gettsim.social_insurance_contributions.eink_grenzen"
 
 
+# function manifest -------------------------------------------------------------
+
+
+@pytest.fixture
+def manifest_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "FUNCTION_MANIFEST_DIR", tmp_path / "manifests")
+    monkeypatch.setattr(loader, "_FUNCTION_MANIFESTS", {})
+    return tmp_path / "manifests"
+
+
+@pytest.fixture
+def package_root(tmp_path, monkeypatch):
+    root = tmp_path / "lazy_package"
+    root.mkdir()
+    (root / "functions.py").write_text(
+        textwrap.dedent(
+            """
+            from _gettsim.shared import policy_info
+
+            aggregate_by_group_functions = {"foo_hh": {"aggr": "count"}}
+
+            @policy_info(start_date="2020-01-01", params_key_for_rounding="foo")
+            def foo(bar: float, foo_params: dict) -> float:
+                return bar * foo_params["factor"]
+            """
+        )
+    )
+    monkeypatch.syspath_prepend(tmp_path)
+    yield root
+    sys.modules.pop("lazy_package.functions", None)
+
+
+def test_manifest_recreates_internal_functions(manifest_dir):  # noqa: ARG001
+    lazy_functions = _load_internal_functions()
+    functions = [
+        function
+        for path in _find_python_files_recursively(PATHS_TO_INTERNAL_FUNCTIONS)
+        for function in _load_functions_in_module(path, RESOURCE_DIR, False)
+    ]
+
+    assert len(lazy_functions) == len(functions)
+    for lazy_function, function in zip(lazy_functions, functions, strict=True):
+        assert isinstance(lazy_function, LazyPolicyFunction)
+        for attribute in [
+            "name_in_dag",
+            "module_name",
+            "start_date",
+            "end_date",
+            "params_key_for_rounding",
+            "skip_vectorization",
+            "original_function_name",
+            "__name__",
+            "__module__",
+            "__annotations__",
+            "__signature__",
+        ]:
+            assert getattr(lazy_function, attribute) == getattr(function, attribute)
+        assert getattr(lazy_function, "__info__", None) == getattr(
+            function, "__info__", None
+        )
+
+
+@pytest.mark.parametrize("variant", ["aggregate_by_group", "aggregate_by_p_id"])
+def test_manifest_recreates_internal_aggregation_dicts(
+    variant,
+    manifest_dir,  # noqa: ARG001
+):
+    expected = _load_aggregation_dict(
+        PATHS_TO_INTERNAL_FUNCTIONS, RESOURCE_DIR, variant
+    )
+
+    assert load_internal_aggregation_dict(variant) == expected
+
+
+def test_module_is_imported_when_function_is_used(manifest_dir, package_root):
+    load_function_manifest(package_root, package_root)
+    assert len(list(manifest_dir.glob("manifest-*.json"))) == 1
+
+    # Forget the module and the manifest in memory to ensure the file is used.
+    sys.modules.pop("lazy_package.functions")
+    loader._FUNCTION_MANIFESTS.clear()  # noqa: SLF001
+    (function,) = _load_functions(package_root, package_root)
+
+    assert function.name_in_dag == "foo"
+    assert function.params_key_for_rounding == "foo"
+    assert function.dependencies == {"bar", "foo_params"}
+    assert not function.is_loaded
+    assert "lazy_package.functions" not in sys.modules
+
+    assert numpy.array_equal(
+        function(numpy.array([1.0, 2.0]), {"factor": 2.0}), numpy.array([2.0, 4.0])
+    )
+    assert function.is_loaded
+    assert "lazy_package.functions" in sys.modules
+
+
+def test_manifest_is_rebuilt_if_module_changes(manifest_dir, package_root):
+    load_function_manifest(package_root, package_root)
+
+    path = package_root / "functions.py"
+    path.write_text(path.read_text().replace("bar: float", "baz: float"))
+    (function,) = _load_functions(package_root, package_root)
+
+    assert function.dependencies == {"baz", "foo_params"}
+    assert len(list(manifest_dir.glob("manifest-*.json"))) == 2
+
+
+def test_functions_are_imported_if_manifest_cannot_describe_them(
+    manifest_dir,  # noqa: ARG001
+    package_root,
+):
+    (package_root / "functions.py").write_text(
+        textwrap.dedent(
+            """
+            Amount = float
+
+            def foo(bar: Amount) -> Amount:
+                return bar
+            """
+        )
+    )
+
+    manifest = load_function_manifest(package_root, package_root)
+    (function,) = _load_functions(package_root, package_root)
+
+    assert manifest["modules"][0]["functions"] is None
+    assert not isinstance(function, LazyPolicyFunction)
+    assert function.__annotations__ == {"bar": float, "return": float}
+
+
+@pytest.mark.parametrize(
+    ("annotation", "expected"),
+    [
+        ("float", float),
+        ("numpy.ndarray[int]", numpy.ndarray[int]),
+        ("dict[str, dict]", dict[str, dict]),
+    ],
+)
+def test_evaluate_annotation(annotation, expected):
+    assert _evaluate_annotation(annotation) == expected
+
+
+@pytest.mark.parametrize("annotation", ["int | None", "__import__('os').getcwd()"])
+def test_unsupported_annotations_are_not_evaluated(annotation):
+    with pytest.raises(ValueError, match="not supported"):
+        _evaluate_annotation(annotation)
+
+
 @pytest.mark.parametrize(
     ("functions", "targets"),
     [
@@ -80,22 +238,35 @@ def test_create_derived_functions(
         ]
     )
 
-    (
-        time_conversion_functions,
-        aggregate_by_group_functions,
-        aggregate_by_p_id_functions,
-    ) = _create_derived_functions(environment, targets, [])
-
-    derived_functions = {
-        **time_conversion_functions,
-        **aggregate_by_group_functions,
-        **aggregate_by_p_id_functions,
-    }
+    derived_functions, _ = check_functions_and_differentiate_types(
+        environment, targets, []
+    )
 
     for name in targets:
         assert name in derived_functions
 
 
+def test_derived_functions_are_only_created_if_requested() -> None:
+    def foo_y() -> float:
+        return 1.0
+
+    def bar_m(foo_m: float) -> float:
+        return foo_m
+
+    def baz_y() -> float:
+        return 1.0
+
+    environment = PolicyEnvironment(
+        [PolicyFunction(foo_y), PolicyFunction(bar_m), PolicyFunction(baz_y)]
+    )
+
+    functions, _ = check_functions_and_differentiate_types(
+        environment, ["bar_m_hh"], ["p_id", "hh_id"]
+    )
+
+    assert set(functions) == {"bar_m_hh", "bar_m", "foo_m", "foo_y", "_hh_group_index"}
+
+
 # vectorize_func --------------------------------------------------------------
 
 
@@ -121,3 +292,55 @@ def test_vectorize_func(function: Callable) -> None:
     assert numpy.array_equal(
         vectorized_func(numpy.array([1, 2, 3])), numpy.array([2, 4, 6])
     )
+
+
+def scalar_func_with_if(x: int) -> int:
+    if x > 1:
+        out = x * 2
+    else:
+        out = 0
+    return out
+
+
+def scalar_func_with_dict_lookup(x: int) -> int:
+    return {1: 2, 2: 4, 3: 6}[x]
+
+
+def test_vectorize_func_translates_by_default() -> None:
+    function = PolicyFunction(scalar_func_with_if)
+
+    assert function.vectorization_strategy == "ast"
+    assert function.vectorization_fallback_reason is None
+    assert numpy.array_equal(function(numpy.array([1, 2, 3])), numpy.array([0, 4, 6]))
+
+
+def test_vectorize_func_falls_back_if_call_fails() -> None:
+    function = PolicyFunction(scalar_func_with_dict_lookup)
+
+    assert function.vectorization_strategy == "ast"
+    assert numpy.array_equal(function(numpy.array([1, 2, 3])), numpy.array([2, 4, 6]))
+    assert function.vectorization_strategy == "vectorize"
+    assert "unhashable" in function.vectorization_fallback_reason
+
+
+def test_vectorize_func_falls_back_if_translation_fails() -> None:
+    function = PolicyFunction(lambda x: x * 2, function_name="foo")
+
+    assert function.vectorization_strategy == "vectorize"
+    assert function.vectorization_fallback_reason.startswith("Translation failed")
+    assert numpy.array_equal(function(numpy.array([1, 2, 3])), numpy.array([2, 4, 6]))
+
+
+def test_vectorize_func_broadcasts_scalar_output() -> None:
+    def constant(x: int) -> int:  # noqa: ARG001
+        return 1
+
+    function = PolicyFunction(constant)
+
+    assert numpy.array_equal(function(numpy.array([1, 2, 3])), numpy.array([1, 1, 1]))
+
+
+def test_skip_vectorization_has_no_vectorization_strategy() -> None:
+    function = PolicyFunction(already_vectorized_func)
+
+    assert function.vectorization_strategy is None
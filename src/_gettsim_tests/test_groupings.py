@@ -1,7 +1,19 @@
+from collections import Counter
+
+import numpy
 import pandas as pd
 import pytest
+from numpy.testing import assert_array_equal
 from pandas.testing import assert_series_equal
 
+from _gettsim.groupings import (
+    bg_id_numpy,
+    eg_id_numpy,
+    ehe_id_numpy,
+    fg_id_numpy,
+    sn_id_numpy,
+    wthh_id_numpy,
+)
 from _gettsim.interface import compute_taxes_and_transfers
 from _gettsim_tests._helpers import cached_set_up_policy_environment
 from _gettsim_tests._policy_test_utils import PolicyTestData, load_policy_test_data
@@ -57,3 +69,353 @@ def test_fail_to_compute_sn_id_if_married_but_gemeinsam_veranlagt_differs():
             environment=environment,
             targets=["sn_id"],
         )
+
+
+# ======================================================================================
+# Equivalence with loop-based implementations
+# ======================================================================================
+
+
+def _random_population(n: int, seed: int) -> dict[str, numpy.ndarray]:
+    rng = numpy.random.default_rng(seed)
+
+    p_id = rng.permutation(numpy.arange(n) * 3 + 7)
+    hh_id = numpy.sort(rng.integers(0, max(n // 3, 1), size=n))
+    alter = rng.integers(0, 80, size=n)
+
+    # Partners are mostly mutual, but also asymmetric or pointing to missing persons.
+    p_id_partner = numpy.full(n, -1)
+    rows = rng.permutation(n)
+    for i, j in zip(rows[0::2][: n // 4], rows[1::2][: n // 4], strict=False):
+        p_id_partner[i] = p_id[j]
+        p_id_partner[j] = p_id[i]
+    asymmetric = rng.random(n) < 0.05
+    p_id_partner[asymmetric] = rng.choice(p_id, size=asymmetric.sum())
+    missing = rng.random(n) < 0.02
+    p_id_partner[missing] = 1_000_000 + numpy.arange(missing.sum())
+
+    p_id_elternteil_1 = numpy.where(rng.random(n) < 0.5, rng.choice(p_id, size=n), -1)
+    p_id_elternteil_2 = numpy.where(rng.random(n) < 0.3, rng.choice(p_id, size=n), -1)
+
+    gemeinsam_veranlagt = numpy.zeros(n, dtype=bool)
+    is_mutual = p_id_partner >= 0
+    pair_draw = rng.random(n) < 0.7
+    gemeinsam_veranlagt[is_mutual] = pair_draw[is_mutual]
+
+    return {
+        "p_id": p_id,
+        "hh_id": hh_id,
+        "alter": alter,
+        "p_id_partner": p_id_partner,
+        "p_id_elternteil_1": p_id_elternteil_1,
+        "p_id_elternteil_2": p_id_elternteil_2,
+        "gemeinsam_veranlagt": gemeinsam_veranlagt,
+        "flag_1": rng.random(n) < 0.3,
+        "flag_2": rng.random(n) < 0.3,
+    }
+
+
+@pytest.mark.parametrize("n", [0, 1, 2, 5, 50, 500])
+@pytest.mark.parametrize("seed", range(5))
+def test_eg_id_and_ehe_id_equal_loop_implementation(n, seed):
+    pop = _random_population(n, seed)
+
+    expected = _eg_id_loop(pop["p_id"], pop["p_id_partner"])
+
+    assert_array_equal(eg_id_numpy(pop["p_id"], pop["p_id_partner"]), expected)
+    assert_array_equal(ehe_id_numpy(pop["p_id"], pop["p_id_partner"]), expected)
+
+
+@pytest.mark.parametrize("n", [0, 1, 2, 5, 50, 500])
+@pytest.mark.parametrize("seed", range(5))
+def test_fg_id_and_bg_id_equal_loop_implementation(n, seed):
+    pop = _random_population(n, seed)
+    args = (
+        pop["p_id"],
+        pop["hh_id"],
+        pop["alter"],
+        pop["p_id_partner"],
+        pop["p_id_elternteil_1"],
+        pop["p_id_elternteil_2"],
+    )
+
+    fg_id = fg_id_numpy(*args)
+
+    assert_array_equal(fg_id, _fg_id_loop(*args))
+    assert_array_equal(
+        bg_id_numpy(fg_id, pop["alter"], pop["flag_1"]),
+        _bg_id_loop(fg_id, pop["alter"], pop["flag_1"]),
+    )
+
+
+@pytest.mark.parametrize("n", [0, 1, 2, 5, 50, 500])
+@pytest.mark.parametrize("seed", range(5))
+def test_sn_id_equals_loop_implementation(n, seed):
+    pop = _random_population(n, seed)
+
+    try:
+        expected = _sn_id_loop(
+            pop["p_id"], pop["p_id_partner"], pop["gemeinsam_veranlagt"]
+        )
+    except ValueError as e:
+        with pytest.raises(ValueError, match=str(e)):
+            sn_id_numpy(pop["p_id"], pop["p_id_partner"], pop["gemeinsam_veranlagt"])
+    else:
+        assert_array_equal(
+            sn_id_numpy(pop["p_id"], pop["p_id_partner"], pop["gemeinsam_veranlagt"]),
+            expected,
+        )
+
+
+def test_sn_id_equals_loop_implementation_for_consistent_couples():
+    rng = numpy.random.default_rng(0)
+    p_id = rng.permutation(1_000)
+    p_id_ehepartner = numpy.full(1_000, -1)
+    p_id_ehepartner[p_id[:400:2]] = p_id[1:400:2]
+    p_id_ehepartner[p_id[1:400:2]] = p_id[:400:2]
+    gemeinsam_veranlagt = numpy.zeros(1_000, dtype=bool)
+    couple_veranlagt = rng.random(200) < 0.7
+    gemeinsam_veranlagt[p_id[:400:2]] = couple_veranlagt
+    gemeinsam_veranlagt[p_id[1:400:2]] = couple_veranlagt
+    # Rows correspond to positions in the p_id array.
+    p_id_ehepartner = p_id_ehepartner[p_id]
+    gemeinsam_veranlagt = gemeinsam_veranlagt[p_id]
+
+    assert_array_equal(
+        sn_id_numpy(p_id, p_id_ehepartner, gemeinsam_veranlagt),
+        _sn_id_loop(p_id, p_id_ehepartner, gemeinsam_veranlagt),
+    )
+
+
+@pytest.mark.parametrize("n", [0, 1, 50])
+def test_wthh_id_equals_loop_implementation(n):
+    pop = _random_population(n, 0)
+
+    assert_array_equal(
+        wthh_id_numpy(pop["hh_id"], pop["flag_1"], pop["flag_2"]),
+        _wthh_id_loop(pop["hh_id"], pop["flag_1"], pop["flag_2"]),
+    )
+
+
+def test_fg_id_later_assignment_takes_precedence():
+    # Person 2 is assigned to the Familiengemeinschaft of their parent (0) first and to
+    # the one of their Einstandspartner (1), who appears later, afterwards.
+    p_id = numpy.array([0, 1, 2])
+    result = fg_id_numpy(
+        p_id=p_id,
+        hh_id=numpy.array([0, 0, 0]),
+        alter=numpy.array([50, 20, 20]),
+        p_id_einstandspartner=numpy.array([-1, 2, 1]),
+        p_id_elternteil_1=numpy.array([-1, -1, 0]),
+        p_id_elternteil_2=numpy.array([-1, -1, -1]),
+    )
+
+    assert_array_equal(result, numpy.array([0, 1, 1]))
+
+
+def _bg_id_loop(
+    fg_id: numpy.ndarray[int],
+    alter: numpy.ndarray[int],
+    eigenbedarf_gedeckt: numpy.ndarray[bool],
+) -> numpy.ndarray[int]:
+    """Loop-based reference implementation of `bg_id_numpy`."""
+    # TODO(@MImmesberger): Remove input variable eigenbedarf_gedeckt once
+    # Bedarfsgemeinschaften are fully endogenous
+    # https://github.com/iza-institute-of-labor-economics/gettsim/issues/763
+    counter = Counter()
+    result = []
+
+    for index, current_fg_id in enumerate(fg_id):
+        current_alter = alter[index]
+        current_eigenbedarf_gedeckt = eigenbedarf_gedeckt[index]
+        # TODO(@MImmesberger): Remove hard-coded number
+        # https://github.com/iza-institute-of-labor-economics/gettsim/issues/668
+        if current_alter < 25 and current_eigenbedarf_gedeckt:
+            counter[current_fg_id] += 1
+            result.append(current_fg_id * 100 + counter[current_fg_id])
+        else:
+            result.append(current_fg_id * 100)
+
+    return numpy.asarray(result)
+
+
+def _eg_id_loop(
+    p_id: numpy.ndarray[int],
+    p_id_einstandspartner: numpy.ndarray[int],
+) -> numpy.ndarray[int]:
+    """Loop-based reference implementation of `eg_id_numpy`."""
+    p_id_to_eg_id = {}
+    next_eg_id = 0
+    result = []
+
+    for index, current_p_id in enumerate(p_id):
+        current_p_id_einstandspartner = p_id_einstandspartner[index]
+
+        if (
+            current_p_id_einstandspartner >= 0
+            and current_p_id_einstandspartner in p_id_to_eg_id
+        ):
+            result.append(p_id_to_eg_id[current_p_id_einstandspartner])
+            continue
+
+        # New Einstandsgemeinschaft
+        result.append(next_eg_id)
+        p_id_to_eg_id[current_p_id] = next_eg_id
+        next_eg_id += 1
+
+    return numpy.asarray(result)
+
+
+def _ehe_id_loop(
+    p_id: numpy.ndarray[int],
+    p_id_ehepartner: numpy.ndarray[int],
+) -> numpy.ndarray[int]:
+    """Loop-based reference implementation of `ehe_id_numpy`."""
+    p_id_to_ehe_id = {}
+    next_ehe_id = 0
+    result = []
+
+    for index, current_p_id in enumerate(p_id):
+        current_p_id_ehepartner = p_id_ehepartner[index]
+
+        if current_p_id_ehepartner >= 0 and current_p_id_ehepartner in p_id_to_ehe_id:
+            result.append(p_id_to_ehe_id[current_p_id_ehepartner])
+            continue
+
+        # New Steuersubjekt
+        result.append(next_ehe_id)
+        p_id_to_ehe_id[current_p_id] = next_ehe_id
+        next_ehe_id += 1
+
+    return numpy.asarray(result)
+
+
+def _fg_id_loop(  # noqa: PLR0913
+    p_id: numpy.ndarray[int],
+    hh_id: numpy.ndarray[int],
+    alter: numpy.ndarray[int],
+    p_id_einstandspartner: numpy.ndarray[int],
+    p_id_elternteil_1: numpy.ndarray[int],
+    p_id_elternteil_2: numpy.ndarray[int],
+) -> numpy.ndarray[int]:
+    """Loop-based reference implementation of `fg_id_numpy`."""
+    # Build indexes
+    p_id_to_index = {}
+    p_id_to_p_ids_children = {}
+
+    for index, current_p_id in enumerate(p_id):
+        # Fast access from p_id to index
+        p_id_to_index[current_p_id] = index
+
+        # Fast access from p_id to p_ids of children
+        current_p_id_elternteil_1 = p_id_elternteil_1[index]
+        current_p_id_elternteil_2 = p_id_elternteil_2[index]
+
+        if current_p_id_elternteil_1 >= 0:
+            if current_p_id_elternteil_1 not in p_id_to_p_ids_children:
+                p_id_to_p_ids_children[current_p_id_elternteil_1] = []
+            p_id_to_p_ids_children[current_p_id_elternteil_1].append(current_p_id)
+
+        if current_p_id_elternteil_2 >= 0:
+            if current_p_id_elternteil_2 not in p_id_to_p_ids_children:
+                p_id_to_p_ids_children[current_p_id_elternteil_2] = []
+            p_id_to_p_ids_children[current_p_id_elternteil_2].append(current_p_id)
+
+    p_id_to_fg_id = {}
+    next_fg_id = 0
+
+    for index, current_p_id in enumerate(p_id):
+        # Already assigned a fg_id to this p_id via einstandspartner / parent
+        if current_p_id in p_id_to_fg_id:
+            continue
+
+        p_id_to_fg_id[current_p_id] = next_fg_id
+
+        current_hh_id = hh_id[index]
+        current_p_id_einstandspartner = p_id_einstandspartner[index]
+        current_p_id_children = p_id_to_p_ids_children.get(current_p_id, [])
+
+        # Assign fg to einstandspartner
+        if current_p_id_einstandspartner >= 0:
+            p_id_to_fg_id[current_p_id_einstandspartner] = next_fg_id
+
+        # Assign fg to children
+        for current_p_id_child in current_p_id_children:
+            child_index = p_id_to_index[current_p_id_child]
+            child_hh_id = hh_id[child_index]
+            child_alter = alter[child_index]
+            child_p_id_children = p_id_to_p_ids_children.get(current_p_id_child, [])
+
+            if (
+                child_hh_id == current_hh_id
+                # TODO (@MImmesberger): Check correct conditions for grown up children
+                # https://github.com/iza-institute-of-labor-economics/gettsim/pull/509
+                # TODO(@MImmesberger): Remove hard-coded number
+                # https://github.com/iza-institute-of-labor-economics/gettsim/issues/668
+                and child_alter < 25
+                and len(child_p_id_children) == 0
+            ):
+                p_id_to_fg_id[current_p_id_child] = next_fg_id
+
+        next_fg_id += 1
+
+    # Compute result vector
+    result = [p_id_to_fg_id[current_p_id] for current_p_id in p_id]
+    return numpy.asarray(result)
+
+
+def _sn_id_loop(
+    p_id: numpy.ndarray[int],
+    p_id_ehepartner: numpy.ndarray[int],
+    gemeinsam_veranlagt: numpy.ndarray[bool],
+) -> numpy.ndarray[int]:
+    """Loop-based reference implementation of `sn_id_numpy`."""
+    p_id_to_sn_id = {}
+    p_id_to_gemeinsam_veranlagt = {}
+    next_sn_id = 0
+    result = []
+
+    for index, current_p_id in enumerate(p_id):
+        current_p_id_ehepartner = p_id_ehepartner[index]
+        current_gemeinsam_veranlagt = gemeinsam_veranlagt[index]
+
+        if current_p_id_ehepartner >= 0 and current_p_id_ehepartner in p_id_to_sn_id:
+            gemeinsam_veranlagt_ehepartner = p_id_to_gemeinsam_veranlagt[
+                current_p_id_ehepartner
+            ]
+
+            if current_gemeinsam_veranlagt != gemeinsam_veranlagt_ehepartner:
+                message = (
+                    f"{current_p_id_ehepartner} and {current_p_id} are "
+                    "married, but have different values for "
+                    "gemeinsam_veranlagt."
+                )
+                raise ValueError(message)
+
+            if current_gemeinsam_veranlagt:
+                result.append(p_id_to_sn_id[current_p_id_ehepartner])
+                continue
+
+        # New Steuersubjekt
+        result.append(next_sn_id)
+        p_id_to_sn_id[current_p_id] = next_sn_id
+        p_id_to_gemeinsam_veranlagt[current_p_id] = current_gemeinsam_veranlagt
+        next_sn_id += 1
+
+    return numpy.asarray(result)
+
+
+def _wthh_id_loop(
+    hh_id: numpy.ndarray[int],
+    wohngeld_vorrang_bg: numpy.ndarray[bool],
+    wohngeld_kinderzuschl_vorrang_bg: numpy.ndarray[bool],
+) -> numpy.ndarray[int]:
+    """Loop-based reference implementation of `wthh_id_numpy`."""
+    result = []
+    for index, current_hh_id in enumerate(hh_id):
+        if wohngeld_vorrang_bg[index] or wohngeld_kinderzuschl_vorrang_bg[index]:
+            result.append(current_hh_id * 100 + 1)
+        else:
+            result.append(current_hh_id * 100)
+
+    return numpy.asarray(result)
@@ -4,7 +4,8 @@ import numpy
 import pandas as pd
 import pytest
 
-from _gettsim.config import FOREIGN_KEYS
+from _gettsim import config
+from _gettsim.config import FOREIGN_KEYS, USE_JAX
 from _gettsim.functions.policy_function import PolicyFunction
 from _gettsim.gettsim_typing import convert_series_to_internal_type
 from _gettsim.groupings import bg_id_numpy, wthh_id_numpy
@@ -15,6 +16,7 @@ from _gettsim.interface import (
     _fail_if_pid_is_non_unique,
     _round_and_partial_parameters_to_functions,
     compute_taxes_and_transfers,
+    prepare_taxes_and_transfers,
 )
 from _gettsim.policy_environment import PolicyEnvironment
 from _gettsim.shared import policy_info
@@ -208,8 +210,7 @@ def test_wrong_data_type():
     with pytest.raises(
         NotImplementedError,
         match=(
-            "'data' is not a pd.DataFrame or a "
-            "pd.Series or a dictionary of pd.Series."
+            "'data' is not a pd.DataFrame or a pd.Series or a dictionary of pd.Series."
         ),
     ):
         compute_taxes_and_transfers(data, PolicyEnvironment([]), ["c"])
@@ -432,6 +433,129 @@ def test_user_provided_aggregate_by_group_specs():
     numpy.testing.assert_array_almost_equal(out["arbeitsl_geld_2_m_hh"], expected_res)
 
 
+def test_aggregate_by_group_with_large_non_contiguous_group_ids():
+    data = pd.DataFrame(
+        {
+            "p_id": [1, 2, 3],
+            "hh_id": [10**12, 7, 10**12],
+            "arbeitsl_geld_2_m": [100, 50, 100],
+        }
+    )
+    aggregate_by_group_specs = {
+        "arbeitsl_geld_2_m_hh": {
+            "source_col": "arbeitsl_geld_2_m",
+            "aggr": "sum",
+        }
+    }
+
+    out = compute_taxes_and_transfers(
+        data,
+        PolicyEnvironment([], aggregate_by_group_specs=aggregate_by_group_specs),
+        targets="arbeitsl_geld_2_m_hh",
+    )
+
+    numpy.testing.assert_array_almost_equal(
+        out["arbeitsl_geld_2_m_hh"], pd.Series([200, 50, 200])
+    )
+
+
+def test_plan_equals_compute_taxes_and_transfers():
+    aggregate_by_group_specs = {
+        "arbeitsl_geld_2_m_hh": {
+            "source_col": "arbeitsl_geld_2_m",
+            "aggr": "sum",
+        }
+    }
+    environment = PolicyEnvironment(
+        [], aggregate_by_group_specs=aggregate_by_group_specs
+    )
+    plan = prepare_taxes_and_transfers(
+        environment,
+        data_cols=["p_id", "hh_id", "arbeitsl_geld_2_m"],
+        targets="arbeitsl_geld_2_m_hh",
+    )
+
+    for n_individuals in [1, 3, 10]:
+        data = pd.DataFrame(
+            {
+                "p_id": numpy.arange(n_individuals),
+                "hh_id": numpy.arange(n_individuals) // 2,
+                "arbeitsl_geld_2_m": numpy.arange(n_individuals) * 10.0,
+            }
+        )
+        expected = compute_taxes_and_transfers(
+            data, environment, targets="arbeitsl_geld_2_m_hh"
+        )
+        pd.testing.assert_frame_equal(plan(data), expected)
+
+
+def some_func_with_condition(x: float, y: float) -> float:
+    if x > y:
+        out = x * y
+    else:
+        out = 1.0
+    return out
+
+
+@pytest.mark.skipif(not USE_JAX, reason="JAX is not used.")
+def test_jit_plan_equals_compute_taxes_and_transfers():
+    environment = PolicyEnvironment(
+        [PolicyFunction(some_func_with_condition, function_name="some_func")]
+    )
+    plan = prepare_taxes_and_transfers(
+        environment, data_cols=["p_id", "x", "y"], targets="some_func", jit=True
+    )
+
+    for n_individuals in [1, 3, 10]:
+        data = pd.DataFrame(
+            {
+                "p_id": numpy.arange(n_individuals),
+                "x": numpy.arange(n_individuals) * 10.0,
+                "y": numpy.arange(n_individuals) / 2,
+            }
+        )
+        expected = compute_taxes_and_transfers(data, environment, targets="some_func")
+        pd.testing.assert_frame_equal(plan(data), expected)
+
+    # The compiled executor is shared with later plans for the same computation.
+    later_plan = prepare_taxes_and_transfers(
+        environment, data_cols=["p_id", "x", "y"], targets="some_func", jit=True
+    )
+    assert later_plan.executor is plan.executor
+
+
+def test_jit_requires_jax_backend(monkeypatch):
+    monkeypatch.setattr(config, "USE_JAX", False)
+    environment = PolicyEnvironment(
+        [PolicyFunction(lambda x: x, function_name="some_func")]
+    )
+    with pytest.raises(ValueError, match="requires the JAX backend"):
+        prepare_taxes_and_transfers(
+            environment, data_cols=["p_id", "x"], targets="some_func", jit=True
+        )
+
+
+def test_plan_fails_if_data_columns_differ():
+    environment = PolicyEnvironment(
+        [PolicyFunction(lambda x: x, function_name="some_func")]
+    )
+    plan = prepare_taxes_and_transfers(
+        environment, data_cols=["p_id", "x"], targets="some_func"
+    )
+    with pytest.raises(ValueError, match="differ from the columns"):
+        plan(pd.DataFrame({"p_id": [0], "x": [1.0], "y": [1.0]}))
+
+
+def test_plan_checks_root_nodes_without_data():
+    environment = PolicyEnvironment(
+        [PolicyFunction(lambda x: x, function_name="some_func")]
+    )
+    with pytest.raises(ValueError, match="data columns are missing"):
+        prepare_taxes_and_transfers(
+            environment, data_cols=["p_id"], targets="some_func"
+        )
+
+
 def test_user_provided_aggregate_by_group_specs_function():
     data = pd.DataFrame(
         {
@@ -1,7 +1,11 @@
 import numpy
 import pytest
 
-from _gettsim.shared import join_numpy
+from _gettsim.config import USE_JAX
+from _gettsim.shared import join, join_numpy
+
+if USE_JAX:
+    from _gettsim.shared import join_jax
 
 
 @pytest.mark.parametrize(
@@ -63,3 +67,95 @@ def test_join_numpy_raises_duplicate_primary_key():
 def test_join_numpy_raises_invalid_foreign_key():
     with pytest.raises(ValueError, match="Invalid foreign keys:"):
         join_numpy(numpy.array([2]), numpy.array([1]), numpy.array(["a"]), "d")
+
+
+def _join_by_broadcasting(
+    foreign_key, primary_key, target, value_if_foreign_key_is_missing
+):
+    matches_foreign_key = foreign_key[:, None] == primary_key
+    padded_matches_foreign_key = numpy.pad(
+        matches_foreign_key, ((0, 0), (0, 1)), "constant", constant_values=True
+    )
+    indices = numpy.argmax(padded_matches_foreign_key, axis=1)
+    padded_targets = numpy.pad(
+        target, (0, 1), "constant", constant_values=value_if_foreign_key_is_missing
+    )
+    return padded_targets.take(indices)
+
+
+@pytest.mark.parametrize("n", [1, 2, 10, 1_000])
+@pytest.mark.parametrize("seed", range(3))
+def test_join_numpy_equals_join_by_broadcasting(n, seed):
+    rng = numpy.random.default_rng(seed)
+    primary_key = rng.permutation(n) * 2
+    foreign_key = rng.choice(numpy.append(primary_key, [-1, -5]), size=n)
+    target = rng.normal(size=n)
+
+    numpy.testing.assert_array_equal(
+        join_numpy(foreign_key, primary_key, target, -1.0),
+        _join_by_broadcasting(foreign_key, primary_key, target, -1.0),
+    )
+
+
+def test_join_numpy_uses_dtype_of_target():
+    result = join_numpy(numpy.array([1, -1]), numpy.array([1]), numpy.array([2]), 0.5)
+
+    numpy.testing.assert_array_equal(result, numpy.array([2, 0]))
+    assert result.dtype == numpy.array([2]).dtype
+
+
+def test_join_numpy_with_empty_primary_key():
+    result = join_numpy(
+        numpy.array([-1, -1]), numpy.array([], dtype=int), numpy.array([]), 1.0
+    )
+
+    numpy.testing.assert_array_equal(result, numpy.array([1.0, 1.0]))
+
+
+def test_join_numpy_does_not_allocate_quadratic_memory():
+    n = 1_000_000
+    primary_key = numpy.arange(n)
+    foreign_key = primary_key[::-1].copy()
+
+    result = join_numpy(foreign_key, primary_key, primary_key, -1)
+
+    numpy.testing.assert_array_equal(result, foreign_key)
+
+
+def test_join_dispatches_to_backend():
+    result = join(numpy.array([2, 1]), numpy.array([1, 2]), numpy.array([3, 4]), 0)
+
+    numpy.testing.assert_array_equal(result, numpy.array([4, 3]))
+
+
+@pytest.mark.skipif(not USE_JAX, reason="JAX is not used.")
+def test_join_jax_equals_join_numpy():
+    rng = numpy.random.default_rng(0)
+    primary_key = rng.permutation(100)
+    foreign_key = rng.choice(numpy.append(primary_key, -1), size=100)
+    target = rng.normal(size=100)
+
+    numpy.testing.assert_allclose(
+        join_jax(foreign_key, primary_key, target, 0.0),
+        join_numpy(foreign_key, primary_key, target, 0.0),
+    )
+
+
+@pytest.mark.skipif(not USE_JAX, reason="JAX is not used.")
+def test_join_jax_raises_invalid_foreign_key():
+    with pytest.raises(ValueError, match="Invalid foreign keys:"):
+        join_jax(numpy.array([2]), numpy.array([1]), numpy.array([1.0]), 0.0)
+
+
+@pytest.mark.skipif(not USE_JAX, reason="JAX is not used.")
+def test_join_jax_under_jit_equals_join_numpy():
+    import jax
+
+    primary_key = numpy.array([4, 1, 3])
+    foreign_key = numpy.array([3, -1, 4, 1])
+    target = numpy.array([1.0, 2.0, 3.0])
+
+    numpy.testing.assert_allclose(
+        jax.jit(join_jax, static_argnums=3)(foreign_key, primary_key, target, 0.0),
+        join_numpy(foreign_key, primary_key, target, 0.0),
+    )
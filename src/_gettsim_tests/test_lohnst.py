@@ -1,8 +1,11 @@
+import numpy
 import pytest
 from pandas.testing import assert_series_equal
 
+from _gettsim.functions.policy_function import PolicyFunction
 from _gettsim.interface import compute_taxes_and_transfers
 from _gettsim.policy_environment import set_up_policy_environment
+from _gettsim.taxes.lohnst import lohnst_m, lohnst_mit_kinderfreib_m
 from _gettsim_tests._helpers import cached_set_up_policy_environment
 from _gettsim_tests._policy_test_utils import PolicyTestData, load_policy_test_data
 
@@ -59,3 +62,33 @@ def test_lohnsteuer_rv_anteil():
     assert (
         environment.params["eink_st_abzuege"]["vorsorgepauschale_rentenv_anteil"] == 1
     )
+
+
+@pytest.mark.parametrize("function", [lohnst_m, lohnst_mit_kinderfreib_m])
+def test_lohnsteuer_is_vectorized_without_fallback(function):
+    params = set_up_policy_environment(2020).params
+    lohnst_eink_y = numpy.repeat(numpy.linspace(0.0, 400_000.0, 41), 6)
+    steuerklasse = numpy.tile(numpy.arange(1, 7), 41)
+    kwargs = {
+        "lohnst_eink_y": lohnst_eink_y,
+        "eink_st_params": params["eink_st"],
+        "lohnst_params": params["lohnst"],
+        "steuerklasse": steuerklasse,
+    }
+    if function is lohnst_mit_kinderfreib_m:
+        kwargs["kinderfreib_für_soli_st_lohnst_y"] = numpy.full(len(steuerklasse), 5e3)
+    vectorized = PolicyFunction(function)
+
+    result = vectorized(**kwargs)
+
+    assert vectorized.vectorization_strategy == "ast"
+    expected = [
+        function(
+            **{
+                k: v[i] if isinstance(v, numpy.ndarray) else v
+                for k, v in kwargs.items()
+            }
+        )
+        for i in range(len(steuerklasse))
+    ]
+    numpy.testing.assert_allclose(result, expected)
@@ -0,0 +1,141 @@
+import numpy
+import pandas as pd
+import pytest
+
+from _gettsim import config
+from _gettsim.config import USE_JAX
+from _gettsim.interface import compute_taxes_and_transfers
+from _gettsim.marginal_rates import compute_marginal_tax_rates
+from _gettsim.policy_environment import PolicyEnvironment
+from _gettsim.synthetic import create_synthetic_data
+
+
+def steuer_m(bruttolohn_m: float, steuer_params: dict) -> float:
+    if bruttolohn_m > steuer_params["freibetrag"]:
+        out = (bruttolohn_m - steuer_params["freibetrag"]) * steuer_params["satz"]
+    else:
+        out = 0.0
+    return out
+
+
+def transfer_m_hh(alter_hh: int) -> float:
+    return alter_hh * 1.0
+
+
+def netto_m(bruttolohn_m: float, steuer_m: float) -> float:
+    return bruttolohn_m - steuer_m
+
+
+def netto_m_hh(netto_summe_m_hh: float, transfer_m_hh: float) -> float:
+    return netto_summe_m_hh + transfer_m_hh
+
+
+def netto_y(netto_m: float) -> float:
+    return netto_m * 12
+
+
+@pytest.fixture
+def environment():
+    return PolicyEnvironment(
+        [steuer_m, transfer_m_hh, netto_m, netto_m_hh, netto_y],
+        params={"steuer": {"satz": 0.2, "freibetrag": 1_000.0}},
+        aggregate_by_group_specs={
+            "netto_summe_m_hh": {"source_col": "netto_m", "aggr": "sum"},
+            "alter_hh": {"source_col": "alter", "aggr": "max"},
+        },
+    )
+
+
+@pytest.fixture
+def data():
+    return pd.DataFrame(
+        {
+            "p_id": [0, 1, 2, 3],
+            "hh_id": [0, 0, 1, 2],
+            "alter": [30, 40, 50, 60],
+            "bruttolohn_m": [500.0, 2_000.0, 999.0, 3_000.0],
+        }
+    )
+
+
+def test_marginal_rates(data, environment):
+    result = compute_marginal_tax_rates(
+        data, environment, ["netto_m", "netto_m_hh", "netto_y"], changes=[1.0, 2.0]
+    )
+
+    assert list(result.index.get_level_values("change").unique()) == [1.0, 2.0]
+    numpy.testing.assert_allclose(result.loc[1.0, "netto_m"], [0.0, 1.0, 0.0, 0.2])
+    numpy.testing.assert_allclose(result.loc[2.0, "netto_m"], [0.0, 1.0, 0.1, 0.2])
+    numpy.testing.assert_allclose(result.loc[1.0, "netto_m_hh"], [0.0, 0.0, 0.0, 0.2])
+    numpy.testing.assert_allclose(result["netto_y"], result["netto_m"])
+
+
+def test_marginal_rates_of_second_earner(data, environment):
+    data = data.assign(hh_id=[0, 0, 1, 1])
+
+    result = compute_marginal_tax_rates(
+        data, environment, ["netto_m", "netto_m_hh"], earner=1
+    )
+
+    numpy.testing.assert_allclose(result.loc[1.0, "netto_m"], [1.0, 0.2, 1.0, 0.2])
+    numpy.testing.assert_allclose(result.loc[1.0, "netto_m_hh"], [0.2, 0.2, 0.2, 0.2])
+
+
+def test_marginal_rates_equal_differences_of_compute_taxes_and_transfers():
+    environment = PolicyEnvironment.for_date(2020)
+    data = create_synthetic_data(
+        n_adults=2,
+        n_children=1,
+        specs_heterogeneous={
+            "bruttolohn_m": [[float(w), 0.0, 0.0] for w in range(0, 6_000, 500)]
+        },
+    )
+    net_income = ["eink_st_y_sn", "arbeitsl_geld_2_m_bg", "wohngeld_m_wthh"]
+
+    result = compute_marginal_tax_rates(data, environment, net_income, changes=[100.0])
+
+    base = compute_taxes_and_transfers(
+        data, environment, targets=net_income, rounding=False
+    )
+    is_earner = data.groupby("hh_id").cumcount() == 0
+    data.loc[is_earner, "bruttolohn_m"] += 100.0
+    changed = compute_taxes_and_transfers(
+        data, environment, targets=net_income, rounding=False
+    )
+    months = {"eink_st_y_sn": 12, "arbeitsl_geld_2_m_bg": 1, "wohngeld_m_wthh": 1}
+    for name, n in months.items():
+        expected = 1 - (changed[name] - base[name]) / (n * 100.0)
+        numpy.testing.assert_allclose(result.loc[100.0, name], expected)
+
+
+@pytest.mark.skipif(not USE_JAX, reason="JAX is not used.")
+def test_marginal_rates_with_autodiff(data, environment):
+    result = compute_marginal_tax_rates(
+        data, environment, ["netto_m", "netto_y"], method="autodiff"
+    )
+
+    assert list(result.index.get_level_values("change").unique()) == [0.0]
+    numpy.testing.assert_allclose(result.loc[0.0, "netto_m"], [0.0, 1.0, 0.0, 0.2])
+    numpy.testing.assert_allclose(result["netto_y"], result["netto_m"])
+
+
+def test_fail_if_autodiff_without_jax(data, environment, monkeypatch):
+    monkeypatch.setattr(config, "USE_JAX", False)
+
+    with pytest.raises(ValueError, match="requires the JAX backend"):
+        compute_marginal_tax_rates(data, environment, "netto_m", method="autodiff")
+
+
+@pytest.mark.parametrize(
+    ("kwargs", "match"),
+    [
+        ({"method": "secant"}, "'method' must be one of"),
+        ({"income": "kapitaleink_m"}, "must be a column of the data"),
+        ({"net_income": "netto"}, "must end with a time unit"),
+        ({"earner": 1}, "'earner' must be the position of a member"),
+    ],
+)
+def test_fail_if_arguments_are_invalid(data, environment, kwargs, match):
+    kwargs = {"net_income": "netto_m", **kwargs}
+    with pytest.raises(ValueError, match=match):
+        compute_marginal_tax_rates(data, environment, **kwargs)
@@ -0,0 +1,115 @@
+import numpy
+import pandas as pd
+import pytest
+
+from _gettsim.interface import compute_taxes_and_transfers
+from _gettsim.parallel import (
+    _get_linked_components,
+    _split_into_partitions,
+    compute_taxes_and_transfers_in_parallel,
+)
+from _gettsim.policy_environment import PolicyEnvironment
+from _gettsim.synthetic import create_synthetic_data
+
+AGGREGATE_BY_GROUP_SPECS = {
+    "arbeitsl_geld_2_m_hh": {
+        "source_col": "arbeitsl_geld_2_m",
+        "aggr": "sum",
+    }
+}
+
+
+@pytest.fixture
+def data():
+    rng = numpy.random.default_rng(0)
+    hh_id = rng.integers(0, 150, size=400)
+    return pd.DataFrame(
+        {
+            "p_id": rng.permutation(400) + 10,
+            "hh_id": hh_id,
+            "arbeitsl_geld_2_m": rng.uniform(0, 1_000, size=len(hh_id)),
+        }
+    )
+
+
+@pytest.fixture
+def environment():
+    return PolicyEnvironment([], aggregate_by_group_specs=AGGREGATE_BY_GROUP_SPECS)
+
+
+def test_linked_components_follow_households_and_foreign_keys():
+    data = pd.DataFrame(
+        {
+            "p_id": [0, 1, 2, 3, 4, 5],
+            "hh_id": [0, 0, 1, 2, 3, 4],
+            "p_id_elternteil_1": [-1, -1, 0, -1, 2, -1],
+            "p_id_ehepartner": [-1, -1, -1, 5, -1, 3],
+        }
+    )
+
+    components = _get_linked_components(data)
+
+    assert components[0] == components[1] == components[2] == components[4]
+    assert components[3] == components[5]
+    assert components[0] != components[3]
+
+
+@pytest.mark.parametrize("n_partitions", [1, 3, 16, 1_000])
+def test_partitions_do_not_split_components(n_partitions):
+    components = numpy.random.default_rng(0).integers(0, 50, size=300)
+
+    partitions = _split_into_partitions(components, n_partitions)
+
+    assert len(partitions) <= n_partitions
+    numpy.testing.assert_array_equal(
+        numpy.sort(numpy.concatenate(partitions)), numpy.arange(300)
+    )
+    components_per_partition = [set(components[rows]) for rows in partitions]
+    assert sum(len(c) for c in components_per_partition) == 50
+
+
+@pytest.mark.parametrize("n_workers", [1, 3])
+def test_results_equal_compute_taxes_and_transfers(data, environment, n_workers):
+    expected = compute_taxes_and_transfers(
+        data, environment, targets="arbeitsl_geld_2_m_hh"
+    )
+
+    result = compute_taxes_and_transfers_in_parallel(
+        data, environment, targets="arbeitsl_geld_2_m_hh", n_workers=n_workers
+    )
+
+    pd.testing.assert_frame_equal(result, expected)
+
+
+@pytest.mark.parametrize("n_workers", [1, 3])
+def test_derived_group_ids_equal_compute_taxes_and_transfers(n_workers):
+    environment = PolicyEnvironment.for_date(2020)
+    data = create_synthetic_data(
+        n_adults=2,
+        n_children=2,
+        specs_heterogeneous={
+            "bruttolohn_m": [[float(w), 0.0, 0.0, 0.0] for w in range(0, 6_000, 500)]
+        },
+    )
+    targets = [
+        "fg_id",
+        "bg_id",
+        "sn_id",
+        "ehe_id",
+        "eink_st_y_sn",
+        "arbeitsl_geld_2_m_bg",
+    ]
+    expected = compute_taxes_and_transfers(data, environment, targets=targets)
+
+    result = compute_taxes_and_transfers_in_parallel(
+        data, environment, targets=targets, n_workers=n_workers
+    )
+
+    for group_id in ["fg_id", "bg_id", "sn_id", "ehe_id"]:
+        numpy.testing.assert_array_equal(
+            pd.factorize(result[group_id])[0], pd.factorize(expected[group_id])[0]
+        )
+    pd.testing.assert_frame_equal(
+        result.drop(columns=["fg_id", "bg_id", "sn_id", "ehe_id"]),
+        expected.drop(columns=["fg_id", "bg_id", "sn_id", "ehe_id"]),
+    )
@@ -0,0 +1,149 @@
+import datetime
+import json
+
+import pytest
+import yaml
+
+from _gettsim import config, parameter_store
+from _gettsim.config import INTERNAL_PARAMS_GROUPS, RESOURCE_DIR
+from _gettsim.parameter_store import (
+    ParameterTimeline,
+    build_parameter_store,
+    load_parameter_group,
+    load_parameter_timeline,
+)
+
+
+@pytest.fixture
+def store_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "PARAMETER_STORE_DIR", tmp_path / "store")
+    monkeypatch.setattr(parameter_store, "_ENCODED_GROUPS", {})
+    monkeypatch.setattr(parameter_store, "_TIMELINES", {})
+    return tmp_path / "store"
+
+
+@pytest.fixture
+def yaml_path(tmp_path):
+    path = tmp_path / "parameters"
+    path.mkdir()
+    (path / "foo.yaml").write_text("a:\n  2020-01-01:\n    scalar: 1\n")
+    return path
+
+
+@pytest.mark.parametrize("group", INTERNAL_PARAMS_GROUPS)
+def test_store_equals_yaml(group, store_dir):  # noqa: ARG001
+    expected = yaml.load(
+        (RESOURCE_DIR / "parameters" / f"{group}.yaml").read_text(encoding="utf-8"),
+        Loader=yaml.CLoader,
+    )
+
+    assert load_parameter_group(group) == expected
+
+
+def test_store_is_written_and_read(store_dir, yaml_path, monkeypatch):
+    build_parameter_store(yaml_path, groups=["foo"])
+    assert len(list(store_dir.glob("foo-*.json"))) == 1
+
+    # Clear the in-memory store and break the YAML parser to ensure the file is used.
+    parameter_store._ENCODED_GROUPS.clear()  # noqa: SLF001
+    monkeypatch.setattr(parameter_store.yaml, "load", None)
+
+    assert load_parameter_group("foo", yaml_path=yaml_path) == {
+        "a": {datetime.date(2020, 1, 1): {"scalar": 1}}
+    }
+
+
+def test_changed_yaml_is_parsed_again(store_dir, yaml_path):  # noqa: ARG001
+    load_parameter_group("foo", yaml_path=yaml_path)
+    (yaml_path / "foo.yaml").write_text("a:\n  2020-01-01:\n    scalar: 2\n")
+
+    out = load_parameter_group("foo", yaml_path=yaml_path)
+
+    assert out["a"][datetime.date(2020, 1, 1)]["scalar"] == 2
+
+
+def test_broken_store_file_is_rebuilt(store_dir, yaml_path):
+    build_parameter_store(yaml_path, groups=["foo"])
+    (store_file,) = store_dir.glob("foo-*.json")
+    store_file.write_text("broken")
+    parameter_store._ENCODED_GROUPS.clear()  # noqa: SLF001
+
+    out = load_parameter_group("foo", yaml_path=yaml_path)
+
+    assert out["a"][datetime.date(2020, 1, 1)]["scalar"] == 1
+
+
+def test_unwritable_store_is_ignored(tmp_path, monkeypatch, yaml_path):
+    not_a_dir = tmp_path / "file"
+    not_a_dir.write_text("")
+    monkeypatch.setattr(config, "PARAMETER_STORE_DIR", not_a_dir / "store")
+    monkeypatch.setattr(parameter_store, "_ENCODED_GROUPS", {})
+
+    out = load_parameter_group("foo", yaml_path=yaml_path)
+
+    assert out["a"][datetime.date(2020, 1, 1)]["scalar"] == 1
+
+
+def test_loaded_groups_are_independent_copies(store_dir, yaml_path):  # noqa: ARG001
+    load_parameter_group("foo", yaml_path=yaml_path)["a"].clear()
+
+    assert load_parameter_group("foo", yaml_path=yaml_path)["a"]
+
+
+def test_timeline_lookups():
+    timeline = ParameterTimeline(
+        {
+            "a": {
+                "note": "foo",
+                datetime.date(2010, 1, 1): {"scalar": 2},
+                datetime.date(2000, 1, 1): {"scalar": 1},
+            },
+            "rounding": {"a": {datetime.date(2000, 1, 1): {"base": 1}}},
+        }
+    )
+
+    assert timeline.change_dates["a"] == [
+        datetime.date(2000, 1, 1),
+        datetime.date(2010, 1, 1),
+    ]
+    assert timeline.first_change("a") == datetime.date(2000, 1, 1)
+    assert timeline.last_change_until("a", datetime.date(1999, 12, 31)) is None
+    assert timeline.last_change_until("a", datetime.date(2000, 1, 1)) == (
+        datetime.date(2000, 1, 1)
+    )
+    assert timeline.last_change_until("a", datetime.date(2009, 12, 31)) == (
+        datetime.date(2000, 1, 1)
+    )
+    assert timeline.last_change_until("a", datetime.date(2030, 1, 1)) == (
+        datetime.date(2010, 1, 1)
+    )
+
+
+def test_timeline_is_built_once_per_file_contents(store_dir, yaml_path):  # noqa: ARG001
+    timeline = load_parameter_timeline("foo", yaml_path=yaml_path)
+    assert load_parameter_timeline("foo", yaml_path=yaml_path) is timeline
+
+    (yaml_path / "foo.yaml").write_text("a:\n  2021-01-01:\n    scalar: 2\n")
+
+    assert load_parameter_timeline("foo", yaml_path=yaml_path) is not timeline
+
+
+def test_store_does_not_execute_code(store_dir, yaml_path):
+    build_parameter_store(yaml_path, groups=["foo"])
+    (store_file,) = store_dir.glob("foo-*.json")
+    store_file.write_text('{"__dict__": [["a", {"__reduce__": "os.system"}]]}')
+    parameter_store._ENCODED_GROUPS.clear()  # noqa: SLF001
+
+    assert load_parameter_group("foo", yaml_path=yaml_path) == {
+        "a": {"__reduce__": "os.system"}
+    }
+
+
+def test_encoding_round_trip():
+    data = {
+        datetime.date(2020, 1, 1): {0: {"upper_threshold": float("inf")}},
+        "datetime": datetime.datetime(2020, 1, 1, 12),
+        "values": [1, 2.5, None, True, "a"],
+    }
+
+    assert parameter_store._decode(json.dumps(parameter_store._encode(data))) == data  # noqa: SLF001
@@ -2,11 +2,194 @@
 Tests for `piecewise_polynomial`
 """
 
+from collections import OrderedDict
+
 import numpy
+import pytest
 
+from _gettsim import config, piecewise_functions
 from _gettsim.piecewise_functions import (
+    create_lookup_table,
     get_piecewise_parameters,
+    piecewise_polynomial,
+)
+from _gettsim.policy_environment import PolicyEnvironment
+
+QUADRATIC_PARAMS = {
+    0: {
+        "lower_threshold": "-inf",
+        "upper_threshold": 0,
+        "rate_linear": 0,
+        "rate_quadratic": 0,
+        "intercept_at_lower_threshold": 1,
+    },
+    1: {"upper_threshold": 10, "rate_linear": 0.5, "rate_quadratic": 0.1},
+    2: {"upper_threshold": 20, "rate_linear": 1, "rate_quadratic": -0.02},
+    3: {"upper_threshold": "inf", "rate_linear": 0.25, "rate_quadratic": 0},
+}
+
+
+@pytest.fixture(params=["numpy", "jax"])
+def backend(request, monkeypatch):
+    if request.param == "jax":
+        jax_numpy = pytest.importorskip("jax.numpy")
+        monkeypatch.setattr(config, "numpy_or_jax", jax_numpy)
+    return request.param
+
+
+def _piecewise_polynomial_at_scalar(x, parameters, rates_multiplier=1):
+    """Evaluate the piecewise polynomial by summing over the intervals below `x`."""
+    thresholds = parameters["thresholds"]
+    rates = parameters["rates"] * rates_multiplier
+    out = parameters["intercepts_at_lower_thresholds"][0]
+    for interval in range(1, len(thresholds) - 1):
+        if x <= thresholds[interval]:
+            break
+        increment = min(x, thresholds[interval + 1]) - thresholds[interval]
+        out += sum(rates[i, interval] * increment ** (i + 1) for i in range(len(rates)))
+    return out
+
+
+@pytest.mark.parametrize("rates_multiplier", [None, 1.5, "individual"])
+def test_piecewise_polynomial_on_arrays(backend, rates_multiplier):  # noqa: ARG001
+    parameters = get_piecewise_parameters(QUADRATIC_PARAMS, "test", "quadratic")
+    x = numpy.array([-5.0, 0.0, 3.0, 10.0, 12.5, 20.0, 33.0])
+    if rates_multiplier == "individual":
+        rates_multiplier = numpy.linspace(0.5, 2, len(x))
+
+    actual = piecewise_polynomial(
+        config.numpy_or_jax.asarray(x),
+        rates_multiplier=rates_multiplier,
+        **parameters,
+    )
+
+    multipliers = numpy.broadcast_to(
+        1 if rates_multiplier is None else rates_multiplier, x.shape
+    )
+    expected = [
+        _piecewise_polynomial_at_scalar(x_i, parameters, multiplier)
+        for x_i, multiplier in zip(x, multipliers, strict=True)
+    ]
+    numpy.testing.assert_allclose(numpy.asarray(actual), expected, rtol=1e-6)
+
+
+def test_piecewise_polynomial_on_scalar():
+    parameters = get_piecewise_parameters(QUADRATIC_PARAMS, "test", "quadratic")
+
+    actual = piecewise_polynomial(12.5, **parameters)
+
+    assert actual == pytest.approx(_piecewise_polynomial_at_scalar(12.5, parameters))
+
+
+@pytest.mark.parametrize("year", [2002, 2005, 2010, 2021, 2024])
+@pytest.mark.parametrize(
+    ("group", "param"), [("eink_st", "eink_st_tarif"), ("soli_st", "soli_st")]
+)
+def test_lookup_table_is_exact(year, group, param):
+    parameters = PolicyEnvironment.for_date(year).params[group][param]
+    lookup_table = parameters["lookup_table"]
+    stop = lookup_table["start"] + len(lookup_table["values"])
+    whole_numbers = numpy.arange(-100, stop + 100, dtype=float)
+    x = numpy.concatenate(
+        [whole_numbers, whole_numbers + 0.5, numpy.linspace(-100, stop + 100, 997)]
+    )
+    kwargs = {k: v for k, v in parameters.items() if k != "lookup_table"}
+
+    actual = piecewise_polynomial(x, lookup_table=lookup_table, **kwargs)
+
+    numpy.testing.assert_array_equal(actual, piecewise_polynomial(x, **kwargs))
+
+
+def test_lookup_table_on_scalar():
+    parameters = get_piecewise_parameters(QUADRATIC_PARAMS, "test", "quadratic")
+    lookup_table = create_lookup_table(**parameters)
+
+    for x in [-5, 3, 12.5, 33]:
+        actual = piecewise_polynomial(x, lookup_table=lookup_table, **parameters)
+        assert actual == piecewise_polynomial(x, **parameters)
+
+
+def test_lookup_table_on_scalar_is_looked_up_at_whole_numbers(monkeypatch):
+    parameters = get_piecewise_parameters(QUADRATIC_PARAMS, "test", "quadratic")
+    lookup_table = create_lookup_table(**parameters)
+    x = [-5, 0, 3.0, numpy.float64(7), 19]
+    expected = [piecewise_polynomial(v, **parameters) for v in x]
+
+    def fail(*_args, **_kwargs):
+        raise AssertionError("The polynomial must not be evaluated.")
+
+    monkeypatch.setattr(config, "USE_JAX", False)
+    monkeypatch.setattr(piecewise_functions, "_piecewise_polynomial", fail)
+    monkeypatch.setattr(piecewise_functions.numpy, "array_equal", fail)
+    actual = [
+        piecewise_polynomial(v, lookup_table=lookup_table, **parameters) for v in x
+    ]
+
+    numpy.testing.assert_array_equal(actual, expected)
+
+
+def test_lookup_table_is_ignored_for_other_parameters():
+    parameters = get_piecewise_parameters(QUADRATIC_PARAMS, "test", "quadratic")
+    lookup_table = create_lookup_table(**parameters)
+    parameters["rates"] = parameters["rates"] * 2
+    x = numpy.arange(-5.0, 30.0)
+
+    actual = piecewise_polynomial(x, lookup_table=lookup_table, **parameters)
+
+    numpy.testing.assert_array_equal(actual, piecewise_polynomial(x, **parameters))
+
+
+def test_lookup_table_is_shared_between_dates():
+    environments = PolicyEnvironment.for_dates(["2024-01-01", "2024-07-01"])
+    first, second = (
+        env.params["eink_st"]["eink_st_tarif"]["lookup_table"]["values"]
+        for env in environments.values()
+    )
+
+    assert numpy.shares_memory(first, second)
+
+
+def test_least_recently_used_lookup_tables_are_dropped(monkeypatch):
+    tables = OrderedDict()
+    monkeypatch.setattr(piecewise_functions, "_LOOKUP_TABLES", tables)
+    monkeypatch.setattr(piecewise_functions, "LOOKUP_TABLE_CACHE_SIZE", 2)
+    parameters = {
+        "thresholds": numpy.array([-numpy.inf, 0.0, 10.0, numpy.inf]),
+        "rates": numpy.array([[0.0, 0.1, 0.2]]),
+    }
+    intercepts = [0.0, 1.0, 0.0, 3.0]
+
+    for intercept in intercepts:
+        lookup_table = create_lookup_table(
+            **parameters,
+            intercepts_at_lower_thresholds=numpy.array([0.0, intercept, 2.0]),
+        )
+        assert lookup_table["values"][1] == intercept
+
+    assert [table["values"][1] for table in tables.values()] == [0.0, 3.0]
+
+
+@pytest.mark.parametrize(
+    ("group", "param"), [("eink_st", "eink_st_tarif"), ("soli_st", "soli_st")]
 )
+def test_lookup_table_refers_to_parameters_of_environment(group, param):
+    parameters = PolicyEnvironment.for_date(2024).params[group][param]
+
+    for name in ["thresholds", "rates", "intercepts_at_lower_thresholds"]:
+        assert parameters["lookup_table"][name] is parameters[name]
+
+
+def test_lookup_table_cannot_be_combined_with_rates_multiplier():
+    parameters = get_piecewise_parameters(QUADRATIC_PARAMS, "test", "quadratic")
+    lookup_table = create_lookup_table(**parameters)
+
+    with pytest.raises(ValueError, match="rates multiplier"):
+        piecewise_polynomial(
+            numpy.arange(3.0),
+            rates_multiplier=2,
+            lookup_table=lookup_table,
+            **parameters,
+        )
 
 
 def test_get_piecewise_parameters_all_intercepts_supplied():
@@ -1,14 +1,21 @@
 """Some tests for the policy_environment module."""
 
+import copy
 from datetime import date, timedelta
 
+import numpy
 import pandas as pd
 import pytest
 
+import _gettsim.config
 from _gettsim.functions.policy_function import PolicyFunction
+from _gettsim.interface import compute_taxes_and_transfers
 from _gettsim.policy_environment import (
     PolicyEnvironment,
+    _cached_policy_environment_for_date,
     _load_parameter_group_from_yaml,
+    clear_policy_environment_cache,
+    get_policy_regimes,
     load_functions_for_date,
     set_up_policy_environment,
 )
@@ -144,3 +151,190 @@ def test_load_functions_for_date(
 
     assert functions_last_day[dag_key].__name__ == function_name_last_day
     assert functions_next_day[dag_key].__name__ == function_name_next_day
+
+
+def test_get_vectorization_fallbacks():
+    def bar(x: int) -> int:
+        return {1: 2}[x]
+
+    environment = PolicyEnvironment(
+        [PolicyFunction(lambda x: x, function_name="foo"), PolicyFunction(bar)]
+    )
+    assert list(environment.get_vectorization_fallbacks()) == ["foo"]
+
+    environment.get_function_by_name("bar")(numpy.array([1, 1]))
+    assert list(environment.get_vectorization_fallbacks()) == ["foo", "bar"]
+
+
+def test_get_numba_fallbacks(monkeypatch):
+    pytest.importorskip("numba")
+    monkeypatch.setattr(_gettsim.config, "USE_NUMBA", True)
+
+    def compiled(x: float, test_params: dict) -> float:
+        return x * test_params["rate"] if x > 0 else 0.0
+
+    def passes_params_on(x: float, test_params: dict) -> float:
+        return compiled(x, test_params)
+
+    environment = PolicyEnvironment(
+        [PolicyFunction(compiled), PolicyFunction(passes_params_on)]
+    )
+    for name in ["compiled", "passes_params_on"]:
+        out = environment.get_function_by_name(name)(
+            numpy.array([-1.0, 2.0]), test_params={"rate": 0.5}
+        )
+        numpy.testing.assert_array_equal(out, [0.0, 1.0])
+
+    assert list(environment.get_numba_fallbacks()) == ["passes_params_on"]
+    assert (
+        environment.get_function_by_name("compiled").vectorization_strategy == "numba"
+    )
+
+
+def test_errors_of_numba_functions_for_the_data_are_raised(monkeypatch):
+    pytest.importorskip("numba")
+    monkeypatch.setattr(_gettsim.config, "USE_NUMBA", True)
+
+    def by_size(anz_personen: int, test_params: dict) -> float:
+        return test_params["by_size"][anz_personen]
+
+    function = PolicyFunction(by_size)
+    params = {"by_size": {1: 100.0, 2: 150.0}}
+
+    out = function(numpy.array([1, 2]), test_params=params)
+    numpy.testing.assert_array_equal(out, [100.0, 150.0])
+    with pytest.raises(KeyError):
+        function(numpy.array([1, 3]), test_params=params)
+    assert function.vectorization_strategy == "numba"
+    assert function.numba_fallback_reason is None
+
+
+def test_for_date_is_cached_by_normalized_date():
+    environment = PolicyEnvironment.for_date(2020)
+
+    assert PolicyEnvironment.for_date("2020-01-01") is environment
+    assert PolicyEnvironment.for_date(date(2020, 1, 1)) is environment
+    assert PolicyEnvironment.for_date(2021) is not environment
+
+
+def test_for_date_is_cached_by_array_backend(monkeypatch):
+    pytest.importorskip("numba")
+    monkeypatch.setattr(_gettsim.config, "USE_JAX", False)
+    monkeypatch.setattr(_gettsim.config, "USE_NUMBA", False)
+    environment = PolicyEnvironment.for_date(2023)
+    function = environment.get_function_by_name("kindergeld_anspruch")
+    assert function.vectorization_strategy == "ast"
+
+    monkeypatch.setattr(_gettsim.config, "USE_NUMBA", True)
+    numba_environment = PolicyEnvironment.for_date(2023)
+    function = numba_environment.get_function_by_name("kindergeld_anspruch")
+
+    assert numba_environment is not environment
+    assert function.vectorization_strategy == "numba"
+
+
+def test_clear_policy_environment_cache():
+    environment = PolicyEnvironment.for_date(2020)
+
+    clear_policy_environment_cache()
+
+    assert _cached_policy_environment_for_date.cache_info().currsize == 0
+    assert PolicyEnvironment.for_date(2020) is not environment
+
+
+def test_cached_environment_is_immutable():
+    environment = PolicyEnvironment.for_date(2020)
+
+    with pytest.raises(TypeError, match="immutable"):
+        environment.params["eink_st"]["foo"] = 1
+    with pytest.raises(TypeError, match="immutable"):
+        environment.params.update({"foo": 1})
+    with pytest.raises(TypeError, match="immutable"):
+        del environment.functions["kindergeld_m"]
+    with pytest.raises(ValueError, match="read-only"):
+        environment.params["eink_st"]["eink_st_tarif"]["thresholds"][0] = 1
+
+
+def test_copies_of_cached_parameters_are_mutable():
+    environment = PolicyEnvironment.for_date(2020)
+    params = copy.deepcopy(environment.params)
+
+    params["eink_st"]["foo"] = 1
+    params["eink_st"]["eink_st_tarif"]["thresholds"][0] = 1
+    new_environment = environment.replace_all_parameters(params)
+
+    assert new_environment.params["eink_st"]["foo"] == 1
+    assert "foo" not in environment.params["eink_st"]
+
+
+def test_for_dates_equals_for_date():
+    dates = [date(2008, 1, 1), "2023-07-01", 2024]
+    environments = PolicyEnvironment.for_dates(dates)
+
+    assert list(environments) == [date(2008, 1, 1), date(2023, 7, 1), date(2024, 1, 1)]
+    for d, environment in environments.items():
+        expected = PolicyEnvironment.for_date(d)
+        assert environment.functions.keys() == expected.functions.keys()
+        assert repr(environment.params) == repr(expected.params)
+        assert environment.aggregate_by_group_specs == expected.aggregate_by_group_specs
+
+
+def test_for_dates_shares_unchanged_values():
+    environments = PolicyEnvironment.for_dates(["2023-02-01", "2023-03-01"])
+    first, second = environments.values()
+
+    assert first.functions is second.functions
+    assert (
+        first.params["eink_st"]["eink_st_tarif"]
+        is (second.params["eink_st"]["eink_st_tarif"])
+    )
+    assert first.params["eink_st"]["datum"] != second.params["eink_st"]["datum"]
+    with pytest.raises(TypeError, match="immutable"):
+        first.params["eink_st"]["foo"] = 1
+
+
+def test_get_policy_regimes():
+    dates = [date(2022, month, 1) for month in range(1, 13)]
+    environments = PolicyEnvironment.for_dates(dates)
+
+    regimes = get_policy_regimes(environments, targets=["eink_st_y_sn", "kindergeld_m"])
+
+    # Changes in July (e.g., pensions) and October 2022 (e.g., Minijob threshold).
+    assert regimes == [
+        (date(2022, 1, 1), date(2022, 6, 1)),
+        (date(2022, 7, 1), date(2022, 9, 1)),
+        (date(2022, 10, 1), date(2022, 12, 1)),
+    ]
+
+
+def test_policy_regimes_do_not_span_dates_if_elterngeld_is_computed():
+    dates = [date(2022, 1, 1), date(2022, 2, 1)]
+    environments = PolicyEnvironment.for_dates(dates)
+    data = pd.DataFrame(
+        {
+            "p_id": [0],
+            "hh_id": [0],
+            "geburtsjahr": [2021],
+            "geburtsmonat": [6],
+            "geburtstag": [1],
+        }
+    )
+
+    # Elterngeld depends on the age in months, which is computed from the date.
+    ages = [
+        compute_taxes_and_transfers(data, environment, targets="alter_monate")
+        for environment in environments.values()
+    ]
+
+    assert ages[0]["alter_monate"].iloc[0] != ages[1]["alter_monate"].iloc[0]
+    assert get_policy_regimes(environments, targets="eink_st_y_sn") == [
+        (dates[0], dates[1])
+    ]
+    assert get_policy_regimes(environments, targets="elterngeld_m") == [
+        (dates[0], dates[0]),
+        (dates[1], dates[1]),
+    ]
+    assert get_policy_regimes(environments) == [
+        (dates[0], dates[0]),
+        (dates[1], dates[1]),
+    ]
@@ -0,0 +1,256 @@
+import copy
+import functools
+
+import numpy
+import pandas as pd
+import pytest
+
+from _gettsim import scenarios
+from _gettsim.config import USE_JAX
+from _gettsim.interface import compute_taxes_and_transfers
+from _gettsim.policy_environment import PolicyEnvironment
+from _gettsim.scenarios import (
+    compute_taxes_and_transfers_for_scenarios,
+    get_functions_using_params,
+    get_varied_params,
+)
+from _gettsim.synthetic import create_synthetic_data
+from _gettsim.taxes.eink_st import _eink_st_tarif
+
+
+def einkommen_m(bruttolohn_m: float) -> float:
+    return bruttolohn_m * 2
+
+
+def steuer_m(einkommen_m: float, steuer_params: dict) -> float:
+    if einkommen_m > steuer_params["freibetrag"]:
+        out = (einkommen_m - steuer_params["freibetrag"]) * steuer_params["satz"]
+    else:
+        out = 0.0
+    return out
+
+
+def netto_m(einkommen_m: float, steuer_m: float) -> float:
+    return einkommen_m - steuer_m
+
+
+@pytest.fixture
+def data():
+    return pd.DataFrame(
+        {
+            "p_id": [0, 1, 2, 3],
+            "bruttolohn_m": [0.0, 500.0, 1_000.0, 3_000.0],
+        }
+    )
+
+
+@pytest.fixture
+def environments():
+    environment = PolicyEnvironment(
+        [einkommen_m, steuer_m, netto_m],
+        params={"steuer": {"satz": 0.2, "freibetrag": 1_000.0}, "andere": {"x": 1}},
+    )
+    return {
+        f"satz_{satz}": environment.replace_all_parameters(
+            {"steuer": {"satz": satz, "freibetrag": 1_000.0}, "andere": {"x": 1}}
+        )
+        for satz in [0.1, 0.2, 0.3]
+    }
+
+
+@pytest.mark.parametrize("targets", [["netto_m", "einkommen_m"], ["einkommen_m"]])
+def test_results_equal_compute_taxes_and_transfers(data, environments, targets):
+    result = compute_taxes_and_transfers_for_scenarios(
+        data, environments, targets=targets
+    )
+
+    assert list(result.index.get_level_values("scenario").unique()) == list(
+        environments
+    )
+    for name, environment in environments.items():
+        expected = compute_taxes_and_transfers(data, environment, targets=targets)
+        pd.testing.assert_frame_equal(
+            result.loc[name], expected, check_dtype=False, check_index_type=False
+        )
+
+
+def test_results_of_full_taxes_and_transfers_system():
+    environment = PolicyEnvironment.for_date(2020)
+    data = create_synthetic_data(
+        n_adults=2,
+        n_children=1,
+        specs_heterogeneous={
+            "bruttolohn_m": [[float(w), 0.0, 0.0] for w in range(0, 6_000, 500)]
+        },
+    )
+    targets = [
+        "eink_st_y_sn",
+        "arbeitsl_geld_2_m_bg",
+        "kindergeld_m",
+        "wohngeld_m_wthh",
+    ]
+    environments = []
+    for factor in [1.0, 1.1]:
+        params = copy.deepcopy(environment.params)
+        params["eink_st"]["eink_st_tarif"]["rates"] *= factor
+        params["arbeitsl_geld_2"]["regelsatz"][1] *= factor
+        environments.append(environment.replace_all_parameters(params))
+
+    result = compute_taxes_and_transfers_for_scenarios(
+        data, environments, targets=targets
+    )
+
+    for i, e in enumerate(environments):
+        expected = compute_taxes_and_transfers(data, e, targets=targets)
+        pd.testing.assert_frame_equal(
+            result.loc[i], expected, check_dtype=False, check_index_type=False
+        )
+
+
+def test_get_varied_params():
+    base = {"a": {"b": 1, "c": numpy.array([1.0, 2.0])}, "d": {"e": "x"}}
+    other = {"a": {"b": 1, "c": numpy.array([1.0, 3.0])}, "d": {"e": "x"}}
+
+    varied_params = get_varied_params([base, base, other])
+
+    assert list(varied_params) == [("a", "c")]
+    numpy.testing.assert_array_equal(
+        numpy.stack(varied_params["a", "c"]), [[1.0, 2.0], [1.0, 2.0], [1.0, 3.0]]
+    )
+
+
+def test_dictionaries_with_different_keys_are_varied_as_a_whole():
+    varied_params = get_varied_params([{"a": {"b": {"c": 1}}}, {"a": {"b": {"d": 1}}}])
+
+    assert list(varied_params) == [("a", "b")]
+
+
+@pytest.mark.parametrize(
+    ("paths", "expected"),
+    [
+        ({("steuer", "satz")}, {"steuer_m"}),
+        ({("steuer",)}, {"steuer_m"}),
+        ({("steuer", "andere")}, set()),
+        ({("andere", "x")}, set()),
+    ],
+)
+def test_functions_using_params(environments, paths, expected):
+    environment = next(iter(environments.values()))
+    functions = {
+        name: functools.partial(f, steuer_params=environment.params["steuer"])
+        if name == "steuer_m"
+        else f
+        for name, f in environment.functions.items()
+    }
+
+    assert get_functions_using_params(functions, paths, rounding=True) == expected
+
+
+def test_functions_passing_on_params_use_the_whole_group():
+    def f(x: float, steuer_params: dict) -> float:
+        return x * len(steuer_params)
+
+    func = functools.partial(f, steuer_params={})
+
+    assert get_functions_using_params(
+        {"f": func}, {("steuer", "satz")}, rounding=True
+    ) == {"f"}
+
+
+def test_fail_if_environments_have_different_functions(data, environments):
+    environments = list(environments.values())
+    environments[1] = environments[1].upsert_functions(netto_m)
+
+    with pytest.raises(ValueError, match="must have the same functions"):
+        compute_taxes_and_transfers_for_scenarios(data, environments, targets="netto_m")
+
+
+@pytest.mark.skipif(not USE_JAX, reason="JAX is not used.")
+def test_scenarios_are_vectorized_with_jax(data, environments, monkeypatch):
+    results_of_vmap = []
+    compute_with_vmap = scenarios._compute_with_vmap  # noqa: SLF001
+
+    def spy(**kwargs):
+        results_of_vmap.append(compute_with_vmap(**kwargs))
+        return results_of_vmap[-1]
+
+    monkeypatch.setattr(scenarios, "_compute_with_vmap", spy)
+
+    result = compute_taxes_and_transfers_for_scenarios(
+        data, environments, targets="netto_m"
+    )
+
+    assert len(results_of_vmap) == 1
+    assert results_of_vmap[0]["netto_m"].shape == (3, 4)
+    assert result.attrs["vectorized"]
+    for name, environment in environments.items():
+        expected = compute_taxes_and_transfers(data, environment, targets="netto_m")
+        pd.testing.assert_frame_equal(
+            result.loc[name], expected, check_dtype=False, check_index_type=False
+        )
+
+
+def eink_st_tarif_y(zu_verst_eink_y: float, eink_st_params: dict) -> float:
+    return _eink_st_tarif(zu_verst_eink_y, eink_st_params)
+
+
+@pytest.mark.skipif(not USE_JAX, reason="JAX is not used.")
+def test_income_tax_tariffs_are_vectorized_with_jax():
+    environment = PolicyEnvironment(
+        [eink_st_tarif_y],
+        params={"eink_st": PolicyEnvironment.for_date(2020).params["eink_st"]},
+    )
+    data = pd.DataFrame(
+        {"p_id": [0, 1, 2, 3], "zu_verst_eink_y": [0.0, 9_408.0, 30_000.5, 1e6]}
+    )
+    environments = []
+    for factor in [1.0, 1.1]:
+        params = copy.deepcopy(environment.params)
+        params["eink_st"]["eink_st_tarif"]["rates"] *= factor
+        environments.append(environment.replace_all_parameters(params))
+
+    result = compute_taxes_and_transfers_for_scenarios(
+        data, environments, targets="eink_st_tarif_y"
+    )
+
+    assert result.attrs["vectorized"]
+    for i, e in enumerate(environments):
+        expected = compute_taxes_and_transfers(data, e, targets="eink_st_tarif_y")
+        pd.testing.assert_frame_equal(
+            result.loc[i], expected, check_dtype=False, check_index_type=False
+        )
+
+
+def tarif_m(einkommen_m: float, tarif_params: dict) -> float:
+    if tarif_params["art"] == "proportional":
+        out = einkommen_m * 0.1
+    else:
+        out = 0.0
+    return out
+
+
+def test_scenarios_with_parameters_which_cannot_be_stacked(data):
+    environment = PolicyEnvironment([einkommen_m, tarif_m])
+    environments = [
+        environment.replace_all_parameters({"tarif": {"art": art}})
+        for art in ["proportional", "keine"]
+    ]
+
+    result = compute_taxes_and_transfers_for_scenarios(
+        data, environments, targets="tarif_m"
+    )
+
+    assert not result.attrs["vectorized"]
+    numpy.testing.assert_allclose(result.loc[0, "tarif_m"], [0.0, 100.0, 200.0, 600.0])
+    numpy.testing.assert_allclose(result.loc[1, "tarif_m"], 0.0)
+
+
+@pytest.mark.skipif(not USE_JAX, reason="JAX is not used.")
+def test_other_errors_of_vmap_are_raised(data, environments, monkeypatch):
+    def fail(**_kwargs):
+        raise KeyError("hh_id")
+
+    monkeypatch.setattr(scenarios, "_compute_with_vmap", fail)
+
+    with pytest.raises(KeyError, match="hh_id"):
+        compute_taxes_and_transfers_for_scenarios(data, environments, targets="netto_m")
@@ -0,0 +1,155 @@
+import numpy
+import pandas as pd
+import pytest
+
+from _gettsim.interface import compute_taxes_and_transfers
+from _gettsim.policy_environment import PolicyEnvironment
+from _gettsim.session import TaxTransferSession
+from _gettsim.synthetic import create_synthetic_data
+
+
+def einkommen_m(bruttolohn_m: float, kapitaleink_m: float) -> float:
+    return bruttolohn_m + kapitaleink_m
+
+
+def steuer_m(einkommen_m: float, steuer_params: dict) -> float:
+    return einkommen_m * steuer_params["satz"]
+
+
+def transfer_m(alter: int) -> float:
+    return 100.0 if alter < 18 else 0.0
+
+
+def netto_m(einkommen_m: float, steuer_m: float, transfer_m: float) -> float:
+    return einkommen_m - steuer_m + transfer_m
+
+
+TARGETS = ["netto_m", "steuer_m", "transfer_m"]
+
+
+@pytest.fixture
+def environment():
+    return PolicyEnvironment(
+        [einkommen_m, steuer_m, transfer_m, netto_m], params={"steuer": {"satz": 0.2}}
+    )
+
+
+@pytest.fixture
+def data():
+    return pd.DataFrame(
+        {
+            "p_id": [0, 1, 2],
+            "bruttolohn_m": [1_000.0, 2_000.0, 0.0],
+            "kapitaleink_m": [0.0, 100.0, 0.0],
+            "alter": [40, 45, 10],
+        }
+    )
+
+
+def test_results_equal_compute_taxes_and_transfers_after_update(data, environment):
+    session = TaxTransferSession(data, environment, targets=TARGETS)
+    session.compute()
+
+    session.update({"bruttolohn_m": [3_000.0, 0.0, 0.0]})
+    data["bruttolohn_m"] = [3_000.0, 0.0, 0.0]
+
+    pd.testing.assert_frame_equal(
+        session.compute(),
+        compute_taxes_and_transfers(data, environment, targets=TARGETS),
+    )
+
+
+def test_only_descendants_of_updated_columns_are_recomputed(data, environment):
+    session = TaxTransferSession(data, environment, targets=TARGETS)
+    session.compute()
+    assert set(session.last_computed) == {
+        "einkommen_m",
+        "steuer_m",
+        "transfer_m",
+        "netto_m",
+    }
+
+    session.update(pd.DataFrame({"alter": [40, 45, 20]}))
+    session.compute()
+    assert session.last_computed == ["transfer_m", "netto_m"]
+    assert session.cached_nodes == {
+        "einkommen_m": 0,
+        "steuer_m": 0,
+        "transfer_m": 1,
+        "netto_m": 1,
+    }
+
+    session.compute()
+    assert session.last_computed == []
+
+
+def test_compute_subset_of_targets(data, environment):
+    session = TaxTransferSession(data, environment, targets=TARGETS)
+
+    result = session.compute("transfer_m")
+
+    assert list(result) == ["transfer_m"]
+    assert session.last_computed == ["transfer_m"]
+
+
+@pytest.mark.parametrize("eviction_policy", ["lru", "largest"])
+def test_cached_results_are_bounded(data, environment, eviction_policy):
+    session = TaxTransferSession(
+        data,
+        environment,
+        targets=TARGETS,
+        max_cached_bytes=2 * 3 * 8,
+        eviction_policy=eviction_policy,
+    )
+    expected = session.compute()
+
+    assert session.cached_bytes <= 2 * 3 * 8
+    assert len(session.cached_nodes) == 2
+
+    pd.testing.assert_frame_equal(session.compute(), expected)
+    assert len(session.last_computed) == 2
+
+
+def test_full_taxes_and_transfers_system():
+    environment = PolicyEnvironment.for_date(2020)
+    data = create_synthetic_data(
+        n_adults=2,
+        n_children=1,
+        specs_heterogeneous={
+            "bruttolohn_m": [[float(w), 0.0, 0.0] for w in range(0, 6_000, 1_000)]
+        },
+    )
+    targets = ["eink_st_y_sn", "kindergeld_m", "arbeitsl_geld_2_m_bg"]
+    session = TaxTransferSession(data, environment, targets=targets)
+    session.compute()
+    n_computed = len(session.last_computed)
+
+    data["bruttolohn_m"] = numpy.where(data["bruttolohn_m"] > 0, 7_000.0, 0.0)
+    session.update(data[["bruttolohn_m"]])
+
+    pd.testing.assert_frame_equal(
+        session.compute(),
+        compute_taxes_and_transfers(data, environment, targets=targets),
+    )
+    assert "kindergeld_m" not in session.last_computed
+    assert 0 < len(session.last_computed) < n_computed
+
+
+@pytest.mark.parametrize(
+    ("update", "match"),
+    [
+        ({"unknown": [0, 1, 2]}, "columns are unknown"),
+        ({"alter": [1, 2]}, "must have 3 rows"),
+        ({"p_id": [0, 0, 1]}, "p_id"),
+    ],
+)
+def test_fail_if_update_is_invalid(data, environment, update, match):
+    session = TaxTransferSession(data, environment, targets=TARGETS)
+
+    with pytest.raises(ValueError, match=match):
+        session.update(update)
+
+
+def test_fail_if_eviction_policy_is_unknown(data, environment):
+    with pytest.raises(ValueError, match="eviction_policy"):
+        TaxTransferSession(data, environment, eviction_policy="fifo")
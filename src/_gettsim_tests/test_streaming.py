@@ -0,0 +1,149 @@
+import numpy
+import pandas as pd
+import pytest
+
+from _gettsim.interface import compute_taxes_and_transfers
+from _gettsim.policy_environment import PolicyEnvironment
+from _gettsim.streaming import (
+    _split_into_household_chunks,
+    compute_taxes_and_transfers_in_chunks,
+)
+from _gettsim.synthetic import create_synthetic_data
+
+AGGREGATE_BY_GROUP_SPECS = {
+    "arbeitsl_geld_2_m_hh": {
+        "source_col": "arbeitsl_geld_2_m",
+        "aggr": "sum",
+    }
+}
+
+
+@pytest.fixture
+def data():
+    rng = numpy.random.default_rng(0)
+    hh_size = rng.integers(1, 5, size=200)
+    hh_id = numpy.repeat(numpy.arange(len(hh_size)), hh_size)
+    return pd.DataFrame(
+        {
+            "p_id": numpy.arange(len(hh_id)),
+            "hh_id": hh_id,
+            "arbeitsl_geld_2_m": rng.uniform(0, 1_000, size=len(hh_id)),
+        }
+    )
+
+
+@pytest.fixture
+def environment():
+    return PolicyEnvironment([], aggregate_by_group_specs=AGGREGATE_BY_GROUP_SPECS)
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 100, 10_000])
+def test_chunks_do_not_cut_through_households(data, chunk_size):
+    frames = [data.iloc[:123], data.iloc[123:130], data.iloc[130:]]
+
+    chunks = list(_split_into_household_chunks(iter(frames), chunk_size))
+
+    pd.testing.assert_frame_equal(pd.concat(chunks), data)
+    for chunk in chunks[:-1]:
+        assert len(chunk) >= chunk_size
+    hh_ids_per_chunk = [set(chunk["hh_id"]) for chunk in chunks]
+    assert sum(len(ids) for ids in hh_ids_per_chunk) == data["hh_id"].nunique()
+
+
+@pytest.mark.parametrize("hh_id", [[0, 1, 0], [1, 1, 0]])
+def test_fail_if_households_are_not_sorted(hh_id):
+    data = pd.DataFrame({"p_id": [0, 1, 2], "hh_id": hh_id})
+    with pytest.raises(ValueError, match="must be sorted by 'hh_id'"):
+        list(_split_into_household_chunks(iter([data]), chunk_size=10))
+
+
+def test_fail_if_household_appears_again_in_later_chunk():
+    frames = [
+        pd.DataFrame({"p_id": [0, 1, 2], "hh_id": [0, 0, 1]}),
+        pd.DataFrame({"p_id": [3, 4], "hh_id": [2, 0]}),
+    ]
+    with pytest.raises(ValueError, match="must be sorted by 'hh_id'"):
+        list(_split_into_household_chunks(iter(frames), chunk_size=2))
+
+
+@pytest.mark.parametrize("chunk_size", [5, 50, 10_000])
+def test_results_equal_compute_taxes_and_transfers(data, environment, chunk_size):
+    expected = compute_taxes_and_transfers(
+        data, environment, targets="arbeitsl_geld_2_m_hh"
+    )
+
+    results = compute_taxes_and_transfers_in_chunks(
+        data, environment, targets="arbeitsl_geld_2_m_hh", chunk_size=chunk_size
+    )
+
+    pd.testing.assert_frame_equal(pd.concat(results).sort_index(), expected)
+
+
+def test_unsorted_dataframe_is_sorted_by_household(data, environment):
+    shuffled = data.sample(frac=1, random_state=0)
+    expected = compute_taxes_and_transfers(
+        shuffled, environment, targets="arbeitsl_geld_2_m_hh"
+    )
+    expected.index = shuffled.index
+
+    results = compute_taxes_and_transfers_in_chunks(
+        shuffled, environment, targets="arbeitsl_geld_2_m_hh", chunk_size=20
+    )
+
+    pd.testing.assert_frame_equal(pd.concat(results).loc[shuffled.index], expected)
+
+
+def test_iterable_of_dataframes(data, environment):
+    frames = [data.iloc[i : i + 37] for i in range(0, len(data), 37)]
+    expected = compute_taxes_and_transfers(
+        data, environment, targets="arbeitsl_geld_2_m_hh"
+    )
+
+    results = compute_taxes_and_transfers_in_chunks(
+        frames, environment, targets="arbeitsl_geld_2_m_hh", chunk_size=30
+    )
+
+    pd.testing.assert_frame_equal(pd.concat(results), expected)
+
+
+def test_parquet_roundtrip(data, environment, tmp_path):
+    pytest.importorskip("pyarrow")
+    data.to_parquet(tmp_path / "data.parquet")
+    expected = compute_taxes_and_transfers(
+        data, environment, targets="arbeitsl_geld_2_m_hh"
+    )
+
+    compute_taxes_and_transfers_in_chunks(
+        tmp_path / "data.parquet",
+        environment,
+        targets="arbeitsl_geld_2_m_hh",
+        chunk_size=50,
+        output_path=tmp_path / "results.parquet",
+    )
+
+    result = pd.read_parquet(tmp_path / "results.parquet")
+    pd.testing.assert_frame_equal(result, expected, check_index_type=False)
+
+
+def test_derived_group_ids_are_unique_across_chunks():
+    environment = PolicyEnvironment.for_date(2020)
+    data = create_synthetic_data(
+        n_adults=2,
+        n_children=2,
+        specs_heterogeneous={
+            "bruttolohn_m": [[float(w), 0.0, 0.0, 0.0] for w in range(0, 6_000, 500)]
+        },
+    )
+    targets = ["fg_id", "bg_id", "sn_id", "ehe_id", "eink_st_y_sn"]
+    expected = compute_taxes_and_transfers(data, environment, targets=targets)
+
+    results = compute_taxes_and_transfers_in_chunks(
+        data, environment, targets=targets, chunk_size=8
+    )
+    result = pd.concat(results).sort_index()
+
+    for group_id in ["fg_id", "bg_id", "sn_id", "ehe_id"]:
+        numpy.testing.assert_array_equal(
+            pd.factorize(result[group_id])[0], pd.factorize(expected[group_id])[0]
+        )
+    pd.testing.assert_series_equal(result["eink_st_y_sn"], expected["eink_st_y_sn"])
@@ -185,7 +185,7 @@ def f12(x):
 
 def f12_exp(x):
     out = 0
-    out += numpy.where(x < 1, 1, out)
+    out = numpy.where(x < 1, out + 1, out)
     return out
 
 
@@ -248,7 +248,7 @@ def f17(x):
 def f17_exp(x):
     a = x < 0
     b = x // 2
-    return numpy.any((a, b))
+    return numpy.logical_or(a, b)
 
 
 def f18(x):
@@ -261,6 +261,36 @@ def f18_exp(x):
     return numpy.sum(n)
 
 
+def f19(x):
+    out = 5
+    if x < 1:
+        out += 1
+    elif x < 5:
+        out *= 2
+    else:
+        out = 0
+    return out
+
+
+def f19_exp(x):
+    out = 5
+    out = numpy.where(x < 1, out + 1, numpy.where(x < 5, out * 2, 0))
+    return out
+
+
+def f20(x):
+    out = min([x, 3, 5])
+    if x < 0:
+        out = max((out, -3))
+    return sum([out, x]) * any([x > 8, x < -8])
+
+
+def f20_exp(x):
+    out = numpy.minimum(numpy.minimum(x, 3), 5)
+    out = numpy.where(x < 0, numpy.maximum(out, -3), out)
+    return (out + x) * numpy.logical_or(x > 8, x < -8)
+
+
 x = numpy.arange(-10, 10)
 rng = numpy.random.default_rng(seed=0)
 flag = rng.binomial(1, 0.25, size=100)
@@ -286,6 +316,8 @@ TEST_CASES = [
     (f16, f16_exp, (x,)),
     (f17, f17_exp, (x,)),
     (f18, f18_exp, (x,)),
+    (f19, f19_exp, (x,)),
+    (f20, f20_exp, (x,)),
 ]
 
 
@@ -345,18 +377,39 @@ def g4(x):
     return max(x, 0, 1)
 
 
+def g5(x):
+    # different variables assigned in if-clause and else-clause
+    a = 0
+    b = 1
+    if x < 0:
+        a = 1
+    else:
+        b = 0
+    return a + b
+
+
+def test_lambda_cannot_be_made_vectorizable():
+    with pytest.raises(TranslateToVectorizableError):
+        make_vectorizable(lambda x: x, backend="numpy")
+
+
+def test_make_vectorizable_does_not_modify_module():
+    make_vectorizable(f1, backend="numpy")
+    assert f1 is globals()["f1"]
+
+
 def test_notimplemented_error():
     with pytest.raises(NotImplementedError):
         make_vectorizable(f1, backend="dask")
 
 
-@pytest.mark.parametrize("func", [g1, g2, g3, g4])
+@pytest.mark.parametrize("func", [g1, g2, g3, g4, g5])
 def test_unallowed_operation_source(func):
     with pytest.raises(TranslateToVectorizableError):
         make_vectorizable_source(func, backend="numpy")
 
 
-@pytest.mark.parametrize("func", [g1, g2, g3, g4])
+@pytest.mark.parametrize("func", [g1, g2, g3, g4, g5])
 def test_unallowed_operation_wrapper(func):
     with pytest.raises(TranslateToVectorizableError):
         make_vectorizable(func, backend="numpy")
@@ -0,0 +1,110 @@
+from collections import OrderedDict
+
+import numpy
+import pytest
+
+from _gettsim import vectorization_numba
+from _gettsim.vectorization_numba import TranslateToNumbaError, make_numba_vectorized
+
+PARAMS = {
+    "rate": 0.5,
+    "thresholds": numpy.array([10.0, 20.0]),
+    "by_size": {1: 100.0, 2: 150.0, 3: 180.0, "each_additional": 20.0},
+    "nested": {"limit": 30},
+}
+
+
+def scalar_func(x, n, test_params):
+    if x < test_params["thresholds"][0]:
+        out = 0.0
+    elif x < test_params["nested"]["limit"]:
+        out = test_params["rate"] * x
+    else:
+        out = test_params["by_size"][n]
+    return out
+
+
+def func_passing_params_on(x, test_params):
+    return scalar_func(x, 1, test_params)
+
+
+def func_with_dynamic_str_key(x, key, test_params):
+    return x * test_params[key]
+
+
+def test_params_are_compiled_as_constants():
+    pytest.importorskip("numba")
+    x = numpy.array([5.0, 15.0, 35.0, 40.0])
+    n = numpy.array([1, 1, 2, 3])
+
+    vectorized = make_numba_vectorized(scalar_func, {"test_params": PARAMS})
+
+    numpy.testing.assert_array_equal(
+        vectorized(x, n),
+        [scalar_func(x_i, n_i, PARAMS) for x_i, n_i in zip(x, n, strict=True)],
+    )
+
+
+def test_inputs_are_broadcast():
+    pytest.importorskip("numba")
+    vectorized = make_numba_vectorized(scalar_func, {"test_params": PARAMS})
+
+    out = vectorized(numpy.array([[5.0], [35.0]]), numpy.array([1, 2]))
+
+    numpy.testing.assert_array_equal(out, [[0.0, 0.0], [100.0, 150.0]])
+
+
+def test_compiled_functions_are_cached_by_params(monkeypatch):
+    pytest.importorskip("numba")
+    kernels = OrderedDict()
+    monkeypatch.setattr(vectorization_numba, "_KERNELS", kernels)
+    params = {**PARAMS, "rate": 0.3}
+
+    make_numba_vectorized(scalar_func, {"test_params": params})
+    make_numba_vectorized(scalar_func, {"test_params": dict(params)})
+    assert len(kernels) == 1
+
+    make_numba_vectorized(scalar_func, {"test_params": {**params, "rate": 0.4}})
+    assert len(kernels) == 2
+
+
+def test_least_recently_used_compiled_functions_are_dropped(monkeypatch):
+    pytest.importorskip("numba")
+    kernels = OrderedDict()
+    monkeypatch.setattr(vectorization_numba, "_KERNELS", kernels)
+    monkeypatch.setattr(vectorization_numba, "NUMBA_KERNEL_CACHE_SIZE", 2)
+    rates = [0.1, 0.2, 0.1, 0.3]
+
+    for rate in rates:
+        vectorized = make_numba_vectorized(
+            scalar_func, {"test_params": {**PARAMS, "rate": rate}}
+        )
+        numpy.testing.assert_array_equal(
+            vectorized(numpy.array([15.0]), numpy.array([1])), [15 * rate]
+        )
+
+    kept_rates = [
+        rate for key in kernels for rate in set(rates) if f"{rate} * x" in key[1]
+    ]
+    assert kept_rates == [0.1, 0.3]
+
+
+def test_lookup_of_missing_integer_key_raises():
+    pytest.importorskip("numba")
+    vectorized = make_numba_vectorized(scalar_func, {"test_params": PARAMS})
+
+    with pytest.raises(KeyError):
+        vectorized(numpy.array([35.0]), numpy.array([4]))
+
+
+@pytest.mark.parametrize("func", [func_passing_params_on, func_with_dynamic_str_key])
+def test_params_which_are_not_accessed_with_literal_keys_raise(func):
+    with pytest.raises(TranslateToNumbaError, match="test_params"):
+        make_numba_vectorized(func, {"test_params": PARAMS})
+
+
+def test_lambda_functions_raise():
+    with pytest.raises(TranslateToNumbaError, match="single function definition"):
+        make_numba_vectorized(
+            lambda x, test_params: x * test_params, {"test_params": PARAMS}
+        )
@@ -26,12 +26,26 @@ from _gettsim import (
     transfers,
     visualization,
 )
+from _gettsim.budget_line import compute_budget_lines
+from _gettsim.comparison import compare_environments
 from _gettsim.functions.policy_function import PolicyFunction
 from _gettsim.interface import (
     FunctionsAndColumnsOverlapWarning,
+    TaxTransferPlan,
     compute_taxes_and_transfers,
+    prepare_taxes_and_transfers,
 )
-from _gettsim.policy_environment import PolicyEnvironment, set_up_policy_environment
+from _gettsim.marginal_rates import compute_marginal_tax_rates
+from _gettsim.parallel import compute_taxes_and_transfers_in_parallel
+from _gettsim.policy_environment import (
+    PolicyEnvironment,
+    clear_policy_environment_cache,
+    get_policy_regimes,
+    set_up_policy_environment,
+)
+from _gettsim.scenarios import compute_taxes_and_transfers_for_scenarios
+from _gettsim.session import TaxTransferSession
+from _gettsim.streaming import compute_taxes_and_transfers_in_chunks
 from _gettsim.synthetic import create_synthetic_data
 from _gettsim.visualization import plot_dag
 from _gettsim_tests import TEST_DIR
@@ -58,8 +72,19 @@ __all__ = [
     "FunctionsAndColumnsOverlapWarning",
     "PolicyEnvironment",
     "PolicyFunction",
+    "TaxTransferPlan",
+    "TaxTransferSession",
     "compute_taxes_and_transfers",
+    "compute_taxes_and_transfers_in_chunks",
+    "compute_taxes_and_transfers_in_parallel",
+    "compute_taxes_and_transfers_for_scenarios",
+    "compare_environments",
+    "compute_marginal_tax_rates",
+    "compute_budget_lines",
+    "prepare_taxes_and_transfers",
     "set_up_policy_environment",
+    "clear_policy_environment_cache",
+    "get_policy_regimes",
     "plot_dag",
     # TODO (@hmgaudecker): See what can be changed/removed from remainder.
     # https://github.com/iza-institute-of-labor-economics/gettsim/issues/378